@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Adelaide Weather Forecasting API - Adaptive Admission Control
+=============================================================
+
+Concurrency limiter in front of the expensive forecast paths (/forecast
+cache fills and /api/analogs searches). Past saturation, extra requests
+only lengthen queues (analog pool, compute executor, uvicorn), so latency
+collapses for everyone; the limiter instead keeps in-flight work near what
+the backend sustains and sheds the excess early with a 503 + Retry-After.
+
+- Gradient limit (Netflix Gradient2 style): a slow EWMA of request latency is
+  the no-load reference, and each sample scales the limit by
+  ``tolerance * long_rtt / rtt`` (clamped to [0.5, 1]) plus sqrt(limit)
+  headroom for probing, smoothed; the limit only grows while it is in use
+- Backend overload signals (compute executor rejections, which the search
+  service and adapter otherwise absorb) cut the limit multiplicatively
+- Requests beyond the limit wait in a bounded FIFO for at most ``max_wait``;
+  background work (precompute) never queues and is shed first
+- Cache hits and health checks never pass through the limiter
+- Queue depth, in-flight count, the current limit and shed counts are
+  exported as Prometheus metrics
+
+Configuration (environment):
+    ADMISSION_CONTROL_ENABLED   true | false (default: true)
+    ADMISSION_INITIAL_LIMIT     Starting concurrency limit (default: 8)
+    ADMISSION_MIN_LIMIT         Lower bound of the limit (default: 2)
+    ADMISSION_MAX_LIMIT         Upper bound of the limit (default: 64)
+    ADMISSION_MAX_QUEUE         Requests allowed to wait for a slot (default: 32)
+    ADMISSION_MAX_WAIT_MS       Longest wait for a slot before shedding (default: 500)
+
+Author: Performance Engineering
+Version: 1.0.0 - Adaptive admission control
+"""
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+from prometheus_client import Counter, Gauge, REGISTRY
+
+from api.services.compute_executor import get_compute_executor
+
+logger = logging.getLogger(__name__)
+
+FOREGROUND = 'foreground'
+BACKGROUND = 'background'
+
+
+def _get_or_create_metric(metric_cls, name, documentation, *args, **kwargs):
+    """Return existing Prometheus metric or create a new one (imports may repeat in tests)."""
+    existing = REGISTRY._names_to_collectors.get(name)
+    if existing is not None:
+        return existing
+    return metric_cls(name, documentation, *args, **kwargs)
+
+
+admission_queue_depth = _get_or_create_metric(
+    Gauge, 'admission_queue_depth', 'Requests waiting for an admission slot', ['limiter'],
+    multiprocess_mode='livesum'
+)
+admission_in_flight = _get_or_create_metric(
+    Gauge, 'admission_in_flight', 'Admitted requests currently running', ['limiter'],
+    multiprocess_mode='livesum'
+)
+admission_concurrency_limit = _get_or_create_metric(
+    Gauge, 'admission_concurrency_limit', 'Current adaptive concurrency limit', ['limiter'],
+    multiprocess_mode='livesum'
+)
+admission_shed_total = _get_or_create_metric(
+    Counter, 'admission_shed_total', 'Requests shed by admission control', ['limiter', 'reason']
+)
+
+
+class LoadShed(Exception):
+    """The request was shed; retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"load shed ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveConcurrencyLimiter:
+    """Gradient-based concurrency limiter with a bounded wait queue."""
+
+    def __init__(self, name: str = 'forecast', initial_limit: int = 8, min_limit: int = 2,
+                 max_limit: int = 64, max_queue: int = 32, max_wait: float = 0.5,
+                 tolerance: float = 1.5, smoothing: float = 0.2, long_window: int = 100,
+                 backoff: float = 0.9, rejections: Optional[Callable[[], int]] = None,
+                 enabled: bool = True):
+        """
+        Args:
+            name: Metric label
+            initial_limit, min_limit, max_limit: Concurrency limit start and bounds
+            max_queue: Foreground requests allowed to wait for a slot
+            max_wait: Seconds a request waits for a slot before it is shed
+            tolerance: Latency growth over the long-term average tolerated before shrinking
+            smoothing: Weight of each new limit estimate
+            long_window: Samples in the long-term latency EWMA
+            backoff: Multiplicative decrease on a backend overload signal
+            rejections: Running count of backend rejections; any increase is an overload signal
+            enabled: False admits everything without accounting
+        """
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.long_alpha = 2.0 / (long_window + 1)
+        self.backoff = backoff
+        self._rejections = rejections
+        self._last_rejections = 0
+        self.enabled = enabled
+
+        self.in_flight = 0
+        self.long_rtt: Optional[float] = None
+        self.last_rtt: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.stats = {'admitted': 0, 'queued': 0, 'shed_queue_full': 0, 'shed_queue_timeout': 0,
+                      'shed_background': 0, 'overload_signals': 0}
+        self._publish()
+
+    @asynccontextmanager
+    async def admit(self, priority: str = FOREGROUND) -> AsyncIterator[None]:
+        """Hold an admission slot for the body of the block.
+
+        Raises:
+            LoadShed: no slot became available in time (or background work found none free)
+        """
+        if not self.enabled:
+            yield
+            return
+
+        await self._acquire(priority)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - start)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained (at least 1)."""
+        rtt = self.long_rtt or 1.0
+        backlog = len(self._waiters) + self.in_flight + 1
+        return max(1, math.ceil(backlog * rtt / max(self.limit, 1.0)))
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'enabled': self.enabled, 'limit': round(self.limit, 2), 'in_flight': self.in_flight,
+                'queue_depth': len(self._waiters), 'max_queue': self.max_queue,
+                'long_rtt_ms': round(self.long_rtt * 1000, 2) if self.long_rtt else None,
+                'last_rtt_ms': round(self.last_rtt * 1000, 2) if self.last_rtt else None,
+                **self.stats}
+
+    # -------------------------------------------------------------- internals
+
+    async def _acquire(self, priority: str):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self._admit()
+            return
+        if priority == BACKGROUND:
+            self._shed('background')
+        if len(self._waiters) >= self.max_queue:
+            self._shed('queue_full')
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats['queued'] += 1
+        self._publish()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self._shed('queue_timeout')
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        # _wake_waiters already counted this request as in flight
+
+    def _abandon(self, waiter: asyncio.Future):
+        """Drop a waiter that gave up, handing back a slot granted meanwhile."""
+        if waiter.done() and not waiter.cancelled():
+            self.in_flight -= 1
+            self._wake_waiters()
+        else:
+            waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        self._publish()
+
+    def _admit(self):
+        self.in_flight += 1
+        self.stats['admitted'] += 1
+        self._publish()
+
+    def _release(self, rtt: float):
+        self.in_flight -= 1
+        if self._backend_rejected():
+            self.stats['overload_signals'] += 1
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+        else:
+            self._update_limit(rtt)
+        self._wake_waiters()
+        self._publish()
+
+    def _backend_rejected(self) -> bool:
+        if self._rejections is None:
+            return False
+        current = self._rejections()
+        rejected, self._last_rejections = current > self._last_rejections, current
+        return rejected
+
+    def _update_limit(self, rtt: float):
+        """One Gradient2 step from a latency sample."""
+        rtt = max(rtt, 1e-6)
+        self.last_rtt = rtt
+        if self.long_rtt is None:
+            self.long_rtt = rtt
+            return
+        self.long_rtt += self.long_alpha * (rtt - self.long_rtt)
+        # After an overload the long-term average lags high; pull it back towards recovery
+        if self.long_rtt / rtt > 2.0:
+            self.long_rtt *= 0.95
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / rtt))
+        estimate = self.limit * gradient + math.sqrt(self.limit)
+        if estimate > self.limit and self.in_flight + 1 < self.limit / 2:
+            return  # Only grow a limit that is actually being used
+        self.limit = (1 - self.smoothing) * self.limit + self.smoothing * estimate
+        self.limit = max(self.min_limit, min(self.max_limit, self.limit))
+
+    def _wake_waiters(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._admit()
+            waiter.set_result(None)
+
+    def _shed(self, reason: str):
+        self.stats[f'shed_{reason}'] += 1
+        admission_shed_total.labels(limiter=self.name, reason=reason).inc()
+        raise LoadShed(reason, self.retry_after())
+
+    def _publish(self):
+        admission_queue_depth.labels(limiter=self.name).set(len(self._waiters))
+        admission_in_flight.labels(limiter=self.name).set(self.in_flight)
+        admission_concurrency_limit.labels(limiter=self.name).set(self.limit)
+
+
+_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_admission_limiter() -> AdaptiveConcurrencyLimiter:
+    """Process-wide limiter shared by /forecast and /api/analogs (they share the compute backend)."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdaptiveConcurrencyLimiter(
+                    initial_limit=int(os.getenv('ADMISSION_INITIAL_LIMIT', '8')),
+                    min_limit=int(os.getenv('ADMISSION_MIN_LIMIT', '2')),
+                    max_limit=int(os.getenv('ADMISSION_MAX_LIMIT', '64')),
+                    max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', '32')),
+                    max_wait=float(os.getenv('ADMISSION_MAX_WAIT_MS', '500')) / 1000.0,
+                    rejections=lambda: get_compute_executor().stats['rejected'],
+                    enabled=os.getenv('ADMISSION_CONTROL_ENABLED', 'true').lower() == 'true',
+                )
+    return _limiter
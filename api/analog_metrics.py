@@ -10,6 +10,7 @@ as specified in OBS1 requirements.
 Metrics:
 - analog_real_total: Counter for successful real FAISS searches
 - analog_fallback_total: Counter for fallback searches used
+- analog_cache_hit_total: Counter for searches answered by the analog result cache
 - analog_search_seconds: Histogram for search latency with horizon/k labels
 - analog_results_count: Gauge for number of analogs returned per horizon
 
@@ -44,6 +45,12 @@ analog_fallback_total = _get_or_create_metric(
     'Total fallback analog searches used'
 )
 
+analog_cache_hit_total = _get_or_create_metric(
+    Counter, 
+    'analog_cache_hit_total', 
+    'Total analog searches answered by the result cache without a FAISS search'
+)
+
 analog_search_seconds = _get_or_create_metric(
     Histogram, 
     'analog_search_seconds', 
@@ -63,6 +70,7 @@ analog_results_count = _get_or_create_metric(
 __all__ = [
     'analog_real_total',
     'analog_fallback_total', 
+    'analog_cache_hit_total',
     'analog_search_seconds',
     'analog_results_count'
 ]
\ No newline at end of file
@@ -14,6 +14,8 @@ Features:
 - Mock analog search until real component available
 - Unit conversions and error handling
 - Maintains API response format compatibility
+- Per-horizon ForecastResult cache so any variable subset is a projection
+- Served ensembles appended to the calibration ForecastArchive
 
 Author: Integration Layer
 Version: 1.0.0 - Production Bridge
@@ -23,7 +25,9 @@ import os
 import sys
 import logging
 import asyncio
+import time
 import numpy as np
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
@@ -33,6 +37,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Core forecasting system
 from core.analog_forecaster import RealTimeAnalogForecaster
+from core.calibration_engine import ForecastArchive
 
 # Variable definitions and conversion utilities  
 from api.variables import (
@@ -42,6 +47,10 @@ from api.variables import (
 
 # Production analog search service
 from api.services import get_analog_search_service
+from api.services.compute_executor import get_compute_executor
+
+# Analog data generation token (shared with the response cache)
+from api.services.data_generation import PROJECT_ROOT, analog_data_generation
 
 logger = logging.getLogger(__name__)
 
@@ -87,8 +96,27 @@ class ForecastAdapter:
             '48h': 48
         }
         
+        # One analog search + core forecast per (horizon, analog generation, time bucket);
+        # every requested variable subset is projected from the cached entry
+        self.result_bucket_seconds = int(os.getenv('FORECAST_RESULT_BUCKET_SECONDS', '300'))
+        self.result_cache_size = int(os.getenv('FORECAST_RESULT_CACHE_SIZE', '16'))
+        self._result_cache: 'OrderedDict[Tuple[int, str, int], Dict[str, Any]]' = OrderedDict()
+        self._result_inflight: Dict[Tuple[int, str, int], asyncio.Future] = {}
+        self.result_cache_hits = 0
+        self.result_cache_misses = 0
+        
+        # Every served forecast is archived once per result bucket for calibration monitoring
+        self.forecast_archive = self._open_forecast_archive()
+        
         logger.info("ForecastAdapter initialized with variable mapping")
     
+    @staticmethod
+    def _open_forecast_archive() -> Optional[ForecastArchive]:
+        """ForecastArchive under FORECAST_ARCHIVE_DIR (relative to the project root), unless disabled."""
+        if os.getenv('FORECAST_ARCHIVE_ENABLED', 'true').lower() != 'true':
+            return None
+        return ForecastArchive(PROJECT_ROOT / os.getenv('FORECAST_ARCHIVE_DIR', 'calibration_data/forecasts'))
+    
     async def _ensure_analog_service(self):
         """Ensure analog search service is initialized."""
         if self.analog_service is None:
@@ -118,16 +146,10 @@ class ForecastAdapter:
             
             horizon_hours = self.horizon_mapping[horizon]
             
-            # Ensure analog search service is connected
-            await self._ensure_analog_service()
-            
-            # Generate analog search results using production service
-            analog_results = await self._generate_analog_results(horizon_hours)
-            
-            # Get raw forecast from core system
-            forecast_result = self.forecaster.generate_forecast(analog_results, horizon_hours)
+            # Analog search + core forecast for all variables, shared across variable sets
+            entry = await self._get_forecast_entry(horizon_hours)
             
-            if not forecast_result:
+            if entry is None:
                 logger.warning(f"Core forecaster returned no results for {horizon}")
                 # Check if fallback is allowed via environment variable
                 allow_fallback = os.getenv("ALLOW_ANALOG_FALLBACK", "false") == "true"
@@ -137,13 +159,11 @@ class ForecastAdapter:
                 
                 return self._generate_fallback_response(variables)
             
-            # Convert forecaster output to API format
-            api_response = {}
-            
-            for api_var in variables:
-                api_response[api_var] = self._convert_variable_result(
-                    api_var, forecast_result, analog_results
-                )
+            # Project the requested variables out of the cached entry
+            api_response = {
+                api_var: self._project_variable(entry, api_var)
+                for api_var in variables
+            }
             
             logger.info(f"Successfully generated forecast for {len(variables)} variables")
             return api_response
@@ -156,6 +176,128 @@ class ForecastAdapter:
                 raise
             return self._generate_fallback_response(variables)
     
+    def _result_cache_key(self, horizon_hours: int) -> Tuple[int, str, int]:
+        """Key cached forecasts by horizon, analog data generation and time bucket."""
+        bucket = int(time.time() // self.result_bucket_seconds)
+        return (horizon_hours, analog_data_generation(), bucket)
+    
+    async def _get_forecast_entry(self, horizon_hours: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached forecast entry for a horizon, computing it at most once.
+        
+        Concurrent callers for the same key wait on a single computation.
+        
+        Args:
+            horizon_hours: Forecast horizon in hours
+            
+        Returns:
+            Entry with the ForecastResult, analog results and converted variables,
+            or None if the core forecaster produced no result
+        """
+        key = self._result_cache_key(horizon_hours)
+        
+        entry = self._result_cache.get(key)
+        if entry is not None:
+            self._result_cache.move_to_end(key)
+            self.result_cache_hits += 1
+            return entry
+        
+        self.result_cache_misses += 1
+        task = self._result_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute_forecast_entry(key, horizon_hours))
+            self._result_inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._result_inflight.pop(key, None))
+        
+        # Shield so a cancelled request does not abort a computation others share
+        return await asyncio.shield(task)
+    
+    async def _compute_forecast_entry(self, key: Tuple[int, str, int], 
+                                      horizon_hours: int) -> Optional[Dict[str, Any]]:
+        """Run analog search and core forecast, then cache all variables at once."""
+        # Ensure analog search service is connected
+        await self._ensure_analog_service()
+        
+        # Generate analog search results using production service
+        analog_results = await self._generate_analog_results(horizon_hours)
+        
+        # Core forecast and variable conversion on a compute worker
+        entry = await get_compute_executor().run(self._build_forecast_entry, analog_results, horizon_hours, key)
+        
+        if entry is None:
+            return None
+        
+        self._result_cache[key] = entry
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > self.result_cache_size:
+            self._result_cache.popitem(last=False)
+        
+        return entry
+    
+    def _build_forecast_entry(self, analog_results: Dict[str, Any], horizon_hours: int,
+                              key: Optional[Tuple[int, str, int]] = None) -> Optional[Dict[str, Any]]:
+        """Get the raw forecast from the core system and convert every variable (blocking)."""
+        forecast_result = self.forecaster.generate_forecast(analog_results, horizon_hours)
+        
+        if not forecast_result:
+            return None
+        
+        if key is not None:
+            self._archive_forecast(key, forecast_result, analog_results)
+        
+        return {
+            'forecast_result': forecast_result,
+            'analog_results': analog_results,
+            'variables': {
+                api_var: self._convert_variable_result(api_var, forecast_result, analog_results)
+                for api_var in self.variable_mapping
+            }
+        }
+    
+    def _archive_forecast(self, key: Tuple[int, str, int], forecast_result: Any,
+                          analog_results: Dict[str, Any]):
+        """Append a served forecast and its analog ensemble to the ForecastArchive (blocking).
+        
+        The segment id is the result cache key, so workers filling the same
+        bucket replace each other's segment instead of duplicating the forecast.
+        """
+        if self.forecast_archive is None or not isinstance(forecast_result.members, np.ndarray):
+            return
+        if analog_results.get('search_metadata', {}).get('search_method') == 'fallback':
+            return  # Mock analogs say nothing about calibration
+        
+        horizon, generation, bucket = key
+        variables = list(self.forecaster.variables)
+        bounds = forecast_result.confidence_intervals
+        row = lambda values: np.array([[values.get(var, np.nan) for var in variables]], dtype=np.float32)
+        try:
+            self.forecast_archive.append(
+                horizon, [analog_results['init_time']], [forecast_result.forecast_time], variables,
+                mean=row(forecast_result.variables),
+                p05=row({var: bound[0] for var, bound in bounds.items()}),
+                p95=row({var: bound[1] for var, bound in bounds.items()}),
+                members=forecast_result.members[None], weights=forecast_result.weights[None],
+                segment_id=f"{generation.replace('-', '_')}_{bucket}"
+            )
+        except Exception as e:
+            logger.warning(f"Failed to archive {horizon}h forecast: {e}")
+    
+    def _project_variable(self, entry: Dict[str, Any], api_var: str) -> Dict[str, Any]:
+        """Return a copy of one variable's API result from a cached entry."""
+        result = entry['variables'].get(api_var)
+        if result is None:
+            result = self._convert_variable_result(
+                api_var, entry['forecast_result'], entry['analog_results']
+            )
+            entry['variables'][api_var] = result
+        return dict(result)
+    
+    def clear_result_cache(self) -> int:
+        """Drop cached forecast entries (e.g. after new analog data is published)."""
+        cleared = len(self._result_cache)
+        self._result_cache.clear()
+        return cleared
+    
     async def _generate_analog_results(self, horizon_hours: int) -> Dict[str, Any]:
         """
         Generate analog search results using production AnalogSearchService.
@@ -504,7 +646,13 @@ class ForecastAdapter:
                 'supported_horizons': list(self.horizon_mapping.keys()),
                 'available_api_variables': list(self.variable_mapping.keys()),
                 'direct_mappings': sum(1 for v in self.variable_mapping.values() if v is not None),
-                'missing_variables': [k for k, v in self.variable_mapping.items() if v is None]
+                'missing_variables': [k for k, v in self.variable_mapping.items() if v is None],
+                'result_cache': {
+                    'entries': len(self._result_cache),
+                    'hits': self.result_cache_hits,
+                    'misses': self.result_cache_misses,
+                    'bucket_seconds': self.result_bucket_seconds
+                }
             }
             
         except Exception as e:
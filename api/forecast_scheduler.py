@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Forecast Precompute Scheduler
+=============================
+
+Background scheduler that computes every forecast horizon ahead of demand and
+publishes the serialized responses into the forecast response cache, so the
+/forecast handler is a pure cache read for the common "latest forecast" case.
+
+Features:
+- Recomputes all horizons when the analog data generation changes or on a
+  fixed cadence, whichever comes first
+- Publishes each cycle atomically into the response cache (and shared tier)
+- Persists published entries to disk so a restarted worker serves them at once
+- One leader per host (file lock) computes; other workers load its output
+
+Author: Performance Engineering
+Version: 1.0.0 - Precompute and publish
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from api.performance_middleware import CacheEntry, FileCacheTier, ForecastCache
+from api.services.data_generation import PROJECT_ROOT, analog_data_generation
+from api.variables import DEFAULT_VARIABLES, VALID_HORIZONS, VARIABLE_ORDER
+
+logger = logging.getLogger(__name__)
+
+# Builds the serialized /forecast body for (horizon, variables)
+ForecastBodyBuilder = Callable[[str, List[str]], Awaitable[bytes]]
+
+
+def precompute_dir() -> str:
+    """FORECAST_PRECOMPUTE_DIR, with relative paths resolved under the project root.
+
+    Every worker must agree on this directory: it holds the leader lock as well
+    as the persisted forecasts, so it can never depend on the worker's CWD.
+    """
+    return str(PROJECT_ROOT / os.getenv('FORECAST_PRECOMPUTE_DIR', 'tmp/forecasts'))
+
+
+class ForecastPrecomputeScheduler:
+    """
+    Precomputes and publishes forecasts for all horizons.
+
+    Each cycle publishes two variable sets per horizon: the defaults (what a
+    bare /forecast request asks for) and the full variable set.
+    """
+
+    def __init__(self, cache: ForecastCache, build_body: ForecastBodyBuilder,
+                 interval_seconds: Optional[int] = None, poll_seconds: Optional[int] = None,
+                 persist_dir: Optional[str] = None,
+                 variable_sets: Optional[List[List[str]]] = None):
+        self.cache = cache
+        self.build_body = build_body
+        self.interval_seconds = interval_seconds or int(os.getenv('FORECAST_PRECOMPUTE_INTERVAL', '300'))
+        self.poll_seconds = poll_seconds or int(os.getenv('FORECAST_PRECOMPUTE_POLL', '30'))
+        self.persist_dir = persist_dir or precompute_dir()
+        self.variable_sets = variable_sets or [list(DEFAULT_VARIABLES), list(VARIABLE_ORDER)]
+        self.store = FileCacheTier(self.persist_dir)
+
+        self.published_generation: Optional[str] = None
+        self.last_published_at = 0.0
+        self.cycles = 0
+        self.failures = 0
+        self.is_leader = False
+        self._lock_file = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _ttl(self, horizon: str) -> int:
+        # Outlive one missed cycle so requests never fall back to the lazy path
+        return max(self.cache.ttl_for_horizon(horizon), 2 * self.interval_seconds)
+
+    def _targets(self, generation: str) -> List[Tuple[str, str, List[str]]]:
+        return [
+            (self.cache.make_key(horizon, variables, generation), horizon, variables)
+            for horizon in VALID_HORIZONS
+            for variables in self.variable_sets
+        ]
+
+    def _acquire_leadership(self) -> bool:
+        """Take the per-host scheduler lock; only the holder computes forecasts."""
+        try:
+            lock_file = open(os.path.join(self.persist_dir, '.scheduler.lock'), 'w')
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        self._lock_file = lock_file
+        return True
+
+    async def compute_and_publish(self) -> int:
+        """
+        Compute every target for the current generation and publish them together.
+
+        Nothing is published unless every target computed, so clients never
+        see a mix of generations across horizons.
+        """
+        generation = analog_data_generation()
+        targets = self._targets(generation)
+        started = time.time()
+
+        bodies = await asyncio.gather(
+            *(self.build_body(horizon, variables) for _, horizon, variables in targets)
+        )
+        entries = {
+            key: CacheEntry.build(body, self._ttl(horizon), self.cache.stale_ttl, self.cache.compression_level)
+            for (key, horizon, _), body in zip(targets, bodies)
+        }
+
+        await self.cache.publish(entries)
+        await asyncio.gather(*(self.store.set(key, entry) for key, entry in entries.items()))
+
+        self.published_generation = generation
+        self.last_published_at = time.time()
+        self.cycles += 1
+        logger.info(f"Published {len(entries)} precomputed forecasts for generation {generation} "
+                    f"in {(self.last_published_at - started) * 1000:.0f}ms")
+        return len(entries)
+
+    async def load_persisted(self) -> int:
+        """Publish persisted entries for the current generation that are newer than ours."""
+        generation = analog_data_generation()
+        entries: Dict[str, CacheEntry] = {}
+        for key, _, _ in self._targets(generation):
+            entry = await self.store.get(key)
+            current = self.cache.cache.get(key)
+            if entry is not None and (current is None or current.created_at < entry.created_at):
+                entries[key] = entry
+
+        if entries:
+            await self.cache.publish(entries)
+            logger.info(f"Loaded {len(entries)} persisted forecasts for generation {generation}")
+        return len(entries)
+
+    def _due(self) -> bool:
+        if self.published_generation != analog_data_generation():
+            return True
+        return time.time() - self.last_published_at >= self.interval_seconds
+
+    async def run(self) -> None:
+        """Scheduler loop: publish on data refresh or cadence, whichever comes first."""
+        try:
+            await self.load_persisted()
+        except Exception as e:
+            logger.warning(f"Could not load persisted forecasts: {e}")
+
+        while True:
+            try:
+                if not self.is_leader:
+                    self.is_leader = await asyncio.get_running_loop().run_in_executor(
+                        None, self._acquire_leadership
+                    )
+                if self.is_leader:
+                    if self._due():
+                        await self.compute_and_publish()
+                else:
+                    # Follower workers pick up what the leader persisted
+                    await self.load_persisted()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Forecast precompute cycle failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+            logger.info(f"Forecast precompute scheduler started (interval {self.interval_seconds}s, "
+                        f"poll {self.poll_seconds}s, persist dir {self.persist_dir})")
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+            self.is_leader = False
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'leader': self.is_leader,
+            'published_generation': self.published_generation,
+            'last_published_at': self.last_published_at or None,
+            'cycles': self.cycles,
+            'failures': self.failures,
+            'interval_seconds': self.interval_seconds,
+            'persist_dir': self.persist_dir
+        }
@@ -18,11 +18,13 @@ Author: Web Service Layer
 Version: 1.0.0 - Production API
 """
 
+import asyncio
 import os
 import sys
 import time
 import json
 import hashlib
+import inspect
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Any
@@ -31,13 +33,11 @@ from typing import Dict, List, Optional, Any
 from fastapi import FastAPI, HTTPException, Depends, status, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import JSONResponse, Response
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
 import uvicorn
 from pydantic import BaseModel, Field, field_validator
 from prometheus_client import (
@@ -47,6 +47,8 @@ from prometheus_client import (
     generate_latest,
     CONTENT_TYPE_LATEST,
     REGISTRY,
+    CollectorRegistry,
+    multiprocess,
 )
 
 # Add parent directory to path for imports
@@ -61,9 +63,10 @@ from api.forecast_adapter import ForecastAdapter
 from core.startup_validation_system import ExpertValidatedStartupSystem
 from api.services.faiss_health_monitoring import FAISSHealthMonitor, get_faiss_health_monitor
 from core.config_drift_detector import ConfigurationDriftDetector
+from core.shared_corpus import get_shared_corpus
 
 # Import analog search service and models
-from api.services.analog_search import get_analog_search_service
+from api.services.analog_search import SearchNotAdmitted, get_analog_search_service
 from api.response_models import AnalogExplorerData, WeatherVariable, ForecastHorizon
 
 # Configure structured logging
@@ -75,13 +78,23 @@ from api.logging_config import (
 # Import security middleware
 from api.security_middleware import (
     SecurityMiddleware, SecurityConfig, InputSanitizer, 
-    SecurityException, ValidationUtils
+    SecurityException, ValidationUtils, query_validator
 )
 
 # Import performance middleware
 from api.performance_middleware import (
     performance_middleware, get_performance_stats, get_rate_limit_config
 )
+from api.services.data_generation import analog_data_generation, stop_analog_data_refresher
+
+# Import single-pass request pipeline
+from api.request_pipeline import RequestPipelineMiddleware
+
+# Import forecast precompute scheduler
+from api.forecast_scheduler import ForecastPrecomputeScheduler
+
+# Import adaptive admission control for the forecast endpoints
+from api.admission_control import BACKGROUND, FOREGROUND, LoadShed, get_admission_limiter
 
 # Import enhanced health endpoints
 from api.enhanced_health_endpoints import health_router, initialize_health_checker
@@ -89,6 +102,9 @@ from api.enhanced_health_endpoints import health_router, initialize_health_check
 # Initialize rate limiter with configurable limits
 limiter = Limiter(key_func=get_remote_address)
 
+# Adaptive concurrency limit on forecast computations and analog searches
+admission_limiter = get_admission_limiter()
+
 def _get_or_create_metric(metric_cls, name, documentation, *args, **kwargs):
     """Return existing Prometheus metric or create a new one.
 
@@ -125,6 +141,9 @@ security_violations = _get_or_create_metric(
 validation_errors = _get_or_create_metric(
     Counter, 'validation_errors_total', 'Total validation errors', ['error_type']
 )
+forecast_cache_requests = _get_or_create_metric(
+    Counter, 'forecast_cache_requests_total', 'Forecast cache lookups by outcome', ['status']
+)
 
 # Analog search metrics (OBS1 requirements)
 analog_real_total = _get_or_create_metric(
@@ -155,19 +174,11 @@ app = FastAPI(
 app.include_router(health_router)
 
 # Add middleware - order matters!
-# GZip compression first (will be conditionally applied based on nginx proxy detection)
-gzip_min_size = int(os.getenv('COMPRESSION_MIN_SIZE', '500'))
-if os.getenv('NGINX_COMPRESSION', 'false').lower() != 'true':
-    app.add_middleware(GZipMiddleware, minimum_size=gzip_min_size)
-
-app.add_middleware(SecurityMiddleware)  # Security second
-app.add_middleware(RequestLoggingMiddleware)  # Then logging
-app.add_middleware(SlowAPIMiddleware)  # Then rate limiting
+# Security validation, correlation IDs, request logging, default rate limits,
+# security/timing headers and gzip run in one pure-ASGI pass
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
-# Add performance middleware 
-app.middleware("http")(performance_middleware)
+app.add_middleware(RequestPipelineMiddleware)
 
 # CORS configuration  
 allowed_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
@@ -267,6 +278,7 @@ if token_health.get("issues"):
 forecast_adapter: Optional[ForecastAdapter] = None
 faiss_health_monitor: Optional[FAISSHealthMonitor] = None
 config_drift_detector: Optional[ConfigurationDriftDetector] = None
+forecast_scheduler: Optional[ForecastPrecomputeScheduler] = None
 system_health: Dict[str, Any] = {}
 startup_time = datetime.now(timezone.utc)
 
@@ -504,7 +516,7 @@ class HealthResponse(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """Initialize the forecasting system with health validation."""
-    global forecast_adapter, faiss_health_monitor, config_drift_detector, system_health
+    global forecast_adapter, faiss_health_monitor, config_drift_detector, forecast_scheduler, system_health
     
     logger.info("🚀 Starting Adelaide Weather Forecasting API")
     logger.info("📋 Initializing forecast adapter with core system...")
@@ -560,6 +572,18 @@ async def startup_event():
             "initialized_at": datetime.now(timezone.utc).isoformat()
         }
         
+        # First generation scan (and its refresher) off the loop; later lookups only read the token
+        await asyncio.get_running_loop().run_in_executor(None, analog_data_generation)
+        
+        # Warm every horizon ahead of demand so /forecast is a cache read
+        if system_health["ready"] and os.getenv('FORECAST_PRECOMPUTE_ENABLED', 'true').lower() == 'true':
+            logger.info("🔥 Starting forecast precompute scheduler...")
+            forecast_scheduler = ForecastPrecomputeScheduler(
+                performance_middleware.cache,
+                lambda horizon, variables: _admitted_forecast_body(horizon, variables, priority=BACKGROUND)
+            )
+            forecast_scheduler.start()
+        
         # Log performance middleware configuration
         perf_stats = get_performance_stats()
         compression_enabled = perf_stats['compression']['enabled']
@@ -775,14 +799,27 @@ def _load_outcomes_data(horizon: str):
     Uses OUTCOMES_DIR env var if provided; otherwise resolves repo-relative
     paths to support different environments (WSL, CI, containers).
     """
-    if horizon in _data_cache:
-        return _data_cache[horizon]
+    corpus = get_shared_corpus()
+    cached = _data_cache.get(horizon)
+    if cached is not None and cached.get("generation") == (corpus.generation if corpus else None):
+        return cached
 
     try:
         import numpy as np
         import pandas as pd
         from pathlib import Path
         
+        hours = _horizon_to_hours(horizon)
+        if corpus is not None and corpus.available(hours, "outcomes") \
+                and corpus.available(hours, "outcomes_metadata"):
+            # Shared read-only mapping: no per-worker copy
+            _data_cache[horizon] = {
+                "outcomes": corpus.outcomes(hours),
+                "metadata": corpus.outcomes_metadata(hours),
+                "generation": corpus.generation
+            }
+            return _data_cache[horizon]
+
         base_dir_env = os.getenv("OUTCOMES_DIR")
         if base_dir_env:
             base = Path(base_dir_env)
@@ -798,7 +835,8 @@ def _load_outcomes_data(horizon: str):
 
         _data_cache[horizon] = {
             "outcomes": outcomes,
-            "metadata": metadata
+            "metadata": metadata,
+            "generation": None
         }
 
         return _data_cache[horizon]
@@ -1219,6 +1257,188 @@ def _map_variable_to_primary(var: str) -> str:
     else:
         return "temperature"
 
+async def _run_forecast_adapter(horizon: str, variables: List[str]) -> Dict[str, Any]:
+    """Raw adapter forecast for (horizon, variables), awaiting async adapters."""
+    forecast_result = forecast_adapter.forecast_with_uncertainty(
+        horizon=horizon,
+        variables=variables
+    )
+    if inspect.isawaitable(forecast_result):
+        forecast_result = await forecast_result
+    return forecast_result
+
+async def _compute_forecast_response(
+    validated_horizon: str,
+    validated_variables: List[str],
+    start_time: float,
+    correlation_id: Optional[str],
+    record_request: bool = True
+) -> ForecastResponse:
+    """Run the analog forecast and build the full response model (cache fill path).
+    
+    ``record_request=False`` is the precompute path: it skips the request
+    latency metric, performance and forecast logging, and FAISS query tracking,
+    so scheduled builds do not show up as client traffic.
+    """
+    if not record_request:
+        forecast_result = await _run_forecast_adapter(validated_horizon, validated_variables)
+    else:
+        # Generate forecast with performance tracking using validated inputs
+        with response_duration_metric.time():
+            with performance_logger.time_operation(
+                "forecast_computation", 
+                horizon=validated_horizon, 
+                variable_count=len(validated_variables),
+                correlation_id=correlation_id
+            ):
+                # Track FAISS query performance if monitor is available
+                if faiss_health_monitor:
+                    async with faiss_health_monitor.track_query(
+                        horizon=validated_horizon, 
+                        k_neighbors=50,  # Default k for analog search
+                        index_type="auto"
+                    ) as faiss_query:
+                        forecast_result = await _run_forecast_adapter(validated_horizon, validated_variables)
+                else:
+                    forecast_result = await _run_forecast_adapter(validated_horizon, validated_variables)
+    
+    # Build response using validated variables
+    # The adapter returns the results in the expected API format
+    variable_results = {}
+    wind_result = None
+    
+    for var in validated_variables:
+        if var in forecast_result:
+            result = forecast_result[var]
+            
+            # Adapter already provides values in correct units and format
+            if isinstance(result, dict):
+                # Dictionary format from fallback response
+                variable_results[var] = VariableResult(
+                    value=result.get("value"),
+                    p05=result.get("p05"),
+                    p95=result.get("p95"),
+                    confidence=result.get("confidence"),
+                    available=result.get("available", False),
+                    analog_count=result.get("analog_count")
+                )
+            elif hasattr(result, 'value'):
+                # Already a VariableResult object or similar
+                variable_results[var] = result
+            else:
+                # Unknown format - create a safe fallback
+                logger.warning(f"Unknown result format for variable {var}: {type(result)}")
+                variable_results[var] = VariableResult(
+                    value=None,
+                    p05=None,
+                    p95=None,
+                    confidence=None,
+                    available=False,
+                    analog_count=None
+                )
+    
+    # Combine wind components if both requested
+    if "u10" in variable_results and "v10" in variable_results:
+        u_result = variable_results["u10"]
+        v_result = variable_results["v10"]
+        
+        if u_result.available and v_result.available:
+            import numpy as np
+            speed = np.sqrt(u_result.value**2 + v_result.value**2)
+            direction = (270 - np.degrees(np.arctan2(v_result.value, u_result.value))) % 360
+            
+            wind_result = WindResult(
+                speed=speed,
+                direction=direction,
+                gust=None,  # Not available in current system
+                available=True
+            )
+    
+    # System metadata
+    latency_ms = (time.time() - start_time) * 1000
+    
+    # Calculate analog count for logging (safely extract from first available variable)
+    analog_count = 0
+    if variable_results and validated_variables:
+        first_var_result = variable_results.get(validated_variables[0])
+        if first_var_result and hasattr(first_var_result, 'analog_count'):
+            analog_count = first_var_result.analog_count or 0
+    
+    # Log successful forecast result
+    if record_request:
+        forecast_logger.log_forecast_result(
+            validated_horizon, variable_results, latency_ms, analog_count, correlation_id
+        )
+    
+    # Generate enhanced response fields
+    narrative = _generate_forecast_narrative(validated_horizon, variable_results, wind_result)
+    risk_assessment = _assess_weather_risks(variable_results, wind_result)
+    analogs_summary = _generate_analogs_summary(variable_results, analog_count)
+    confidence_explanation = _explain_confidence(variable_results, analog_count)
+    
+    response = ForecastResponse(
+        horizon=validated_horizon,
+        generated_at=datetime.now(timezone.utc),
+        variables=variable_results,
+        wind10m=wind_result,
+        narrative=narrative,
+        risk_assessment=risk_assessment,
+        analogs_summary=analogs_summary,
+        confidence_explanation=confidence_explanation,
+        versions=VersionInfo(
+            model="v1.0.0",
+            index="v1.0.0", 
+            datasets="v1.0.0",
+            api_schema="v1.1.0"  # Updated schema version for enhanced response
+        ),
+        hashes=HashInfo(
+            model="a7c3f92",
+            index="2e8b4d1", 
+            datasets="d4f8a91"
+        ),
+        latency_ms=latency_ms
+    )
+    
+    return response
+
+async def _build_forecast_body(
+    horizon: str,
+    variables: List[str],
+    start_time: Optional[float] = None,
+    correlation_id: Optional[str] = None,
+    record_request: bool = True
+) -> bytes:
+    """Serialized /forecast body, shared by request-time cache fills and the precompute scheduler."""
+    forecast_response = await _compute_forecast_response(
+        horizon, variables, start_time or time.time(), correlation_id, record_request
+    )
+    return forecast_response.model_dump_json().encode()
+
+async def _admitted_forecast_body(
+    horizon: str,
+    variables: List[str],
+    start_time: Optional[float] = None,
+    correlation_id: Optional[str] = None,
+    priority: str = FOREGROUND
+) -> bytes:
+    """_build_forecast_body behind admission control; only cache fills pay for a slot.
+    
+    Background (precompute) builds are not client requests and leave request
+    metrics and forecast logs untouched.
+    """
+    async with admission_limiter.admit(priority):
+        return await _build_forecast_body(horizon, variables, start_time, correlation_id,
+                                          record_request=priority != BACKGROUND)
+
+def _overloaded(shed: LoadShed) -> HTTPException:
+    """503 for a request shed by admission control."""
+    error_requests.labels(error_type="overload").inc()
+    return HTTPException(
+        status_code=503,
+        detail="Service overloaded, retry later",
+        headers={"Retry-After": str(shed.retry_after)}
+    )
+
 @app.get("/forecast", response_model=ForecastResponse)
 @limiter.limit(get_dynamic_rate_limit)
 async def get_forecast(
@@ -1242,7 +1462,10 @@ async def get_forecast(
     
     try:
         # Comprehensive input validation using security utilities
-        validation_result = ValidationUtils.validate_forecast_request(horizon, vars)
+        # Reuses the query validation the security layer already did for this request
+        validation_result = ValidationUtils.validate_forecast_request(
+            horizon, vars, getattr(request.state, 'validated_query', None)
+        )
         
         if not validation_result["valid"]:
             error_requests.labels(error_type="validation").inc()
@@ -1281,131 +1504,23 @@ async def get_forecast(
             error_requests.labels(error_type="system").inc()
             raise HTTPException(503, "Forecasting system not ready")
         
-        # Generate forecast with performance tracking using validated inputs
-        with response_duration_metric.time():
-            with performance_logger.time_operation(
-                "forecast_computation", 
-                horizon=validated_horizon, 
-                variable_count=len(validated_variables),
-                correlation_id=correlation_id
-            ):
-                # Track FAISS query performance if monitor is available
-                if faiss_health_monitor:
-                    async with faiss_health_monitor.track_query(
-                        horizon=validated_horizon, 
-                        k_neighbors=50,  # Default k for analog search
-                        index_type="auto"
-                    ) as faiss_query:
-                        forecast_result = forecast_adapter.forecast_with_uncertainty(
-                            horizon=validated_horizon,
-                            variables=validated_variables
-                        )
-                else:
-                    forecast_result = forecast_adapter.forecast_with_uncertainty(
-                        horizon=validated_horizon,
-                        variables=validated_variables
-                    )
-        
-        # Build response using validated variables
-        # The adapter returns the results in the expected API format
-        variable_results = {}
-        wind_result = None
-        
-        for var in validated_variables:
-            if var in forecast_result:
-                result = forecast_result[var]
-                
-                # Adapter already provides values in correct units and format
-                if isinstance(result, dict):
-                    # Dictionary format from fallback response
-                    variable_results[var] = VariableResult(
-                        value=result.get("value"),
-                        p05=result.get("p05"),
-                        p95=result.get("p95"),
-                        confidence=result.get("confidence"),
-                        available=result.get("available", False),
-                        analog_count=result.get("analog_count")
-                    )
-                elif hasattr(result, 'value'):
-                    # Already a VariableResult object or similar
-                    variable_results[var] = result
-                else:
-                    # Unknown format - create a safe fallback
-                    logger.warning(f"Unknown result format for variable {var}: {type(result)}")
-                    variable_results[var] = VariableResult(
-                        value=None,
-                        p05=None,
-                        p95=None,
-                        confidence=None,
-                        available=False,
-                        analog_count=None
-                    )
-        
-        # Combine wind components if both requested
-        if "u10" in variable_results and "v10" in variable_results:
-            u_result = variable_results["u10"]
-            v_result = variable_results["v10"]
-            
-            if u_result.available and v_result.available:
-                import numpy as np
-                speed = np.sqrt(u_result.value**2 + v_result.value**2)
-                direction = (270 - np.degrees(np.arctan2(v_result.value, u_result.value))) % 360
-                
-                wind_result = WindResult(
-                    speed=speed,
-                    direction=direction,
-                    gust=None,  # Not available in current system
-                    available=True
-                )
-        
-        # System metadata
-        latency_ms = (time.time() - start_time) * 1000
-        
-        # Calculate analog count for logging (safely extract from first available variable)
-        analog_count = 0
-        if variable_results and validated_variables:
-            first_var_result = variable_results.get(validated_variables[0])
-            if first_var_result and hasattr(first_var_result, 'analog_count'):
-                analog_count = first_var_result.analog_count or 0
-        
-        # Log successful forecast result
-        forecast_logger.log_forecast_result(
-            validated_horizon, variable_results, latency_ms, analog_count, correlation_id
-        )
-        
-        # Generate enhanced response fields
-        narrative = _generate_forecast_narrative(validated_horizon, variable_results, wind_result)
-        risk_assessment = _assess_weather_risks(variable_results, wind_result)
-        analogs_summary = _generate_analogs_summary(variable_results, analog_count)
-        confidence_explanation = _explain_confidence(variable_results, analog_count)
-        
-        response = ForecastResponse(
-            horizon=validated_horizon,
-            generated_at=datetime.now(timezone.utc),
-            variables=variable_results,
-            wind10m=wind_result,
-            narrative=narrative,
-            risk_assessment=risk_assessment,
-            analogs_summary=analogs_summary,
-            confidence_explanation=confidence_explanation,
-            versions=VersionInfo(
-                model="v1.0.0",
-                index="v1.0.0", 
-                datasets="v1.0.0",
-                api_schema="v1.1.0"  # Updated schema version for enhanced response
-            ),
-            hashes=HashInfo(
-                model="a7c3f92",
-                index="2e8b4d1", 
-                datasets="d4f8a91"
-            ),
-            latency_ms=latency_ms
+        # Serve from the forecast cache; concurrent misses share one computation
+        cache = performance_middleware.cache
+        cache_key = cache.make_key(validated_horizon, validated_variables, analog_data_generation())
+
+        entry, cache_status = await cache.get_or_compute(
+            cache_key,
+            lambda: _admitted_forecast_body(validated_horizon, validated_variables, start_time, correlation_id),
+            ttl=cache.ttl_for_horizon(validated_horizon)
         )
-        
-        return response
+        forecast_cache_requests.labels(status=cache_status.lower()).inc()
+
+        return performance_middleware.cached_response(request, entry, cache_status)
         
     except HTTPException:
         raise
+    except LoadShed as e:
+        raise _overloaded(e)
     except Exception as e:
         error_requests.labels(error_type="internal").inc()
         # Use validated variables if available, fallback to original
@@ -1505,7 +1620,8 @@ async def get_analogs(
         # Convert horizon string to hours for service
         horizon_hours = _horizon_to_hours(validated_horizon)
         
-        # Perform comprehensive analog search with performance tracking
+        # Perform comprehensive analog search with performance tracking; only the FAISS
+        # search is admission-controlled, so result cache hits never take a slot
         with response_duration_metric.time():
             with performance_logger.time_operation(
                 "analog_search",
@@ -1525,7 +1641,8 @@ async def get_analogs(
                             horizon=horizon_hours,
                             variable=_primary_variable_from_list(validated_variables),
                             k=validated_k,
-                            correlation_id=correlation_id
+                            correlation_id=correlation_id,
+                            admission=admission_limiter.admit
                         )
                 else:
                     analog_result = await analog_service.get_analog_details(
@@ -1533,7 +1650,8 @@ async def get_analogs(
                         horizon=horizon_hours,
                         variable=_primary_variable_from_list(validated_variables),
                         k=validated_k,
-                        correlation_id=correlation_id
+                        correlation_id=correlation_id,
+                        admission=admission_limiter.admit
                     )
         
         # Check if analog search was successful
@@ -1570,6 +1688,8 @@ async def get_analogs(
         
     except HTTPException:
         raise
+    except SearchNotAdmitted as e:
+        raise _overloaded(e.cause)
     except Exception as e:
         error_requests.labels(error_type="internal").inc()
         
@@ -1720,7 +1840,13 @@ async def get_metrics(request: Request, _token: str = Depends(verify_token)):
         # - API metrics (forecast_requests, health_requests, etc.)
         # - FAISS metrics (query performance, index health, etc.)
         # - Performance middleware metrics (will be added to registry)
-        unified_metrics = generate_latest()
+        # With several workers, Prometheus multiprocess mode merges every worker's samples
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            multiprocess_registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(multiprocess_registry)
+            unified_metrics = generate_latest(multiprocess_registry)
+        else:
+            unified_metrics = generate_latest()
         
         # Add performance middleware metrics to the output
         # These metrics are generated dynamically from middleware stats
@@ -1807,6 +1933,10 @@ async def get_performance_metrics(request: Request, _token: str = Depends(verify
             'current_time': datetime.now(timezone.utc).isoformat()
         }
         
+        perf_stats['precompute'] = forecast_scheduler.get_status() if forecast_scheduler else {'running': False}
+        perf_stats['query_validation'] = query_validator.get_stats()
+        perf_stats['admission_control'] = admission_limiter.get_stats()
+        
         # Add environment configuration
         perf_stats['configuration'] = {
             'compression_min_size': int(os.getenv('COMPRESSION_MIN_SIZE', '500')),
@@ -1850,7 +1980,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
                 "timestamp": datetime.now(timezone.utc).isoformat(),
                 "correlation_id": correlation_id
             }
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
@@ -1895,10 +2026,17 @@ async def general_exception_handler(request: Request, exc: Exception):
 @app.on_event("shutdown")
 async def shutdown_event():
     """Gracefully shutdown monitoring systems."""
-    global faiss_health_monitor, config_drift_detector
+    global faiss_health_monitor, config_drift_detector, forecast_scheduler
     
     logger.info("🛑 Shutting down Adelaide Weather Forecasting API")
     
+    # Stop forecast precompute scheduler
+    if forecast_scheduler:
+        logger.info("🔥 Stopping forecast precompute scheduler...")
+        await forecast_scheduler.stop()
+        forecast_scheduler = None
+    stop_analog_data_refresher()
+    
     # Shutdown FAISS health monitoring
     if faiss_health_monitor:
         logger.info("📊 Stopping FAISS health monitoring...")
@@ -1911,6 +2049,10 @@ async def shutdown_event():
         config_drift_detector.stop_monitoring()
         config_drift_detector = None
     
+    # Let Prometheus multiprocess mode drop this worker's live gauges
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(os.getpid())
+    
     logger.info("✅ Adelaide Weather API shutdown complete")
 
 if __name__ == "__main__":
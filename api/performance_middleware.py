@@ -6,99 +6,437 @@ Implements caching, compression, and response optimization for <100ms target
 import asyncio
 import gzip
 import json
+import re
+import struct
 import time
 import os
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, Callable
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, Awaitable, Iterable, Mapping, Tuple, Union
 from fastapi import Request, Response
-from fastapi.responses import JSONResponse
 import hashlib
 import logging
 
+from core.shared_metrics import get_shared_metrics
+
 logger = logging.getLogger(__name__)
 
+# Content types worth compressing
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/xml', 'application/javascript')
+
+# Forecast response TTLs by horizon (seconds) - longer horizons change less often
+FORECAST_TTL_SECONDS = {'6h': 180, '12h': 300, '24h': 600, '48h': 900}
+
+@dataclass
+class CacheEntry:
+    """
+    Pre-serialized forecast response with its gzip variant and freshness window.
+
+    Timestamps are wall-clock so entries stay comparable across workers that
+    share them through a shared tier.
+    """
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    created_at: float
+    fresh_until: float
+    stale_until: float
+
+    @classmethod
+    def build(cls, body: bytes, ttl: float, stale_ttl: float, compression_level: int = 6) -> 'CacheEntry':
+        now = time.time()
+        return cls(
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=compression_level),
+            etag=f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"',
+            created_at=now,
+            fresh_until=now + ttl,
+            stale_until=now + ttl + stale_ttl
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzip_body)
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.fresh_until
+
+    def is_servable(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.stale_until
+
+    def to_bytes(self) -> bytes:
+        """Frame as <4-byte header length><JSON header><body><gzip body>"""
+        header = json.dumps({
+            'etag': self.etag,
+            'created_at': self.created_at,
+            'fresh_until': self.fresh_until,
+            'stale_until': self.stale_until,
+            'body_length': len(self.body)
+        }).encode()
+        return struct.pack('>I', len(header)) + header + self.body + self.gzip_body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CacheEntry':
+        (header_length,) = struct.unpack_from('>I', data)
+        header = json.loads(data[4:4 + header_length])
+        payload = data[4 + header_length:]
+        body_length = header['body_length']
+        return cls(
+            body=payload[:body_length],
+            gzip_body=payload[body_length:],
+            etag=header['etag'],
+            created_at=header['created_at'],
+            fresh_until=header['fresh_until'],
+            stale_until=header['stale_until']
+        )
+
+class RedisCacheTier:
+    """
+    Shared cache tier backed by Redis so every uvicorn worker sees the same entries
+    """
+
+    name = 'redis'
+
+    def __init__(self, url: str, prefix: str = 'adelaide:', timeout_seconds: float = 0.25):
+        import redis.asyncio as redis_asyncio
+
+        self.client = redis_asyncio.from_url(
+            url,
+            socket_timeout=timeout_seconds,
+            socket_connect_timeout=timeout_seconds
+        )
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        data = await self.client.get(self.prefix + key)
+        return CacheEntry.from_bytes(data) if data else None
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        expire_seconds = max(1, int(entry.stale_until - time.time()))
+        await self.client.set(self.prefix + key, entry.to_bytes(), ex=expire_seconds)
+
+    async def invalidate(self, pattern: Optional[str] = None) -> int:
+        match = f"{self.prefix}*{pattern}*" if pattern else f"{self.prefix}*"
+        keys = [key async for key in self.client.scan_iter(match=match)]
+        if keys:
+            await self.client.delete(*keys)
+        return len(keys)
+
+class FileCacheTier:
+    """
+    Shared cache tier on a local directory (tmpfs by default) - a stand-in for
+    Redis when all workers run on one host
+    """
+
+    name = 'file'
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _filename(key: str) -> str:
+        return re.sub(r'[^A-Za-z0-9,._-]', '_', key)
+
+    def _read(self, key: str) -> Optional[CacheEntry]:
+        path = self.directory / (self._filename(key) + '.entry')
+        try:
+            entry = CacheEntry.from_bytes(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        if not entry.is_servable():
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def _write(self, key: str, entry: CacheEntry) -> None:
+        path = self.directory / (self._filename(key) + '.entry')
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_bytes(entry.to_bytes())
+        os.replace(tmp_path, path)  # Atomic publish - readers never see partial entries
+
+    def _invalidate(self, pattern: Optional[str]) -> int:
+        fragment = self._filename(pattern) if pattern else ''
+        removed = 0
+        for path in self.directory.glob('*.entry'):
+            if fragment in path.stem:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return await asyncio.get_running_loop().run_in_executor(None, self._read, key)
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._write, key, entry)
+
+    async def invalidate(self, pattern: Optional[str] = None) -> int:
+        return await asyncio.get_running_loop().run_in_executor(None, self._invalidate, pattern)
+
+def create_shared_cache_tier() -> Optional[Any]:
+    """
+    Build the shared cache tier selected by FORECAST_CACHE_SHARED.
+
+    'auto' (default) uses Redis when REDIS_URL is set and REDIS_ENABLED is not
+    false, 'redis' and 'file' force a tier, and 'none' keeps the cache local.
+    """
+    mode = os.getenv('FORECAST_CACHE_SHARED', 'auto').lower()
+    redis_url = os.getenv('REDIS_URL')
+    redis_enabled = os.getenv('REDIS_ENABLED', 'true').lower() == 'true'
+
+    if mode in ('auto', 'redis') and redis_url and redis_enabled:
+        try:
+            return RedisCacheTier(redis_url)
+        except ImportError:
+            logger.warning("redis package not installed - forecast cache shared tier disabled")
+            return None
+
+    if mode == 'file':
+        return FileCacheTier(os.getenv('FORECAST_CACHE_SHARED_DIR', '/dev/shm/adelaide-forecast-cache'))
+
+    return None
+
 class ForecastCache:
     """
-    In-memory cache for forecast requests with TTL and intelligent invalidation
+    Multi-tier cache for forecast responses.
+
+    Entries are keyed by (horizon, sorted variable set, analog data generation)
+    and hold pre-serialized, pre-gzipped response bytes in a size-bounded LRU,
+    backed by an optional shared tier. Concurrent misses for one key collapse
+    into a single computation, and expired entries keep being served while a
+    single background refresh runs (stale-while-revalidate).
     """
     
-    def __init__(self, default_ttl: int = 300):  # 5 minutes default
-        self.cache: Dict[str, Dict[str, Any]] = {}
+    COUNTERS = ('hit_count', 'miss_count', 'stale_count', 'shared_hit_count',
+                'collapsed_count', 'eviction_count')
+    
+    def __init__(self, default_ttl: int = 300, stale_ttl: Optional[int] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 shared_tier: Optional[Any] = None, compression_level: int = 6):
+        self.cache: 'OrderedDict[str, CacheEntry]' = OrderedDict()
         self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl if stale_ttl is not None else int(os.getenv('FORECAST_CACHE_STALE_TTL', '120'))
+        self.max_entries = max_entries or int(os.getenv('FORECAST_CACHE_MAX_ENTRIES', '512'))
+        self.max_bytes = max_bytes or int(os.getenv('FORECAST_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+        self.shared_tier = shared_tier
+        self.compression_level = compression_level
+        self.current_bytes = 0
         self.hit_count = 0
         self.miss_count = 0
-        
-    def _generate_key(self, horizon: str, variables: str) -> str:
-        """Generate cache key from request parameters"""
-        key_data = f"forecast:{horizon}:{variables}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        self.stale_count = 0
+        self.shared_hit_count = 0
+        self.collapsed_count = 0
+        self.eviction_count = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._shared_retry_at = 0.0
     
-    def get(self, horizon: str, variables: str) -> Optional[Dict[str, Any]]:
-        """Get cached forecast data if valid"""
-        cache_key = self._generate_key(horizon, variables)
-        
-        if cache_key not in self.cache:
-            self.miss_count += 1
+    def _publish_counters(self) -> None:
+        """Mirror this worker's counters into the cross-worker metrics segment"""
+        shared = get_shared_metrics()
+        if shared is not None:
+            shared.publish('forecast_cache:', {name: getattr(self, name) for name in self.COUNTERS})
+        
+    @staticmethod
+    def make_key(horizon: str, variables: Union[str, Iterable[str]], generation: str = '') -> str:
+        """Canonical cache key - variable order and duplicates do not matter"""
+        if isinstance(variables, str):
+            variables = variables.split(',')
+        variable_set = ','.join(sorted({var.strip() for var in variables if var.strip()}))
+        return f"forecast:{horizon}:{variable_set}:{generation}"
+
+    def ttl_for_horizon(self, horizon: str) -> int:
+        return FORECAST_TTL_SECONDS.get(horizon, self.default_ttl)
+    
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Get a servable (fresh or stale) entry from the local tier"""
+        entry = self.cache.get(key)
+        if entry is None:
             return None
-            
-        entry = self.cache[cache_key]
-        
-        # Check if entry is expired
-        if datetime.now() > entry['expires_at']:
-            del self.cache[cache_key]
-            self.miss_count += 1
+        if not entry.is_servable():
+            self._remove_local(key)
             return None
-            
-        self.hit_count += 1
-        logger.debug(f"Cache HIT for {cache_key}")
-        return entry['data']
+        self.cache.move_to_end(key)
+        return entry
     
-    def set(self, horizon: str, variables: str, data: Dict[str, Any], ttl: Optional[int] = None) -> None:
-        """Cache forecast data with TTL"""
-        cache_key = self._generate_key(horizon, variables)
-        expires_at = datetime.now() + timedelta(seconds=ttl or self.default_ttl)
-        
-        self.cache[cache_key] = {
-            'data': data,
-            'expires_at': expires_at,
-            'created_at': datetime.now()
-        }
-        
-        logger.debug(f"Cache SET for {cache_key}, expires at {expires_at}")
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """Store entry in the local tier, evicting least recently used entries"""
+        if key in self.cache:
+            self._remove_local(key)
+        self.cache[key] = entry
+        self.current_bytes += entry.size
+
+        while len(self.cache) > 1 and (len(self.cache) > self.max_entries or self.current_bytes > self.max_bytes):
+            evicted_key, evicted = self.cache.popitem(last=False)
+            self.current_bytes -= evicted.size
+            self.eviction_count += 1
+            self._publish_counters()
+            logger.debug(f"Cache EVICT for {evicted_key}")
+
+    def _remove_local(self, key: str) -> None:
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[bytes]],
+                             ttl: Optional[int] = None) -> Tuple[CacheEntry, str]:
+        """
+        Return (entry, status) for key, computing the response bytes on a miss.
+
+        Status is HIT (local), SHARED (promoted from the shared tier), STALE
+        (expired entry served while a refresh runs), MISS (this caller computed)
+        or COLLAPSED (waited on another caller's computation).
+        """
+        ttl = ttl or self.default_ttl
+        now = time.time()
+
+        entry = self.get(key)
+        status = 'HIT'
+        if entry is None:
+            entry = await self._get_shared(key)
+            if entry is not None and entry.is_servable(now):
+                self.set(key, entry)
+                status = 'SHARED'
+            else:
+                entry = None
+
+        if entry is not None:
+            if entry.is_fresh(now):
+                self.hit_count += 1
+                if status == 'SHARED':
+                    self.shared_hit_count += 1
+                self._publish_counters()
+                return entry, status
+            self.stale_count += 1
+            self._publish_counters()
+            self._start_fill(key, compute, ttl)
+            return entry, 'STALE'
+
+        self.miss_count += 1
+        collapsed = key in self._inflight
+        if collapsed:
+            self.collapsed_count += 1
+        self._publish_counters()
+        # Shield so a disconnecting client does not cancel work other callers share
+        entry = await asyncio.shield(self._start_fill(key, compute, ttl))
+        return entry, 'COLLAPSED' if collapsed else 'MISS'
+
+    def _start_fill(self, key: str, compute: Callable[[], Awaitable[bytes]], ttl: int) -> asyncio.Future:
+        """Start (or join) the single in-flight computation for key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fill(key, compute, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._fill_done(key, done))
+        return task
+
+    def _fill_done(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Cache fill failed for {key}: {task.exception()}")
+
+    async def _fill(self, key: str, compute: Callable[[], Awaitable[bytes]], ttl: int) -> CacheEntry:
+        body = await compute()
+        entry = CacheEntry.build(body, ttl, self.stale_ttl, self.compression_level)
+        self.set(key, entry)
+        await self._set_shared(key, entry)
+        logger.debug(f"Cache SET for {key}, fresh for {ttl}s")
+        return entry
+
+    async def publish(self, entries: Dict[str, CacheEntry]) -> None:
+        """
+        Install precomputed entries. Local sets run without yielding, so requests
+        on this worker see either none or all of them.
+        """
+        for key, entry in entries.items():
+            self.set(key, entry)
+        for key, entry in entries.items():
+            await self._set_shared(key, entry)
+
+    def _shared_available(self) -> bool:
+        return self.shared_tier is not None and time.monotonic() >= self._shared_retry_at
+
+    def _shared_failed(self, operation: str, error: Exception) -> None:
+        # Back off so an unreachable shared tier does not add latency to every request
+        self._shared_retry_at = time.monotonic() + 30.0
+        logger.warning(f"Shared cache tier {operation} failed, using local tier only for 30s: {error}")
+
+    async def _get_shared(self, key: str) -> Optional[CacheEntry]:
+        if not self._shared_available():
+            return None
+        try:
+            return await self.shared_tier.get(key)
+        except Exception as e:
+            self._shared_failed('read', e)
+            return None
+
+    async def _set_shared(self, key: str, entry: CacheEntry) -> None:
+        if not self._shared_available():
+            return
+        try:
+            await self.shared_tier.set(key, entry)
+        except Exception as e:
+            self._shared_failed('write', e)
     
     def invalidate_pattern(self, pattern: str) -> int:
-        """Invalidate cache entries matching pattern"""
+        """Invalidate local cache entries matching pattern"""
         keys_to_remove = [key for key in self.cache.keys() if pattern in key]
         for key in keys_to_remove:
-            del self.cache[key]
+            self._remove_local(key)
         
         logger.info(f"Invalidated {len(keys_to_remove)} cache entries matching '{pattern}'")
         return len(keys_to_remove)
+
+    async def invalidate(self, pattern: Optional[str] = None) -> int:
+        """Invalidate entries matching pattern (all when None) in both tiers"""
+        if pattern:
+            removed = self.invalidate_pattern(pattern)
+        else:
+            removed = len(self.cache)
+            self.cache.clear()
+            self.current_bytes = 0
+        if self._shared_available():
+            try:
+                await self.shared_tier.invalidate(pattern)
+            except Exception as e:
+                self._shared_failed('invalidate', e)
+        return removed
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get cache performance statistics"""
-        total_requests = self.hit_count + self.miss_count
-        hit_rate = (self.hit_count / total_requests * 100) if total_requests > 0 else 0
+        """Get cache performance statistics (counters cover all workers when shared metrics are on)"""
+        counters = {name: getattr(self, name) for name in self.COUNTERS}
+        shared = get_shared_metrics()
+        if shared is not None:
+            self._publish_counters()
+            counters.update({name: int(value) for name, value in shared.totals('forecast_cache:').items()})
+        
+        total_requests = counters['hit_count'] + counters['stale_count'] + counters['miss_count']
+        served = counters['hit_count'] + counters['stale_count']
+        hit_rate = (served / total_requests * 100) if total_requests > 0 else 0
         
         return {
-            'hit_count': self.hit_count,
-            'miss_count': self.miss_count,
+            **counters,
             'total_requests': total_requests,
             'hit_rate_percent': round(hit_rate, 2),
             'cached_entries': len(self.cache),
-            'memory_usage_kb': sum(len(str(entry).encode()) for entry in self.cache.values()) / 1024
+            'inflight_computations': len(self._inflight),
+            'memory_usage_kb': self.current_bytes / 1024,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'shared_tier': getattr(self.shared_tier, 'name', None)
         }
     
     def cleanup_expired(self) -> int:
-        """Remove expired entries from cache"""
-        now = datetime.now()
+        """Remove entries that are past their stale window"""
+        now = time.time()
         expired_keys = [
             key for key, entry in self.cache.items() 
-            if now > entry['expires_at']
+            if not entry.is_servable(now)
         ]
         
         for key in expired_keys:
-            del self.cache[key]
+            self._remove_local(key)
             
         if expired_keys:
             logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
@@ -124,35 +462,35 @@ class CompressionMiddleware:
             'compression_ratio_sum': 0.0
         }
     
-    def should_compress(self, request: Request, response_body: bytes) -> bool:
-        """Determine if response should be compressed"""
-        # Skip compression if disabled
+    def should_compress(self, request_headers: Mapping[str, str], response_headers: Mapping[str, str],
+                        body: Optional[bytes] = None) -> bool:
+        """
+        The single gzip decision, shared by the request pipeline and cached responses.
+
+        ``body`` is the complete response body when it is known; streamed
+        responses (None) skip the minimum-size check.
+        """
         if not self.compression_enabled:
             return False
-            
-        # Check if already compressed by nginx proxy
-        if self._is_behind_proxy(request):
+
+        # nginx compresses proxied responses itself
+        if self._is_behind_proxy(request_headers):
             logger.debug("Skipping compression - behind nginx proxy")
             return False
-            
-        # Check if client accepts gzip
-        accept_encoding = request.headers.get('accept-encoding', '')
-        if 'gzip' not in accept_encoding.lower():
-            return False
-            
-        # Check minimum size
-        if len(response_body) < self.minimum_size:
+
+        if 'gzip' not in request_headers.get('accept-encoding', '').lower():
             return False
-            
-        # Check content type (only compress JSON/text responses)
-        content_type = getattr(response_body, 'media_type', 'application/json')
-        compressible_types = ['application/json', 'text/plain', 'text/html', 'application/xml']
-        if not any(ct in content_type for ct in compressible_types):
+
+        if 'content-encoding' in response_headers:
+            return False  # Already encoded (e.g. pre-compressed cache entry)
+
+        content_type = response_headers.get('content-type', '')
+        if not any(content_type.startswith(ct) for ct in COMPRESSIBLE_TYPES):
             return False
-            
-        return True
+
+        return body is None or len(body) >= self.minimum_size
     
-    def _is_behind_proxy(self, request: Request) -> bool:
+    def _is_behind_proxy(self, request_headers: Mapping[str, str]) -> bool:
         """Check if request is coming through nginx proxy"""
         # Check for common proxy headers
         proxy_headers = [
@@ -163,35 +501,43 @@ class CompressionMiddleware:
         ]
         
         for header in proxy_headers:
-            if request.headers.get(header):
+            if request_headers.get(header):
                 return True
                 
         # Check if nginx compression is already enabled
-        return request.headers.get('accept-encoding', '').find('gzip') != -1 and \
-               os.getenv('NGINX_COMPRESSION', 'false').lower() == 'true'
+        return os.getenv('NGINX_COMPRESSION', 'false').lower() == 'true'
     
     def compress_response(self, response_body: bytes) -> bytes:
         """Compress response body using gzip and track metrics"""
-        original_size = len(response_body)
         compressed_body = gzip.compress(response_body, compresslevel=self.compression_level)
-        compressed_size = len(compressed_body)
-        
-        # Update compression stats
+        self.track_compression(len(response_body), len(compressed_body))
+        return compressed_body
+    
+    def track_compression(self, original_size: int, compressed_size: int) -> None:
+        """Record a compressed response, including ones served pre-compressed from cache"""
         self.compression_stats['total_requests'] += 1
         self.compression_stats['compressed_requests'] += 1
         self.compression_stats['bytes_saved'] += (original_size - compressed_size)
         
         compression_ratio = compressed_size / original_size if original_size > 0 else 1.0
         self.compression_stats['compression_ratio_sum'] += compression_ratio
+        self._publish_stats()
         
         logger.debug(f"Compressed response: {original_size} -> {compressed_size} bytes "
                     f"({compression_ratio:.2%} of original)")
-        
-        return compressed_body
+    
+    def _publish_stats(self) -> None:
+        shared = get_shared_metrics()
+        if shared is not None:
+            shared.publish('compression:', self.compression_stats)
     
     def get_compression_stats(self) -> Dict[str, Any]:
-        """Get compression performance statistics"""
+        """Get compression performance statistics (all workers when shared metrics are on)"""
         stats = self.compression_stats.copy()
+        shared = get_shared_metrics()
+        if shared is not None:
+            self._publish_stats()
+            stats.update(shared.totals('compression:'))
         if stats['compressed_requests'] > 0:
             stats['average_compression_ratio'] = stats['compression_ratio_sum'] / stats['compressed_requests']
             stats['compression_rate'] = stats['compressed_requests'] / stats['total_requests']
@@ -231,10 +577,20 @@ class RateLimitMiddleware:
         self.rate_limit_stats['total_requests'] += 1
         if limited:
             self.rate_limit_stats['limited_requests'] += 1
+        
+        shared = get_shared_metrics()
+        if shared is not None:
+            shared.publish('rate_limit:', {
+                'total_requests': self.rate_limit_stats['total_requests'],
+                'limited_requests': self.rate_limit_stats['limited_requests']
+            })
     
     def get_rate_limit_stats(self) -> Dict[str, Any]:
         """Get rate limiting statistics"""
         stats = self.rate_limit_stats.copy()
+        shared = get_shared_metrics()
+        if shared is not None:
+            stats.update({name: int(value) for name, value in shared.totals('rate_limit:').items()})
         if stats['total_requests'] > 0:
             stats['limit_rate'] = stats['limited_requests'] / stats['total_requests']
         else:
@@ -247,7 +603,7 @@ class PerformanceMiddleware:
     """
     
     def __init__(self):
-        self.cache = ForecastCache()
+        self.cache = ForecastCache(shared_tier=create_shared_cache_tier())
         self.compression = CompressionMiddleware()
         self.rate_limiter = RateLimitMiddleware()
         self.request_times: Dict[str, float] = {}
@@ -258,13 +614,7 @@ class PerformanceMiddleware:
         """Process request with performance optimizations"""
         start_time = time.time()
         
-        # Try cache for forecast requests
-        if request.url.path == "/forecast":
-            cached_response = await self._try_cache(request)
-            if cached_response:
-                return cached_response
-        
-        # Process request
+        # Process request (forecast caching happens in the handler, after auth)
         response = await call_next(request)
         
         # Apply performance optimizations
@@ -272,24 +622,25 @@ class PerformanceMiddleware:
         
         return response
     
-    async def _try_cache(self, request: Request) -> Optional[Response]:
-        """Try to serve request from cache"""
-        params = dict(request.query_params)
-        horizon = params.get('horizon', '24h')
-        variables = params.get('vars', 't2m,u10,v10')
+    def cached_response(self, request: Request, entry: CacheEntry, cache_status: str) -> Response:
+        """Build a response straight from cached bytes, honouring ETag and gzip negotiation"""
+        headers = {
+            'X-Cache': cache_status,
+            'ETag': entry.etag,
+            'Cache-Control': f"public, max-age={max(0, int(entry.fresh_until - time.time()))}",
+            'Vary': 'Accept-Encoding'
+        }
         
-        cached_data = self.cache.get(horizon, variables)
-        if cached_data:
-            # Add cache headers
-            headers = {
-                'X-Cache': 'HIT',
-                'X-Cache-Key': self.cache._generate_key(horizon, variables),
-                'Cache-Control': 'public, max-age=300'
-            }
-            
-            return JSONResponse(content=cached_data, headers=headers)
+        if request.headers.get('if-none-match') == entry.etag:
+            return Response(status_code=304, headers=headers)
         
-        return None
+        # Serve the pre-compressed variant; the pipeline sees Content-Encoding and leaves it alone
+        if self.compression.should_compress(request.headers, {'content-type': 'application/json'}, entry.body):
+            self.compression.track_compression(len(entry.body), len(entry.gzip_body))
+            headers['Content-Encoding'] = 'gzip'
+            return Response(content=entry.gzip_body, media_type='application/json', headers=headers)
+        
+        return Response(content=entry.body, media_type='application/json', headers=headers)
     
     async def _optimize_response(self, request: Request, response: Response, start_time: float) -> Response:
         """Apply optimizations to response"""
@@ -307,10 +658,6 @@ class PerformanceMiddleware:
         response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
         response.headers["Content-Security-Policy"] = "default-src 'self'; script-src 'self'; object-src 'none'"
         
-        # Cache forecast responses
-        if request.url.path == "/forecast" and response.status_code == 200:
-            await self._cache_response(request, response)
-        
         # Apply compression if beneficial
         if hasattr(response, 'body'):
             response = await self._apply_compression(request, response)
@@ -321,34 +668,6 @@ class PerformanceMiddleware:
         
         return response
     
-    async def _cache_response(self, request: Request, response: Response) -> None:
-        """Cache successful forecast responses"""
-        if not hasattr(response, 'body'):
-            return
-            
-        try:
-            # Parse response body
-            body_bytes = response.body
-            if isinstance(body_bytes, bytes):
-                response_data = json.loads(body_bytes.decode())
-            else:
-                response_data = body_bytes
-            
-            # Extract cache parameters
-            params = dict(request.query_params)
-            horizon = params.get('horizon', '24h')
-            variables = params.get('vars', 't2m,u10,v10')
-            
-            # Determine TTL based on horizon
-            ttl_map = {'6h': 180, '12h': 300, '24h': 600, '48h': 900}  # seconds
-            ttl = ttl_map.get(horizon, 300)
-            
-            # Cache the response
-            self.cache.set(horizon, variables, response_data, ttl)
-            
-        except Exception as e:
-            logger.error(f"Failed to cache response: {e}")
-    
     async def _apply_compression(self, request: Request, response: Response) -> Response:
         """Apply gzip compression if beneficial"""
         if not hasattr(response, 'body'):
@@ -359,7 +678,7 @@ class PerformanceMiddleware:
         try:
             body_bytes = response.body if isinstance(response.body, bytes) else response.body.encode()
             
-            if self.compression.should_compress(request, body_bytes):
+            if self.compression.should_compress(request.headers, response.headers, body_bytes):
                 compressed_body = self.compression.compress_response(body_bytes)
                 
                 # Update response with compressed body and headers
@@ -406,7 +725,7 @@ class PerformanceMiddleware:
                 'stats': rate_limit_stats
             },
             'optimization': {
-                'cache_cleanup_needed': len(self.cache.cache) > 1000,
+                'cache_cleanup_needed': len(self.cache.cache) >= self.cache.max_entries,
                 'performance_target_ms': 100,
                 'total_middleware_requests': compression_stats.get('total_requests', 0)
             }
@@ -439,12 +758,14 @@ def get_rate_limit_config() -> str:
 
 async def clear_cache(pattern: Optional[str] = None) -> Dict[str, Any]:
     """Clear cache entries (admin endpoint)"""
+    cache = performance_middleware.cache
+    cleared = await cache.invalidate(pattern)
     if pattern:
-        cleared = performance_middleware.cache.invalidate_pattern(pattern)
         return {'cleared_entries': cleared, 'pattern': pattern}
     else:
-        total_entries = len(performance_middleware.cache.cache)
-        performance_middleware.cache.cache.clear()
-        performance_middleware.cache.hit_count = 0
-        performance_middleware.cache.miss_count = 0
-        return {'cleared_entries': total_entries, 'pattern': 'all'}
\ No newline at end of file
+        cache.hit_count = 0
+        cache.miss_count = 0
+        cache.stale_count = 0
+        cache.shared_hit_count = 0
+        cache.collapsed_count = 0
+        return {'cleared_entries': cleared, 'pattern': 'all'}
\ No newline at end of file
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Adelaide Weather Forecasting API - Request Pipeline Middleware
+==============================================================
+
+Single pure-ASGI middleware that replaces the stacked SecurityMiddleware,
+RequestLoggingMiddleware, SlowAPIMiddleware, PerformanceMiddleware and
+GZipMiddleware layers.
+
+One pass over scope/receive/send:
+- Correlation ID assignment (request.state.correlation_id, X-Correlation-ID)
+- Request start/completion logging
+- Security validation (size, headers, query parameters, content type)
+- SlowAPI default/application rate limits (decorated routes enforce their own)
+- Security and timing headers
+- A single gzip decision, streamed chunk by chunk without buffering the body
+
+Author: Performance Engineering
+Version: 1.0.0 - Pure ASGI pipeline
+"""
+
+import time
+import uuid
+import zlib
+import logging
+import traceback
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import structlog
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from slowapi.middleware import _find_route_handler, _should_exempt, async_check_limits
+
+from api.security_middleware import SecurityConfig, SecurityMiddleware
+from api.performance_middleware import PerformanceMiddleware, performance_middleware
+
+logger = logging.getLogger(__name__)
+
+# Responses slower than this are logged as slow (matches PerformanceMiddleware)
+SLOW_RESPONSE_SECONDS = 0.1
+
+
+class RequestPipelineMiddleware:
+    """
+    Pure-ASGI request pipeline for the API.
+
+    Register with ``app.add_middleware(RequestPipelineMiddleware)``; CORS and
+    TrustedHost (already pure ASGI) stay outside it.
+    """
+
+    def __init__(self, app: ASGIApp, security: Optional[SecurityMiddleware] = None,
+                 performance: Optional[PerformanceMiddleware] = None):
+        self.app = app
+        self.security = security or SecurityMiddleware(None)
+        self.performance = performance or performance_middleware
+        self.logger = structlog.get_logger("request_middleware")
+
+        self.compression = self.performance.compression
+        self.security_headers = {
+            name.lower(): value for name, value in SecurityConfig.SECURITY_HEADERS.items()
+        }
+        self._route_handlers: Dict[Tuple[str, str], Optional[Callable]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        correlation_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+        request = Request(scope, receive)
+
+        self.logger.info(
+            "request_started",
+            method=request.method,
+            url=str(request.url),
+            path=request.url.path,
+            query_params=dict(request.query_params),
+            client_ip=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+            correlation_id=correlation_id,
+        )
+
+        responder = _PipelineResponder(self, request, send, start_time, correlation_id)
+
+        try:
+            error_response = await self.security.check_request(request)
+            if error_response is None:
+                error_response = await self._check_rate_limits(request, responder)
+
+            if error_response is not None:
+                await error_response(scope, receive, responder.send)
+            else:
+                await self.app(scope, receive, responder.send)
+        except Exception as exc:
+            self.logger.error(
+                "request_failed",
+                method=request.method,
+                path=request.url.path,
+                duration_ms=round((time.perf_counter() - start_time) * 1000, 2),
+                correlation_id=correlation_id,
+                error_type=type(exc).__name__,
+                error_message=str(exc),
+                traceback=traceback.format_exc(),
+            )
+            raise
+
+        duration = time.perf_counter() - start_time
+        self.logger.info(
+            "request_completed",
+            method=request.method,
+            path=request.url.path,
+            status_code=responder.status_code,
+            duration_ms=round(duration * 1000, 2),
+            correlation_id=correlation_id,
+        )
+        if duration > SLOW_RESPONSE_SECONDS:
+            logger.warning(f"Slow response: {request.url.path} took {duration*1000:.2f}ms")
+
+    async def _check_rate_limits(self, request: Request, responder: '_PipelineResponder') -> Optional[Any]:
+        """Apply SlowAPI default limits to routes without their own @limiter.limit."""
+        app = request.scope.get("app")
+        limiter = getattr(getattr(app, "state", None), "limiter", None)
+        if limiter is None or not limiter.enabled:
+            return None
+
+        route_key = (request.scope["method"], request.scope["path"])
+        if route_key not in self._route_handlers:
+            if len(self._route_handlers) > 1024:
+                self._route_handlers.clear()
+            self._route_handlers[route_key] = _find_route_handler(app.routes, request.scope)
+        handler = self._route_handlers[route_key]
+
+        if _should_exempt(limiter, handler):
+            return None
+
+        error_response, inject_headers = await async_check_limits(limiter, request, handler, app)
+        if inject_headers:
+            responder.limiter = limiter
+        return error_response
+
+
+class _PipelineResponder:
+    """Per-request send wrapper: headers on start, optional streaming gzip on body."""
+
+    def __init__(self, pipeline: RequestPipelineMiddleware, request: Request, send: Send,
+                 start_time: float, correlation_id: str):
+        self.pipeline = pipeline
+        self.request = request
+        self.downstream = send
+        self.start_time = start_time
+        self.correlation_id = correlation_id
+        self.status_code: Optional[int] = None
+        self.limiter = None
+        self.pending_start: Optional[Message] = None
+        self.compressor = None
+        self.original_size = 0
+        self.compressed_size = 0
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.status_code = message["status"]
+            headers = MutableHeaders(scope=message)
+            self._add_headers(headers)
+
+            if self.pipeline.compression.should_compress(self.request.headers, headers):
+                # Hold the start message until the first body chunk shows the size
+                self.pending_start = message
+                return
+            await self.downstream(message)
+            return
+
+        if message_type == "http.response.body" and self.pending_start is not None:
+            await self._send_first_body(message)
+            return
+
+        if message_type == "http.response.body" and self.compressor is not None:
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            data = self.compressor.compress(body)
+            if not more_body:
+                data += self.compressor.flush()
+            self._track(len(body), len(data), done=not more_body)
+            await self.downstream({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        await self.downstream(message)
+
+    def _add_headers(self, headers: MutableHeaders) -> None:
+        for name, value in self.pipeline.security_headers.items():
+            headers[name] = value
+
+        elapsed = time.perf_counter() - self.start_time
+        headers["x-correlation-id"] = self.correlation_id
+        headers["x-response-time"] = f"{elapsed*1000:.2f}ms"
+        headers["x-process-time"] = str(int(elapsed * 1000))
+
+        if self.limiter is not None:
+            self.limiter._inject_asgi_headers(headers, self.request.state.view_rate_limit)
+
+    async def _send_first_body(self, message: Message) -> None:
+        start = self.pending_start
+        self.pending_start = None
+        headers = MutableHeaders(scope=start)
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        compression = self.pipeline.compression
+
+        if not more_body and not compression.should_compress(self.request.headers, headers, body):
+            await self.downstream(start)
+            await self.downstream(message)
+            return
+
+        # gzip container (wbits=31) so streamed chunks form one valid gzip body
+        self.compressor = zlib.compressobj(compression.compression_level, zlib.DEFLATED, 31)
+        data = self.compressor.compress(body)
+        if not more_body:
+            data += self.compressor.flush()
+
+        headers["content-encoding"] = "gzip"
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(len(data))
+
+        self._track(len(body), len(data), done=not more_body)
+        await self.downstream(start)
+        await self.downstream({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _track(self, original: int, compressed: int, done: bool) -> None:
+        self.original_size += original
+        self.compressed_size += compressed
+        if done:
+            self.pipeline.compression.track_compression(self.original_size, self.compressed_size)
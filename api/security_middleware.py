@@ -11,6 +11,7 @@ Features:
 - XSS protection through input sanitization
 - SQL injection protection (defensive)
 - Input validation and normalization
+- Allowlist grammars for known query parameters, memoized per query string
 - Rate limiting enhancement
 - Error message sanitization
 - Security headers enforcement
@@ -24,8 +25,12 @@ import html
 import json
 import time
 import logging
-from typing import Dict, Any, Optional, Set, List, Union
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Set, List, Tuple, Union
 from datetime import datetime, timezone
+from urllib.parse import parse_qsl
 
 from fastapi import Request, Response, HTTPException, status
 from fastapi.responses import JSONResponse
@@ -47,6 +52,21 @@ class SecurityConfig:
     VARIABLE_PATTERN = re.compile(r'^[a-zA-Z0-9_]{1,20}$')
     TOKEN_PATTERN = re.compile(r'^[a-zA-Z0-9\-_.]{8,128}$')
     
+    # Allowlist grammars for known query parameters (matched with fullmatch)
+    VALID_HORIZONS = frozenset({'6h', '12h', '24h', '48h'})
+    VARIABLES_GRAMMAR = re.compile(r'\s*(?:[A-Za-z0-9_]{1,20}\s*)?(?:,\s*(?:[A-Za-z0-9_]{1,20}\s*)?)*')
+    K_GRAMMAR = re.compile(r'[0-9]{1,3}')
+    QUERY_TIME_GRAMMAR = re.compile(
+        r'[0-9]{4}-[0-9]{2}-[0-9]{2}'
+        r'(?:[T ][0-9]{2}:[0-9]{2}(?::[0-9]{2}(?:\.[0-9]{1,9})?)?)?'
+        r'(?:Z|[+-][0-9]{2}:?[0-9]{2})?'
+    )
+    MAX_VARIABLES = 20
+    
+    # Memoized query validations (raw query strings longer than the key limit are not cached)
+    QUERY_CACHE_SIZE = int(os.getenv('QUERY_VALIDATION_CACHE_SIZE', '256'))
+    QUERY_CACHE_MAX_KEY_LENGTH = 1024
+    
     # Dangerous patterns for injection detection
     SQL_INJECTION_PATTERNS = [
         re.compile(r'(\bunion\b|\bselect\b|\binsert\b|\bupdate\b|\bdelete\b|\bdrop\b)', re.IGNORECASE),
@@ -178,6 +198,152 @@ class InputSanitizer:
         return token
 
 
+@dataclass(frozen=True)
+class ValidatedQuery:
+    """Query parameters that passed validation, parsed for the handlers."""
+    params: Dict[str, str]
+    horizon: Optional[str] = None
+    vars: Optional[Tuple[str, ...]] = None
+    variables: Optional[Tuple[str, ...]] = None
+    k: Optional[int] = None
+    query_time: Optional[str] = None
+
+
+class QueryValidator:
+    """
+    Allowlist validation for query strings.
+    
+    Known parameters (horizon, vars/variables, k, query_time) are checked
+    against precompiled grammars in a single match each; only unknown
+    parameters go through InputSanitizer's generic regex scan. Results
+    (including rejections) are memoized per raw query string in a small LRU,
+    so repeated requests skip parsing entirely.
+    """
+    
+    def __init__(self, cache_size: Optional[int] = None):
+        self.cache_size = cache_size if cache_size is not None else SecurityConfig.QUERY_CACHE_SIZE
+        # Rejections are kept as (violation_type, message, status_code): caching the exception
+        # itself would grow its traceback (and keep request frames alive) on every re-raise
+        self._cache: "OrderedDict[bytes, Union[ValidatedQuery, Tuple[str, str, int]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def check_horizon(value: str) -> str:
+        horizon = value.strip()
+        if horizon not in SecurityConfig.VALID_HORIZONS:
+            raise ValueError("Invalid horizon format (must be 6h, 12h, 24h or 48h)")
+        return horizon
+    
+    @staticmethod
+    def check_variables(value: str) -> Tuple[str, ...]:
+        if not SecurityConfig.VARIABLES_GRAMMAR.fullmatch(value):
+            raise ValueError("Invalid variable list")
+        variables = tuple(var.strip() for var in value.split(',') if var.strip())
+        if len(variables) > SecurityConfig.MAX_VARIABLES:
+            raise ValueError(f"Too many variables requested (max {SecurityConfig.MAX_VARIABLES})")
+        return variables
+    
+    @staticmethod
+    def check_k(value: str) -> int:
+        if not SecurityConfig.K_GRAMMAR.fullmatch(value):
+            raise ValueError("k must be a positive integer")
+        return int(value)
+    
+    @staticmethod
+    def check_query_time(value: str) -> str:
+        if not SecurityConfig.QUERY_TIME_GRAMMAR.fullmatch(value):
+            raise ValueError("query_time must be an ISO 8601 datetime")
+        return value
+    
+    def validate(self, raw_query: bytes) -> ValidatedQuery:
+        """Validate a raw query string, raising SecurityException on rejection."""
+        cacheable = len(raw_query) <= SecurityConfig.QUERY_CACHE_MAX_KEY_LENGTH
+        if cacheable:
+            result = self._cache.get(raw_query)
+            if result is not None:
+                self.hits += 1
+                self._cache.move_to_end(raw_query)
+                if isinstance(result, tuple):
+                    raise SecurityException(*result)
+                return result
+        self.misses += 1
+        
+        try:
+            result = self._validate(raw_query)
+        except SecurityException as exc:
+            if cacheable and self.cache_size > 0:
+                self._remember(raw_query, (exc.violation_type, exc.message, exc.status_code))
+            raise
+        
+        if cacheable and self.cache_size > 0:
+            self._remember(raw_query, result)
+        return result
+    
+    def _remember(self, raw_query: bytes, result: Union[ValidatedQuery, Tuple[str, str, int]]):
+        self._cache[raw_query] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def _validate(self, raw_query: bytes) -> ValidatedQuery:
+        # Same decoding as starlette's QueryParams; the last value of a repeated key wins
+        params = dict(parse_qsl(raw_query.decode('latin-1'), keep_blank_values=True))
+        
+        if len(params) > SecurityConfig.MAX_QUERY_PARAMS:
+            raise SecurityException(
+                "too_many_params",
+                f"Too many query parameters (max {SecurityConfig.MAX_QUERY_PARAMS})",
+                400
+            )
+        
+        parsed: Dict[str, Any] = {}
+        for key, value in params.items():
+            if len(key) > 100:
+                raise SecurityException("param_name_too_long", "Parameter name too long", 400)
+            
+            if len(value) > SecurityConfig.MAX_QUERY_PARAM_LENGTH:
+                raise SecurityException(
+                    "param_value_too_long",
+                    f"Parameter value too long (max {SecurityConfig.MAX_QUERY_PARAM_LENGTH})",
+                    400
+                )
+            
+            try:
+                if key == "horizon":
+                    parsed["horizon"] = self.check_horizon(value)
+                elif key in ("vars", "variables"):
+                    parsed[key] = self.check_variables(value)
+                elif key == "k":
+                    parsed["k"] = self.check_k(value)
+                elif key == "query_time":
+                    parsed["query_time"] = self.check_query_time(value)
+                else:
+                    # Generic sanitization only for parameters without a grammar
+                    InputSanitizer.sanitize_string(value, SecurityConfig.MAX_QUERY_PARAM_LENGTH)
+            except ValueError as e:
+                raise SecurityException(
+                    "invalid_parameter",
+                    f"Invalid parameter '{key}': {str(e)}",
+                    400
+                )
+        
+        return ValidatedQuery(params=params, **parsed)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'cached_queries': len(self._cache),
+            'cache_size': self.cache_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate_percent': round(self.hits / total * 100, 2) if total else 0.0
+        }
+
+
+# Shared validator so the memo is reused by the middleware and the handlers
+query_validator = QueryValidator()
+
+
 class SecurityMiddleware(BaseHTTPMiddleware):
     """Comprehensive security middleware for request validation and protection."""
     
@@ -190,6 +356,29 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     
     async def dispatch(self, request: Request, call_next):
         """Process request with comprehensive security checks."""
+        error_response = await self.check_request(request)
+        if error_response is not None:
+            return error_response
+        
+        try:
+            # Process request
+            response = await call_next(request)
+        except Exception as exc:
+            self.blocked_requests += 1
+            self._log_unexpected_error(request, exc, 0.0)
+            return self._error_response(500, "Security validation failed")
+        
+        # Add security headers
+        self._add_security_headers(response)
+        return response
+    
+    async def check_request(self, request: Request) -> Optional[Response]:
+        """
+        Run all request security validation.
+        
+        Returns:
+            An error response if the request must be rejected, otherwise None
+        """
         start_time = time.time()
         self.request_count += 1
         
@@ -200,12 +389,6 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             await self._validate_query_parameters(request)
             await self._validate_content_type(request)
             
-            # Process request
-            response = await call_next(request)
-            
-            # Add security headers
-            self._add_security_headers(response)
-            
             # Log successful security validation
             duration = time.time() - start_time
             self.logger.debug(
@@ -216,7 +399,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 correlation_id=getattr(request.state, 'correlation_id', None)
             )
             
-            return response
+            return None
             
         except SecurityException as exc:
             self.blocked_requests += 1
@@ -236,43 +419,39 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             )
             
             # Return sanitized error response
-            return JSONResponse(
-                status_code=exc.status_code,
-                content={
-                    "error": {
-                        "code": exc.status_code,
-                        "message": self._sanitize_error_message(exc.message),
-                        "timestamp": datetime.now(timezone.utc).isoformat()
-                    }
-                }
-            )
+            return self._error_response(exc.status_code, self._sanitize_error_message(exc.message))
         
         except Exception as exc:
             self.blocked_requests += 1
-            duration = time.time() - start_time
-            
-            # Log unexpected security error
-            self.logger.error(
-                "security_middleware_error",
-                error_type=type(exc).__name__,
-                error_message=str(exc),
-                path=request.url.path,
-                method=request.method,
-                duration_ms=round(duration * 1000, 2),
-                correlation_id=getattr(request.state, 'correlation_id', None)
-            )
+            self._log_unexpected_error(request, exc, time.time() - start_time)
             
             # Return generic error to prevent information leakage
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "error": {
-                        "code": 500,
-                        "message": "Security validation failed",
-                        "timestamp": datetime.now(timezone.utc).isoformat()
-                    }
+            return self._error_response(500, "Security validation failed")
+    
+    def _log_unexpected_error(self, request: Request, exc: Exception, duration: float):
+        """Log an unexpected error raised while securing a request."""
+        self.logger.error(
+            "security_middleware_error",
+            error_type=type(exc).__name__,
+            error_message=str(exc),
+            path=request.url.path,
+            method=request.method,
+            duration_ms=round(duration * 1000, 2),
+            correlation_id=getattr(request.state, 'correlation_id', None)
+        )
+    
+    def _error_response(self, status_code: int, message: str) -> JSONResponse:
+        """Build the sanitized JSON error body used for rejected requests."""
+        return JSONResponse(
+            status_code=status_code,
+            content={
+                "error": {
+                    "code": status_code,
+                    "message": message,
+                    "timestamp": datetime.now(timezone.utc).isoformat()
                 }
-            )
+            }
+        )
     
     async def _validate_request_size(self, request: Request):
         """Validate request size to prevent DoS attacks."""
@@ -327,50 +506,8 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             )
     
     async def _validate_query_parameters(self, request: Request):
-        """Validate query parameters for security issues."""
-        query_params = dict(request.query_params)
-        
-        # Check number of parameters
-        if len(query_params) > SecurityConfig.MAX_QUERY_PARAMS:
-            raise SecurityException(
-                "too_many_params",
-                f"Too many query parameters (max {SecurityConfig.MAX_QUERY_PARAMS})",
-                400
-            )
-        
-        # Validate each parameter
-        for key, value in query_params.items():
-            # Check parameter name
-            if len(key) > 100:
-                raise SecurityException(
-                    "param_name_too_long",
-                    "Parameter name too long",
-                    400
-                )
-            
-            # Check parameter value
-            if len(value) > SecurityConfig.MAX_QUERY_PARAM_LENGTH:
-                raise SecurityException(
-                    "param_value_too_long",
-                    f"Parameter value too long (max {SecurityConfig.MAX_QUERY_PARAM_LENGTH})",
-                    400
-                )
-            
-            # Sanitize and validate based on parameter name
-            try:
-                if key == "horizon":
-                    InputSanitizer.validate_horizon(value)
-                elif key == "vars":
-                    InputSanitizer.validate_variables(value)
-                else:
-                    # Generic sanitization for other parameters
-                    InputSanitizer.sanitize_string(value, SecurityConfig.MAX_QUERY_PARAM_LENGTH)
-            except ValueError as e:
-                raise SecurityException(
-                    "invalid_parameter",
-                    f"Invalid parameter '{key}': {str(e)}",
-                    400
-                )
+        """Validate query parameters once per request; handlers reuse the result."""
+        request.state.validated_query = query_validator.validate(request.scope.get("query_string", b""))
     
     async def _validate_content_type(self, request: Request):
         """Validate request content type."""
@@ -470,14 +607,26 @@ class ValidationUtils:
     """Additional validation utilities for API endpoints."""
     
     @staticmethod
-    def validate_forecast_request(horizon: str, variables: Optional[str]) -> Dict[str, Any]:
-        """Comprehensive validation for forecast request parameters."""
+    def validate_forecast_request(horizon: str, variables: Optional[str],
+                                  validated: Optional[ValidatedQuery] = None) -> Dict[str, Any]:
+        """
+        Comprehensive validation for forecast request parameters.
+        
+        When the security middleware already validated the query string, pass
+        its ValidatedQuery so the parameters are not checked a second time.
+        """
         try:
-            # Validate horizon
-            validated_horizon = InputSanitizer.validate_horizon(horizon)
+            # Validate horizon (the handler default applies when the query omits it)
+            if validated is not None and validated.horizon is not None:
+                validated_horizon = validated.horizon
+            else:
+                validated_horizon = QueryValidator.check_horizon(horizon)
             
             # Validate variables
-            validated_variables = InputSanitizer.validate_variables(variables or "")
+            if validated is not None:
+                validated_variables = list(validated.vars or ())
+            else:
+                validated_variables = list(QueryValidator.check_variables(variables or ""))
             
             # Additional business logic validation
             if validated_horizon in ["48h"] and len(validated_variables) > 10:
@@ -526,5 +675,8 @@ __all__ = [
     'SecurityConfig',
     'InputSanitizer',
     'SecurityException',
-    'ValidationUtils'
+    'ValidationUtils',
+    'QueryValidator',
+    'ValidatedQuery',
+    'query_validator'
 ]
\ No newline at end of file
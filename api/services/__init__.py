@@ -7,6 +7,7 @@ Production services for the Adelaide Weather Forecast API.
 Services:
 - AnalogSearchService: Async FAISS-based analog search with connection pooling
 - FAISSHealthMonitor: Real-time FAISS performance and health monitoring
+- LatencySketch: Mergeable streaming latency percentiles
 """
 
 from .analog_search import (
@@ -24,6 +25,11 @@ from .faiss_health_monitoring import (
     get_faiss_health_monitor
 )
 
+from .latency_sketch import (
+    LatencySketch,
+    SlidingWindowSketch
+)
+
 __all__ = [
     'AnalogSearchService',
     'AnalogSearchConfig', 
@@ -33,5 +39,7 @@ __all__ = [
     'FAISSHealthMonitor',
     'FAISSQueryMetrics',
     'IndexHealthMetrics',
-    'get_faiss_health_monitor'
+    'get_faiss_health_monitor',
+    'LatencySketch',
+    'SlidingWindowSketch'
 ]
\ No newline at end of file
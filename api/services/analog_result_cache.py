@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Locality-Keyed Analog Search Result Cache
+=========================================
+
+Real-time traffic repeats the same search many times: the current-conditions
+input only changes when new data arrives, so consecutive queries produce
+(nearly) identical embeddings. AnalogResultCache returns the neighbours of a
+previous query when the new one is within a cosine tolerance of it, so
+steady-state requests skip the FAISS search.
+
+- Queries are bucketed per horizon by a random-hyperplane LSH code (SimHash)
+  of the normalized embedding; near-identical embeddings share a code
+- Lookups also probe the codes obtained by flipping the bits whose
+  projections are closest to zero, so queries near a hyperplane still hit
+- A candidate is only returned after verifying the exact cosine distance to
+  its cached query, and only if it holds at least the requested k neighbours
+- Buckets are evicted least-recently-used once ``max_entries`` is exceeded
+- The cache empties itself when the analog data generation changes (rebuilt
+  indices, embeddings or outcomes)
+
+Author: Performance Engineering
+Version: 1.0.0 - Analog result cache
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_HASH_BITS = 16
+DEFAULT_PROBE_BITS = 2
+DEFAULT_BUCKET_CAPACITY = 4
+
+
+@dataclass
+class CachedSearch:
+    """Neighbours of one cached query, nearest first."""
+    query: np.ndarray
+    indices: np.ndarray
+    distances: np.ndarray
+    metadata: Dict[str, Any]
+
+
+class AnalogResultCache:
+    """LRU cache of analog search results keyed by embedding locality."""
+
+    def __init__(self, max_entries: int = 1024, tolerance: float = 1e-4,
+                 hash_bits: int = DEFAULT_HASH_BITS, probe_bits: int = DEFAULT_PROBE_BITS,
+                 bucket_capacity: int = DEFAULT_BUCKET_CAPACITY,
+                 generation: Optional[Callable[[], Hashable]] = None, seed: int = 0):
+        """
+        Args:
+            max_entries: Cached queries kept across all horizons (0 disables the cache)
+            tolerance: Maximum cosine distance (1 - cos) between a query and a cached one
+            hash_bits: Hyperplanes per LSH code
+            probe_bits: Low-margin bits flipped at lookup (2**probe_bits buckets probed)
+            bucket_capacity: Cached queries kept per bucket (oldest replaced first)
+            generation: Returns the current analog data generation; a change clears the cache
+            seed: Seed of the hyperplanes (fixed, so codes are stable across restarts)
+        """
+        if not 0 <= probe_bits <= hash_bits <= 63:
+            raise ValueError("need 0 <= probe_bits <= hash_bits <= 63")
+        self.max_entries = max_entries
+        self.tolerance = tolerance
+        self.hash_bits = hash_bits
+        self.probe_bits = probe_bits
+        self.bucket_capacity = bucket_capacity
+        self._generation_fn = generation
+        self.seed = seed
+        self.generation: Optional[Hashable] = None
+        self._planes: Dict[int, np.ndarray] = {}
+        self._buckets: 'OrderedDict[Tuple[int, int], List[CachedSearch]]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'rejected': 0, 'stores': 0,
+                      'evictions': 0, 'invalidations': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def lookup(self, horizon: int, query: np.ndarray, k: int) -> Optional[CachedSearch]:
+        """Cached neighbours for a query within tolerance, truncated to k; None on a miss."""
+        if not self.enabled:
+            return None
+        vector = self._normalize(query)
+        codes = self._probe_codes(vector)
+        with self._lock:
+            self._check_generation()
+            best, best_key, best_similarity = None, None, 1.0 - self.tolerance
+            for code in codes:
+                entries = self._buckets.get((horizon, code))
+                if not entries:
+                    continue
+                for entry in entries:
+                    if len(entry.indices) < k:
+                        continue
+                    similarity = float(np.dot(entry.query, vector))
+                    if similarity >= best_similarity:
+                        best, best_key, best_similarity = entry, (horizon, code), similarity
+            if best is None:
+                candidates = any(self._buckets.get((horizon, code)) for code in codes)
+                self.stats['rejected' if candidates else 'misses'] += 1
+                return None
+            self._buckets.move_to_end(best_key)
+            self.stats['hits'] += 1
+        return CachedSearch(query=best.query, indices=best.indices[:k], distances=best.distances[:k],
+                            metadata={**best.metadata, 'cache_similarity': best_similarity})
+
+    def store(self, horizon: int, query: np.ndarray, indices: np.ndarray, distances: np.ndarray,
+              metadata: Optional[Dict[str, Any]] = None):
+        """Cache the neighbours of a query (copies the arrays)."""
+        if not self.enabled:
+            return
+        vector = self._normalize(query)
+        key = (horizon, self._code(vector))
+        entry = CachedSearch(query=vector, indices=np.array(indices, copy=True),
+                             distances=np.array(distances, copy=True), metadata=dict(metadata or {}))
+        with self._lock:
+            self._check_generation()
+            entries = self._buckets.setdefault(key, [])
+            # A near-duplicate of an existing entry replaces it rather than adding a copy
+            for i, existing in enumerate(entries):
+                if float(np.dot(existing.query, vector)) >= 1.0 - self.tolerance:
+                    entries.pop(i)
+                    self._size -= 1
+                    break
+            if len(entries) >= self.bucket_capacity:
+                entries.pop(0)
+                self._size -= 1
+            entries.append(entry)
+            self._size += 1
+            self._buckets.move_to_end(key)
+            self.stats['stores'] += 1
+            while self._size > self.max_entries:
+                _, evicted = self._buckets.popitem(last=False)
+                self._size -= len(evicted)
+                self.stats['evictions'] += len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._size = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses'] + self.stats['rejected']
+        return {'entries': self._size, 'buckets': len(self._buckets), 'max_entries': self.max_entries,
+                'tolerance': self.tolerance, 'generation': self.generation,
+                'hit_rate': self.stats['hits'] / lookups if lookups else 0.0, **self.stats}
+
+    # -------------------------------------------------------------- internals
+
+    @staticmethod
+    def _normalize(query: np.ndarray) -> np.ndarray:
+        vector = np.asarray(query, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def _hyperplanes(self, dim: int) -> np.ndarray:
+        planes = self._planes.get(dim)
+        if planes is None:
+            rng = np.random.default_rng((self.seed, dim))
+            planes = self._planes[dim] = rng.standard_normal((self.hash_bits, dim)).astype(np.float32)
+        return planes
+
+    def _projections(self, vector: np.ndarray) -> np.ndarray:
+        return self._hyperplanes(len(vector)) @ vector
+
+    def _code(self, vector: np.ndarray) -> int:
+        return self._probe_codes(vector, probe_bits=0)[0]
+
+    def _probe_codes(self, vector: np.ndarray, probe_bits: Optional[int] = None) -> List[int]:
+        """The vector's code first, then the codes with low-margin bits flipped."""
+        projections = self._projections(vector)
+        weights = 1 << np.arange(self.hash_bits, dtype=np.int64)
+        codes = [int(np.dot(projections > 0, weights))]
+        n_probe = self.probe_bits if probe_bits is None else probe_bits
+        for bit in np.argsort(np.abs(projections))[:n_probe]:
+            codes += [code ^ int(weights[bit]) for code in codes]
+        return codes
+
+    def _check_generation(self):
+        """Clear everything when the analog data changed (caller holds the lock)."""
+        if self._generation_fn is None:
+            return
+        current = self._generation_fn()
+        if current != self.generation:
+            if self._size:
+                self.stats['invalidations'] += 1
+            self._buckets.clear()
+            self._size = 0
+            self.generation = current
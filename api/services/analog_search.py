@@ -22,25 +22,34 @@ Version: 1.0.0 - Critical Path Implementation
 import asyncio
 import logging
 import os
+import threading
 import time
 import uuid
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union, Tuple
-from dataclasses import dataclass, asdict
+from typing import AsyncContextManager, Dict, List, Optional, Any, Union, Tuple, Callable
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, asdict, field
 from concurrent.futures import ThreadPoolExecutor
+import faiss
 import numpy as np
 import pandas as pd
 
 # Internal imports
 from scripts.analog_forecaster import AnalogEnsembleForecaster
 from core.analog_forecaster import RealTimeAnalogForecaster
+from api.services.data_generation import analog_data_generation
+from api.services.analog_result_cache import AnalogResultCache
+from api.services.compute_executor import (
+    ComputeCancelled, ComputeExecutor, get_compute_executor, raise_if_cancelled
+)
 
 # Prometheus metrics for analog search monitoring (OBS1)
 try:
     from api.analog_metrics import (
         analog_real_total,
         analog_fallback_total,
+        analog_cache_hit_total,
         analog_search_seconds,
         analog_results_count
     )
@@ -50,6 +59,7 @@ except ImportError:
     METRICS_AVAILABLE = False
     analog_real_total = None
     analog_fallback_total = None
+    analog_cache_hit_total = None
     analog_search_seconds = None
     analog_results_count = None
 
@@ -79,6 +89,17 @@ class AnalogSearchConfig:
     indices_dir: str = "indices"
     use_optimized_index: bool = True
     
+    # Search backend per horizon: "auto" (startup micro-benchmark), "faiss" or "exact"
+    search_backend: str = field(default_factory=lambda: os.getenv("ANALOG_SEARCH_BACKEND", "auto"))
+    exact_search_dtype: str = field(default_factory=lambda: os.getenv("ANALOG_EXACT_SEARCH_DTYPE", "float32"))
+    exact_search_tolerance: float = 1.25  # Max slowdown vs fastest approximate backend
+    exact_search_budget_ms: float = 2.0   # Exact is always chosen under this latency
+    
+    # Result cache for near-identical query embeddings (0 entries disables it)
+    result_cache_size: int = field(default_factory=lambda: int(os.getenv("ANALOG_RESULT_CACHE_SIZE", "1024")))
+    result_cache_tolerance: float = field(
+        default_factory=lambda: float(os.getenv("ANALOG_RESULT_CACHE_TOLERANCE", "1e-4")))  # Cosine distance
+    
     # Performance settings
     max_workers: int = 4
     search_timeout_ms: int = 5000  # 5 second timeout
@@ -92,6 +113,15 @@ class AnalogSearchConfig:
     max_memory_mb: int = 2048
     gc_threshold: int = 100
 
+class SearchNotAdmitted(Exception):
+    """The caller's admission control refused a FAISS search (``cause`` is its exception)."""
+    
+    def __init__(self, cause: Exception):
+        super().__init__(str(cause))
+        self.cause = cause
+
+Admission = Callable[[], AsyncContextManager[Any]]
+
 @dataclass
 class AnalogSearchResult:
     """Structured result from analog search."""
@@ -105,6 +135,141 @@ class AnalogSearchResult:
     success: bool = True
     error_message: Optional[str] = None
 
+class SearchBackend:
+    """Index-like search interface (d, ntotal, search) over one horizon's corpus."""
+
+    name = "base"
+    exact = False
+
+    def __init__(self, d: int, ntotal: int):
+        self.d = d
+        self.ntotal = ntotal
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (similarities, indices), each shaped (n_queries, k)."""
+        raise NotImplementedError
+
+class FaissSearchBackend(SearchBackend):
+    """Search through a loaded FAISS index (FlatIP or IVF-PQ)."""
+
+    def __init__(self, index, nprobe: Optional[int] = None):
+        super().__init__(index.d, index.ntotal)
+        self.index = index
+        self.exact = not hasattr(index, 'nlist')
+        self.name = f"faiss_{type(index).__name__}"
+        if nprobe is not None and hasattr(index, 'nprobe'):
+            index.nprobe = nprobe
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.index.search(np.ascontiguousarray(queries, dtype=np.float32), k)
+
+class ExactMatrixSearchBackend(SearchBackend):
+    """Exact inner-product search as a blocked matrix product plus argpartition.
+
+    Scores every vector of a contiguous (N, D) array (which may be a shared
+    memmap) against the queries with one BLAS GEMM per row block, then keeps
+    the top k per query with argpartition. Results are identical to a FAISS
+    IndexFlatIP over the same vectors, with perfect recall. float16 storage
+    halves memory but is upcast per block, which is slow on most CPUs.
+    """
+
+    name = "exact_matrix"
+    exact = True
+
+    def __init__(self, vectors: np.ndarray, dtype=np.float32, block_rows: int = 65536):
+        dtype = np.dtype(dtype)
+        if vectors.dtype != dtype or not vectors.flags.c_contiguous:
+            vectors = np.ascontiguousarray(vectors, dtype=dtype)
+        super().__init__(vectors.shape[1], vectors.shape[0])
+        self.vectors = vectors
+        self.block_rows = block_rows
+        if dtype != np.float32:
+            self.name = f"exact_matrix_{dtype.name}"
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        k = min(k, self.ntotal)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_indices = np.empty((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, self.ntotal, self.block_rows):
+            block = self.vectors[start:start + self.block_rows]
+            if block.dtype != np.float32:
+                block = block.astype(np.float32)
+            scores = queries @ block.T
+            top = min(k, scores.shape[1])
+            if top < scores.shape[1]:
+                candidates = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+            else:
+                candidates = np.broadcast_to(np.arange(top), scores.shape)
+            scores = np.take_along_axis(scores, candidates, axis=1)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_indices = np.concatenate([best_indices, candidates + start], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_indices = np.take_along_axis(best_indices, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_indices, order, axis=1)
+
+def _median_search_ms(backend: SearchBackend, queries: np.ndarray, k: int, repeats: int) -> float:
+    backend.search(queries[:1], k)  # Warm caches and lazy mappings
+    timings = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            backend.search(query[None, :], k)
+            timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+def benchmark_search_backends(
+    backends: List[SearchBackend],
+    queries: np.ndarray,
+    k: int = 50,
+    repeats: int = 3,
+    tolerance: float = 1.25,
+    budget_ms: float = 2.0
+) -> Tuple[SearchBackend, Dict[str, Any]]:
+    """Pick a search backend from a single-query latency micro-benchmark.
+
+    Exact backends are preferred: one is chosen when it is within tolerance
+    of the fastest approximate backend, or under budget_ms outright (query
+    embedding costs far more). Approximate backends report recall@k against
+    the exact results.
+    """
+    latencies = {backend.name: _median_search_ms(backend, queries, k, repeats) for backend in backends}
+    exact = [backend for backend in backends if backend.exact]
+    approximate = [backend for backend in backends if not backend.exact]
+
+    recall = {}
+    if exact:
+        _, truth = exact[0].search(queries, k)
+        for backend in approximate:
+            _, found = backend.search(queries, k)
+            hits = sum(len(np.intersect1d(t, f)) for t, f in zip(truth, found))
+            recall[backend.name] = hits / truth.size
+
+    fastest_exact = min(exact, key=lambda b: latencies[b.name]) if exact else None
+    fastest_approximate = min(approximate, key=lambda b: latencies[b.name]) if approximate else None
+    if fastest_exact is None:
+        selected = fastest_approximate
+    elif fastest_approximate is None:
+        selected = fastest_exact
+    else:
+        exact_ms = latencies[fastest_exact.name]
+        approximate_ms = latencies[fastest_approximate.name]
+        within_budget = exact_ms <= max(approximate_ms * tolerance, budget_ms)
+        selected = fastest_exact if within_budget else fastest_approximate
+
+    return selected, {
+        'selected': selected.name,
+        'latency_ms': latencies,
+        'recall_at_k': recall,
+        'k': k,
+        'queries': len(queries)
+    }
+
 class AnalogSearchPool:
     """Connection pool for FAISS-based analog search engines."""
     
@@ -114,6 +279,9 @@ class AnalogSearchPool:
         self.available: asyncio.Queue = asyncio.Queue(maxsize=config.pool_size)
         self.lock = asyncio.Lock()
         self._initialized = False
+        self._backend_lock = threading.Lock()
+        self.search_backends: Dict[int, SearchBackend] = {}
+        self.backend_reports: Dict[int, Dict[str, Any]] = {}
         
     async def initialize(self) -> bool:
         """Initialize connection pool."""
@@ -171,10 +339,83 @@ class AnalogSearchPool:
             indices_dir=self.config.indices_dir,
             use_optimized_index=self.config.use_optimized_index
         )
+        self._install_search_backends(forecaster)
         
         logger.info(f"✅ Forecaster instance {instance_id} created")
         return forecaster
     
+    def _install_search_backends(self, forecaster: AnalogEnsembleForecaster):
+        """Replace each horizon's FAISS index with the selected search backend.
+        
+        Selection runs once per horizon and is shared by all pool instances.
+        The exact backend searches the same vectors as the index it replaces
+        (see ``_index_vectors``), so result row ids are unchanged.
+        """
+        mode = self.config.search_backend
+        if mode == "faiss":
+            return
+        
+        for horizon, index in list(forecaster.indices.items()):
+            with self._backend_lock:
+                backend = self.search_backends.get(horizon)
+                if backend is None:
+                    backend = self._select_search_backend(forecaster, horizon, index)
+                    self.search_backends[horizon] = backend
+            if isinstance(backend, ExactMatrixSearchBackend):
+                forecaster.indices[horizon] = backend
+    
+    def _select_search_backend(self, forecaster: AnalogEnsembleForecaster,
+                               horizon: int, index) -> SearchBackend:
+        faiss_backend = FaissSearchBackend(index, nprobe=min(64, index.nlist // 4) if hasattr(index, 'nlist') else None)
+        embeddings = self._index_vectors(forecaster, horizon, index)
+        if embeddings is None:
+            return faiss_backend
+        
+        exact_backend = ExactMatrixSearchBackend(embeddings, dtype=self.config.exact_search_dtype)
+        if self.config.search_backend == "exact":
+            return exact_backend
+        
+        rng = np.random.default_rng(horizon)
+        rows = rng.choice(index.ntotal, size=min(16, index.ntotal), replace=False)
+        queries = np.array(embeddings[np.sort(rows)], dtype=np.float32)
+        queries += rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries /= np.where(norms > 0, norms, 1.0)
+        
+        # Searches run on the compute executor, whose BLAS/OpenMP sizing
+        # (threads_per_worker) is the only thread setting; benchmark under it
+        executor = get_compute_executor()
+        selected, report = benchmark_search_backends(
+            [faiss_backend, exact_backend], queries,
+            tolerance=self.config.exact_search_tolerance,
+            budget_ms=self.config.exact_search_budget_ms
+        )
+        report['threads_per_worker'] = executor.threads_per_worker
+        self.backend_reports[horizon] = report
+        logger.info(f"Search backend for {horizon}h: {report['selected']} "
+                    f"(latency_ms={report['latency_ms']}, recall@k={report['recall_at_k']})")
+        return selected
+    
+    @staticmethod
+    def _index_vectors(forecaster: AnalogEnsembleForecaster, horizon: int, index) -> Optional[np.ndarray]:
+        """Vectors the exact backend must search so its row ids match the index.
+        
+        A flat index stores its vectors verbatim, so they are read back from it.
+        Other indices only qualify when the forecaster's embeddings line up
+        row-for-row with them; otherwise exact search is skipped with a warning.
+        """
+        if isinstance(index, faiss.IndexFlat):
+            return index.reconstruct_n(0, index.ntotal)
+        
+        embeddings = forecaster.embeddings.get(horizon)
+        if embeddings is not None and embeddings.shape == (index.ntotal, index.d):
+            return embeddings
+        found = "no embeddings" if embeddings is None else f"embeddings of shape {embeddings.shape}"
+        logger.warning(f"Exact search skipped for {horizon}h: {type(index).__name__} holds "
+                       f"{index.ntotal}x{index.d} vectors but the forecaster has {found}; "
+                       f"serving the FAISS index")
+        return None
+    
     async def acquire(self) -> Optional[AnalogEnsembleForecaster]:
         """Acquire forecaster from pool."""
         try:
@@ -192,7 +433,7 @@ class AnalogSearchPool:
             self.available.put_nowait(forecaster)
         except asyncio.QueueFull:
             logger.warning("Pool queue full, dropping forecaster instance")
-    
+
     async def shutdown(self):
         """Shutdown connection pool."""
         async with self.lock:
@@ -209,6 +450,43 @@ class AnalogSearchPool:
             self._initialized = False
             logger.info("✅ Analog search pool shutdown complete")
 
+
+class ForecasterLease:
+    """A pooled forecaster held by a request and by the compute jobs it submits.
+    
+    The forecaster goes back to the pool when the last holder lets go, so a
+    request cancelled while its search is still running on a compute worker
+    does not hand the forecaster to another request mid-search.
+    """
+    
+    def __init__(self, pool: AnalogSearchPool, forecaster: AnalogEnsembleForecaster):
+        self.pool = pool
+        self.forecaster = forecaster
+        self.loop = asyncio.get_running_loop()
+        self._holders = 1  # The request itself
+        self._lock = threading.Lock()
+    
+    def hold(self) -> Callable[[], None]:
+        """Add a holder; returns its (thread-safe) drop callback."""
+        with self._lock:
+            self._holders += 1
+        return self._drop_from_worker
+    
+    async def release(self):
+        """Drop the request's hold."""
+        if self._drop():
+            await self.pool.release(self.forecaster)
+    
+    def _drop(self) -> bool:
+        with self._lock:
+            self._holders -= 1
+            return self._holders == 0
+    
+    def _drop_from_worker(self):
+        if self._drop():
+            self.loop.call_soon_threadsafe(
+                lambda: asyncio.ensure_future(self.pool.release(self.forecaster)))
+    
 class AnalogSearchService:
     """Production analog search service with async interface."""
     
@@ -219,7 +497,13 @@ class AnalogSearchService:
         # Fallback is explicitly gated via environment variable
         self._allow_fallback = os.getenv("ALLOW_ANALOG_FALLBACK", "false").lower() == "true"
         self.core_forecaster = RealTimeAnalogForecaster()
-        self.executor = ThreadPoolExecutor(max_workers=self.config.max_workers)
+        # Blocking embedding/FAISS work runs here, never on the event loop
+        self.executor: ComputeExecutor = get_compute_executor()
+        self.result_cache = AnalogResultCache(
+            max_entries=self.config.result_cache_size,
+            tolerance=self.config.result_cache_tolerance,
+            generation=analog_data_generation
+        )
         
         # Performance monitoring
         self.request_count = 0
@@ -273,7 +557,8 @@ class AnalogSearchService:
         query_time: Union[str, datetime],
         horizon: int,
         k: int = 50,
-        correlation_id: Optional[str] = None
+        correlation_id: Optional[str] = None,
+        admission: Optional[Admission] = None
     ) -> AnalogSearchResult:
         """
         Perform async analog search with comprehensive error handling.
@@ -283,6 +568,8 @@ class AnalogSearchService:
             horizon: Forecast horizon in hours (6, 12, 24, 48)
             k: Number of analogs to retrieve
             correlation_id: Optional correlation ID for tracing
+            admission: Optional admission control entered around the FAISS
+                search only; result cache hits never enter it
             
         Returns:
             AnalogSearchResult with indices, distances, and metadata
@@ -320,7 +607,7 @@ class AnalogSearchService:
             for attempt in range(self.config.retry_attempts):
                 try:
                     result = await self._perform_analog_search(
-                        correlation_id, query_time, horizon, k, attempt
+                        correlation_id, query_time, horizon, k, attempt, admission
                     )
                     
                     if result.success:
@@ -336,6 +623,8 @@ class AnalogSearchService:
                         logger.info(f"[{correlation_id}] Analog search completed in {search_time*1000:.1f}ms")
                         return result
                     
+                except SearchNotAdmitted:
+                    raise
                 except Exception as e:
                     logger.warning(f"[{correlation_id}] Attempt {attempt + 1} failed: {e}")
                     if attempt == self.config.retry_attempts - 1:
@@ -347,6 +636,8 @@ class AnalogSearchService:
             # If we get here, all attempts failed
             raise RuntimeError("All retry attempts exhausted")
             
+        except SearchNotAdmitted:
+            raise
         except Exception as e:
             self.error_count += 1
             logger.error(f"[{correlation_id}] Analog search failed: {e}")
@@ -372,7 +663,8 @@ class AnalogSearchService:
         query_time: datetime,
         horizon: int,
         k: int,
-        attempt: int
+        attempt: int,
+        admission: Optional[Admission] = None
     ) -> AnalogSearchResult:
         """Perform the actual analog search using pool."""
         # Acquire forecaster from pool
@@ -381,17 +673,17 @@ class AnalogSearchService:
         if forecaster is None:
             raise RuntimeError("Failed to acquire forecaster from pool")
         
+        lease = ForecasterLease(self.pool, forecaster)
         try:
-            # Perform search in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            
-            # Execute analog search with timeout
+            # Execute analog search with timeout (the search itself runs on the compute executor)
             search_result = await asyncio.wait_for(
                 self._execute_analog_search(
                     forecaster,
                     query_time,
                     horizon,
-                    k
+                    k,
+                    lease,
+                    admission
                 ),
                 timeout=self.config.search_timeout_ms / 1000.0
             )
@@ -415,27 +707,34 @@ class AnalogSearchService:
             )
             
         finally:
-            # Always release forecaster back to pool
-            await self.pool.release(forecaster)
+            # Release forecaster back to pool (deferred while a compute job still uses it)
+            await lease.release()
     
     async def _execute_analog_search(
         self,
         forecaster: AnalogEnsembleForecaster,
         query_time: datetime,
         horizon: int,
-        k: int
+        k: int,
+        lease: Optional[ForecasterLease] = None,
+        admission: Optional[Admission] = None
     ) -> Optional[Dict[str, Any]]:
         """Execute real FAISS analog search with comprehensive validation."""
         search_start = time.time()
         
         try:
-            # Attempt real FAISS search through the forecaster
-            search_result = self._perform_real_faiss_search(forecaster, query_time, horizon, k, search_start)
+            if admission is None:
+                # Embedding, FAISS search and validation in one hop to a compute worker
+                search_result, validation_result = await self.executor.run(
+                    self._search_and_validate, forecaster, query_time, horizon, k, search_start,
+                    on_done=lease.hold() if lease is not None else None
+                )
+            else:
+                search_result, validation_result = await self._admitted_search(
+                    forecaster, query_time, horizon, k, search_start, lease, admission
+                )
             
             if search_result is not None:
-                # Validate the search results
-                validation_result = self._validate_search_results(search_result, horizon, k)
-                
                 # Track search quality metrics (T-011 requirement)
                 result_count = len(search_result.get('indices', []))
                 await self._track_search_quality_metrics(horizon, result_count, validation_result)
@@ -458,6 +757,8 @@ class AnalogSearchService:
                 analog_fallback_total.inc()
             return fallback_result
             
+        except SearchNotAdmitted:
+            raise
         except Exception as e:
             logger.error(f"Analog search execution failed: {e}")
             if not self._allow_fallback:
@@ -468,43 +769,166 @@ class AnalogSearchService:
                 analog_fallback_total.inc()
             return fallback_result
     
-    def _perform_real_faiss_search(
-        self, 
+    async def _admitted_search(
+        self,
+        forecaster: AnalogEnsembleForecaster,
+        query_time: datetime,
+        horizon: int,
+        k: int,
+        search_start: float,
+        lease: Optional[ForecasterLease],
+        admission: Admission
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Search whose FAISS stage runs inside the caller's admission control.
+        
+        The embedding and result cache lookup run first, outside admission, so
+        cache hits neither take nor wait for a slot; a miss is admitted and
+        searched with the embedding it already computed.
+        """
+        search_result, validation_result, query_embedding = await self.executor.run(
+            self._lookup_and_validate, forecaster, query_time, horizon, k, search_start,
+            on_done=lease.hold() if lease is not None else None
+        )
+        if search_result is not None or query_embedding is None:
+            return search_result, validation_result
+        
+        async with AsyncExitStack() as stack:
+            try:
+                await stack.enter_async_context(admission())
+            except Exception as e:
+                raise SearchNotAdmitted(e) from e
+            return await self.executor.run(
+                self._search_and_validate, forecaster, query_time, horizon, k, search_start,
+                query_embedding=query_embedding, on_done=lease.hold() if lease is not None else None
+            )
+    
+    def _lookup_and_validate(
+        self,
         forecaster: AnalogEnsembleForecaster,
         query_time: datetime,
         horizon: int,
         k: int,
         search_start: float
-    ) -> Optional[Dict[str, Any]]:
-        """Perform real FAISS search using the forecaster's internal methods."""
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        """Embedding and result cache lookup only, run on a compute worker.
+        
+        Returns:
+            (search_result, validation_result, query_embedding); the result is
+            None on a cache miss and the embedding None if the query cannot run
+        """
         try:
-            # Convert query_time to pandas timestamp for forecaster compatibility
-            query_pd = pd.to_datetime(query_time)
+            query_embedding = self._query_embedding(forecaster, query_time, horizon)
+            if query_embedding is None:
+                return None, None, None
             
-            # Check if forecaster has the necessary FAISS indices loaded
-            if not hasattr(forecaster, 'indices') or horizon not in forecaster.indices:
-                logger.warning(f"FAISS index for {horizon}h not available in forecaster")
-                return None
+            # Stop here if the request went away while the embedding was computed
+            raise_if_cancelled()
             
-            # Verify index dimension compatibility
-            faiss_index = forecaster.indices[horizon]
-            if not self._verify_index_dimensions(faiss_index, horizon):
-                logger.warning(f"Index dimension mismatch for {horizon}h")
-                return None
-                
-            # Extract weather pattern for query time
-            weather_pattern = forecaster._extract_weather_pattern(query_pd)
-            if weather_pattern is None:
-                logger.warning(f"Could not extract weather pattern for {query_time}")
-                return None
+            search_result = self._cached_search(forecaster, query_embedding, horizon, k, search_start)
+        except ComputeCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"Analog query embedding failed: {e}")
+            return None, None, None
+        if search_result is None:
+            return None, None, query_embedding
+        return search_result, self._validate_search_results(search_result, horizon, k), query_embedding
+    
+    def _search_and_validate(
+        self,
+        forecaster: AnalogEnsembleForecaster,
+        query_time: datetime,
+        horizon: int,
+        k: int,
+        search_start: float,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Blocking search stages, run on a compute worker."""
+        search_result = self._perform_real_faiss_search(forecaster, query_time, horizon, k, search_start,
+                                                        query_embedding)
+        if search_result is None:
+            return None, None
+        return search_result, self._validate_search_results(search_result, horizon, k)
+    
+    def _query_embedding(
+        self,
+        forecaster: AnalogEnsembleForecaster,
+        query_time: datetime,
+        horizon: int
+    ) -> Optional[np.ndarray]:
+        """Query embedding for the weather at query_time, or None if the index cannot serve it."""
+        # Convert query_time to pandas timestamp for forecaster compatibility
+        query_pd = pd.to_datetime(query_time)
+        
+        # Check if forecaster has the necessary FAISS indices loaded
+        if not hasattr(forecaster, 'indices') or horizon not in forecaster.indices:
+            logger.warning(f"FAISS index for {horizon}h not available in forecaster")
+            return None
+        
+        # Verify index dimension compatibility
+        faiss_index = forecaster.indices[horizon]
+        if not self._verify_index_dimensions(faiss_index, horizon):
+            logger.warning(f"Index dimension mismatch for {horizon}h")
+            return None
             
-            # Generate query embedding
-            query_embedding = forecaster._generate_query_embedding(weather_pattern, horizon, query_pd)
+        # Extract weather pattern for query time
+        weather_pattern = forecaster._extract_weather_pattern(query_pd)
+        if weather_pattern is None:
+            logger.warning(f"Could not extract weather pattern for {query_time}")
+            return None
+        
+        # Generate query embedding
+        query_embedding = forecaster._generate_query_embedding(weather_pattern, horizon, query_pd)
+        
+        # Verify embedding dimensions match index
+        if query_embedding.shape[1] != faiss_index.d:
+            logger.error(f"Embedding dimension {query_embedding.shape[1]} != index dimension {faiss_index.d}")
+            return None
+        return query_embedding
+    
+    def _cached_search(
+        self,
+        forecaster: AnalogEnsembleForecaster,
+        query_embedding: np.ndarray,
+        horizon: int,
+        k: int,
+        search_start: float
+    ) -> Optional[Dict[str, Any]]:
+        """Neighbours of a recent near-identical query, or None on a result cache miss."""
+        cached = self.result_cache.lookup(horizon, query_embedding, k)
+        if cached is None:
+            return None
+        return self._cached_search_result(cached, forecaster.indices[horizon], horizon, k, search_start)
+    
+    def _perform_real_faiss_search(
+        self, 
+        forecaster: AnalogEnsembleForecaster,
+        query_time: datetime,
+        horizon: int,
+        k: int,
+        search_start: float,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Perform real FAISS search using the forecaster's internal methods.
+        
+        A query_embedding that already missed the result cache goes straight
+        to the FAISS search.
+        """
+        try:
+            if query_embedding is None:
+                query_embedding = self._query_embedding(forecaster, query_time, horizon)
+                if query_embedding is None:
+                    return None
+                
+                # Stop here if the request went away while the embedding was computed
+                raise_if_cancelled()
+                
+                # Near-identical queries reuse the neighbours of a recent search
+                cached = self._cached_search(forecaster, query_embedding, horizon, k, search_start)
+                if cached is not None:
+                    return cached
             
-            # Verify embedding dimensions match index
-            if query_embedding.shape[1] != faiss_index.d:
-                logger.error(f"Embedding dimension {query_embedding.shape[1]} != index dimension {faiss_index.d}")
-                return None
+            faiss_index = forecaster.indices[horizon]
             
             # Perform FAISS similarity search
             similarities, analog_indices = forecaster._search_analogs(query_embedding, horizon, k)
@@ -537,6 +961,8 @@ class AnalogSearchService:
             total_candidates = len(metadata)
             
             logger.info(f"✅ Real FAISS search completed: {len(analog_indices)} analogs, {search_time_ms:.1f}ms")
+            self.result_cache.store(horizon, query_embedding, analog_indices, distances,
+                                    {'total_candidates': total_candidates})
             
             # Record successful real FAISS search metrics
             if METRICS_AVAILABLE:
@@ -557,15 +983,49 @@ class AnalogSearchService:
                     'faiss_index_dim': faiss_index.d,
                     'search_method': 'real_faiss',
                     'faiss_search_successful': True,
+                    'cache_hit': False,
                     'metrics_recorded': METRICS_AVAILABLE
                 },
                 'search_time_ms': search_time_ms
             }
             
+        except ComputeCancelled:
+            raise
         except Exception as e:
             logger.error(f"Real FAISS search failed: {e}")
             return None
     
+    def _cached_search_result(self, cached, faiss_index, horizon: int, k: int,
+                              search_start: float) -> Dict[str, Any]:
+        """Search result for a query answered by the result cache (no FAISS search)."""
+        search_time_ms = (time.time() - search_start) * 1000
+        logger.info(f"✅ Analog result cache hit: {len(cached.indices)} analogs, {search_time_ms:.1f}ms "
+                    f"(cosine {cached.metadata['cache_similarity']:.6f})")
+        
+        if METRICS_AVAILABLE:
+            analog_cache_hit_total.inc()
+            analog_results_count.labels(horizon=f"{horizon}h").set(len(cached.indices))
+        
+        return {
+            'indices': cached.indices,
+            'distances': cached.distances,
+            'metadata': {
+                'total_candidates': cached.metadata['total_candidates'],
+                'search_time_ms': search_time_ms,
+                'k_neighbors': len(cached.indices),
+                'distance_metric': 'L2_from_corrected_IP',
+                'faiss_index_type': type(faiss_index).__name__,
+                'faiss_index_size': faiss_index.ntotal,
+                'faiss_index_dim': faiss_index.d,
+                'search_method': 'result_cache',
+                'faiss_search_successful': True,
+                'cache_hit': True,
+                'cache_similarity': cached.metadata['cache_similarity'],
+                'metrics_recorded': METRICS_AVAILABLE
+            },
+            'search_time_ms': search_time_ms
+        }
+    
     def _verify_index_dimensions(self, faiss_index, horizon: int) -> bool:
         """Verify FAISS index dimensions match expected embedding metadata."""
         try:
@@ -911,8 +1371,12 @@ class AnalogSearchService:
             'pool': {
                 'initialized': self.pool._initialized,
                 'pool_size': len(self.pool.pool),
-                'available_connections': self.pool.available.qsize()
+                'available_connections': self.pool.available.qsize(),
+                'search_backends': {f"{h}h": b.name for h, b in self.pool.search_backends.items()},
+                'search_backend_benchmarks': self.pool.backend_reports
             },
+            'result_cache': self.result_cache.get_stats(),
+            'compute': self.executor.get_stats(),
             'config': asdict(self.config),
             'metrics': {
                 'prometheus_available': METRICS_AVAILABLE,
@@ -934,7 +1398,8 @@ class AnalogSearchService:
         horizon: int = 24,
         variable: str = "temperature",
         k: int = 50,
-        correlation_id: Optional[str] = None
+        correlation_id: Optional[str] = None,
+        admission: Optional[Admission] = None
     ) -> Dict[str, Any]:
         """
         Get comprehensive analog details with rich FAISS search results and historical metadata.
@@ -948,6 +1413,8 @@ class AnalogSearchService:
             variable: Target variable for analysis (temperature, precipitation, wind)
             k: Number of top analogs to retrieve (max 200)
             correlation_id: Optional correlation ID for tracing
+            admission: Optional admission control entered around the FAISS
+                search only (SearchNotAdmitted if it refuses)
             
         Returns:
             Dictionary containing:
@@ -987,7 +1454,8 @@ class AnalogSearchService:
                 query_time=query_time,
                 horizon=horizon,
                 k=k,
-                correlation_id=correlation_id
+                correlation_id=correlation_id,
+                admission=admission
             )
             
             if not search_result.success:
@@ -1039,6 +1507,8 @@ class AnalogSearchService:
             logger.info(f"[{correlation_id}] Analog details compiled successfully in {total_time_ms:.1f}ms")
             return response
             
+        except SearchNotAdmitted:
+            raise
         except Exception as e:
             self.error_count += 1
             logger.error(f"[{correlation_id}] Failed to get analog details: {e}")
@@ -1773,7 +2243,7 @@ class AnalogSearchService:
                 logger.error(f"[{correlation_id}] Outcomes file not found: {outcomes_path}")
                 return None
             
-            outcomes = np.load(str(outcomes_path))
+            outcomes = await self.executor.run(np.load, str(outcomes_path), mmap_mode='r')
             logger.info(f"[{correlation_id}] Loaded outcomes data: {outcomes.shape}")
             return outcomes
             
@@ -2059,7 +2529,7 @@ class AnalogSearchService:
         # Shutdown connection pool
         await self.pool.shutdown()
         
-        # Shutdown thread pool executor
+        # Shutdown compute executor (the next get_compute_executor() call starts a fresh one)
         self.executor.shutdown(wait=True)
         
         logger.info("✅ AnalogSearchService shutdown complete")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Dedicated Compute Executor
+==========================
+
+One bounded thread pool for the CPU-bound stages of a request (query
+embedding, FAISS search, ensemble statistics), so none of them run on the
+event loop and health checks and unrelated requests are never stalled.
+
+- Each worker thread is pinned to its own slice of the process's CPUs
+  (Linux ``sched_setaffinity`` applies per thread, and OpenMP threads the
+  worker starts inherit the mask)
+- Library thread pools are sized coherently: ``threads_per_worker`` threads
+  for FAISS/OpenMP (per worker thread), BLAS and torch intra-op, so
+  ``workers x threads_per_worker`` never exceeds the available cores; this
+  is the only BLAS setting, so the exact search backend's GEMMs use it too
+- At most ``max_pending`` jobs are queued or running; further submissions
+  fail fast with ComputeQueueFull instead of building an unbounded backlog
+- Cancelling the awaiting coroutine (client disconnect, timeout) drops the
+  job if it has not started; a running job can poll ``compute_cancelled()``
+  between stages and stop early with ComputeCancelled
+- ``on_done`` callbacks run exactly once, when the job can no longer touch
+  its inputs, so pooled resources are released safely after a cancellation
+
+Configuration (environment):
+    ANALOG_COMPUTE_WORKERS              Worker threads (default: min(2, CPUs))
+    ANALOG_COMPUTE_THREADS_PER_WORKER   Library threads per worker (default: CPUs // workers)
+    ANALOG_COMPUTE_QUEUE_DEPTH          Max queued + running jobs (default: 8 x workers)
+    ANALOG_COMPUTE_PIN_CPUS             auto | true | false (auto pins when CPUs >= workers)
+
+Author: Performance Engineering
+Version: 1.0.0 - Dedicated compute executor
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class ComputeQueueFull(RuntimeError):
+    """The compute executor already holds max_pending jobs."""
+
+
+class ComputeCancelled(RuntimeError):
+    """The request that submitted a running job was cancelled."""
+
+
+def compute_cancelled() -> bool:
+    """True inside a compute job whose caller has been cancelled."""
+    token = getattr(_local, 'token', None)
+    return token is not None and token.is_set()
+
+
+def raise_if_cancelled():
+    """Stop a compute job between stages once its caller is gone."""
+    if compute_cancelled():
+        raise ComputeCancelled("compute job cancelled by caller")
+
+
+def _available_cpus() -> List[int]:
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class ComputeExecutor:
+    """Bounded, CPU-pinned thread pool for blocking numpy/torch/FAISS work."""
+
+    def __init__(self, workers: Optional[int] = None, threads_per_worker: Optional[int] = None,
+                 max_pending: Optional[int] = None, pin_cpus: Optional[str] = None):
+        cpus = _available_cpus()
+        self.workers = workers or int(os.getenv('ANALOG_COMPUTE_WORKERS', str(min(2, len(cpus)))))
+        self.threads_per_worker = threads_per_worker or int(os.getenv(
+            'ANALOG_COMPUTE_THREADS_PER_WORKER', str(max(1, len(cpus) // self.workers))))
+        self.max_pending = max_pending or int(os.getenv('ANALOG_COMPUTE_QUEUE_DEPTH', str(8 * self.workers)))
+        pin_cpus = (pin_cpus or os.getenv('ANALOG_COMPUTE_PIN_CPUS', 'auto')).lower()
+        self.pin_cpus = hasattr(os, 'sched_setaffinity') and (
+            pin_cpus in ('true', '1', 'yes') or (pin_cpus == 'auto' and len(cpus) >= self.workers))
+
+        # Worker i gets the i-th contiguous slice of CPUs (slices share CPUs when there are too few)
+        per_worker = max(1, len(cpus) // self.workers)
+        self.cpu_sets = [cpus[(i * per_worker) % len(cpus):][:per_worker] for i in range(self.workers)]
+
+        self._worker_ids = itertools.count()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='analog-compute',
+                                            initializer=self._init_worker)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'cancelled': 0}
+        self._configure_process_pools()
+        logger.info(f"Compute executor: {self.workers} workers x {self.threads_per_worker} threads, "
+                    f"queue depth {self.max_pending}, CPU pinning {'on' if self.pin_cpus else 'off'}")
+
+    async def run(self, fn: Callable[..., Any], *args, on_done: Optional[Callable[[], None]] = None,
+                  **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on a compute worker and await its result.
+
+        Raises:
+            ComputeQueueFull: max_pending jobs are already queued or running
+            ComputeCancelled: the job saw its caller's cancellation and stopped
+        """
+        with self._lock:
+            full = self._pending >= self.max_pending
+            if full:
+                self.stats['rejected'] += 1
+            else:
+                self._pending += 1
+                self.stats['submitted'] += 1
+        if full:
+            self._call(on_done)
+            raise ComputeQueueFull(f"compute queue full ({self.max_pending} jobs pending)")
+
+        token = threading.Event()
+
+        def job():
+            _local.token = token
+            try:
+                raise_if_cancelled()
+                return fn(*args, **kwargs)
+            finally:
+                _local.token = None
+
+        def finished(future):
+            with self._lock:
+                self._pending -= 1
+                if not future.cancelled():
+                    self.stats['failed' if future.exception() is not None else 'completed'] += 1
+            self._call(on_done)
+
+        future = self._executor.submit(job)
+        future.add_done_callback(finished)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            token.set()
+            future.cancel()  # Only succeeds if the job has not started
+            with self._lock:
+                self.stats['cancelled'] += 1
+            raise
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'workers': self.workers, 'threads_per_worker': self.threads_per_worker,
+                'max_pending': self.max_pending, 'pending': self._pending,
+                'cpu_sets': self.cpu_sets if self.pin_cpus else None, **self.stats}
+
+    def shutdown(self, wait: bool = True):
+        global _executor
+        with _executor_lock:
+            if _executor is self:
+                _executor = None  # Later callers get a fresh executor
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # -------------------------------------------------------------- internals
+
+    @staticmethod
+    def _call(callback: Optional[Callable[[], None]]):
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Compute job completion callback failed: {e}")
+
+    def _configure_process_pools(self):
+        """Size the process-wide BLAS and torch pools to one worker's share."""
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(limits=self.threads_per_worker, user_api='blas')
+        except ImportError:
+            logger.debug("threadpoolctl not installed; BLAS thread count left unpinned")
+        torch = sys.modules.get('torch')
+        if torch is not None:
+            torch.set_num_threads(self.threads_per_worker)
+
+    def _init_worker(self):
+        """Pin the new worker thread and size its OpenMP team."""
+        worker_id = next(self._worker_ids) % self.workers
+        if self.pin_cpus:
+            try:
+                os.sched_setaffinity(0, self.cpu_sets[worker_id])  # 0: the calling thread
+            except OSError as e:
+                logger.warning(f"Could not pin compute worker {worker_id}: {e}")
+        try:
+            import faiss
+            faiss.omp_set_num_threads(self.threads_per_worker)  # Per-thread OpenMP setting
+        except ImportError:
+            pass
+        torch = sys.modules.get('torch')
+        if torch is not None and torch.get_num_threads() != self.threads_per_worker:
+            torch.set_num_threads(self.threads_per_worker)
+
+
+_executor: Optional[ComputeExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_compute_executor() -> ComputeExecutor:
+    """Process-wide compute executor shared by the analog search service and the forecast adapter."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ComputeExecutor()
+    return _executor
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Analog Data Generation Token
+============================
+
+Short token identifying the FAISS indices, embeddings and outcomes currently
+on disk. Every cache derived from that data (forecast responses, per-horizon
+forecast results, analog search results) keys or flushes on it, so a rebuild
+invalidates them all.
+
+- Digest of (name, size, mtime_ns) for every file in the data directories,
+  resolved under the project root (or ANALOG_DATA_ROOT), never the CWD
+- Lookups only read the current token; a daemon thread per worker rescans the
+  directories every ANALOG_DATA_GENERATION_REFRESH_SECONDS, so request paths
+  and the event loop never touch the filesystem after the first call
+- ANALOG_DATA_GENERATION pins the token explicitly
+
+Author: Performance Engineering
+Version: 1.0.0 - Analog data generation token
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# Directories whose contents make up the analog data generation
+ANALOG_DATA_DIRS = ('indices', 'embeddings', 'outcomes')
+
+_generation_state: Dict[str, Any] = {'token': None, 'pid': None, 'refresher': None}
+_generation_lock = threading.Lock()
+
+
+def analog_data_root() -> Path:
+    """Directory holding the analog data directories (ANALOG_DATA_ROOT or the project root)."""
+    root = os.getenv('ANALOG_DATA_ROOT')
+    return Path(root) if root else PROJECT_ROOT
+
+
+def analog_data_dirs() -> List[Path]:
+    root = analog_data_root()
+    return [root / dirname for dirname in ANALOG_DATA_DIRS]
+
+
+def _scan_generation() -> str:
+    digest = hashlib.blake2b(digest_size=8)
+    for directory in analog_data_dirs():
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            digest.update(f"{directory.name}/{entry.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+def refresh_analog_data_generation() -> str:
+    """Rescan the data directories now and publish the new token."""
+    token = _scan_generation()
+    if token != _generation_state['token'] and _generation_state['token'] is not None:
+        logger.info(f"Analog data generation changed: {_generation_state['token']} -> {token}")
+    _generation_state['token'] = token
+    return token
+
+
+def _refresh_loop(stop: threading.Event, interval: float):
+    while not stop.wait(interval):
+        try:
+            refresh_analog_data_generation()
+        except Exception as e:
+            logger.warning(f"Analog data generation refresh failed: {e}")
+
+
+def _start_refresher():
+    interval = float(os.getenv('ANALOG_DATA_GENERATION_REFRESH_SECONDS', '30'))
+    if interval <= 0:
+        return None
+    stop = threading.Event()
+    thread = threading.Thread(target=_refresh_loop, args=(stop, interval),
+                              name='analog-data-generation', daemon=True)
+    thread.start()
+    return stop
+
+
+def analog_data_generation() -> str:
+    """
+    Return a short token identifying the analog data currently on disk.
+
+    The token changes whenever any index, embedding or outcome file is
+    rebuilt. Only the first call in a worker scans the directories; after
+    that the background refresher keeps the token current.
+    """
+    override = os.getenv('ANALOG_DATA_GENERATION')
+    if override:
+        return override
+
+    if _generation_state['pid'] == os.getpid():
+        return _generation_state['token']
+
+    with _generation_lock:
+        # Forked workers inherit the parent's token but not its refresher thread
+        if _generation_state['pid'] != os.getpid():
+            refresh_analog_data_generation()
+            _generation_state['refresher'] = _start_refresher()
+            _generation_state['pid'] = os.getpid()
+    return _generation_state['token']
+
+
+def stop_analog_data_refresher():
+    """Stop this worker's refresher; the next lookup rescans and restarts it."""
+    with _generation_lock:
+        if _generation_state['refresher'] is not None:
+            _generation_state['refresher'].set()
+        _generation_state.update(pid=None, refresher=None)
@@ -10,6 +10,8 @@ metrics collection for FAISS-based analog search operations.
 Features:
 - Real-time query performance tracking with async context managers
 - Index health monitoring (memory usage, size, search accuracy)
+- Streaming, mergeable latency sketches per (horizon, index_type) over sliding windows
+- Cross-worker aggregation through the shared metrics segment (multi-process deployments)
 - Prometheus metrics collection for monitoring dashboards
 - Async monitoring that doesn't impact FAISS operation performance
 - Detailed health summary endpoints for system diagnostics
@@ -21,6 +23,7 @@ Version: 1.0.0 - Production FAISS Health System
 
 import asyncio
 import logging
+import os
 import time
 import threading
 try:
@@ -50,6 +53,9 @@ from prometheus_client import (
     CONTENT_TYPE_LATEST
 )
 
+from core.shared_metrics import get_shared_metrics
+from .latency_sketch import LatencySketch, SlidingWindowSketch
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -128,9 +134,11 @@ class FAISSHealthMonitor:
         # Initialize Prometheus metrics
         self._init_prometheus_metrics()
         
-        # Performance tracking
-        self._latency_samples = {f"{h}h": [] for h in [6, 12, 24, 48]}
-        self._max_samples = 1000  # Keep last 1000 samples per horizon
+        # Performance tracking: one sliding-window sketch per (horizon, index_type)
+        self._latency_window_seconds = float(os.getenv('FAISS_LATENCY_WINDOW_SECONDS', '300'))
+        self._latency_sketches: Dict[Tuple[str, str], SlidingWindowSketch] = {}
+        self._percentile_refresh_seconds = 1.0  # Gauge refresh is throttled, sketch updates are not
+        self._last_percentile_refresh = {f"{h}h": 0.0 for h in [6, 12, 24, 48]}
         
         # Last successful search timestamps per horizon
         self._last_successful_search = {f"{h}h": None for h in [6, 12, 24, 48]}
@@ -383,11 +391,6 @@ class FAISSHealthMonitor:
         # Keep only last 1000 completed queries
         if len(self._completed_queries) > 1000:
             self._completed_queries = self._completed_queries[-1000:]
-        
-        # Clean old latency samples per horizon
-        for horizon in self._latency_samples:
-            if len(self._latency_samples[horizon]) > self._max_samples:
-                self._latency_samples[horizon] = self._latency_samples[horizon][-self._max_samples:]
     
     @asynccontextmanager
     async def track_query(self, 
@@ -449,10 +452,11 @@ class FAISSHealthMonitor:
                 index_type=index_type,
                 status='success'
             ).inc()
+            self._count_shared_query(success=True)
             
-            # Store latency sample and update per-horizon percentiles  
-            if horizon in self._latency_samples:
-                self._latency_samples[horizon].append(query_metrics.duration_ms)
+            # Record latency in the streaming sketch and refresh per-horizon percentiles
+            if horizon in self._last_percentile_refresh:
+                self._record_latency(horizon, index_type, query_metrics.duration_ms)
                 
                 # Update per-horizon latency percentiles in real-time (T-011 requirement)
                 self._update_horizon_percentile_metrics(horizon)
@@ -475,6 +479,7 @@ class FAISSHealthMonitor:
                 index_type=index_type,
                 status='error'
             ).inc()
+            self._count_shared_query(success=False)
             
             logger.warning(f"FAISS query failed: {query_id} - {e}")
             
@@ -487,6 +492,11 @@ class FAISSHealthMonitor:
                 self._active_queries.pop(query_id, None)
                 self._completed_queries.append(query_metrics)
     
+    def _count_shared_query(self, success: bool):
+        shared = get_shared_metrics()
+        if shared is not None:
+            shared.inc('faiss_queries:success' if success else 'faiss_queries:error')
+    
     def record_fallback(self, horizon: str, reason: str = "index_unavailable"):
         """Record a fallback event when FAISS search fails."""
         current_time = datetime.now(timezone.utc)
@@ -652,30 +662,67 @@ class FAISSHealthMonitor:
         
         return health_metrics
     
+    def _record_latency(self, horizon: str, index_type: str, duration_ms: float):
+        """Add a latency sample to the (horizon, index_type) sketch in O(1)."""
+        key = (horizon, index_type)
+        sketch = self._latency_sketches.get(key)
+        if sketch is None:
+            sketch = self._latency_sketches[key] = SlidingWindowSketch(self._latency_window_seconds)
+        sketch.add(duration_ms)
+        
+        shared = get_shared_metrics()
+        if shared is not None:
+            shared.observe_bucket(f"faiss_latency:{horizon}:{index_type}",
+                                  sketch.aggregate.bucket_key(duration_ms))
+    
+    def _horizon_latency_sketch(self, horizon: str) -> LatencySketch:
+        """Merge the current window of every index type (and every worker) for a horizon."""
+        shared = get_shared_metrics()
+        if shared is not None:
+            return LatencySketch.from_buckets(shared.read_buckets(f"faiss_latency:{horizon}:"))
+        
+        merged = LatencySketch()
+        for (sketch_horizon, _), sketch in self._latency_sketches.items():
+            if sketch_horizon == horizon:
+                merged.merge(sketch.snapshot())
+        return merged
+    
+    def get_latency_sketches(self) -> Dict[str, Dict[str, Any]]:
+        """Serialized window sketches keyed "horizon:index_type", for cross-worker merging.
+        
+        Combine exports from several workers with LatencySketch.from_dict(...).merge(...).
+        """
+        return {
+            f"{horizon}:{index_type}": sketch.snapshot().to_dict()
+            for (horizon, index_type), sketch in self._latency_sketches.items()
+        }
+    
     def _calculate_latency_percentiles(self, horizon: str) -> Tuple[float, float]:
         """Calculate latency percentiles for a horizon."""
-        if horizon not in self._latency_samples or not self._latency_samples[horizon]:
+        sketch = self._horizon_latency_sketch(horizon)
+        if sketch.count == 0:
             return 0.0, 0.0
         
-        samples = self._latency_samples[horizon]
-        if len(samples) < 10:  # Need minimum samples
-            return np.mean(samples), np.mean(samples)
-        
-        p50 = np.percentile(samples, 50)
-        p95 = np.percentile(samples, 95)
+        if sketch.count < 10:  # Need minimum samples
+            return sketch.mean, sketch.mean
         
+        p50, p95 = sketch.quantiles([0.5, 0.95])
         return float(p50), float(p95)
     
     def _update_horizon_percentile_metrics(self, horizon: str):
         """Update per-horizon percentile metrics in real-time (T-011 requirement)."""
-        if horizon not in self._latency_samples or len(self._latency_samples[horizon]) < 5:
-            return  # Need minimum samples for meaningful percentiles
+        now = time.time()
+        if now - self._last_percentile_refresh[horizon] < self._percentile_refresh_seconds:
+            return
         
         try:
-            samples = self._latency_samples[horizon]
+            sketch = self._horizon_latency_sketch(horizon)
+            if sketch.count < 5:
+                return  # Need minimum samples for meaningful percentiles
+            self._last_percentile_refresh[horizon] = now
+            
             # Convert milliseconds to seconds for Prometheus metrics
-            p50_ms = np.percentile(samples, 50)
-            p95_ms = np.percentile(samples, 95)
+            p50_ms, p95_ms = sketch.quantiles([0.5, 0.95])
             
             # Update Prometheus gauges
             self.search_latency_p50_gauge.labels(horizon=horizon).set(p50_ms / 1000.0)
@@ -739,13 +786,24 @@ class FAISSHealthMonitor:
                 error_rate = 0.0
                 avg_latency_ms = 0.0
         
+        # In multi-worker deployments report every worker's queries, not just this one's
+        shared = get_shared_metrics()
+        worker_count = 1
+        if shared is not None:
+            totals = shared.totals('faiss_queries:')
+            total_queries = int(totals.get('success', 0) + totals.get('error', 0))
+            error_rate = totals.get('error', 0) / total_queries if total_queries else 0.0
+            avg_latency_ms = LatencySketch.from_buckets(shared.read_buckets('faiss_latency:')).mean
+            worker_count = len(shared.live_workers())
+        
         # Build health summary
         health_summary = {
             "status": "healthy",
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "monitoring": {
                 "active": self._monitoring_active,
-                "uptime_seconds": time.time() - getattr(self, '_start_time', time.time())
+                "uptime_seconds": time.time() - getattr(self, '_start_time', time.time()),
+                "workers": worker_count
             },
             "query_performance": {
                 "total_queries": total_queries,
@@ -782,7 +840,7 @@ class FAISSHealthMonitor:
             health_summary["latency_percentiles"][horizon] = {
                 "p50_ms": p50,
                 "p95_ms": p95,
-                "sample_count": len(self._latency_samples.get(horizon, [])),
+                "sample_count": self._horizon_latency_sketch(horizon).count,
                 "last_successful_search": last_search.isoformat() if last_search else None,
                 "last_search_age_seconds": (datetime.now(timezone.utc) - last_search).total_seconds() if last_search else None
             }
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Streaming Latency Sketches
+==========================
+
+Mergeable quantile sketches for search latency monitoring.
+
+LatencySketch is a log-bucketed sketch (DDSketch style): every value lands in
+bucket ceil(log_gamma(v)), so any quantile is reported within a fixed relative
+error (1% by default) using a few hundred counters, whatever the traffic.
+Sketches with the same accuracy merge by adding bucket counts, which makes
+them safe to combine across time windows and across worker processes.
+
+SlidingWindowSketch keeps a ring of per-slice sketches plus a running
+aggregate, so updates are O(1) and percentile reads only walk the aggregate.
+
+Author: Monitoring & Observability Engineer
+Version: 1.0.0 - Streaming percentiles
+"""
+
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class LatencySketch:
+    """Log-bucketed quantile sketch with bounded relative error."""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1):
+        """Record a (non-negative) value."""
+        if value <= 0:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def bucket_key(self, value: float) -> str:
+        """Bucket label for ``value``, for counting into external bucket stores."""
+        if value <= 0:
+            return 'z'
+        return str(math.ceil(math.log(value) / self._log_gamma))
+
+    @classmethod
+    def from_buckets(cls, buckets: Dict[str, float],
+                     relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> 'LatencySketch':
+        """Rebuild a sketch from bucket counts keyed by bucket_key() labels."""
+        sketch = cls(relative_accuracy)
+        for label, count in buckets.items():
+            if count <= 0:
+                continue
+            if label == 'z':
+                sketch.add(0.0, int(count))
+            else:
+                key = int(label)
+                sketch.add(2 * sketch.gamma ** key / (sketch.gamma + 1), int(count))
+        return sketch
+
+    def merge(self, other: 'LatencySketch'):
+        """Add another sketch's counts into this one."""
+        self._check_compatible(other)
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def subtract(self, other: 'LatencySketch'):
+        """Remove counts previously merged from ``other`` (used for window expiry)."""
+        self._check_compatible(other)
+        for key, count in other.buckets.items():
+            remaining = self.buckets.get(key, 0) - count
+            if remaining > 0:
+                self.buckets[key] = remaining
+            else:
+                self.buckets.pop(key, None)
+        self.zero_count -= other.zero_count
+        self.count -= other.count
+        self.sum -= other.sum
+        if self.count <= 0:
+            self.clear()
+
+    def clear(self):
+        self.buckets.clear()
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile ``q`` (0-1), within the sketch's relative accuracy."""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        """Several quantiles in one walk over the buckets."""
+        qs = list(qs)
+        if self.count == 0:
+            return [0.0] * len(qs)
+
+        ranks = sorted((q * (self.count - 1), i) for i, q in enumerate(qs))
+        results = [0.0] * len(qs)
+        position = 0
+        seen = self.zero_count
+        keys = sorted(self.buckets)
+        key_index = 0
+
+        while position < len(ranks) and ranks[position][0] < seen:
+            results[ranks[position][1]] = 0.0
+            position += 1
+
+        while position < len(ranks) and key_index < len(keys):
+            key = keys[key_index]
+            seen += self.buckets[key]
+            # Bucket midpoint in the sense of relative error: 2 * gamma^k / (gamma + 1)
+            value = 2 * self.gamma ** key / (self.gamma + 1)
+            while position < len(ranks) and ranks[position][0] < seen:
+                results[ranks[position][1]] = min(max(value, self.min), self.max)
+                position += 1
+            key_index += 1
+
+        for rank, i in ranks[position:]:
+            results[i] = self.max
+        return results
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form for sharing with other workers."""
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'buckets': {str(key): count for key, count in self.buckets.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LatencySketch':
+        sketch = cls(data.get('relative_accuracy', DEFAULT_RELATIVE_ACCURACY))
+        sketch.buckets = {int(key): int(count) for key, count in data.get('buckets', {}).items()}
+        sketch.zero_count = int(data.get('zero_count', 0))
+        sketch.count = int(data.get('count', 0))
+        sketch.sum = float(data.get('sum', 0.0))
+        if sketch.count:
+            sketch.min = float(data['min'])
+            sketch.max = float(data['max'])
+        return sketch
+
+    def _check_compatible(self, other: 'LatencySketch'):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+
+
+class SlidingWindowSketch:
+    """
+    Latency sketch over the last ``window_seconds``, kept as ``slices`` ring slots.
+
+    The aggregate always equals the sum of the live slices: each add goes to
+    both, and a slice is subtracted from the aggregate when it rotates out.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, slices: int = 10,
+                 relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.window_seconds = window_seconds
+        self.slice_seconds = window_seconds / slices
+        self._slices = [LatencySketch(relative_accuracy) for _ in range(slices)]
+        self._slice_ids = [-1] * slices
+        self.aggregate = LatencySketch(relative_accuracy)
+
+    def _advance(self, now: float) -> int:
+        slice_id = int(now // self.slice_seconds)
+        expired = False
+        for position, current_id in enumerate(self._slice_ids):
+            if current_id != -1 and slice_id - current_id >= len(self._slices):
+                self.aggregate.subtract(self._slices[position])
+                self._slices[position].clear()
+                self._slice_ids[position] = -1
+                expired = True
+
+        if expired and self.aggregate.count:
+            # min/max are not subtractable; rebuild them from the live slices
+            live = [s for s, i in zip(self._slices, self._slice_ids) if i != -1 and s.count]
+            self.aggregate.min = min(s.min for s in live)
+            self.aggregate.max = max(s.max for s in live)
+        return slice_id
+
+    def add(self, value: float, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        slice_id = self._advance(now)
+        position = slice_id % len(self._slices)
+        if self._slice_ids[position] != slice_id:
+            self._slices[position].clear()
+            self._slice_ids[position] = slice_id
+        self._slices[position].add(value)
+        self.aggregate.add(value)
+
+    def snapshot(self, now: Optional[float] = None) -> LatencySketch:
+        """The aggregate for the current window (expired slices dropped first)."""
+        self._advance(time.time() if now is None else now)
+        return self.aggregate
+
+    def quantiles(self, qs: Iterable[float], now: Optional[float] = None) -> List[float]:
+        return self.snapshot(now).quantiles(qs)
+
+    @property
+    def count(self) -> int:
+        return self.aggregate.count
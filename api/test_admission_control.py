@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for the adaptive admission controller in front of the forecast
+endpoints: limit adaptation, bounded queueing with shedding, and cache hits
+bypassing the limiter.
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.admission_control import BACKGROUND, AdaptiveConcurrencyLimiter, LoadShed
+from api.performance_middleware import ForecastCache
+from api.services.analog_search import AnalogSearchConfig, AnalogSearchService, SearchNotAdmitted
+
+
+def test_limit_follows_latency_and_backend_rejections():
+    rejections = {'count': 0}
+    limiter = AdaptiveConcurrencyLimiter(name='test-adapt', initial_limit=10, min_limit=2, max_limit=40,
+                                         rejections=lambda: rejections['count'])
+
+    def samples(n, rtt, concurrent):
+        for _ in range(n):
+            limiter.in_flight = concurrent
+            limiter._release(rtt)
+
+    samples(50, 0.02, concurrent=10)     # Fully used at steady latency: probe upwards
+    grown = limiter.limit
+    assert grown > 10
+
+    samples(30, 0.2, concurrent=10)      # Latency 10x the long-term average: back off
+    assert limiter.limit < grown / 2
+
+    limiter.limit = 20
+    samples(20, 0.02, concurrent=1)      # Mostly idle: no growth without demand
+    assert limiter.limit <= 20
+
+    rejections['count'] += 3             # Compute executor rejected work
+    samples(1, 0.02, concurrent=1)
+    assert limiter.limit == pytest.approx(18) and limiter.stats['overload_signals'] == 1
+
+
+def test_excess_requests_queue_briefly_then_shed_with_retry_after():
+    limiter = AdaptiveConcurrencyLimiter(name='test-shed', initial_limit=1, min_limit=1, max_limit=1,
+                                         max_queue=1, max_wait=0.2)
+    order = []
+
+    async def request(name, hold=0.05, priority='foreground'):
+        async with limiter.admit(priority):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def scenario():
+        first = asyncio.ensure_future(request('first'))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(request('second'))   # Waits for first's slot
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 1
+        with pytest.raises(LoadShed) as full:
+            await request('third')
+        with pytest.raises(LoadShed) as background:
+            await request('precompute', priority=BACKGROUND)
+        await asyncio.gather(first, second)
+
+        blocker = asyncio.ensure_future(request('blocker', hold=0.5))
+        await asyncio.sleep(0)
+        with pytest.raises(LoadShed) as timeout:
+            await request('late')
+        await blocker
+        return full.value, background.value, timeout.value
+
+    full, background, timeout = asyncio.run(scenario())
+    assert order == ['first', 'second', 'blocker']
+    assert (full.reason, background.reason, timeout.reason) == ('queue_full', 'background', 'queue_timeout')
+    assert full.retry_after >= 1
+    stats = limiter.get_stats()
+    assert stats['in_flight'] == 0 and stats['queue_depth'] == 0
+    assert stats['shed_queue_full'] == stats['shed_background'] == stats['shed_queue_timeout'] == 1
+
+
+def test_cache_hits_are_served_while_misses_are_shed():
+    limiter = AdaptiveConcurrencyLimiter(name='test-cache', initial_limit=1, min_limit=1, max_limit=1,
+                                         max_queue=0)
+    cache = ForecastCache(max_entries=10)
+
+    async def build(body):
+        async with limiter.admit():
+            return body
+
+    async def scenario():
+        await cache.get_or_compute('forecast:24h:t2m:g', lambda: build(b'cached'), ttl=60)
+        async with limiter.admit():       # Saturate the limiter
+            entry, status = await cache.get_or_compute('forecast:24h:t2m:g', lambda: build(b'new'), ttl=60)
+            with pytest.raises(LoadShed):
+                await cache.get_or_compute('forecast:48h:t2m:g', lambda: build(b'miss'), ttl=60)
+        return entry, status
+
+    entry, status = asyncio.run(scenario())
+    assert status == 'HIT' and entry.body == b'cached'
+    assert limiter.stats['shed_queue_full'] == 1 and 'forecast:48h:t2m:g' not in cache.cache
+
+
+def test_analog_result_cache_hits_skip_admission():
+    rng = np.random.default_rng(3)
+    corpus = rng.normal(size=(200, 256)).astype(np.float32)
+    faiss.normalize_L2(corpus)
+    index = faiss.IndexFlatIP(256)
+    index.add(corpus)
+    state = {'embedding': corpus[5:6].copy(), 'searches': 0}
+
+    def search(query, horizon, k):
+        state['searches'] += 1
+        similarities, indices = index.search(query, k)
+        return 2.0 + 2.0 * similarities[0], indices[0]
+
+    forecaster = SimpleNamespace(
+        indices={24: index}, metadata={24: pd.DataFrame(index=range(200))},
+        _extract_weather_pattern=lambda time: object(),
+        _generate_query_embedding=lambda pattern, horizon, time: state['embedding'],
+        _search_analogs=search)
+
+    class Pool:
+        async def acquire(self):
+            return forecaster
+
+        async def release(self, released):
+            pass
+
+    service = AnalogSearchService(AnalogSearchConfig(result_cache_size=16))
+    service.pool = Pool()
+    limiter = AdaptiveConcurrencyLimiter(name='test-analogs', initial_limit=1, min_limit=1, max_limit=1,
+                                         max_queue=0)
+
+    async def scenario():
+        first = await service.search_analogs('2024-01-01', 24, k=10, admission=limiter.admit)
+        async with limiter.admit():       # Saturate the limiter
+            hit = await service.search_analogs('2024-01-01', 24, k=10, admission=limiter.admit)
+            state['embedding'] = corpus[9:10].copy()
+            with pytest.raises(SearchNotAdmitted) as shed:
+                await service.get_analog_details('2024-01-01', 24, k=10, admission=limiter.admit)
+        return first, hit, shed.value
+
+    first, hit, shed = asyncio.run(scenario())
+    assert first.success and first.search_metadata['search_method'] == 'real_faiss'
+    assert hit.success and hit.search_metadata['search_method'] == 'result_cache'
+    assert isinstance(shed.cause, LoadShed) and shed.cause.retry_after >= 1
+    assert state['searches'] == 1
+    assert limiter.stats['shed_queue_full'] == 1
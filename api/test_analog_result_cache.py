@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the locality-keyed analog search result cache and its use in
+AnalogSearchService.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+import pandas as pd
+from prometheus_client import REGISTRY
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.analog_result_cache import AnalogResultCache
+from api.services.analog_search import AnalogSearchConfig, AnalogSearchService
+
+
+def unit(rng, dim=64):
+    vector = rng.normal(size=dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_near_identical_queries_hit_after_verification():
+    rng = np.random.default_rng(0)
+    cache = AnalogResultCache(tolerance=1e-4)
+    query = unit(rng)
+    cache.store(24, query, np.arange(50), np.linspace(0.1, 0.6, 50), {'total_candidates': 1000})
+
+    hits = 0
+    for _ in range(200):
+        nearby = query + rng.normal(scale=5e-4, size=64).astype(np.float32)
+        hit = cache.lookup(24, 3.0 * nearby, 20)  # Scale does not matter
+        if hit is not None:
+            hits += 1
+            assert hit.indices.tolist() == list(range(20)) and len(hit.distances) == 20
+            assert hit.metadata['cache_similarity'] >= 1 - 1e-4
+    assert hits >= 190  # Multi-probe keeps hyperplane crossings from missing
+
+    before = dict(cache.stats)
+    assert cache.lookup(24, query, 60) is None          # Cached k too small
+    assert cache.lookup(12, query, 10) is None          # Other horizon
+    assert cache.lookup(24, unit(rng), 10) is None      # Unrelated query
+    assert cache.stats['rejected'] == before['rejected'] + 1
+    assert cache.stats['misses'] == before['misses'] + 2
+
+    # Same bucket but beyond the cosine tolerance: rejected, not returned
+    strict = AnalogResultCache(tolerance=1e-12)
+    strict.store(24, query, np.arange(50), np.zeros(50))
+    assert strict.lookup(24, query + rng.normal(scale=5e-4, size=64).astype(np.float32), 10) is None
+    assert strict.stats['rejected'] == 1 and strict.get_stats()['hit_rate'] == 0.0
+
+
+def test_lru_eviction_and_generation_invalidation():
+    generation = {'token': 'gen-1'}
+    cache = AnalogResultCache(max_entries=3, generation=lambda: generation['token'])
+    rng = np.random.default_rng(1)
+    queries = [unit(rng) for _ in range(4)]
+    for i, query in enumerate(queries[:3]):
+        cache.store(6, query, np.arange(10) + i, np.zeros(10))
+    assert cache.lookup(6, queries[0], 10) is not None   # Refreshes query 0
+
+    cache.store(6, queries[3], np.arange(10), np.zeros(10))
+    assert cache.get_stats()['entries'] == 3 and cache.stats['evictions'] == 1
+    assert cache.lookup(6, queries[1], 10) is None      # Least recently used went first
+    assert cache.lookup(6, queries[0], 10).indices[0] == 0
+
+    generation['token'] = 'gen-2'
+    assert cache.lookup(6, queries[0], 10) is None
+    assert cache.get_stats()['entries'] == 0 and cache.stats['invalidations'] == 1
+
+    disabled = AnalogResultCache(max_entries=0)
+    disabled.store(6, queries[0], np.arange(10), np.zeros(10))
+    assert disabled.lookup(6, queries[0], 10) is None
+
+
+def test_service_skips_faiss_for_repeated_queries():
+    rng = np.random.default_rng(2)
+    corpus = rng.normal(size=(500, 256)).astype(np.float32)
+    faiss.normalize_L2(corpus)
+    index = faiss.IndexFlatIP(256)
+    index.add(corpus)
+    state = {'embedding': corpus[7:8].copy(), 'searches': 0}
+
+    def search(query, horizon, k):
+        state['searches'] += 1
+        similarities, indices = index.search(query, k)
+        return 2.0 + 2.0 * similarities[0], indices[0]  # Squared-IP convention of the forecaster
+
+    forecaster = SimpleNamespace(
+        indices={24: index}, metadata={24: pd.DataFrame(index=range(500))},
+        _extract_weather_pattern=lambda time: object(),
+        _generate_query_embedding=lambda pattern, horizon, time: state['embedding'],
+        _search_analogs=search)
+    service = AnalogSearchService(AnalogSearchConfig(result_cache_size=16))
+
+    first = service._perform_real_faiss_search(forecaster, pd.Timestamp('2024-01-01'), 24, 20, 0.0)
+    counters = lambda: (REGISTRY.get_sample_value('analog_real_total'),
+                        REGISTRY.get_sample_value('analog_cache_hit_total'))
+    real_before, hits_before = counters()
+    state['embedding'] = corpus[7:8] * 1.0001
+    second = service._perform_real_faiss_search(forecaster, pd.Timestamp('2024-01-01 00:05'), 24, 10, 0.0)
+
+    assert state['searches'] == 1
+    assert counters() == (real_before, hits_before + 1)    # A cache hit is not a FAISS search
+    assert first['metadata']['search_method'] == 'real_faiss' and first['indices'][0] == 7
+    assert second['metadata']['search_method'] == 'result_cache' and second['metadata']['cache_hit']
+    np.testing.assert_array_equal(second['indices'], first['indices'][:10])
+    assert service._validate_search_results(second, 24, 10)['valid']
+
+    state['embedding'] = corpus[8:9].copy()
+    third = service._perform_real_faiss_search(forecaster, pd.Timestamp('2024-01-01 00:10'), 24, 10, 0.0)
+    assert state['searches'] == 2 and third['indices'][0] == 8
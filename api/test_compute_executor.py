@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the dedicated compute executor and its use by AnalogSearchService.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.analog_search import AnalogSearchConfig, AnalogSearchService
+from api.services.compute_executor import (
+    ComputeExecutor, ComputeQueueFull, compute_cancelled, raise_if_cancelled
+)
+
+
+def test_queue_depth_is_bounded():
+    executor = ComputeExecutor(workers=1, threads_per_worker=1, max_pending=2, pin_cpus='false')
+    gate = threading.Event()
+    released = []
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run(gate.wait, on_done=lambda: released.append(1)))
+        second = asyncio.ensure_future(executor.run(lambda: 'queued', on_done=lambda: released.append(2)))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ComputeQueueFull):
+            await executor.run(lambda: 'rejected', on_done=lambda: released.append(3))
+        assert executor.pending == 2
+        gate.set()
+        return await first, await second
+
+    assert asyncio.run(scenario()) == (True, 'queued')
+    assert sorted(released) == [1, 2, 3] and executor.pending == 0
+    assert executor.get_stats()['rejected'] == 1 and executor.get_stats()['completed'] == 2
+    executor.shutdown()
+
+
+def test_cancellation_drops_queued_jobs_and_signals_running_ones():
+    executor = ComputeExecutor(workers=1, threads_per_worker=1, max_pending=4, pin_cpus='false')
+    started, stages, released = threading.Event(), [], []
+
+    def staged():
+        started.set()
+        while not compute_cancelled():
+            time.sleep(0.005)
+        stages.append('first stage')
+        raise_if_cancelled()
+        stages.append('second stage')
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(staged, on_done=lambda: released.append('running')))
+        queued = asyncio.ensure_future(executor.run(stages.append, 'never', on_done=lambda: released.append('queued')))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        queued.cancel()
+        running.cancel()
+        for task in (running, queued):
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        while executor.pending:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert stages == ['first stage']
+    assert sorted(released) == ['queued', 'running']
+    assert executor.get_stats()['cancelled'] == 2
+    executor.shutdown()
+
+
+def test_search_runs_off_the_event_loop_and_releases_forecaster_after_it():
+    service = AnalogSearchService(AnalogSearchConfig(result_cache_size=0, search_timeout_ms=50))
+    service.executor = ComputeExecutor(workers=1, threads_per_worker=1, max_pending=4, pin_cpus='false')
+    finish = threading.Event()
+
+    def slow_search(query, horizon, k):
+        finish.wait(5)
+        return np.linspace(0.1, 0.5, k), np.arange(k)
+
+    forecaster = SimpleNamespace(
+        indices={24: faiss.IndexFlatIP(256)}, metadata={24: pd.DataFrame(index=range(100))},
+        _extract_weather_pattern=lambda time: object(),
+        _generate_query_embedding=lambda pattern, horizon, time: np.ones((1, 256), dtype=np.float32),
+        _search_analogs=slow_search)
+    released = []
+
+    class Pool:
+        async def acquire(self):
+            return forecaster
+
+        async def release(self, instance):
+            released.append(instance)
+
+    service.pool = Pool()
+
+    async def scenario():
+        beats = 0
+
+        async def heartbeat():
+            nonlocal beats
+            while True:
+                beats += 1
+                await asyncio.sleep(0.005)
+
+        ticker = asyncio.ensure_future(heartbeat())
+        with pytest.raises(asyncio.TimeoutError):
+            await service._perform_analog_search('test', pd.Timestamp('2024-01-01'), 24, 10, 0)
+        assert beats >= 3        # The loop kept running during the blocking search
+        assert released == []    # The worker still holds the forecaster
+        finish.set()
+        while not released:
+            await asyncio.sleep(0.01)
+        ticker.cancel()
+
+    asyncio.run(scenario())
+    assert released == [forecaster]
+    service.executor.shutdown()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-tier forecast response cache in performance_middleware.
+
+Covers key canonicalisation, single-flight collapsing of concurrent misses,
+stale-while-revalidate, LRU bounds and sharing entries through the file tier.
+"""
+
+import asyncio
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.performance_middleware import CacheEntry, FileCacheTier, ForecastCache
+
+
+def make_compute(calls, body=b'{"horizon":"24h"}', delay=0.05):
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return body
+    return compute
+
+
+def test_key_is_canonical_over_variable_order_and_duplicates():
+    assert ForecastCache.make_key("24h", "t2m,u10", "g1") == ForecastCache.make_key("24h", ["u10", "t2m", "u10"], "g1")
+    assert ForecastCache.make_key("24h", "t2m", "g1") != ForecastCache.make_key("24h", "t2m", "g2")
+
+
+def test_concurrent_misses_collapse_into_one_computation():
+    cache = ForecastCache(max_entries=10)
+    calls = []
+
+    async def run():
+        compute = make_compute(calls)
+        return await asyncio.gather(*(cache.get_or_compute("k", compute, ttl=60) for _ in range(20)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    statuses = [status for _, status in results]
+    assert statuses.count("MISS") == 1
+    assert statuses.count("COLLAPSED") == 19
+    assert all(entry is results[0][0] for entry, _ in results)
+    assert gzip.decompress(results[0][0].gzip_body) == results[0][0].body
+
+
+def test_expired_entry_served_stale_while_single_refresh_runs():
+    cache = ForecastCache(stale_ttl=60)
+    calls = []
+
+    async def run():
+        await cache.get_or_compute("k", make_compute(calls, body=b"old", delay=0), ttl=60)
+        cache.cache["k"].fresh_until = 0  # Force expiry, still within stale window
+
+        refresh = make_compute(calls, body=b"new", delay=0.05)
+        first = await cache.get_or_compute("k", refresh, ttl=60)
+        second = await cache.get_or_compute("k", refresh, ttl=60)
+        await asyncio.sleep(0.1)
+        third = await cache.get_or_compute("k", refresh, ttl=60)
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+
+    assert (first[1], first[0].body) == ("STALE", b"old")
+    assert (second[1], second[0].body) == ("STALE", b"old")
+    assert (third[1], third[0].body) == ("HIT", b"new")
+    assert len(calls) == 2
+
+
+def test_failed_computation_is_not_cached():
+    cache = ForecastCache()
+
+    async def failing():
+        raise RuntimeError("forecast failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_compute("k", failing))
+
+    assert "k" not in cache.cache
+    assert cache.get_stats()["inflight_computations"] == 0
+
+
+def test_lru_eviction_respects_entry_and_byte_bounds():
+    cache = ForecastCache(max_entries=2, max_bytes=10 ** 6)
+    for key in ("a", "b"):
+        cache.set(key, CacheEntry.build(b"x" * 100, 60, 60))
+    cache.get("a")  # Touch so "b" becomes least recently used
+    cache.set("c", CacheEntry.build(b"x" * 100, 60, 60))
+
+    assert list(cache.cache) == ["a", "c"]
+    assert cache.eviction_count == 1
+
+    small = ForecastCache(max_entries=100, max_bytes=1)
+    small.set("a", CacheEntry.build(b"x" * 100, 60, 60))
+    small.set("b", CacheEntry.build(b"x" * 100, 60, 60))
+    assert list(small.cache) == ["b"]
+    assert small.current_bytes == small.cache["b"].size
+
+
+def test_entries_shared_between_workers_through_file_tier(tmp_path):
+    calls = []
+    worker_a = ForecastCache(shared_tier=FileCacheTier(str(tmp_path)))
+    worker_b = ForecastCache(shared_tier=FileCacheTier(str(tmp_path)))
+
+    async def run():
+        await worker_a.get_or_compute("forecast:24h:t2m:g1", make_compute(calls), ttl=60)
+        return await worker_b.get_or_compute("forecast:24h:t2m:g1", make_compute(calls), ttl=60)
+
+    entry, status = asyncio.run(run())
+
+    assert status == "SHARED"
+    assert entry.body == b'{"horizon":"24h"}'
+    assert len(calls) == 1
+
+    asyncio.run(worker_b.invalidate("24h"))
+    assert list(tmp_path.glob("*.entry")) == []
+
+
+def test_generation_reads_project_data_dirs_and_refreshes_in_background(tmp_path, monkeypatch):
+    import time
+
+    from api.services import data_generation
+
+    for dirname in data_generation.ANALOG_DATA_DIRS:
+        (tmp_path / dirname).mkdir()
+    (tmp_path / 'indices' / 'faiss_24h_flatip.faiss').write_bytes(b'v1')
+    monkeypatch.setenv('ANALOG_DATA_ROOT', str(tmp_path))
+    monkeypatch.setenv('ANALOG_DATA_GENERATION_REFRESH_SECONDS', '0.05')
+    monkeypatch.delenv('ANALOG_DATA_GENERATION', raising=False)
+    monkeypatch.chdir(tmp_path / 'embeddings')          # The CWD no longer matters
+    data_generation.stop_analog_data_refresher()
+
+    try:
+        first = data_generation.analog_data_generation()
+        scans = []
+        monkeypatch.setattr(data_generation, '_scan_generation',
+                            lambda original=data_generation._scan_generation: scans.append(1) or original())
+        assert data_generation.analog_data_generation() == first and not scans  # Lookups do no I/O
+
+        (tmp_path / 'outcomes' / 'outcomes_24h.npy').write_bytes(b'rebuilt')
+        deadline = time.monotonic() + 5
+        while data_generation.analog_data_generation() == first and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert data_generation.analog_data_generation() != first and scans
+    finally:
+        data_generation.stop_analog_data_refresher()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-horizon ForecastResult cache in ForecastAdapter.
+
+The core forecaster and analog search service are replaced with fakes so the
+tests only count how often the expensive path runs.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.forecast_adapter import ForecastAdapter
+from core.analog_forecaster import ForecastResult
+from core.calibration_engine import ForecastArchive
+
+
+class FakeAnalogService:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_analog_results_for_adapter(self, horizon_hours, correlation_id=None):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        return {
+            'indices': list(range(50)),
+            'distances': [0.1] * 50,
+            'init_time': datetime(2024, 1, 1, tzinfo=timezone.utc),
+            'search_metadata': {'search_time_ms': 1.0}
+        }
+
+
+def make_forecast(analog_results, horizon):
+    values = {'t2m': 295.15, 'u10': 3.0, 'v10': -1.0, 'cape': 150.0, 't850': 285.0, 'z500': 55000.0, 'q850': 0.008}
+    return ForecastResult(
+        horizon=horizon,
+        forecast_time=pd.Timestamp('2024-01-01T12:00Z'),
+        variables=values,
+        confidence_intervals={var: (value * 0.9, value * 1.1) for var, value in values.items()},
+        confidence_level=0.8,
+        ensemble_size=50
+    )
+
+
+def make_adapter():
+    with patch('api.forecast_adapter.RealTimeAnalogForecaster'):
+        adapter = ForecastAdapter()
+    adapter.analog_service = FakeAnalogService()
+    adapter.forecaster = MagicMock()
+    adapter.forecaster.generate_forecast.side_effect = make_forecast
+    return adapter
+
+
+def test_variable_subsets_are_projected_from_one_computation():
+    adapter = make_adapter()
+
+    async def run():
+        first = await adapter.forecast_with_uncertainty('24h', ['t2m', 'u10'])
+        second = await adapter.forecast_with_uncertainty('24h', ['v10', 't2m', 'cape'])
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert adapter.analog_service.calls == 1
+    assert adapter.forecaster.generate_forecast.call_count == 1
+    assert first['t2m'] == second['t2m']
+    assert set(second) == {'v10', 't2m', 'cape'}
+
+    # Callers get copies, so mutating a response cannot corrupt the cache
+    first['t2m']['value'] = None
+    assert asyncio.run(adapter.forecast_with_uncertainty('24h', ['t2m']))['t2m']['value'] is not None
+
+
+def test_concurrent_requests_share_one_computation_per_horizon():
+    adapter = make_adapter()
+
+    async def run():
+        return await asyncio.gather(
+            *(adapter.forecast_with_uncertainty(horizon, ['t2m'])
+              for horizon in ('6h', '24h') for _ in range(5))
+        )
+
+    asyncio.run(run())
+
+    assert adapter.analog_service.calls == 2
+
+
+def test_new_time_bucket_or_generation_recomputes():
+    adapter = make_adapter()
+
+    asyncio.run(adapter.forecast_with_uncertainty('12h', ['t2m']))
+    with patch('api.forecast_adapter.analog_data_generation', return_value='rebuilt'):
+        asyncio.run(adapter.forecast_with_uncertainty('12h', ['t2m']))
+    with patch('api.forecast_adapter.time.time', return_value=10 ** 10):
+        asyncio.run(adapter.forecast_with_uncertainty('12h', ['t2m']))
+
+    assert adapter.analog_service.calls == 3
+
+
+def test_served_forecasts_are_archived_once_per_bucket(tmp_path):
+    variables = ['z500', 't2m', 'u10']
+
+    def make_ensemble_forecast(analog_results, horizon):
+        forecast = make_forecast(analog_results, horizon)
+        forecast.members = np.array([[55000.0, 295.0, 3.0], [55100.0, np.nan, 2.0]], dtype=np.float32)
+        forecast.weights = np.array([0.6, 0.4], dtype=np.float32)
+        return forecast
+
+    # Two workers filling the same result bucket
+    workers = [make_adapter(), make_adapter()]
+    for adapter in workers:
+        adapter.forecast_archive = ForecastArchive(tmp_path)
+        adapter.forecaster.variables = variables
+        adapter.forecaster.generate_forecast.side_effect = make_ensemble_forecast
+        with patch('api.forecast_adapter.time.time', return_value=1_700_000_000):
+            asyncio.run(adapter.forecast_with_uncertainty('24h', ['t2m']))
+
+    archived = ForecastArchive(tmp_path).read(24)
+    assert archived['variables'] == variables
+    assert len(archived['valid_time']) == 1
+    assert archived['mean'][0].tolist() == [55000.0, np.float32(295.15), 3.0]
+    assert archived['members'].shape == (1, 2, 3)
+    assert np.isnan(archived['members'][0, 1, 1])
+    assert len(list((tmp_path / '24h').glob('forecasts-*.npz'))) == 1
+
+    # Forecasts without an ensemble (and mock fallback analogs) are not archived
+    adapter = make_adapter()
+    adapter.forecast_archive = ForecastArchive(tmp_path)
+    asyncio.run(adapter.forecast_with_uncertainty('6h', ['t2m']))
+    assert ForecastArchive(tmp_path).read(6) is None
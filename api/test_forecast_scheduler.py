@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the forecast precompute scheduler.
+
+A fake body builder stands in for the forecast pipeline so the tests check
+what gets published, persisted and reloaded.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# api.main validates the token at import time (imported by the precompute test)
+os.environ["API_TOKEN"] = "Xk9fQ2mZ7pL4vR8tN3wB6yH1jC5dG0sAqE"
+os.environ["ENVIRONMENT"] = "development"
+
+from api.forecast_scheduler import ForecastPrecomputeScheduler
+from api.performance_middleware import ForecastCache
+from api.services.data_generation import analog_data_generation
+from api.variables import DEFAULT_VARIABLES, VALID_HORIZONS
+
+
+def make_scheduler(tmp_path, cache=None, fail_horizon=None):
+    calls = []
+
+    async def build_body(horizon, variables):
+        calls.append((horizon, tuple(variables)))
+        if horizon == fail_horizon:
+            raise RuntimeError("forecast failed")
+        return f'{{"horizon":"{horizon}"}}'.encode()
+
+    scheduler = ForecastPrecomputeScheduler(
+        cache or ForecastCache(), build_body, interval_seconds=300, persist_dir=str(tmp_path)
+    )
+    return scheduler, calls
+
+
+def test_publish_warms_every_horizon_so_requests_hit(tmp_path):
+    scheduler, calls = make_scheduler(tmp_path)
+
+    published = asyncio.run(scheduler.compute_and_publish())
+
+    assert published == 2 * len(VALID_HORIZONS)
+    assert {horizon for horizon, _ in calls} == set(VALID_HORIZONS)
+
+    async def lazy_compute():
+        raise AssertionError("request should be served from the published entry")
+
+    key = scheduler.cache.make_key("24h", list(reversed(DEFAULT_VARIABLES)), analog_data_generation())
+    entry, status = asyncio.run(scheduler.cache.get_or_compute(key, lazy_compute))
+    assert status == "HIT"
+    assert entry.body == b'{"horizon":"24h"}'
+    assert entry.fresh_until - entry.created_at >= 600
+
+
+def test_failed_cycle_publishes_nothing(tmp_path):
+    scheduler, _ = make_scheduler(tmp_path, fail_horizon="48h")
+
+    try:
+        asyncio.run(scheduler.compute_and_publish())
+    except RuntimeError:
+        pass
+
+    assert len(scheduler.cache.cache) == 0
+    assert scheduler.published_generation is None
+    assert scheduler._due()
+
+
+def test_restarted_worker_loads_persisted_forecasts(tmp_path):
+    first, _ = make_scheduler(tmp_path)
+    asyncio.run(first.compute_and_publish())
+
+    restarted, calls = make_scheduler(tmp_path)
+    loaded = asyncio.run(restarted.load_persisted())
+
+    assert loaded == 2 * len(VALID_HORIZONS)
+    assert calls == []
+    assert asyncio.run(restarted.load_persisted()) == 0  # Nothing newer to load
+
+
+def test_only_one_scheduler_per_host_leads(tmp_path):
+    leader, _ = make_scheduler(tmp_path)
+    follower, _ = make_scheduler(tmp_path)
+
+    assert leader._acquire_leadership()
+    assert not follower._acquire_leadership()
+    asyncio.run(leader.stop())
+    assert follower._acquire_leadership()
+    asyncio.run(follower.stop())
+
+
+def test_precompute_builds_do_not_count_as_requests(monkeypatch):
+    from contextlib import asynccontextmanager
+    from unittest.mock import MagicMock
+
+    from prometheus_client import REGISTRY
+
+    from api import main
+    from api.admission_control import BACKGROUND
+
+    tracked = []
+
+    class Monitor:
+        @asynccontextmanager
+        async def track_query(self, **labels):
+            tracked.append(labels)
+            yield None
+
+    adapter = MagicMock()
+    adapter.forecast_with_uncertainty.return_value = {
+        't2m': {'value': 20.0, 'p05': 18.0, 'p95': 22.0, 'confidence': 0.8,
+                'available': True, 'analog_count': 50}
+    }
+    forecast_logger = MagicMock()
+    monkeypatch.setattr(main, 'forecast_adapter', adapter)
+    monkeypatch.setattr(main, 'faiss_health_monitor', Monitor())
+    monkeypatch.setattr(main, 'forecast_logger', forecast_logger)
+    observed = lambda: REGISTRY.get_sample_value('response_duration_seconds_count')
+
+    before = observed()
+    body = asyncio.run(main._admitted_forecast_body('24h', ['t2m'], priority=BACKGROUND))
+    assert b'"horizon":"24h"' in body
+    assert observed() == before and tracked == [] and not forecast_logger.log_forecast_result.called
+
+    asyncio.run(main._admitted_forecast_body('24h', ['t2m']))
+    assert observed() == before + 1 and len(tracked) == 1 and forecast_logger.log_forecast_result.called
+
+
+def test_precompute_dir_does_not_depend_on_the_working_directory(tmp_path, monkeypatch):
+    from api.forecast_scheduler import precompute_dir
+    from api.services.data_generation import PROJECT_ROOT
+
+    monkeypatch.delenv('FORECAST_PRECOMPUTE_DIR', raising=False)
+    monkeypatch.chdir(tmp_path)
+    assert precompute_dir() == str(PROJECT_ROOT / 'tmp' / 'forecasts')
+
+    monkeypatch.setenv('FORECAST_PRECOMPUTE_DIR', str(tmp_path / 'shared'))
+    assert precompute_dir() == str(tmp_path / 'shared')
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming latency sketches used by FAISSHealthMonitor.
+
+Checks quantile accuracy against numpy, merging across workers, sliding
+window expiry and the monitor's per-(horizon, index_type) tracking.
+"""
+
+import asyncio
+import os
+import sys
+
+import numpy as np
+from prometheus_client import CollectorRegistry
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.faiss_health_monitoring import FAISSHealthMonitor
+from api.services.latency_sketch import LatencySketch, SlidingWindowSketch
+
+
+def test_quantiles_within_relative_accuracy():
+    samples = np.random.default_rng(0).lognormal(mean=2.0, sigma=0.8, size=20000)
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for value in samples:
+        sketch.add(float(value))
+
+    for q, estimate in zip((0.5, 0.95, 0.99), sketch.quantiles([0.5, 0.95, 0.99])):
+        exact = np.quantile(samples, q, method='lower')
+        assert abs(estimate - exact) / exact <= 0.011
+    assert len(sketch.buckets) < 500
+
+
+def test_worker_sketches_merge_like_one_stream():
+    samples = np.random.default_rng(1).exponential(20.0, size=4000)
+    combined = LatencySketch()
+    workers = [LatencySketch(), LatencySketch()]
+    for i, value in enumerate(samples):
+        combined.add(float(value))
+        workers[i % 2].add(float(value))
+
+    merged = LatencySketch.from_dict(workers[0].to_dict())
+    merged.merge(LatencySketch.from_dict(workers[1].to_dict()))
+
+    assert merged.count == combined.count
+    assert merged.quantiles([0.5, 0.95]) == combined.quantiles([0.5, 0.95])
+
+
+def test_sliding_window_drops_expired_slices():
+    window = SlidingWindowSketch(window_seconds=60, slices=6)
+    for _ in range(100):
+        window.add(500.0, now=0.0)
+    for _ in range(100):
+        window.add(5.0, now=30.0)
+
+    assert window.snapshot(now=59.0).count == 200
+    late = window.snapshot(now=65.0)  # First slice (t=0) has expired
+    assert late.count == 100
+    assert late.max == 5.0
+    assert abs(window.quantiles([0.95], now=65.0)[0] - 5.0) / 5.0 <= 0.01
+
+
+def test_monitor_tracks_sketches_per_horizon_and_index_type():
+    monitor = FAISSHealthMonitor(registry=CollectorRegistry())
+
+    async def run():
+        for index_type in ("flatip", "ivfpq"):
+            for _ in range(20):
+                async with monitor.track_query("24h", k_neighbors=10, index_type=index_type):
+                    pass
+
+    asyncio.run(run())
+
+    sketches = monitor.get_latency_sketches()
+    assert set(sketches) == {"24h:flatip", "24h:ivfpq"}
+    assert sketches["24h:flatip"]["count"] == 20
+    p50, p95 = monitor._calculate_latency_percentiles("24h")
+    assert 0.0 <= p50 <= p95
+    assert monitor._calculate_latency_percentiles("6h") == (0.0, 0.0)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the allowlist query validator in security_middleware.
+
+Covers the per-parameter grammars, generic sanitization of unknown
+parameters, LRU memoization of results and reuse by ValidationUtils.
+"""
+
+import os
+import sys
+import traceback
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.security_middleware import QueryValidator, SecurityException, ValidationUtils
+
+
+def test_known_parameters_parsed_by_grammar():
+    validator = QueryValidator()
+    result = validator.validate(b"horizon=24h&vars=t2m,%20u10,,msl&k=25&query_time=2024-01-01T12:00:00Z")
+
+    assert result.horizon == "24h"
+    assert result.vars == ("t2m", "u10", "msl")
+    assert result.k == 25
+    assert result.query_time == "2024-01-01T12:00:00Z"
+
+
+@pytest.mark.parametrize("query", [
+    b"horizon=24H",
+    b"horizon=%3Cscript%3E",
+    b"vars=t2m;drop",
+    b"vars=t%202m",
+    b"vars=" + b",".join([b"v%d" % i for i in range(21)]),
+    b"k=-1",
+    b"k=10abc",
+    b"query_time=tomorrow",
+    b"other=%3Cscript%3Ealert(1)%3C/script%3E",
+    b"other=1%20or%201=1",
+])
+def test_malformed_or_malicious_queries_rejected(query):
+    with pytest.raises(SecurityException) as exc_info:
+        QueryValidator().validate(query)
+    assert exc_info.value.status_code == 400
+
+
+def test_results_and_rejections_are_memoized():
+    validator = QueryValidator(cache_size=2)
+
+    first = validator.validate(b"horizon=6h")
+    assert validator.validate(b"horizon=6h") is first
+    for _ in range(2):
+        with pytest.raises(SecurityException):
+            validator.validate(b"horizon=bad")
+    assert (validator.hits, validator.misses) == (2, 2)
+
+    validator.validate(b"horizon=12h")  # Evicts the least recently used entry
+    validator.validate(b"horizon=6h")
+    assert validator.misses == 4
+    assert validator.get_stats()["cached_queries"] == 2
+
+
+def test_cached_rejection_traceback_does_not_grow():
+    validator = QueryValidator()
+    lengths, errors = [], []
+    for _ in range(5):
+        try:
+            validator.validate(b"horizon=bad")
+        except SecurityException as exc:
+            errors.append(exc)
+            lengths.append(len(traceback.extract_tb(exc.__traceback__)))
+    assert validator.hits == 4
+    assert len(set(lengths[1:])) == 1          # Every cache hit raises a fresh exception
+    assert len({id(exc) for exc in errors}) == 5
+    assert errors[-1].violation_type == "invalid_parameter" and errors[-1].status_code == 400
+
+
+def test_forecast_validation_reuses_middleware_result():
+    validated = QueryValidator().validate(b"horizon=48h&vars=t2m,u10")
+    result = ValidationUtils.validate_forecast_request("48h", "ignored;", validated)
+
+    assert result == {"horizon": "48h", "variables": ["t2m", "u10"], "valid": True}
+
+    # Defaults still apply when the query string omits a parameter
+    result = ValidationUtils.validate_forecast_request("24h", None, QueryValidator().validate(b""))
+    assert result["horizon"] == "24h" and result["variables"] == []
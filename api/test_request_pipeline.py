@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass RequestPipelineMiddleware.
+
+A minimal FastAPI app is wrapped in the pipeline so the tests cover headers,
+correlation IDs, security rejection and the one compression decision without
+loading the forecasting system.
+"""
+
+import gzip
+import os
+import sys
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.performance_middleware import CacheEntry, PerformanceMiddleware
+from api.request_pipeline import RequestPipelineMiddleware
+
+BODY = b'{"value":21.5}' * 100
+
+
+def make_client():
+    app = FastAPI()
+    performance = PerformanceMiddleware()
+
+    @app.get("/json")
+    async def json_body(request: Request):
+        return Response(content=BODY, media_type="application/json",
+                        headers={"X-Seen-Correlation": request.state.correlation_id})
+
+    @app.get("/small")
+    async def small():
+        return Response(content=b'{"ok":true}', media_type="application/json")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(5):
+                yield BODY
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(content=gzip.compress(BODY), media_type="application/json",
+                        headers={"Content-Encoding": "gzip"})
+
+    entry = CacheEntry.build(BODY, ttl=60, stale_ttl=60)
+
+    @app.get("/cached")
+    async def cached(request: Request):
+        return performance.cached_response(request, entry, "HIT")
+
+    app.add_middleware(RequestPipelineMiddleware, performance=performance)
+    return TestClient(app), performance
+
+
+def test_headers_and_correlation_id_added_once():
+    client, _ = make_client()
+    response = client.get("/json", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.headers["x-correlation-id"] == response.headers["x-seen-correlation"]
+    assert response.headers["x-frame-options"] == "DENY"
+    assert "x-response-time" in response.headers
+    assert len(response.headers.get_list("content-security-policy")) == 1
+    assert "content-encoding" not in response.headers
+    assert response.content == BODY
+
+
+def test_single_and_streamed_bodies_are_gzipped_once():
+    client, performance = make_client()
+
+    response = client.get("/json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == BODY  # httpx decodes exactly one gzip layer
+
+    streamed = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert streamed.headers["content-encoding"] == "gzip"
+    assert "content-length" not in streamed.headers
+    assert streamed.content == BODY * 5
+
+    assert performance.compression.compression_stats["compressed_requests"] == 2
+
+
+def test_small_and_preencoded_bodies_pass_through():
+    client, _ = make_client()
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.json() == {"ok": True}
+
+    encoded = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert encoded.content == BODY
+
+
+def test_malicious_query_rejected_with_security_headers():
+    client, _ = make_client()
+    response = client.get("/json", params={"horizon": "<script>alert(1)</script>"})
+
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == 400
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert "x-correlation-id" in response.headers
+
+
+def test_cached_entries_follow_the_same_compression_decision():
+    client, performance = make_client()
+
+    direct = client.get("/cached", headers={"Accept-Encoding": "gzip"})
+    assert direct.headers["content-encoding"] == "gzip" and direct.content == BODY
+    assert performance.compression.compression_stats["compressed_requests"] == 1  # Served pre-compressed
+
+    for path in ("/cached", "/json"):
+        proxied = client.get(path, headers={"Accept-Encoding": "gzip", "X-Forwarded-For": "10.0.0.1"})
+        assert "content-encoding" not in proxied.headers and proxied.content == BODY
+    assert performance.compression.compression_stats["compressed_requests"] == 1
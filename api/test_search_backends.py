@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-horizon analog search backends and their startup selection.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.analog_search import (
+    AnalogSearchConfig, AnalogSearchPool, ExactMatrixSearchBackend,
+    FaissSearchBackend, benchmark_search_backends
+)
+from api.services.compute_executor import get_compute_executor
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(3000, 64)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def test_exact_backend_matches_flat_index(corpus):
+    flat = faiss.IndexFlatIP(64)
+    flat.add(corpus)
+    queries = corpus[:5] + 0.01
+
+    # Small blocks exercise the cross-block top-k merge
+    exact = ExactMatrixSearchBackend(corpus, block_rows=700)
+    similarities, indices = exact.search(queries, 20)
+    expected_similarities, expected_indices = flat.search(queries, 20)
+
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(similarities, expected_similarities, rtol=1e-5)
+    assert indices[:, 0].tolist() == [0, 1, 2, 3, 4]
+
+
+class SlowExact(ExactMatrixSearchBackend):
+    def __init__(self, vectors, delay):
+        super().__init__(vectors)
+        self.delay = delay
+
+    def search(self, queries, k):
+        import time
+        time.sleep(self.delay)
+        return super().search(queries, k)
+
+
+def test_benchmark_prefers_exact_unless_approximate_is_clearly_faster(corpus):
+    ivf = faiss.IndexIVFFlat(faiss.IndexFlatIP(64), 64, 32, faiss.METRIC_INNER_PRODUCT)
+    ivf.train(corpus)
+    ivf.add(corpus)
+    approximate = FaissSearchBackend(ivf, nprobe=1)
+    queries = corpus[:8]
+
+    selected, report = benchmark_search_backends([approximate, ExactMatrixSearchBackend(corpus)], queries,
+                                                 k=10, repeats=1, budget_ms=50.0)
+    assert selected.exact and report['selected'] == 'exact_matrix'
+    assert 0 < report['recall_at_k'][approximate.name] < 1
+
+    selected, report = benchmark_search_backends([approximate, SlowExact(corpus, 0.02)], queries,
+                                                 k=10, repeats=1, budget_ms=1.0)
+    assert selected is approximate
+
+
+def test_pool_installs_selected_backend_once_per_horizon(corpus):
+    index = faiss.IndexIVFFlat(faiss.IndexFlatIP(64), 64, 32, faiss.METRIC_INNER_PRODUCT)
+    index.train(corpus)
+    index.add(corpus)
+    pool = AnalogSearchPool(AnalogSearchConfig(search_backend="auto",
+                                               exact_search_budget_ms=1000.0))
+    forecasters = [SimpleNamespace(indices={24: index}, embeddings={24: corpus}) for _ in range(2)]
+    for forecaster in forecasters:
+        pool._install_search_backends(forecaster)
+
+    assert forecasters[0].indices[24] is forecasters[1].indices[24] is pool.search_backends[24]
+    assert isinstance(pool.search_backends[24], ExactMatrixSearchBackend)
+    assert list(pool.backend_reports) == [24]
+    assert pool.backend_reports[24]['recall_at_k']['faiss_IndexIVFFlat'] < 1
+    assert pool.backend_reports[24]['threads_per_worker'] == get_compute_executor().threads_per_worker
+
+    mismatched = SimpleNamespace(indices={6: index}, embeddings={6: corpus[:100]})
+    pool._install_search_backends(mismatched)
+    assert mismatched.indices[6] is index
+
+
+def test_exact_backend_covers_flat_index_when_embeddings_are_filtered(corpus, caplog):
+    flat = faiss.IndexFlatIP(64)
+    flat.add(corpus)
+    pool = AnalogSearchPool(AnalogSearchConfig(search_backend="exact"))
+    forecaster = SimpleNamespace(indices={24: flat}, embeddings={24: corpus[:1000]})
+    pool._install_search_backends(forecaster)
+
+    backend = forecaster.indices[24]
+    assert isinstance(backend, ExactMatrixSearchBackend) and backend.ntotal == flat.ntotal
+    queries = corpus[2500:2503] + 0.01
+    np.testing.assert_array_equal(backend.search(queries, 10)[1], flat.search(queries, 10)[1])
+
+    ivf = faiss.IndexIVFFlat(faiss.IndexFlatIP(64), 64, 32, faiss.METRIC_INNER_PRODUCT)
+    ivf.train(corpus)
+    ivf.add(corpus)
+    filtered = SimpleNamespace(indices={6: ivf}, embeddings={6: corpus[:1000]})
+    with caplog.at_level("WARNING"):
+        pool._install_search_backends(filtered)
+    assert filtered.indices[6] is ivf
+    assert "Exact search skipped for 6h" in caplog.text
+
+
+def test_concurrent_exact_searches_leave_the_blas_setting_alone(corpus):
+    threadpoolctl = pytest.importorskip("threadpoolctl")
+    from concurrent.futures import ThreadPoolExecutor
+
+    def blas_threads():
+        return {lib['num_threads'] for lib in threadpoolctl.threadpool_info() if lib['user_api'] == 'blas'}
+
+    backend = ExactMatrixSearchBackend(corpus, block_rows=500)
+    with threadpoolctl.threadpool_limits(limits=2, user_api='blas'):   # Set once, as the executor does
+        configured = blas_threads()
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(lambda i: backend.search(corpus[i:i + 4], 10), range(0, 400, 4)))
+        assert blas_threads() == configured
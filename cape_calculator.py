@@ -20,28 +20,25 @@ warnings.filterwarnings("ignore", category=UserWarning, module="metpy")
 
 logger = logging.getLogger(__name__)
 
-def calculate_cape_empirical(
-    t850: float,  # Temperature at 850 hPa [K]
-    q850: float,  # Specific humidity at 850 hPa [kg/kg]
-    t500: float,  # Temperature at 500 hPa [K]
-    debug: bool = False
-) -> float:
+def calculate_cape_empirical_array(t850, q850, t500) -> np.ndarray:
     """
-    Calculate CAPE using a smoothed empirical relationship.
+    Array-native empirical CAPE [J/kg] for broadcastable T850/q850/T500 inputs.
 
-    The goal is to derive a continuous, non-zero CAPE estimate that still reflects
-    the primary physical drivers (instability, moisture, lapse rate) while operating
-    with only a very shallow vertical profile (500/850 hPa).
+    Accepts scalars, 1-D time series or full (time, lat, lon) fields and
+    returns a float64 array of the broadcast shape, with the same numerics as
+    calculate_cape_empirical (NaN inputs give NaN).
     """
-    try:
+    t850 = np.asarray(t850, dtype=np.float64)
+    q850 = np.asarray(q850, dtype=np.float64)
+    t500 = np.asarray(t500, dtype=np.float64)
+
+    with np.errstate(over='ignore', invalid='ignore'):
         # Convert to user-friendly units
-        t850_c = t850 - 273.15
-        t500_c = t500 - 273.15
-        q850_gkg = max(q850 * 1000.0, 0.0)
+        q850_gkg = np.maximum(q850 * 1000.0, 0.0)
 
         # Instability between 850 and 500 hPa
-        temp_diff = t850_c - t500_c  # °C
-        instability = max(temp_diff, 0.0)
+        temp_diff = (t850 - 273.15) - (t500 - 273.15)  # °C
+        instability = np.maximum(temp_diff, 0.0)
 
         # Approximate lapse rate (K/km) using ~4 km layer depth
         lapse_rate = instability / 4.0
@@ -53,25 +50,44 @@ def calculate_cape_empirical(
         instability_score = np.log1p(np.exp((instability - 12.0) / 2.5))
 
         # Combine ingredients
-        cape = 120.0 * instability_score * moisture_score * (1.0 + 0.1 * max(lapse_rate - 6.5, 0.0))
+        cape = 120.0 * instability_score * moisture_score * (1.0 + 0.1 * np.maximum(lapse_rate - 6.5, 0.0))
 
         # Penalise extremely dry environments
-        if q850_gkg < 1.0:
-            cape *= 0.35
-        elif q850_gkg < 3.0:
-            cape *= 0.65
+        cape = cape * np.where(q850_gkg < 1.0, 0.35, np.where(q850_gkg < 3.0, 0.65, 1.0))
 
         # Gentle floor to avoid hard zeros while remaining physical
-        cape = max(cape, 5.0 if instability > 0 else 0.0)
+        cape = np.maximum(cape, np.where(instability > 0, 5.0, 0.0))
 
         # Clip to realistic climatological bounds
-        cape = float(np.clip(cape, 0.0, 4000.0))
+        return np.clip(cape, 0.0, 4000.0)
+
+
+def calculate_cape_empirical(
+    t850: float,  # Temperature at 850 hPa [K]
+    q850: float,  # Specific humidity at 850 hPa [kg/kg]
+    t500: float,  # Temperature at 500 hPa [K]
+    debug: bool = False
+) -> float:
+    """
+    Calculate CAPE using a smoothed empirical relationship.
+
+    The goal is to derive a continuous, non-zero CAPE estimate that still reflects
+    the primary physical drivers (instability, moisture, lapse rate) while operating
+    with only a very shallow vertical profile (500/850 hPa).
+
+    Scalar wrapper around calculate_cape_empirical_array.
+    """
+    try:
+        cape = float(calculate_cape_empirical_array(t850, q850, t500))
 
         if debug:
+            t850_c = t850 - 273.15
+            t500_c = t500 - 273.15
+            q850_gkg = max(q850 * 1000.0, 0.0)
+            temp_diff = t850_c - t500_c
             print("Empirical CAPE calculation:")
             print(f"  T850: {t850_c:.1f}°C | T500: {t500_c:.1f}°C | ΔT: {temp_diff:.1f}K")
-            print(f"  q850: {q850_gkg:.1f} g/kg | lapse rate: {lapse_rate:.1f} K/km")
-            print(f"  Scores → instability: {instability_score:.2f}, moisture: {moisture_score:.2f}")
+            print(f"  q850: {q850_gkg:.1f} g/kg | lapse rate: {max(temp_diff, 0.0) / 4.0:.1f} K/km")
             print(f"  CAPE: {cape:.0f} J/kg")
 
         return cape
@@ -81,6 +97,17 @@ def calculate_cape_empirical(
         return 0.0
 
 
+def calculate_cape_simplified_array(t850, q850, t500, z850=None, z500=None,
+                                    surface_pressure: float = 1013.25) -> np.ndarray:
+    """
+    Array-native calculate_cape_simplified: broadcastable inputs, CAPE array out.
+
+    z850, z500 and surface_pressure are accepted for API parity but not used
+    by the empirical method.
+    """
+    return calculate_cape_empirical_array(t850, q850, t500)
+
+
 def calculate_cape_simplified(
     t850: float,  # Temperature at 850 hPa [K]
     q850: float,  # Specific humidity at 850 hPa [kg/kg]
@@ -109,6 +136,30 @@ def calculate_cape_simplified(
     return calculate_cape_empirical(t850, q850, t500, debug)
 
 
+def calculate_cape_field(pressure_data):
+    """
+    Gridded CAPE [J/kg] from an ERA5 pressure-level Dataset.
+
+    Selects the 850/500 hPa levels and evaluates the empirical estimator over
+    all remaining dimensions (e.g. time, latitude, longitude) at once, lazily
+    when the dataset is dask-backed.
+
+    Args:
+        pressure_data: xarray Dataset with 't' and 'q' on isobaricInhPa
+
+    Returns:
+        xarray DataArray of CAPE without the level dimension
+    """
+    import xarray as xr
+
+    t850 = pressure_data['t'].sel(isobaricInhPa=850, method='nearest', drop=True)
+    t500 = pressure_data['t'].sel(isobaricInhPa=500, method='nearest', drop=True)
+    q850 = pressure_data['q'].sel(isobaricInhPa=850, method='nearest', drop=True)
+    cape = xr.apply_ufunc(calculate_cape_empirical_array, t850, q850, t500,
+                          dask='parallelized', output_dtypes=[np.float64])
+    return cape.rename('cape')
+
+
 def calculate_cape_metpy(
     pressure_levels: np.ndarray,  # [hPa]
     temperatures: np.ndarray,     # [K]  
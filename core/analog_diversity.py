@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Temporally De-duplicated Analog Retrieval
+=========================================
+
+Consecutive 6-hourly states from one synoptic event embed almost identically,
+so a plain top-k search often returns several analogs from the same event and
+the ensemble spread collapses. This module over-fetches k×m candidates in a
+single FAISS call and keeps the k most similar ones that are at least a
+minimum time apart, using an int64 epoch array per horizon.
+
+The over-fetch factor m is learned per horizon: it is doubled (and the search
+repeated) only when a query cannot fill k diverse analogs, and halved again
+once the candidate pool is consistently much larger than needed.
+
+Author: Performance Engineering
+Version: 1.0.0 - Temporal diversity filter
+"""
+
+import bisect
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OVERFETCH = 4
+MAX_OVERFETCH = 64
+
+
+def analog_epochs(metadata: pd.DataFrame, time_column: str = 'init_time') -> np.ndarray:
+    """Analog init times as int64 epoch seconds, aligned with metadata rows."""
+    times = pd.to_datetime(metadata[time_column], utc=True)
+    return times.to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+
+def select_temporally_diverse(similarities: np.ndarray, indices: np.ndarray,
+                              epochs: np.ndarray, k: int,
+                              min_separation_seconds: int) -> Tuple[np.ndarray, int]:
+    """Greedily keep the best-ranked candidates at least ``min_separation_seconds`` apart.
+
+    Candidates must be in rank order (as FAISS returns them). Validity masking,
+    the epoch gather and the time sort are done once as array operations;
+    each accepted analog then clears its exclusion window with two binary
+    searches over the time-sorted epochs, and the next survivor is found with
+    a C-level scan of the alive mask, so the loop runs at most ``k`` times.
+
+    Returns:
+        Positions of the selected candidates (in rank order) and the number of
+        candidates that were examined to fill them.
+    """
+    valid = (indices >= 0) & (indices < len(epochs)) & np.isfinite(similarities)
+    candidate_epochs = epochs[np.where(valid, indices, 0)]
+    by_time = np.argsort(candidate_epochs, kind='stable')
+    sorted_epochs = candidate_epochs[by_time].tolist()
+    by_time = by_time.tolist()
+    candidate_epochs = candidate_epochs.tolist()
+    alive = bytearray(valid.tobytes())
+
+    selected = []
+    position = alive.find(1)
+    while position != -1 and len(selected) < k:
+        selected.append(position)
+        epoch = candidate_epochs[position]
+        lo = bisect.bisect_right(sorted_epochs, epoch - min_separation_seconds)
+        hi = bisect.bisect_left(sorted_epochs, epoch + min_separation_seconds)
+        for excluded in by_time[lo:hi]:
+            alive[excluded] = 0
+        alive[position] = 0
+        position = alive.find(1, position + 1)
+
+    examined = selected[-1] + 1 if selected else 0
+    return np.asarray(selected, dtype=np.int64), examined
+
+
+class TemporalDiversityFilter:
+    """Over-fetching, adaptively widened minimum-separation retrieval for one forecaster."""
+
+    def __init__(self, min_separation_hours: float,
+                 initial_overfetch: int = DEFAULT_OVERFETCH,
+                 max_overfetch: int = MAX_OVERFETCH):
+        self.min_separation_seconds = int(min_separation_hours * 3600)
+        self.initial_overfetch = initial_overfetch
+        self.max_overfetch = max_overfetch
+        self._overfetch: Dict[int, int] = {}
+        self._epochs: Dict[int, np.ndarray] = {}
+        self.stats = {'searches': 0, 'widened': 0, 'shortfalls': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.min_separation_seconds > 0
+
+    def set_metadata(self, horizon: int, metadata: pd.DataFrame):
+        """Cache the epoch array for a horizon (call again when metadata is reloaded)."""
+        self._epochs[horizon] = analog_epochs(metadata)
+
+    def search(self, index, query_embedding: np.ndarray, horizon: int,
+               k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """k temporally diverse analogs as (similarities, indices), best first."""
+        epochs = self._epochs[horizon]
+        ntotal = index.ntotal
+        overfetch = self._overfetch.get(horizon, self.initial_overfetch)
+        self.stats['searches'] += 1
+
+        while True:
+            fetch = min(k * overfetch, ntotal)
+            similarities, indices = index.search(query_embedding, fetch)
+            similarities, indices = similarities[0], indices[0]
+            selected, examined = select_temporally_diverse(
+                similarities, indices, epochs, k, self.min_separation_seconds
+            )
+
+            if len(selected) >= k or fetch >= ntotal or overfetch >= self.max_overfetch:
+                break
+            overfetch = min(overfetch * 2, self.max_overfetch)
+            self.stats['widened'] += 1
+
+        if len(selected) < k:
+            self.stats['shortfalls'] += 1
+            logger.warning(f"Only {len(selected)}/{k} analogs for {horizon}h are "
+                           f"{self.min_separation_seconds // 3600}h apart (fetched {fetch})")
+
+        # Shrink the learned factor when far fewer candidates than fetched were needed
+        if examined * 4 <= fetch and overfetch > self.initial_overfetch:
+            overfetch //= 2
+        self._overfetch[horizon] = overfetch
+
+        return similarities[selected], indices[selected]
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            'min_separation_hours': self.min_separation_seconds / 3600,
+            'overfetch': dict(self._overfetch),
+            **self.stats
+        }
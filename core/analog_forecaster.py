@@ -21,11 +21,23 @@ import pandas as pd
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+try:
+    from core.shared_corpus import get_shared_corpus
+    from core.analog_parameters import AnalogParameterStore, get_analog_parameters, season_of
+except ImportError:
+    from shared_corpus import get_shared_corpus
+    from analog_parameters import AnalogParameterStore, get_analog_parameters, season_of
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+
+def valid_outcome_mask(var_name: str, values: np.ndarray) -> np.ndarray:
+    """Mask of usable analog outcomes (zero temperatures mark missing data)."""
+    return values > 0 if var_name in ['t2m', 't850'] else np.ones_like(values, dtype=bool)
+
 @dataclass
 class ForecastResult:
     """Container for forecast results with uncertainty."""
@@ -35,6 +47,8 @@ class ForecastResult:
     confidence_intervals: Dict[str, Tuple[float, float]]  # 5th-95th percentiles
     confidence_level: float  # Overall confidence (0-1)
     ensemble_size: int  # Number of analogs used
+    members: Optional[np.ndarray] = field(default=None, repr=False)  # (k, V) analog outcomes, NaN where invalid
+    weights: Optional[np.ndarray] = field(default=None, repr=False)  # (k,) analog weights
     
     def __str__(self) -> str:
         """Professional forecast formatting."""
@@ -66,7 +80,8 @@ class ForecastResult:
 class RealTimeAnalogForecaster:
     """Real-time analog ensemble forecaster with GPT-5 methodology."""
     
-    def __init__(self, outcomes_dir: Path = Path("outcomes")):
+    def __init__(self, outcomes_dir: Path = Path("outcomes"),
+                 parameter_store: Optional[AnalogParameterStore] = None):
         self.outcomes_dir = outcomes_dir
         self.outcomes_cache = {}  # Memory-mapped arrays
         self.metadata_cache = {}  # Metadata DataFrames
@@ -84,7 +99,8 @@ class RealTimeAnalogForecaster:
             'cape'     # CAPE (J/kg)
         ]
         
-        # Adaptive temperature parameters (learned per horizon)
+        # Default temperature parameters per horizon, used until fitted values
+        # are available (see scripts/optimize_analog_parameters.py)
         # These control the softness of the weighting function
         self.temperature_params = {
             6: 0.1,    # Sharp weighting for short-term
@@ -98,12 +114,24 @@ class RealTimeAnalogForecaster:
         self.max_analogs = 50      # Maximum analogs to consider
         self.confidence_threshold = 0.8  # Minimum confidence for "high confidence"
         
+        # Fitted per-horizon (and per-season) tau and k, hot-reloaded
+        self.parameter_store = parameter_store or get_analog_parameters()
+        
     def load_outcomes_for_horizon(self, horizon: int) -> bool:
         """Load outcomes and metadata for specified horizon."""
         if horizon in self.outcomes_cache:
             return True  # Already loaded
             
         try:
+            # Attach to the shared corpus when one is published (no per-worker copy)
+            corpus = get_shared_corpus()
+            if corpus is not None and corpus.available(horizon, 'outcomes') \
+                    and corpus.available(horizon, 'outcomes_metadata'):
+                self.outcomes_cache[horizon] = corpus.outcomes(horizon)
+                self.metadata_cache[horizon] = corpus.outcomes_metadata(horizon)
+                logger.info(f"✅ Attached {horizon}h outcomes from shared corpus {corpus.generation}")
+                return True
+            
             # Load memory-mapped outcomes array
             outcomes_path = self.outcomes_dir / f"outcomes_{horizon}h.npy"
             if not outcomes_path.exists():
@@ -130,10 +158,21 @@ class RealTimeAnalogForecaster:
             logger.error(f"❌ Failed to load outcomes for {horizon}h: {e}")
             return False
     
-    def compute_analog_weights(self, distances: np.ndarray, horizon: int) -> np.ndarray:
+    def analog_parameters(self, horizon: int, valid_time: Optional[pd.Timestamp] = None) -> Tuple[float, int]:
+        """Kernel temperature and ensemble size for a horizon (and valid-time season)."""
+        season = season_of(valid_time.month) if valid_time is not None else None
+        fitted = self.parameter_store.get(horizon, season)
+        if fitted is None:
+            return self.temperature_params.get(horizon, 0.2), self.max_analogs
+        tau, k = fitted
+        return tau, min(max(k, self.min_analogs), self.max_analogs)
+    
+    def compute_analog_weights(self, distances: np.ndarray, horizon: int,
+                               tau: Optional[float] = None) -> np.ndarray:
         """Compute kernel-based soft weights using adaptive temperature."""
         # Get temperature parameter for this horizon
-        tau = self.temperature_params.get(horizon, 0.2)
+        if tau is None:
+            tau = self.analog_parameters(horizon)[0]
         
         # Apply softmax weighting: w_i = softmax(-distance_i / τ)
         # Negative distances because smaller distance = higher weight
@@ -155,7 +194,7 @@ class RealTimeAnalogForecaster:
             values = outcomes[:, i]
             
             # Data validation: filter out invalid values (especially zeros for temperature)
-            valid_mask = values > 0 if var_name in ['t2m', 't850'] else np.ones_like(values, dtype=bool)
+            valid_mask = valid_outcome_mask(var_name, values)
             
             # If too many invalid values, skip this variable
             if np.sum(valid_mask) < len(values) * 0.5:  # Less than 50% valid
@@ -259,17 +298,18 @@ class RealTimeAnalogForecaster:
             outcomes = self.outcomes_cache[horizon]
             metadata = self.metadata_cache[horizon]
             
-            # Get outcomes for selected analogs
-            analog_outcomes = outcomes[analog_indices]
+            # Calculate forecast valid time
+            forecast_time = init_time + pd.Timedelta(hours=horizon)
+            tau, k = self.analog_parameters(horizon, forecast_time)
             
-            # Limit number of analogs
-            max_analogs = min(self.max_analogs, len(analog_indices))
-            analog_outcomes = analog_outcomes[:max_analogs]
+            # Limit number of analogs before gathering their outcomes
+            max_analogs = min(k, len(analog_indices))
             distances = distances[:max_analogs]
             analog_indices = analog_indices[:max_analogs]
+            analog_outcomes = outcomes[analog_indices]
             
             # Compute adaptive weights
-            weights = self.compute_analog_weights(distances, horizon)
+            weights = self.compute_analog_weights(distances, horizon, tau)
             
             # Generate ensemble statistics
             stats = self.compute_ensemble_statistics(analog_outcomes, weights)
@@ -277,9 +317,6 @@ class RealTimeAnalogForecaster:
             # Assess forecast confidence
             confidence = self.assess_forecast_confidence(distances, weights, horizon)
             
-            # Calculate forecast valid time
-            forecast_time = init_time + pd.Timedelta(hours=horizon)
-            
             # Extract point forecasts and confidence intervals
             variables = {}
             confidence_intervals = {}
@@ -292,6 +329,11 @@ class RealTimeAnalogForecaster:
                         stats[var_name]['q95']
                     )
             
+            # Keep the ensemble itself for the forecast archive
+            members = np.array(analog_outcomes[:, :len(self.variables)], dtype=np.float32)
+            for i, var_name in enumerate(self.variables):
+                members[~valid_outcome_mask(var_name, members[:, i]), i] = np.nan
+            
             # Create forecast result
             forecast = ForecastResult(
                 horizon=horizon,
@@ -299,7 +341,9 @@ class RealTimeAnalogForecaster:
                 variables=variables,
                 confidence_intervals=confidence_intervals,
                 confidence_level=confidence,
-                ensemble_size=max_analogs
+                ensemble_size=max_analogs,
+                members=members,
+                weights=np.asarray(weights, dtype=np.float32)
             )
             
             logger.info(f"✅ Generated {horizon}h forecast: {confidence*100:.0f}% confidence, {max_analogs} analogs")
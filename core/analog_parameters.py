@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Analog Kernel Parameter Store
+=============================
+
+Versioned per-horizon kernel temperature (tau) and ensemble size (k) for the
+analog forecasters, fitted offline by scripts/optimize_analog_parameters.py
+from batched hindcasts and hot-loaded by the serving processes.
+
+The parameter file is JSON written atomically (temp file + rename)::
+
+    {
+      "format_version": 1,
+      "version": "20261018T120000Z-3f9a1c2b",
+      "generated_at": "...",
+      "horizons": {
+        "24": {"tau": 0.12, "k": 30,
+               "seasons": {"DJF": {"tau": 0.1, "k": 25}, ...}},
+        ...
+      }
+    }
+
+Season entries (DJF/MAM/JJA/SON of the forecast valid time) are optional and
+override the horizon entry. Readers stat the file at most once per
+``check_interval`` seconds and reload it when it changes, so a new fit takes
+effect without a restart; an unreadable or malformed file is logged and the
+previously loaded parameters stay in use.
+
+Enabled by default from configs/analog_parameters.json; ANALOG_PARAMETERS_PATH
+overrides the location (an empty value disables the store).
+
+Author: Performance Engineering
+Version: 1.0.0 - Fitted analog kernel parameters
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+SEASONS = ('DJF', 'MAM', 'JJA', 'SON')
+DEFAULT_PATH = Path(__file__).resolve().parents[1] / 'configs' / 'analog_parameters.json'
+
+PathLike = Union[str, Path]
+
+
+def season_of(month: int) -> str:
+    """Meteorological season label for a calendar month (1-12)."""
+    return SEASONS[(int(month) % 12) // 3]
+
+
+def write_parameters(path: PathLike, document: Dict):
+    """Validate a parameter document and write it atomically."""
+    _parse(document)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, staging = tempfile.mkstemp(prefix=f".{path.stem}.", suffix='.json', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(document, f, indent=2)
+        os.replace(staging, path)
+    except BaseException:
+        if os.path.exists(staging):
+            os.unlink(staging)
+        raise
+
+
+def _entry(raw: Dict) -> Tuple[float, int]:
+    tau, k = float(raw['tau']), int(raw['k'])
+    if not tau > 0 or k < 1:
+        raise ValueError(f"invalid kernel parameters tau={tau}, k={k}")
+    return tau, k
+
+
+def _parse(document: Dict) -> Dict[int, Dict[Optional[str], Tuple[float, int]]]:
+    """horizon -> {None: horizon entry, season: season entry}."""
+    if document.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"unsupported format_version {document.get('format_version')!r}")
+    parsed = {}
+    for horizon, raw in document['horizons'].items():
+        entries = {None: _entry(raw)}
+        for season, season_raw in raw.get('seasons', {}).items():
+            if season not in SEASONS:
+                raise ValueError(f"unknown season {season!r}")
+            entries[season] = _entry(season_raw)
+        parsed[int(horizon)] = entries
+    return parsed
+
+
+class AnalogParameterStore:
+    """Hot-reloading reader for the fitted analog kernel parameters."""
+
+    def __init__(self, path: Optional[PathLike] = None, check_interval: float = 5.0):
+        """
+        Args:
+            path: Parameter file (default ANALOG_PARAMETERS_PATH or
+                configs/analog_parameters.json); an empty string disables the store
+            check_interval: Minimum seconds between stat() calls on the file
+        """
+        if path is None:
+            path = os.getenv('ANALOG_PARAMETERS_PATH', str(DEFAULT_PATH))
+        self.path = str(path)
+        self.check_interval = check_interval
+        self.version: Optional[str] = None
+        self._parameters: Dict[int, Dict[Optional[str], Tuple[float, int]]] = {}
+        self._signature = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, horizon: int, season: Optional[str] = None) -> Optional[Tuple[float, int]]:
+        """(tau, k) for a horizon, season-specific when fitted; None when not fitted."""
+        self.refresh()
+        entries = self._parameters.get(horizon)
+        if entries is None:
+            return None
+        return entries.get(season, entries[None])
+
+    def refresh(self, force: bool = False):
+        """Reload the file if it changed since the last check."""
+        if not self.path:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        with self._lock:
+            if not force and now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                if self._signature is not None:
+                    logger.warning(f"Analog parameter file {self.path} removed; keeping version {self.version}")
+                    self._signature = None
+                return
+            signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            if signature == self._signature:
+                return
+            self._signature = signature
+            try:
+                with open(self.path) as f:
+                    document = json.load(f)
+                self._parameters = _parse(document)
+                self.version = document.get('version')
+                logger.info(f"✅ Loaded analog parameters {self.version} for horizons "
+                            f"{sorted(self._parameters)} from {self.path}")
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"❌ Ignoring invalid analog parameter file {self.path}: {e}")
+
+
+_store: Optional[AnalogParameterStore] = None
+_store_lock = threading.Lock()
+
+
+def get_analog_parameters() -> AnalogParameterStore:
+    """Process-wide parameter store shared by all forecasters."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AnalogParameterStore()
+    return _store
@@ -312,16 +312,15 @@ class AnalogQualityValidator:
                     'seasonal_diversity': 0.0
                 }
             
-            # Extract timestamps for valid analogs
-            analog_times = []
-            for idx in valid_indices:
-                if idx < len(analog_metadata):
-                    timestamp = analog_metadata.iloc[idx].get('init_time')
-                    if timestamp is not None:
-                        if isinstance(timestamp, str):
-                            timestamp = pd.to_datetime(timestamp)
-                        analog_times.append(timestamp)
-            
+            # Extract timestamps for valid analogs in one take
+            valid_indices = valid_indices[valid_indices < len(analog_metadata)]
+            if 'init_time' in analog_metadata.columns:
+                analog_times = pd.DatetimeIndex(pd.to_datetime(
+                    analog_metadata['init_time'].to_numpy()[valid_indices]
+                )).dropna()
+            else:
+                analog_times = pd.DatetimeIndex([])
+
             if len(analog_times) < 2:
                 return {
                     'span_hours': 0.0,
@@ -329,8 +328,6 @@ class AnalogQualityValidator:
                     'seasonal_diversity': 0.0
                 }
             
-            analog_times = pd.to_datetime(analog_times)
-            
             # Temporal span
             time_span = analog_times.max() - analog_times.min()
             span_hours = time_span.total_seconds() / 3600
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Shared Artifact Digest Service
+==============================
+
+One place to hash model checkpoints, FAISS indices and embedding files for
+the startup validators, health checks, reproducibility tracking and version
+stamping, so boot hashes each artifact's bytes once instead of once per
+validator.
+
+- Files are streamed through the hash in large (8 MiB) reused buffers
+- Several files are hashed in parallel (hashlib releases the GIL on large updates)
+- All requested algorithms for a file are computed in a single read pass
+- Digests persist to disk keyed by (path, size, mtime_ns, inode, ctime_ns), so
+  later boots and other validators reuse them until the file changes
+- The cache lives in a service-owned directory (0700, file 0600) and is
+  ignored unless this user owns it and nobody else can write it
+- Integrity checks pass ``verify=True``: they never trust a persisted digest,
+  hash fresh once per process and share that result with later callers
+
+SHA-256 is the shared default because manifests record it and it is hardware
+accelerated on current x86/ARM CPUs; other hashlib algorithms (e.g. blake2b,
+md5) can be requested per call.
+
+Author: Performance Engineering
+Version: 1.0.0 - Shared artifact digests
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALGORITHM = 'sha256'
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+CACHE_FORMAT_VERSION = 1
+
+PathLike = Union[str, Path]
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _default_cache_path() -> str:
+    return os.getenv('ARTIFACT_DIGEST_CACHE',
+                     str(PROJECT_ROOT / '.cache' / 'artifact_digests.json'))
+
+
+def _trusted(path: str) -> bool:
+    """Only a cache owned by this user and writable by nobody else is loaded."""
+    stat = os.stat(path)
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+class ArtifactDigestService:
+    """Cached, chunked and parallel file hashing shared across validators."""
+
+    def __init__(self, cache_path: Optional[PathLike] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            cache_path: JSON file for persisted digests (default ARTIFACT_DIGEST_CACHE
+                or <project>/.cache); an empty string disables persistence
+            chunk_size: Read buffer size per hashing thread
+            max_workers: Threads used by digest_many (default min(4, CPU count))
+        """
+        self.cache_path = str(cache_path) if cache_path is not None else _default_cache_path()
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._entries: Dict[str, Dict] = {}
+        # (path, algorithm) -> signature of digests computed by this process
+        self._verified: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._local = threading.local()
+        self.stats = {'hits': 0, 'misses': 0, 'bytes_hashed': 0}
+        self._load()
+
+    # ------------------------------------------------------------ public API
+
+    def digest(self, path: PathLike, algorithm: str = DEFAULT_ALGORITHM, verify: bool = False) -> str:
+        """Hex digest of a file, from cache when its stat signature is unchanged.
+
+        ``verify=True`` ignores persisted digests and only reuses one this
+        process computed from the file's bytes (for integrity checks).
+        """
+        return self.digests(path, (algorithm,), verify)[algorithm]
+
+    def digests(self, path: PathLike, algorithms: Sequence[str] = (DEFAULT_ALGORITHM,),
+                verify: bool = False) -> Dict[str, str]:
+        """Several hex digests of one file, computing any missing ones in one pass."""
+        result = self._digests(path, algorithms, verify)
+        self.save()
+        return result
+
+    def digest_many(self, paths: Iterable[PathLike],
+                    algorithm: str = DEFAULT_ALGORITHM, verify: bool = False) -> Dict[str, str]:
+        """Digests for many files, hashing uncached files in parallel.
+
+        Returns a mapping of the given path strings to digests; unreadable
+        files are omitted (and logged).
+        """
+        paths = [str(p) for p in paths]
+        results: Dict[str, str] = {}
+
+        def work(path: str):
+            try:
+                return path, self._digests(path, (algorithm,), verify)[algorithm]
+            except OSError as e:
+                logger.warning(f"Could not hash {path}: {e}")
+                return path, None
+
+        if len(paths) > 1 and self.max_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers,
+                                    thread_name_prefix='artifact-digest') as pool:
+                pairs = list(pool.map(work, paths))
+        else:
+            pairs = [work(path) for path in paths]
+
+        for path, value in pairs:
+            if value is not None:
+                results[path] = value
+        self.save()
+        return results
+
+    def save(self):
+        """Persist new digests (atomic replace); a no-op when nothing changed."""
+        if not self.cache_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = {key: {'signature': list(entry['signature']), 'digests': dict(entry['digests'])}
+                       for key, entry in self._entries.items()}
+            payload = {'version': CACHE_FORMAT_VERSION, 'entries': entries}
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.cache_path) or '.'
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.digests-')  # Created 0600
+            with os.fdopen(fd, 'w') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not persist artifact digests to {self.cache_path}: {e}")
+
+    def get_stats(self) -> Dict[str, object]:
+        return {'cached_files': len(self._entries), 'cache_path': self.cache_path, **self.stats}
+
+    # -------------------------------------------------------------- internals
+
+    @staticmethod
+    def _signature(stat: os.stat_result) -> Tuple[int, int, int, int]:
+        return (stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_ctime_ns)
+
+    def _digests(self, path: PathLike, algorithms: Sequence[str], verify: bool = False) -> Dict[str, str]:
+        key = os.path.abspath(path)
+        signature = list(self._signature(os.stat(key)))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['signature'] != signature:
+                entry = {'signature': signature, 'digests': {}}
+            missing = [a for a in algorithms if a not in entry['digests']
+                       or (verify and self._verified.get((key, a)) != signature)]
+            if not missing:
+                self.stats['hits'] += 1
+                return {a: entry['digests'][a] for a in algorithms}
+
+        computed = self._hash_file(key, missing)
+
+        with self._lock:
+            # Only store if the file did not change while it was being read
+            if list(self._signature(os.stat(key))) == signature:
+                current = self._entries.get(key)
+                if current is None or current['signature'] != signature:
+                    current = {'signature': signature, 'digests': {}}
+                    self._entries[key] = current
+                stale = [a for a, value in computed.items() if current['digests'].get(a, value) != value]
+                if stale:
+                    logger.warning(f"Persisted {', '.join(stale)} digest of {key} did not match its bytes; "
+                                   f"discarding its cache entry")
+                    current['digests'] = {}
+                current['digests'].update(computed)
+                for algorithm in computed:
+                    self._verified[(key, algorithm)] = signature
+                self._dirty = True
+            self.stats['misses'] += 1
+            self.stats['bytes_hashed'] += signature[0]
+            merged = {**entry['digests'], **computed}
+        return {a: merged[a] for a in algorithms}
+
+    def _buffer(self) -> bytearray:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or len(buffer) != self.chunk_size:
+            buffer = bytearray(self.chunk_size)
+            self._local.buffer = buffer
+        return buffer
+
+    def _hash_file(self, path: str, algorithms: Sequence[str]) -> Dict[str, str]:
+        hashers = {a: hashlib.new(a) for a in algorithms}
+        buffer = self._buffer()
+        view = memoryview(buffer)
+        with open(path, 'rb', buffering=0) as f:
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                chunk = view[:read]
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+        return {a: h.hexdigest() for a, h in hashers.items()}
+
+    def _load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            if not _trusted(self.cache_path):
+                logger.warning(f"Ignoring artifact digest cache {self.cache_path}: "
+                               f"not owned by this user or writable by others")
+                return
+            with open(self.cache_path) as f:
+                payload = json.load(f)
+            if payload.get('version') == CACHE_FORMAT_VERSION:
+                self._entries = payload.get('entries', {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable artifact digest cache {self.cache_path}: {e}")
+
+
+_service: Optional[ArtifactDigestService] = None
+_service_lock = threading.Lock()
+
+
+def get_artifact_digests() -> ArtifactDigestService:
+    """Process-wide digest service shared by all validators."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ArtifactDigestService()
+    return _service
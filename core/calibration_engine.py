@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Calibration Engine
+==================
+
+Bulk calibration of stored analog ensemble forecasts against verifying
+outcomes, for every horizon and variable at once.
+
+Forecasts are persisted in a ForecastArchive: one directory per horizon of
+append-only ``.npz`` segments holding init/valid times, the point forecast
+(mean), the p05/p95 bounds and the weighted analog ensemble. Verifying
+outcomes are the outcomes database rows (``outcomes_{h}h.npy`` plus
+``metadata_{h}h_clean.parquet``) matched on valid_time.
+
+All scores are array operations over (rows, variables[, members]):
+
+- CRPS of the weighted ensemble (sorted O(k log k) form)
+- PIT values and histograms
+- p05-p95 interval coverage, with misses below and above
+- Reliability diagrams and Brier score for threshold exceedance events
+- MAE, RMSE, bias and ensemble spread
+
+Scores are kept as per-day sufficient statistics (sums and counts), so a
+rolling window is a sum over day buckets. ``update`` only reads segments and
+rows newer than the per-horizon watermark, which makes the daily job
+proportional to the new forecasts rather than the archive.
+
+Usage:
+    python -m core.calibration_engine update --archive calibration_data/forecasts \\
+        --outcomes outcomes --state calibration_data/calibration_state.npz
+    python -m core.calibration_engine report --state calibration_data/calibration_state.npz
+
+Author: Performance Engineering
+Version: 1.0.0 - Vectorized calibration
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HORIZONS = (6, 12, 24, 48)
+VARIABLES = ('z500', 't2m', 't850', 'q850', 'u10', 'v10', 'u850', 'v850', 'cape')
+POSITIVE_VARIABLES = ('t2m', 't850')  # Zero means missing (see compute_ensemble_statistics)
+NS_PER_DAY = 86_400 * 10 ** 9
+
+PathLike = Union[str, Path]
+
+# Per-day sufficient statistics: (days, variables) unless listed in BINNED_STATS
+SUM_STATS = ('count', 'crps', 'abs_error', 'sq_error', 'error', 'spread_sq',
+             'covered', 'below', 'above', 'brier')
+BINNED_STATS = ('pit_hist', 'rel_count', 'rel_prob', 'rel_obs')
+
+
+def weighted_crps(members: np.ndarray, weights: np.ndarray, truth: np.ndarray,
+                  presorted: bool = False) -> np.ndarray:
+    """CRPS of weighted ensembles, vectorized over leading axes.
+
+    CRPS = sum_i w_i |x_i - y| - 1/2 sum_ij w_i w_j |x_i - x_j|, with the
+    pairwise term computed in O(k log k) from the sorted members:
+    sum_ij w_i w_j |x_i - x_j| = 2 sum_i w_i x_i (2 F_i - w_i - 1).
+
+    Args:
+        members: (..., k) ensemble values
+        weights: (..., k) weights summing to 1 along the last axis
+        truth: (...) observed values
+        presorted: Members are already ascending along the last axis (skips
+            the sort when scoring many weightings of the same ensembles)
+    """
+    skill_term = np.sum(weights * np.abs(members - truth[..., None]), axis=-1)
+    if presorted:
+        sorted_members, sorted_weights = members, weights
+    else:
+        order = np.argsort(members, axis=-1)
+        sorted_members = np.take_along_axis(members, order, axis=-1)
+        sorted_weights = np.take_along_axis(weights, order, axis=-1)
+    cumulative = np.cumsum(sorted_weights, axis=-1)
+    spread_term = np.sum(sorted_weights * sorted_members * (2 * cumulative - sorted_weights - 1), axis=-1)
+    return skill_term - spread_term
+
+
+def weighted_quantiles(members: np.ndarray, weights: np.ndarray,
+                       quantiles: Sequence[float]) -> np.ndarray:
+    """Weighted ensemble quantiles, vectorized over leading axes.
+
+    Uses the rule of compute_ensemble_statistics: the first sorted member
+    whose cumulative weight reaches q.
+
+    Returns:
+        (len(quantiles), ...) array
+    """
+    order = np.argsort(members, axis=-1)
+    sorted_members = np.take_along_axis(members, order, axis=-1)
+    cumulative = np.cumsum(np.take_along_axis(weights, order, axis=-1), axis=-1)
+    k = members.shape[-1]
+    result = []
+    for q in quantiles:
+        position = np.minimum(np.sum(cumulative < q, axis=-1), k - 1)
+        result.append(np.take_along_axis(sorted_members, position[..., None], axis=-1)[..., 0])
+    return np.stack(result)
+
+
+def epochs_ns(times) -> np.ndarray:
+    """int64 nanoseconds for datetime-like values (naive, UTC if tz-aware).
+
+    The unit is normalized explicitly: pandas >= 2 keeps parsed strings and
+    datetime64[us] inputs in their own resolution, and asi8 counts in it.
+    """
+    index = pd.DatetimeIndex(pd.to_datetime(times))
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    return index.astype('datetime64[ns]').asi8
+
+
+def _atomic_savez(path: Path, **arrays):
+    """Write an .npz next to its destination and rename it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, staging = tempfile.mkstemp(prefix=f".{path.stem}.", suffix='.npz', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(staging, path)
+    except BaseException:
+        if os.path.exists(staging):
+            os.unlink(staging)
+        raise
+
+
+def _segment_id(path: Path) -> str:
+    return path.stem.split('-', 3)[3]
+
+
+class ForecastArchive:
+    """Append-only store of issued ensemble forecasts, one directory per horizon.
+
+    Segment names carry their valid_time range, so readers skip old segments
+    without opening them. A segment written under an explicit segment id
+    supersedes earlier ones with the same id, so workers re-archiving the
+    same served forecast never duplicate its rows.
+    """
+
+    def __init__(self, root: PathLike):
+        self.root = Path(root)
+
+    def _segments(self, horizon: int) -> List[Path]:
+        directory = self.root / f"{horizon}h"
+        return sorted(directory.glob('forecasts-*.npz')) if directory.is_dir() else []
+
+    def append(self, horizon: int, init_times, valid_times, variables: Sequence[str],
+               mean: np.ndarray, p05: np.ndarray, p95: np.ndarray,
+               members: np.ndarray, weights: np.ndarray,
+               segment_id: Optional[str] = None) -> Optional[Path]:
+        """Persist a batch of forecasts as one segment.
+
+        Args:
+            init_times, valid_times: (n,) datetime-like
+            variables: names of the variable axis
+            mean, p05, p95: (n, V)
+            members: (n, k, V) analog outcomes
+            weights: (n, k) analog weights, or (n, k, V) per-variable weights
+            segment_id: replaces earlier segments written under the same id
+                (no '-'); defaults to a fresh per-process id
+
+        Returns:
+            Path of the written segment (None for an empty batch)
+        """
+        valid_epochs = epochs_ns(valid_times)
+        if len(valid_epochs) == 0:
+            return None
+        if segment_id is None:
+            segment_id = f"{os.getpid()}-{len(self._segments(horizon)):06d}"
+        elif '-' in segment_id:
+            raise ValueError(f"segment_id must not contain '-': {segment_id!r}")
+        path = (self.root / f"{horizon}h" /
+                f"forecasts-{valid_epochs.min():020d}-{valid_epochs.max():020d}-{segment_id}.npz")
+        _atomic_savez(path,
+                      init_time=epochs_ns(init_times), valid_time=valid_epochs,
+                      variables=np.array(list(variables)),
+                      mean=np.asarray(mean, dtype=np.float32), p05=np.asarray(p05, dtype=np.float32),
+                      p95=np.asarray(p95, dtype=np.float32), members=np.asarray(members, dtype=np.float32),
+                      weights=np.asarray(weights, dtype=np.float32))
+        for older in self._segments(horizon):
+            # Readers keep the last segment per id; drop the ones it supersedes
+            if older < path and _segment_id(older) == segment_id:
+                older.unlink(missing_ok=True)
+        return path
+
+    def read(self, horizon: int, valid_after: Optional[int] = None) -> Optional[Dict[str, np.ndarray]]:
+        """All forecasts of a horizon with valid_time > valid_after (epoch ns).
+
+        Returns:
+            Dict of concatenated arrays, or None when there is nothing new
+        """
+        latest = {_segment_id(path): path for path in self._segments(horizon)}
+        parts = []
+        for path in sorted(latest.values()):
+            last = int(path.name.split('-')[2])
+            if valid_after is not None and last <= valid_after:
+                continue
+            with np.load(path) as segment:
+                part = {name: segment[name] for name in segment.files}
+            if part['weights'].ndim == 2:
+                part['weights'] = np.repeat(part['weights'][:, :, None], part['members'].shape[2], axis=2)
+            if valid_after is not None:
+                keep = part['valid_time'] > valid_after
+                part = {name: (values if name == 'variables' else values[keep]) for name, values in part.items()}
+            parts.append(part)
+        if not parts:
+            return None
+
+        variables = list(parts[0]['variables'])
+        if any(list(part['variables']) != variables for part in parts):
+            raise ValueError(f"{horizon}h archive segments disagree on variables")
+        k = max(part['members'].shape[1] for part in parts)
+        for part in parts:
+            # Pad smaller ensembles with zero-weight members
+            pad = k - part['members'].shape[1]
+            if pad:
+                part['members'] = np.pad(part['members'], ((0, 0), (0, pad), (0, 0)))
+                part['weights'] = np.pad(part['weights'], ((0, 0), (0, pad), (0, 0)))
+        forecasts = {name: np.concatenate([part[name] for part in parts])
+                     for name in parts[0] if name != 'variables'}
+        forecasts['variables'] = variables
+        return forecasts
+
+
+def calibration_statistics(mean: np.ndarray, p05: np.ndarray, p95: np.ndarray,
+                           members: np.ndarray, weights: np.ndarray, truth: np.ndarray,
+                           thresholds: np.ndarray, pit_bins: int = 10,
+                           reliability_bins: int = 10) -> Dict[str, np.ndarray]:
+    """Per-row calibration statistics for (n, V) forecasts.
+
+    Args:
+        mean, p05, p95, truth: (n, V)
+        members, weights: (n, k, V); non-finite members are ignored and the
+            remaining weights renormalized per variable
+        thresholds: (V,) event thresholds for the reliability diagram
+
+    Returns:
+        Dict of (n, V) arrays plus 'valid', 'pit_bin' and 'rel_bin' indices
+    """
+    members = np.asarray(members, dtype=np.float64)
+    truth = np.asarray(truth, dtype=np.float64)
+    member_valid = np.isfinite(members)
+    weights = np.where(member_valid, np.asarray(weights, dtype=np.float64), 0.0)
+    total = weights.sum(axis=1)
+    weights = weights / np.where(total > 0, total, 1.0)[:, None, :]
+    members = np.where(member_valid, members, 0.0)
+
+    valid = (np.isfinite(truth) & np.isfinite(mean) & np.isfinite(p05) & np.isfinite(p95) & (total > 0))
+    safe_truth = np.where(valid, truth, 0.0)
+
+    # Ensemble CRPS over (n, V, k)
+    crps = weighted_crps(np.moveaxis(members, 1, 2), np.moveaxis(weights, 1, 2), safe_truth)
+
+    # PIT with ties split evenly
+    below_truth = np.sum(weights * (members < safe_truth[:, None, :]), axis=1)
+    at_truth = np.sum(weights * (members == safe_truth[:, None, :]), axis=1)
+    pit = np.clip(below_truth + 0.5 * at_truth, 0.0, 1.0)
+
+    # Exceedance probability of the event truth > threshold
+    event_prob = np.clip(np.sum(weights * (members > thresholds), axis=1), 0.0, 1.0)
+    event_obs = (safe_truth > thresholds).astype(np.float64)
+
+    ensemble_mean = np.sum(weights * members, axis=1)
+    spread_sq = np.sum(weights * (members - ensemble_mean[:, None, :]) ** 2, axis=1)
+    error = np.where(valid, mean - safe_truth, 0.0)
+
+    return {
+        'valid': valid,
+        'crps': crps,
+        'error': error,
+        'abs_error': np.abs(error),
+        'sq_error': error ** 2,
+        'spread_sq': spread_sq,
+        'covered': (safe_truth >= p05) & (safe_truth <= p95),
+        'below': safe_truth < p05,
+        'above': safe_truth > p95,
+        'pit': pit,
+        'pit_bin': np.minimum((pit * pit_bins).astype(np.int64), pit_bins - 1),
+        'event_prob': event_prob,
+        'event_obs': event_obs,
+        'brier': (event_prob - event_obs) ** 2,
+        'rel_bin': np.minimum((event_prob * reliability_bins).astype(np.int64), reliability_bins - 1),
+    }
+
+
+def _day_buckets(days: np.ndarray, statistics: Dict[str, np.ndarray], n_variables: int,
+                 pit_bins: int, reliability_bins: int) -> Dict[str, np.ndarray]:
+    """Sum per-row statistics into per-day buckets."""
+    unique_days, row_day = np.unique(days, return_inverse=True)
+    n_days = len(unique_days)
+    valid = statistics['valid']
+    weight = valid.astype(np.float64)
+    columns = np.broadcast_to(np.arange(n_variables), valid.shape)
+    day_of = np.broadcast_to(row_day[:, None], valid.shape)
+
+    def per_day(values):
+        flat = day_of * n_variables + columns
+        return np.bincount(flat.ravel(), weights=(values * weight).ravel(),
+                           minlength=n_days * n_variables).reshape(n_days, n_variables)
+
+    def per_day_bin(bins, n_bins, values):
+        flat = (day_of * n_variables + columns) * n_bins + bins
+        return np.bincount(flat.ravel(), weights=(values * weight).ravel(),
+                           minlength=n_days * n_variables * n_bins).reshape(n_days, n_variables, n_bins)
+
+    buckets = {'days': unique_days, 'count': per_day(np.ones_like(weight))}
+    for name in SUM_STATS[1:]:
+        buckets[name] = per_day(statistics[name].astype(np.float64))
+    ones = np.ones_like(weight)
+    buckets['pit_hist'] = per_day_bin(statistics['pit_bin'], pit_bins, ones)
+    buckets['rel_count'] = per_day_bin(statistics['rel_bin'], reliability_bins, ones)
+    buckets['rel_prob'] = per_day_bin(statistics['rel_bin'], reliability_bins, statistics['event_prob'])
+    buckets['rel_obs'] = per_day_bin(statistics['rel_bin'], reliability_bins, statistics['event_obs'])
+    return buckets
+
+
+def _merge_buckets(state: Optional[Dict[str, np.ndarray]], new: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Add day buckets into a horizon state (both sorted by day)."""
+    if state is None or len(state['days']) == 0:
+        return new
+    days = np.union1d(state['days'], new['days'])
+    old_rows = np.searchsorted(days, state['days'])
+    new_rows = np.searchsorted(days, new['days'])
+    merged = {'days': days}
+    for name in SUM_STATS + BINNED_STATS:
+        values = np.zeros((len(days),) + state[name].shape[1:])
+        values[old_rows] += state[name]
+        values[new_rows] += new[name]
+        merged[name] = values
+    return merged
+
+
+def load_verifying_outcomes(outcomes_dir: PathLike, horizon: int):
+    """Outcomes of a horizon and their valid times (epoch ns), sorted by valid time."""
+    outcomes_dir = Path(outcomes_dir)
+    outcomes = np.load(outcomes_dir / f"outcomes_{horizon}h.npy", mmap_mode='r')
+    metadata = pd.read_parquet(outcomes_dir / f"metadata_{horizon}h_clean.parquet", columns=['valid_time'])
+    valid_epochs = epochs_ns(metadata['valid_time'])
+    order = np.argsort(valid_epochs, kind='stable')
+    return valid_epochs[order], order, outcomes
+
+
+class CalibrationEngine:
+    """Rolling-window calibration over a ForecastArchive, updated incrementally."""
+
+    def __init__(self, archive: ForecastArchive, state_path: Optional[PathLike] = None,
+                 variables: Sequence[str] = VARIABLES, pit_bins: int = 10, reliability_bins: int = 10,
+                 retention_days: int = 400, event_thresholds: Optional[Dict[str, float]] = None):
+        self.archive = archive
+        self.state_path = Path(state_path) if state_path else None
+        self.variables = list(variables)
+        self.pit_bins = pit_bins
+        self.reliability_bins = reliability_bins
+        self.retention_days = retention_days
+        self.event_thresholds = dict(event_thresholds or {})
+        self.watermarks: Dict[int, int] = {}
+        self.states: Dict[int, Dict[str, np.ndarray]] = {}
+
+        if self.state_path is not None and self.state_path.exists():
+            self.load_state()
+
+    def _thresholds(self, truth: np.ndarray) -> np.ndarray:
+        """Event thresholds per variable, fixed on first use (median of the first verified batch)."""
+        for column, name in enumerate(self.variables):
+            if name not in self.event_thresholds:
+                values = truth[:, column]
+                values = values[np.isfinite(values)]
+                self.event_thresholds[name] = float(np.median(values)) if len(values) else 0.0
+        return np.array([self.event_thresholds[name] for name in self.variables])
+
+    def _truth(self, valid_epochs: np.ndarray, sorted_valid: np.ndarray, order: np.ndarray,
+               outcomes: np.ndarray, outcome_variables: Sequence[str]):
+        """Verifying outcome rows for each forecast valid time (NaN where absent)."""
+        positions = np.minimum(np.searchsorted(sorted_valid, valid_epochs), max(len(sorted_valid) - 1, 0))
+        found = (sorted_valid[positions] == valid_epochs) if len(sorted_valid) else np.zeros(len(valid_epochs), bool)
+        rows = order[positions[found]]
+        columns = [list(outcome_variables).index(name) for name in self.variables]
+        truth = np.full((len(valid_epochs), len(self.variables)), np.nan)
+        if len(rows):
+            # Sorted gather keeps memory-mapped reads sequential
+            gather = np.argsort(rows, kind='stable')
+            block = np.asarray(outcomes[rows[gather]], dtype=np.float64)[:, columns]
+            found_rows = np.flatnonzero(found)
+            truth[found_rows[gather]] = block
+        for name in POSITIVE_VARIABLES:
+            if name in self.variables:
+                column = self.variables.index(name)
+                truth[truth[:, column] <= 0, column] = np.nan
+        return truth
+
+    def update_horizon(self, horizon: int, outcome_valid_epochs: np.ndarray, outcome_order: np.ndarray,
+                       outcomes: np.ndarray, outcome_variables: Sequence[str] = VARIABLES) -> int:
+        """Score forecasts newer than the watermark whose valid time has been observed.
+
+        Args:
+            outcome_valid_epochs: sorted valid times (epoch ns) of the outcome rows
+            outcome_order: row of outcomes for each sorted valid time
+            outcomes: (M, V_out) outcomes array (may be memory-mapped)
+
+        Returns:
+            Number of forecast rows processed
+        """
+        if len(outcome_valid_epochs) == 0:
+            return 0
+        forecasts = self.archive.read(horizon, valid_after=self.watermarks.get(horizon))
+        if forecasts is None:
+            return 0
+
+        # Only forecasts whose valid time is covered by the outcomes; later ones stay pending
+        latest_observed = int(outcome_valid_epochs[-1])
+        ready = forecasts['valid_time'] <= latest_observed
+        if not ready.any():
+            return 0
+        columns = [forecasts['variables'].index(name) for name in self.variables]
+        select = lambda name: forecasts[name][ready][..., columns]
+
+        valid_epochs = forecasts['valid_time'][ready]
+        truth = self._truth(valid_epochs, outcome_valid_epochs, outcome_order, outcomes, outcome_variables)
+        statistics = calibration_statistics(select('mean'), select('p05'), select('p95'),
+                                            select('members'), select('weights'), truth,
+                                            self._thresholds(truth), self.pit_bins, self.reliability_bins)
+        buckets = _day_buckets(valid_epochs // NS_PER_DAY, statistics, len(self.variables),
+                               self.pit_bins, self.reliability_bins)
+
+        state = _merge_buckets(self.states.get(horizon), buckets)
+        keep = state['days'] > state['days'].max() - self.retention_days
+        self.states[horizon] = {name: values[keep] for name, values in state.items()}
+        self.watermarks[horizon] = int(valid_epochs.max())
+        return int(ready.sum())
+
+    def update(self, outcomes_dir: PathLike, horizons: Iterable[int] = HORIZONS) -> Dict[int, int]:
+        """Incrementally process every horizon and persist the state."""
+        processed = {}
+        for horizon in horizons:
+            try:
+                sorted_valid, order, outcomes = load_verifying_outcomes(outcomes_dir, horizon)
+            except FileNotFoundError:
+                logger.warning(f"No verifying outcomes for {horizon}h")
+                continue
+            processed[horizon] = self.update_horizon(horizon, sorted_valid, order, outcomes)
+            logger.info(f"{horizon}h: processed {processed[horizon]:,} new forecasts")
+        if self.state_path is not None:
+            self.save_state()
+        return processed
+
+    def report(self, window_days: int = 30, end_day: Optional[int] = None) -> Dict[str, Dict]:
+        """Calibration over the last window_days of verified forecasts per horizon.
+
+        Args:
+            window_days: Rolling window length in days
+            end_day: Last day of the window (epoch days; default: latest verified day)
+        """
+        report = {}
+        for horizon, state in sorted(self.states.items()):
+            if len(state['days']) == 0:
+                continue
+            last = state['days'].max() if end_day is None else end_day
+            in_window = (state['days'] > last - window_days) & (state['days'] <= last)
+            totals = {name: state[name][in_window].sum(axis=0) for name in SUM_STATS + BINNED_STATS}
+            horizon_report = {}
+            for column, name in enumerate(self.variables):
+                count = totals['count'][column]
+                if count == 0:
+                    continue
+                rel_count = totals['rel_count'][column]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    forecast_probability = totals['rel_prob'][column] / rel_count
+                    observed_frequency = totals['rel_obs'][column] / rel_count
+                pit_hist = totals['pit_hist'][column] / count
+                rmse = float(np.sqrt(totals['sq_error'][column] / count))
+                spread = float(np.sqrt(totals['spread_sq'][column] / count))
+                horizon_report[name] = {
+                    'count': int(count),
+                    'crps': float(totals['crps'][column] / count),
+                    'mae': float(totals['abs_error'][column] / count),
+                    'rmse': rmse,
+                    'bias': float(totals['error'][column] / count),
+                    'spread': spread,
+                    'spread_skill_ratio': spread / rmse if rmse > 0 else float('nan'),
+                    'interval_coverage': float(totals['covered'][column] / count),
+                    'below_p05': float(totals['below'][column] / count),
+                    'above_p95': float(totals['above'][column] / count),
+                    'pit_histogram': pit_hist.tolist(),
+                    # Mean squared departure from a flat PIT histogram, relative to flat
+                    'pit_flatness': float(np.mean((pit_hist * self.pit_bins - 1.0) ** 2)),
+                    'event_threshold': self.event_thresholds.get(name),
+                    'brier_score': float(totals['brier'][column] / count),
+                    'reliability': {
+                        'forecast_probability': [None if np.isnan(p) else float(p) for p in forecast_probability],
+                        'observed_frequency': [None if np.isnan(o) else float(o) for o in observed_frequency],
+                        'count': rel_count.astype(int).tolist(),
+                    },
+                }
+            report[f"{horizon}h"] = {
+                'window_days': window_days,
+                'window_end': str(pd.Timestamp(int(last) * NS_PER_DAY).date()),
+                'variables': horizon_report,
+            }
+        return report
+
+    def save_state(self):
+        """Persist day buckets, watermarks and thresholds atomically."""
+        arrays = {}
+        for horizon, state in self.states.items():
+            for name, values in state.items():
+                arrays[f"{horizon}/{name}"] = values
+        meta = {
+            'variables': self.variables,
+            'pit_bins': self.pit_bins,
+            'reliability_bins': self.reliability_bins,
+            'watermarks': {str(h): w for h, w in self.watermarks.items()},
+            'event_thresholds': self.event_thresholds,
+        }
+        _atomic_savez(self.state_path, meta=np.array(json.dumps(meta)), **arrays)
+
+    def load_state(self):
+        """Restore a state written by save_state."""
+        with np.load(self.state_path) as saved:
+            meta = json.loads(str(saved['meta']))
+            if (meta['variables'] != self.variables or meta['pit_bins'] != self.pit_bins
+                    or meta['reliability_bins'] != self.reliability_bins):
+                raise ValueError(f"Calibration state {self.state_path} was built with different settings")
+            self.watermarks = {int(h): int(w) for h, w in meta['watermarks'].items()}
+            self.event_thresholds = {**meta['event_thresholds'], **self.event_thresholds}
+            self.states = {}
+            for key in saved.files:
+                if key == 'meta':
+                    continue
+                horizon, name = key.split('/')
+                self.states.setdefault(int(horizon), {})[name] = saved[key]
+
+
+def main():
+    """Command-line entry point: update or report the calibration state."""
+    parser = argparse.ArgumentParser(description="Vectorized forecast calibration")
+    parser.add_argument('command', choices=['update', 'report'])
+    parser.add_argument('--archive', default='calibration_data/forecasts', help='ForecastArchive directory')
+    parser.add_argument('--outcomes', default='outcomes', help='Outcomes database directory')
+    parser.add_argument('--state', default='calibration_data/calibration_state.npz')
+    parser.add_argument('--window-days', type=int, default=30)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    engine = CalibrationEngine(ForecastArchive(args.archive), args.state)
+    if args.command == 'update':
+        engine.update(args.outcomes)
+    print(json.dumps(engine.report(args.window_days), indent=2))
+
+
+if __name__ == "__main__":
+    main()
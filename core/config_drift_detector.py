@@ -40,6 +40,7 @@ from enum import Enum
 from contextlib import contextmanager
 import queue
 import fnmatch
+import re
 
 import yaml
 import numpy as np
@@ -610,6 +611,20 @@ class ConfigurationDriftDetector:
     DEFAULT_BASELINE_RETENTION = 30  # days
     MAX_DRIFT_EVENTS = 1000  # Maximum events to retain in memory
     
+    # Snapshot engine configuration
+    HASH_CHUNK_SIZE = 1024 * 1024  # Stream files through SHA-256 in 1 MiB chunks
+    DEFAULT_FULL_SCAN_INTERVAL = 600  # seconds between full walks while watchdog tracks changes
+    IGNORED_DIRECTORIES = frozenset({
+        "node_modules", ".git", "venv", "forecast_env", "__pycache__", ".next", "build", "dist"
+    })
+    EXCLUDE_PATTERNS = [
+        "**/node_modules/**", "node_modules/**", "**/.git/**", ".git/**", 
+        "**/venv/**", "venv/**", "**/forecast_env/**", "forecast_env/**", 
+        "**/__pycache__/**", "__pycache__/**", "**/.next/**", ".next/**",
+        "**/build/**", "build/**", "**/dist/**", "dist/**", 
+        "**/*.log", "*.log", "**/*.tmp", "*.tmp"
+    ]
+    
     def __init__(self, 
                  project_root: Path = None,
                  baseline_retention_days: int = DEFAULT_BASELINE_RETENTION,
@@ -675,6 +690,19 @@ class ConfigurationDriftDetector:
             "**/prometheus*.yml", "prometheus*.yml", "**/alertmanager*.yml", "alertmanager*.yml"
         ]
         
+        # Incremental snapshot state: relative path -> ((inode, size, mtime_ns), sha256)
+        self._file_cache: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+        self._schema_cache: Dict[str, Tuple[str, bool]] = {}
+        self._dirty_paths: Set[str] = set()
+        self._dirty_lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._dirty_tracking = False
+        self._full_rescan_needed = True
+        self._last_full_scan = 0.0
+        self.full_scan_interval = float(os.getenv('CONFIG_DRIFT_FULL_SCAN_INTERVAL',
+                                                  str(self.DEFAULT_FULL_SCAN_INTERVAL)))
+        self.scan_stats = {'full_scans': 0, 'incremental_scans': 0, 'files_hashed': 0, 'bytes_hashed': 0}
+        
         # Environment variables to monitor
         self.monitored_env_vars = [
             "API_TOKEN", "API_BASE_URL", "ENVIRONMENT", "CORS_ORIGINS",
@@ -718,18 +746,29 @@ class ConfigurationDriftDetector:
                         def on_modified(self, event):
                             if event.is_directory:
                                 return
+                            self.drift_detector._mark_dirty(event.src_path)
                             self._process_file_event(event.src_path, "modified")
                         
                         def on_created(self, event):
                             if event.is_directory:
                                 return
+                            self.drift_detector._mark_dirty(event.src_path)
                             self._process_file_event(event.src_path, "created")
                         
                         def on_deleted(self, event):
+                            self.drift_detector._mark_dirty(event.src_path, event.is_directory)
                             if event.is_directory:
                                 return
                             self._process_file_event(event.src_path, "deleted")
                         
+                        def on_moved(self, event):
+                            self.drift_detector._mark_dirty(event.src_path, event.is_directory)
+                            self.drift_detector._mark_dirty(event.dest_path, event.is_directory)
+                            if event.is_directory:
+                                return
+                            self._process_file_event(event.src_path, "deleted")
+                            self._process_file_event(event.dest_path, "created")
+                        
                         def _process_file_event(self, file_path: str, event_type: str):
                             current_time = time.time()
                             
@@ -766,6 +805,8 @@ class ConfigurationDriftDetector:
                         logger.info(f"📁 Monitoring directory: {monitor_dir}")
                 
                 self.observer.start()
+                # Snapshots now only re-examine paths reported by watchdog events
+                self._dirty_tracking = True
                 
                 # Start background monitoring thread
                 self.monitoring_thread = threading.Thread(
@@ -789,6 +830,7 @@ class ConfigurationDriftDetector:
     def stop_monitoring(self):
         """Stop configuration monitoring and cleanup resources."""
         self.monitoring_active = False
+        self._dirty_tracking = False
         
         if self.observer:
             self.observer.stop()
@@ -1008,18 +1050,9 @@ class ConfigurationDriftDetector:
         """Create a comprehensive configuration snapshot."""
         snapshot_id = f"{snapshot_type}_{int(time.time())}"
         
-        # Compute file hashes for all monitored files
-        file_hashes = {}
-        for pattern in self.monitored_patterns:
-            for file_path in self.project_root.rglob(pattern):
-                if file_path.is_file() and self._is_monitored_file(str(file_path)):
-                    try:
-                        with open(file_path, 'rb') as f:
-                            file_hash = hashlib.sha256(f.read()).hexdigest()
-                            relative_path = str(file_path.relative_to(self.project_root))
-                            file_hashes[relative_path] = file_hash
-                    except Exception as e:
-                        logger.warning(f"⚠️ Could not hash file {file_path}: {e}")
+        # Compute file hashes for all monitored files (only changed files are rehashed)
+        hashed_before = self.scan_stats['files_hashed']
+        file_hashes = self._scan_configuration_files()
         
         # Capture environment variables
         environment_vars = {}
@@ -1029,7 +1062,7 @@ class ConfigurationDriftDetector:
                 environment_vars[env_var] = value
         
         # Perform schema validation
-        schema_validation = self._validate_configuration_schemas()
+        schema_validation = self._validate_configuration_schemas(file_hashes)
         
         snapshot = ConfigurationSnapshot(
             snapshot_id=snapshot_id,
@@ -1040,6 +1073,7 @@ class ConfigurationDriftDetector:
             metadata={
                 "snapshot_type": snapshot_type,
                 "files_monitored": len(file_hashes),
+                "files_rehashed": self.scan_stats['files_hashed'] - hashed_before,
                 "env_vars_monitored": len(environment_vars)
             }
         )
@@ -1052,30 +1086,131 @@ class ConfigurationDriftDetector:
     
     def _is_monitored_file(self, file_path: str) -> bool:
         """Check if a file should be monitored for drift."""
+        exclude_regex, monitored_regex, _ = self._pattern_matchers()
         file_path_lower = file_path.lower()
         
         # Exclude certain directories and files
-        exclude_patterns = [
-            "**/node_modules/**", "node_modules/**", "**/.git/**", ".git/**", 
-            "**/venv/**", "venv/**", "**/forecast_env/**", "forecast_env/**", 
-            "**/__pycache__/**", "__pycache__/**", "**/.next/**", ".next/**",
-            "**/build/**", "build/**", "**/dist/**", "dist/**", 
-            "**/*.log", "*.log", "**/*.tmp", "*.tmp"
-        ]
-        
-        for exclude_pattern in exclude_patterns:
-            if fnmatch.fnmatch(file_path_lower, exclude_pattern.lower()):
-                return False
+        if exclude_regex.match(file_path_lower):
+            return False
         
         # Check if matches monitored patterns
-        for pattern in self.monitored_patterns:
-            if fnmatch.fnmatch(file_path_lower, pattern.lower()):
-                return True
+        return monitored_regex.match(file_path_lower) is not None
+    
+    def _pattern_matchers(self) -> Tuple['re.Pattern', 're.Pattern', List[str]]:
+        """Exclude/monitor patterns compiled into one regex each (rebuilt if patterns change)."""
+        patterns = tuple(self.monitored_patterns)
+        cached = getattr(self, '_compiled_patterns', None)
+        if cached is None or cached[0] != patterns:
+            exclude_regex = re.compile('|'.join(
+                fnmatch.translate(pattern.lower()) for pattern in self.EXCLUDE_PATTERNS
+            ))
+            monitored_regex = re.compile('|'.join(
+                fnmatch.translate(pattern.lower()) for pattern in patterns
+            ))
+            # rglob(pattern) matches these trailing path segments at any depth
+            rglob_suffixes = [p[3:] if p.startswith('**/') else p for p in patterns]
+            cached = (patterns, (exclude_regex, monitored_regex, rglob_suffixes))
+            self._compiled_patterns = cached
+        return cached[1]
+    
+    def _matches_rglob(self, relative_path: str) -> bool:
+        """Whether project_root.rglob() of any monitored pattern would yield this path."""
+        _, _, rglob_suffixes = self._pattern_matchers()
+        path = Path(relative_path)
+        return any(path.match(suffix) for suffix in rglob_suffixes)
+    
+    def _mark_dirty(self, file_path: str, is_directory: bool = False):
+        """Record a watchdog event so the next snapshot re-examines the path."""
+        with self._dirty_lock:
+            if is_directory:
+                # Whole trees moved or removed: only a full walk sees every file
+                self._full_rescan_needed = True
+            else:
+                self._dirty_paths.add(os.path.abspath(file_path))
+    
+    def _scan_configuration_files(self) -> Dict[str, str]:
+        """
+        Hash all monitored files, reusing cached digests for unchanged files.
         
-        return False
+        A file is rehashed only when its (inode, size, mtime_ns) changes. While
+        watchdog is tracking changes, only paths marked dirty by its events are
+        re-examined; a full walk (pruning ignored trees) runs on first use,
+        after directory-level events and every full_scan_interval seconds.
+        """
+        with self._scan_lock:
+            with self._dirty_lock:
+                dirty_paths = self._dirty_paths
+                self._dirty_paths = set()
+                full_scan = (not self._dirty_tracking or self._full_rescan_needed or
+                             time.monotonic() - self._last_full_scan >= self.full_scan_interval)
+                if full_scan:
+                    self._full_rescan_needed = False
+            
+            if full_scan:
+                self._last_full_scan = time.monotonic()
+                self.scan_stats['full_scans'] += 1
+                previous = self._file_cache
+                self._file_cache = {}
+                for file_path in self._walk_monitored_files():
+                    relative_path = os.path.relpath(file_path, self.project_root)
+                    self._refresh_file(file_path, relative_path, previous.get(relative_path))
+            else:
+                self.scan_stats['incremental_scans'] += 1
+                for file_path in dirty_paths:
+                    relative_path = os.path.relpath(file_path, self.project_root)
+                    cached = self._file_cache.pop(relative_path, None)
+                    if (not relative_path.startswith('..') and self._is_monitored_file(file_path)
+                            and self._matches_rglob(relative_path) and os.path.isfile(file_path)):
+                        self._refresh_file(file_path, relative_path, cached)
+            
+            return {path: digest for path, (_, digest) in self._file_cache.items()}
+    
+    def _walk_monitored_files(self):
+        """Yield monitored files under project_root, never descending into ignored trees."""
+        root = str(self.project_root)
+        for directory, subdirectories, file_names in os.walk(root):
+            subdirectories[:] = [d for d in subdirectories if d not in self.IGNORED_DIRECTORIES]
+            relative_directory = os.path.relpath(directory, root)
+            for file_name in file_names:
+                file_path = os.path.join(directory, file_name)
+                if not self._is_monitored_file(file_path):
+                    continue
+                relative_path = file_name if relative_directory == '.' else os.path.join(relative_directory, file_name)
+                if self._matches_rglob(relative_path) and os.path.isfile(file_path):
+                    yield file_path
+    
+    def _refresh_file(self, file_path: str, relative_path: str,
+                      cached: Optional[Tuple[Tuple[int, int, int], str]]):
+        """Store the digest for one file, hashing it only if its stat signature changed."""
+        try:
+            stat = os.stat(file_path)
+            signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if cached is not None and cached[0] == signature:
+                self._file_cache[relative_path] = cached
+                return
+            
+            digest = hashlib.sha256()
+            buffer = bytearray(min(self.HASH_CHUNK_SIZE, max(stat.st_size, 1)))
+            view = memoryview(buffer)
+            with open(file_path, 'rb', buffering=0) as f:
+                while True:
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    digest.update(view[:read])
+            
+            self._file_cache[relative_path] = (signature, digest.hexdigest())
+            self.scan_stats['files_hashed'] += 1
+            self.scan_stats['bytes_hashed'] += stat.st_size
+        except Exception as e:
+            logger.warning(f"⚠️ Could not hash file {file_path}: {e}")
     
-    def _validate_configuration_schemas(self) -> Dict[str, bool]:
-        """Validate configuration files against expected schemas."""
+    def _validate_configuration_schemas(self, file_hashes: Optional[Dict[str, str]] = None) -> Dict[str, bool]:
+        """Validate configuration files against expected schemas.
+        
+        With ``file_hashes`` from the current snapshot, a file whose digest is
+        unchanged since its last validation reuses the previous result.
+        """
         validation_results = {}
         
         # Validate YAML configuration files
@@ -1087,9 +1222,16 @@ class ConfigurationDriftDetector:
         
         for config_path, validator in yaml_configs.items():
             full_path = self.project_root / config_path
+            digest = file_hashes.get(config_path) if file_hashes else None
+            cached = self._schema_cache.get(config_path)
+            if digest is not None and cached is not None and cached[0] == digest:
+                validation_results[config_path] = cached[1]
+                continue
             if full_path.exists():
                 try:
                     validation_results[config_path] = validator(full_path)
+                    if digest is not None:
+                        self._schema_cache[config_path] = (digest, validation_results[config_path])
                 except Exception as e:
                     logger.warning(f"⚠️ Schema validation failed for {config_path}: {e}")
                     validation_results[config_path] = False
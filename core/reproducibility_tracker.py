@@ -39,6 +39,11 @@ from dataclasses import dataclass, asdict, field
 import numpy as np
 import pandas as pd
 
+try:
+    from core.artifact_digests import get_artifact_digests
+except ImportError:
+    from artifact_digests import get_artifact_digests
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -168,11 +173,8 @@ class ReproducibilityTracker:
         model_path = production_models[0]
         
         # Compute model hash
-        with open(model_path, 'rb') as f:
-            model_data = f.read()
-            model_hash = hashlib.sha256(model_data).hexdigest()
-        
-        model_size = len(model_data)
+        model_hash = get_artifact_digests().digest(model_path)
+        model_size = model_path.stat().st_size
         
         # Load checkpoint metadata
         try:
@@ -311,6 +313,12 @@ class ReproducibilityTracker:
         
         index_versions = {}
         
+        # Hash every index in parallel up front; the loop below reuses the digests
+        get_artifact_digests().digest_many(
+            path for horizon in horizons for index_type in index_types
+            for path in [indices_dir / f"faiss_{horizon}h_{index_type}.faiss"] if path.exists()
+        )
+        
         for horizon in horizons:
             for index_type in index_types:
                 index_key = f"{horizon}h_{index_type}"
@@ -321,9 +329,7 @@ class ReproducibilityTracker:
                     continue
                 
                 # Compute index hash
-                with open(index_path, 'rb') as f:
-                    index_data = f.read()
-                    index_hash = hashlib.sha256(index_data).hexdigest()
+                index_hash = get_artifact_digests().digest(index_path)
                 
                 # Load index to get metadata
                 try:
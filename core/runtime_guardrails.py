@@ -17,7 +17,7 @@ RUNTIME GUARDRAILS:
 - Automatic forecast suppression on corruption
 - Graceful degradation with reduced ensemble size
 - Memory limit enforcement with garbage collection
-- Performance circuit breakers
+- Performance circuit breakers (shared across API workers when shared metrics are enabled)
 - Error recovery and fallback mechanisms
 
 MONITORING SYSTEMS:
@@ -49,6 +49,11 @@ from enum import Enum
 import numpy as np
 import pandas as pd
 
+try:
+    from core.shared_metrics import get_shared_metrics
+except ImportError:
+    from shared_metrics import get_shared_metrics
+
 logger = logging.getLogger(__name__)
 
 class SystemStatus(Enum):
@@ -128,10 +133,27 @@ class RuntimeGuardRails:
     MAX_ZERO_FRACTION = 0.8             # Max fraction of zeros allowed
     MAX_NAN_FRACTION = 0.1              # Max fraction of NaN values
     PRECISION_TOLERANCE = 1e-12         # Numerical precision threshold
+    CORRUPTION_CHUNK_ELEMENTS = 1 << 20  # Elements per chunk in the corruption sweep
+    PRECISION_CHECK_MAX_ELEMENTS = 1 << 22  # Larger inputs check precision on a row sample
+    SAMPLE_CONFIDENCE = 0.99            # Confidence of reported sampling error bounds
+    
+    # Physically valid ranges per variable
+    VARIABLE_RANGES = {
+        'z500': (4800, 6200),
+        't2m': (200, 350),
+        't850': (200, 340),
+        'q850': (0, 0.030),
+        'u10': (-50, 50),
+        'v10': (-50, 50),
+        'u850': (-80, 80),
+        'v850': (-80, 80),
+        'cape': (0, 8000)
+    }
     
     # Circuit breaker settings
     CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
     CIRCUIT_BREAKER_RECOVERY_TIME = 300  # 5 minutes
+    CIRCUIT_BREAKER_SYNC_INTERVAL = 1.0  # Seconds between cross-worker breaker checks
     
     def __init__(self, max_memory_gb: float = 8.0, enable_gpu_monitoring: bool = True):
         """Initialize runtime guardrails system.
@@ -221,13 +243,20 @@ class RuntimeGuardRails:
                 self._handle_memory_limit_exceeded(operation, end_memory)
     
     def detect_corruption(self, data: np.ndarray, data_type: str, 
-                         variable_name: str = "unknown") -> List[CorruptionEvent]:
+                         variable_name: str = "unknown",
+                         sample_rows: Optional[int] = None) -> List[CorruptionEvent]:
         """Detect various types of data corruption.
         
+        All indicators come from one chunked sweep over the array (see
+        _scan_corruption_statistics), so large and memory-mapped inputs are
+        checked in bounded memory without copying them.
+        
         Args:
             data: Data array to check for corruption
             data_type: Type of data ('embedding', 'outcome', 'weather', etc.)
             variable_name: Name of the variable being checked
+            sample_rows: Scan only this many randomly chosen rows; fractions
+                are then estimates and events carry their error bound
             
         Returns:
             List of corruption events detected
@@ -237,75 +266,84 @@ class RuntimeGuardRails:
         if data is None or data.size == 0:
             return corruption_events
         
-        # Flatten data for analysis
-        flat_data = data.flatten()
+        stats = self._scan_corruption_statistics(data, variable_name, sample_rows)
+        scanned = stats['elements']
+        sampling = stats.get('sampling')
+        
+        def with_sampling(details: Dict[str, Any]) -> Dict[str, Any]:
+            if sampling:
+                details['sampling'] = sampling
+            return details
+        
+        def estimated_count(count: int) -> int:
+            return int(round(count * data.size / scanned)) if sampling else count
         
         # Check for all-zero artifacts
-        zero_fraction = np.sum(flat_data == 0) / len(flat_data)
+        zero_fraction = stats['zero_count'] / scanned
         if zero_fraction > self.MAX_ZERO_FRACTION:
             event = CorruptionEvent(
                 timestamp=datetime.now().isoformat(),
                 corruption_type=CorruptionType.ALL_ZEROS,
                 affected_component=f"{data_type}_{variable_name}",
                 severity="high" if zero_fraction > 0.95 else "medium",
-                details={
+                details=with_sampling({
                     'zero_fraction': zero_fraction,
                     'data_shape': data.shape,
                     'total_elements': data.size
-                },
+                }),
                 mitigation_applied="data_flagged_for_rejection"
             )
             corruption_events.append(event)
         
         # Check for NaN propagation
-        nan_fraction = np.sum(np.isnan(flat_data)) / len(flat_data)
+        nan_fraction = stats['nan_count'] / scanned
         if nan_fraction > self.MAX_NAN_FRACTION:
             event = CorruptionEvent(
                 timestamp=datetime.now().isoformat(),
                 corruption_type=CorruptionType.NAN_PROPAGATION,
                 affected_component=f"{data_type}_{variable_name}",
                 severity="critical" if nan_fraction > 0.5 else "high",
-                details={
+                details=with_sampling({
                     'nan_fraction': nan_fraction,
-                    'nan_count': np.sum(np.isnan(flat_data))
-                },
+                    'nan_count': estimated_count(stats['nan_count'])
+                }),
                 mitigation_applied="nan_filtering_applied"
             )
             corruption_events.append(event)
         
         # Check for infinite values
-        inf_count = np.sum(np.isinf(flat_data))
+        inf_count = stats['posinf_count'] + stats['neginf_count']
         if inf_count > 0:
             event = CorruptionEvent(
                 timestamp=datetime.now().isoformat(),
                 corruption_type=CorruptionType.INF_VALUES,
                 affected_component=f"{data_type}_{variable_name}",
                 severity="high",
-                details={
-                    'inf_count': inf_count,
-                    'pos_inf_count': np.sum(np.isposinf(flat_data)),
-                    'neg_inf_count': np.sum(np.isneginf(flat_data))
-                },
+                details=with_sampling({
+                    'inf_count': estimated_count(inf_count),
+                    'pos_inf_count': estimated_count(stats['posinf_count']),
+                    'neg_inf_count': estimated_count(stats['neginf_count'])
+                }),
                 mitigation_applied="inf_values_clipped"
             )
             corruption_events.append(event)
         
         # Variable-specific range validation
-        range_violations = self._check_variable_ranges(flat_data, variable_name)
+        range_violations = stats['range']
         if range_violations['violation_count'] > 0:
             event = CorruptionEvent(
                 timestamp=datetime.now().isoformat(),
                 corruption_type=CorruptionType.RANGE_VIOLATION,
                 affected_component=f"{data_type}_{variable_name}",
                 severity="medium",
-                details=range_violations,
+                details=with_sampling(range_violations),
                 mitigation_applied="out_of_range_values_flagged"
             )
             corruption_events.append(event)
         
         # Check for precision loss (for floating point data)
         if data.dtype in [np.float32, np.float64]:
-            precision_issues = self._check_precision_loss(flat_data)
+            precision_issues = stats['precision']
             if precision_issues['precision_loss_detected']:
                 event = CorruptionEvent(
                     timestamp=datetime.now().isoformat(),
@@ -483,40 +521,115 @@ class RuntimeGuardRails:
             degraded_operations=list(self.degraded_operations)
         )
     
-    def _check_variable_ranges(self, data: np.ndarray, variable_name: str) -> Dict[str, Any]:
-        """Check if variable values are within expected ranges."""
-        variable_ranges = {
-            'z500': (4800, 6200),
-            't2m': (200, 350),
-            't850': (200, 340),
-            'q850': (0, 0.030),
-            'u10': (-50, 50),
-            'v10': (-50, 50),
-            'u850': (-80, 80),
-            'v850': (-80, 80),
-            'cape': (0, 8000)
-        }
-        
-        if variable_name not in variable_ranges:
-            return {'violation_count': 0, 'message': 'no_range_defined'}
-        
-        min_val, max_val = variable_ranges[variable_name]
-        valid_data = data[np.isfinite(data)]
-        
-        if len(valid_data) == 0:
-            return {'violation_count': 0, 'message': 'no_valid_data'}
+    def _scan_corruption_statistics(self, data: np.ndarray, variable_name: str,
+                                    sample_rows: Optional[int] = None) -> Dict[str, Any]:
+        """Compute every corruption indicator in one chunked sweep over ``data``.
+        
+        The array is walked in row slices of about CORRUPTION_CHUNK_ELEMENTS
+        elements. Slices of contiguous and memory-mapped arrays are views, so
+        the input is never copied or flattened as a whole, and temporaries stay
+        chunk-sized and cache-resident. Non-finite classification and range
+        counting only run on chunks that need them.
+        
+        With ``sample_rows`` (fewer than the array has), a uniform random subset
+        of rows is scanned. Every row has the same number of elements, so each
+        reported fraction is a mean of per-row fractions in [0, 1], and by
+        Hoeffding's inequality lies within ``fraction_error_bound`` of the true
+        fraction with probability SAMPLE_CONFIDENCE.
+        """
+        array = data.reshape(1) if data.ndim == 0 else data
+        n_rows = array.shape[0]
+        row_size = array.size // n_rows
+        rows_per_chunk = max(1, self.CORRUPTION_CHUNK_ELEMENTS // max(row_size, 1))
+        floating = np.issubdtype(array.dtype, np.floating)
+        value_range = self.VARIABLE_RANGES.get(variable_name)
+        
+        sampled_rows = None
+        if sample_rows is not None and 0 < sample_rows < n_rows:
+            sampled_rows = np.sort(np.random.default_rng().choice(n_rows, size=sample_rows, replace=False))
+            chunks = (array[sampled_rows[i:i + rows_per_chunk]]
+                      for i in range(0, sample_rows, rows_per_chunk))
+        else:
+            chunks = (array[i:i + rows_per_chunk] for i in range(0, n_rows, rows_per_chunk))
         
-        violations = (valid_data < min_val) | (valid_data > max_val)
-        violation_count = np.sum(violations)
+        elements = zero_count = nan_count = posinf_count = neginf_count = 0
+        finite_count = violation_count = 0
+        data_min, data_max = np.inf, -np.inf
         
-        return {
-            'violation_count': violation_count,
-            'violation_fraction': violation_count / len(valid_data),
-            'min_allowed': min_val,
-            'max_allowed': max_val,
-            'data_min': float(np.min(valid_data)),
-            'data_max': float(np.max(valid_data))
+        for chunk in chunks:
+            flat = chunk.reshape(-1)
+            elements += flat.size
+            zero_count += int(np.count_nonzero(flat == 0))
+            
+            finite = flat
+            if floating:
+                finite_mask = np.isfinite(flat)
+                chunk_finite = int(np.count_nonzero(finite_mask))
+                if chunk_finite < flat.size:
+                    chunk_posinf = int(np.count_nonzero(np.isposinf(flat)))
+                    chunk_neginf = int(np.count_nonzero(np.isneginf(flat)))
+                    posinf_count += chunk_posinf
+                    neginf_count += chunk_neginf
+                    nan_count += flat.size - chunk_finite - chunk_posinf - chunk_neginf
+                    finite = flat[finite_mask]
+            finite_count += finite.size
+            
+            if value_range is not None and finite.size:
+                chunk_min, chunk_max = finite.min(), finite.max()
+                data_min = min(data_min, float(chunk_min))
+                data_max = max(data_max, float(chunk_max))
+                min_val, max_val = value_range
+                if chunk_min < min_val or chunk_max > max_val:
+                    violation_count += int(np.count_nonzero((finite < min_val) | (finite > max_val)))
+        
+        if value_range is None:
+            range_stats = {'violation_count': 0, 'message': 'no_range_defined'}
+        elif finite_count == 0:
+            range_stats = {'violation_count': 0, 'message': 'no_valid_data'}
+        else:
+            range_stats = {
+                'violation_count': violation_count,
+                'violation_fraction': violation_count / finite_count,
+                'min_allowed': value_range[0],
+                'max_allowed': value_range[1],
+                'data_min': data_min,
+                'data_max': data_max
+            }
+        
+        stats = {
+            'elements': elements,
+            'zero_count': zero_count,
+            'nan_count': nan_count,
+            'posinf_count': posinf_count,
+            'neginf_count': neginf_count,
+            'range': range_stats,
+            'precision': (self._check_precision_loss(self._precision_sample(array, sampled_rows))
+                          if array.dtype in (np.float32, np.float64) else {'precision_loss_detected': False})
         }
+        if sampled_rows is not None:
+            stats['sampling'] = {
+                'sampled_rows': int(sample_rows),
+                'total_rows': int(n_rows),
+                'fraction_error_bound': float(np.sqrt(np.log(2 / (1 - self.SAMPLE_CONFIDENCE)) / (2 * sample_rows))),
+                'confidence': self.SAMPLE_CONFIDENCE
+            }
+        return stats
+    
+    def _precision_sample(self, array: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Values for the precision check, limited to PRECISION_CHECK_MAX_ELEMENTS via a row sample."""
+        row_size = max(array.size // array.shape[0], 1)
+        max_rows = max(1, self.PRECISION_CHECK_MAX_ELEMENTS // row_size)
+        if rows is None:
+            if array.shape[0] <= max_rows:
+                return array.reshape(-1)
+            rows = np.arange(array.shape[0])
+        if len(rows) > max_rows:
+            rows = np.sort(np.random.default_rng().choice(rows, size=max_rows, replace=False))
+        return array[rows].reshape(-1)
+    
+    def _check_variable_ranges(self, data: np.ndarray, variable_name: str) -> Dict[str, Any]:
+        """Check if variable values are within expected ranges."""
+        return self._scan_corruption_statistics(data, variable_name)['range']
     
     def _check_precision_loss(self, data: np.ndarray) -> Dict[str, Any]:
         """Check for numerical precision loss."""
@@ -528,7 +641,7 @@ class RuntimeGuardRails:
         if len(unique_values) < len(data) * 0.5:  # Less than 50% unique values
             # Check if values are clustered at specific precision levels
             if len(unique_values) > 1:
-                min_diff = np.min(np.diff(np.sort(unique_values)))
+                min_diff = np.min(np.diff(unique_values))
                 if min_diff < self.PRECISION_TOLERANCE:
                     return {
                         'precision_loss_detected': True,
@@ -569,6 +682,7 @@ class RuntimeGuardRails:
             return False
         
         breaker = self.circuit_breakers[operation]
+        self._sync_shared_breaker(operation, breaker)
         
         if breaker['state'] == 'open':
             # Check if recovery time has passed
@@ -582,6 +696,58 @@ class RuntimeGuardRails:
         
         return False
     
+    def _sync_shared_breaker(self, operation: str, breaker: Dict[str, Any], force: bool = False):
+        """Adopt the breaker state of all workers so breakers trip globally, not per process.
+        
+        Each worker publishes its own failure count and the time it last opened or
+        closed the breaker. Failures recorded before the latest close anywhere are
+        dropped, and the breaker opens here when the failures of all live workers
+        reach the threshold or another worker opened it within the recovery time.
+        """
+        shared = get_shared_metrics()
+        if shared is None:
+            return
+        
+        # Reading the other workers' segments is throttled on the hot path
+        now = time.time()
+        if not force and now - breaker.get('synced_at', 0.0) < self.CIRCUIT_BREAKER_SYNC_INTERVAL:
+            return
+        breaker['synced_at'] = now
+        
+        prefix = f"breaker:{operation}:"
+        workers = shared.worker_values(prefix, live_only=True).values()
+        closed_at = max((w.get(prefix + 'closed_at', 0.0) for w in workers), default=0.0)
+        if closed_at > breaker.get('closed_at', 0.0):
+            breaker['closed_at'] = closed_at
+            breaker['failures'] = 0
+            if breaker['state'] != 'closed':
+                breaker['state'] = 'closed'
+                self.degraded_operations.discard(operation)
+            shared.set(prefix + 'failures', 0)
+            workers = shared.worker_values(prefix, live_only=True).values()
+        
+        if breaker['state'] != 'closed':
+            return
+        
+        opened_at = max((w.get(prefix + 'opened_at', 0.0) for w in workers), default=0.0)
+        total_failures = sum(w.get(prefix + 'failures', 0.0) for w in workers)
+        if opened_at > closed_at and now - opened_at <= self.CIRCUIT_BREAKER_RECOVERY_TIME:
+            breaker['state'] = 'open'
+            breaker['last_failure'] = opened_at
+            self.degraded_operations.add(operation)
+        elif total_failures >= self.CIRCUIT_BREAKER_FAILURE_THRESHOLD:
+            self._open_circuit_breaker(operation, breaker, int(total_failures))
+    
+    def _open_circuit_breaker(self, operation: str, breaker: Dict[str, Any], failures: int):
+        breaker['state'] = 'open'
+        breaker['last_failure'] = breaker['last_failure'] or time.time()
+        logger.error(f"🚨 Circuit breaker OPEN for {operation} after {failures} failures")
+        self.degraded_operations.add(operation)
+        
+        shared = get_shared_metrics()
+        if shared is not None:
+            shared.set(f"breaker:{operation}:opened_at", breaker['last_failure'])
+    
     def _record_circuit_breaker_failure(self, operation: str, error: str):
         """Record circuit breaker failure."""
         if operation not in self.circuit_breakers:
@@ -591,10 +757,13 @@ class RuntimeGuardRails:
         breaker['failures'] += 1
         breaker['last_failure'] = time.time()
         
-        if breaker['failures'] >= self.CIRCUIT_BREAKER_FAILURE_THRESHOLD:
-            breaker['state'] = 'open'
-            logger.error(f"🚨 Circuit breaker OPEN for {operation} after {breaker['failures']} failures")
-            self.degraded_operations.add(operation)
+        shared = get_shared_metrics()
+        if shared is not None:
+            shared.set(f"breaker:{operation}:failures", breaker['failures'])
+            self._sync_shared_breaker(operation, breaker, force=True)
+        
+        if breaker['state'] != 'open' and breaker['failures'] >= self.CIRCUIT_BREAKER_FAILURE_THRESHOLD:
+            self._open_circuit_breaker(operation, breaker, breaker['failures'])
     
     def _reset_circuit_breaker_failure(self, operation: str):
         """Reset circuit breaker after successful operation."""
@@ -605,6 +774,12 @@ class RuntimeGuardRails:
                 breaker['failures'] = 0
                 logger.info(f"✅ Circuit breaker closed for {operation}")
                 self.degraded_operations.discard(operation)
+                
+                shared = get_shared_metrics()
+                if shared is not None:
+                    breaker['closed_at'] = time.time()
+                    shared.set(f"breaker:{operation}:failures", 0)
+                    shared.set(f"breaker:{operation}:closed_at", breaker['closed_at'])
     
     def _handle_performance_degradation(self, operation: str, duration_ms: float):
         """Handle performance degradation event."""
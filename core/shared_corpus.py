@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Shared Analog Corpus
+====================
+
+Read-only, versioned copy of the analog search artifacts (FAISS indices,
+embeddings, outcomes and metadata for every horizon) in a shared-memory
+directory, so multi-worker API deployments map one physical copy instead of
+each worker loading its own.
+
+A parent process or sidecar publishes the corpus once (``python -m
+core.shared_corpus publish``); workers attach to it:
+
+- Arrays are stored as .npy files and opened with ``np.load(mmap_mode='r')``
+- FAISS indices are opened with ``IO_FLAG_MMAP_IFC``, so codes stay in the mapping
+- Metadata parquet is converted to one .npy file per column; numeric and
+  datetime columns are zero-copy views, string columns are small copies
+
+Each publish writes a new ``gen-<token>`` directory (the token digests the
+source files' name, size and mtime) and atomically repoints the ``current``
+symlink to it. Attached workers keep their mappings of the old generation
+until they reattach; old generations are pruned after ``keep`` publishes.
+
+Enabled when ANALOG_CORPUS_DIR is set. Point it at a tmpfs (e.g. /dev/shm)
+mounted with ``huge=within_size`` to back the corpus with huge pages; the
+mappings are also advised MADV_HUGEPAGE where the kernel supports it.
+
+Author: Performance Engineering
+Version: 1.0.0 - Shared analog corpus
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HORIZONS = (6, 12, 24, 48)
+INDEX_KINDS = ('flatip', 'ivfpq')
+MANIFEST_NAME = 'manifest.json'
+CURRENT_LINK = 'current'
+FORMAT_VERSION = 1
+
+PathLike = Union[str, Path]
+
+
+def _source_files(embeddings_dir: Path, indices_dir: Path, outcomes_dir: Path,
+                  horizons: Iterable[int]) -> Dict[int, Dict[str, Path]]:
+    """Artifacts to publish per horizon, keyed by their name in the corpus."""
+    sources = {}
+    for horizon in horizons:
+        files = {
+            'embeddings': embeddings_dir / f"embeddings_{horizon}h.npy",
+            'metadata': embeddings_dir / f"metadata_{horizon}h.parquet",
+            'outcomes': outcomes_dir / f"outcomes_{horizon}h.npy",
+            'outcomes_metadata': outcomes_dir / f"metadata_{horizon}h_clean.parquet",
+        }
+        for kind in INDEX_KINDS:
+            files[f"index_{kind}"] = indices_dir / f"faiss_{horizon}h_{kind}.faiss"
+        sources[horizon] = {name: path for name, path in files.items() if path.is_file()}
+    return sources
+
+
+def corpus_generation(sources: Dict[int, Dict[str, Path]]) -> str:
+    """Token identifying the source artifacts by (name, size, mtime_ns)."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(str(FORMAT_VERSION).encode())
+    for horizon in sorted(sources):
+        for name in sorted(sources[horizon]):
+            stat = sources[horizon][name].stat()
+            digest.update(f"{horizon}:{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def _write_columns(metadata: pd.DataFrame, directory: Path) -> List[Dict[str, str]]:
+    """Store a DataFrame as one .npy file per column.
+
+    Object columns are stored as fixed-width unicode; their missing values go
+    in a separate boolean mask (astype(str) alone would turn None/NaN into
+    the string 'nan').
+    """
+    directory.mkdir()
+    columns = []
+    for position, column in enumerate(metadata.columns):
+        series = metadata[column]
+        entry = {'name': str(column), 'file': f"{position:03d}.npy"}
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            entry['tz'] = str(series.dt.tz)
+            values = series.dt.tz_convert(None).to_numpy('datetime64[ns]')
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            values = series.to_numpy('datetime64[ns]')
+        else:
+            values = series.to_numpy()
+            if values.dtype == object or not isinstance(values.dtype, np.dtype):
+                nulls = series.isna().to_numpy()
+                values = series.astype(object).where(~nulls, '').astype(str).to_numpy(dtype=str)
+                if nulls.any():
+                    entry['nulls'] = f"{position:03d}.nulls.npy"
+                    np.save(directory / entry['nulls'], nulls, allow_pickle=False)
+        np.save(directory / entry['file'], values, allow_pickle=False)
+        columns.append(entry)
+    return columns
+
+
+def _advise_hugepages(array: np.ndarray):
+    """Best-effort MADV_HUGEPAGE on the mapping behind a memmap."""
+    advice = getattr(mmap, 'MADV_HUGEPAGE', None)
+    mapping = getattr(array, '_mmap', None)
+    if advice is None or mapping is None:
+        return
+    try:
+        mapping.madvise(advice)
+    except (OSError, ValueError):
+        pass
+
+
+def contiguous_rows(array, mask: np.ndarray):
+    """Select rows of an array or DataFrame by a boolean mask, as a view when
+    the mask is one contiguous run (e.g. a time-sorted training period)."""
+    mask = np.asarray(mask, dtype=bool)
+    selected = np.flatnonzero(mask)
+    if len(selected) and selected[-1] - selected[0] + 1 == len(selected):
+        rows = slice(int(selected[0]), int(selected[-1]) + 1)
+        if isinstance(array, pd.DataFrame):
+            return array.iloc[rows].reset_index(drop=True)
+        return array[rows]
+    if isinstance(array, pd.DataFrame):
+        return array[mask].reset_index(drop=True)
+    return array[mask]
+
+
+class SharedAnalogCorpus:
+    """Read-only view of one published corpus generation."""
+
+    def __init__(self, directory: PathLike):
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_NAME) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported corpus format in {self.directory}")
+        self.generation: str = self.manifest['generation']
+        self._cache: Dict[Tuple[int, str], object] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def attach(cls, root: Optional[PathLike] = None) -> Optional['SharedAnalogCorpus']:
+        """Attach to the current generation under root, or None if none is published."""
+        root = Path(root or os.environ['ANALOG_CORPUS_DIR'])
+        try:
+            target = os.readlink(root / CURRENT_LINK)
+        except OSError:
+            return None
+        return cls(root / target)
+
+    def available(self, horizon: int, name: str) -> bool:
+        return name in self.manifest['horizons'].get(str(horizon), {})
+
+    def index(self, horizon: int, kind: str = 'flatip'):
+        """FAISS index whose codes are mapped from the corpus, not copied."""
+        def load(entry):
+            import faiss
+            flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+            return faiss.read_index(str(self.directory / entry['file']), flags)
+        return self._get(horizon, f"index_{kind}", load)
+
+    def embeddings(self, horizon: int) -> np.ndarray:
+        return self._get(horizon, 'embeddings', self._load_array)
+
+    def outcomes(self, horizon: int) -> np.ndarray:
+        return self._get(horizon, 'outcomes', self._load_array)
+
+    def metadata(self, horizon: int) -> pd.DataFrame:
+        """Embedding metadata (metadata_{h}h.parquet) for the horizon."""
+        return self._get(horizon, 'metadata', self._load_frame)
+
+    def outcomes_metadata(self, horizon: int) -> pd.DataFrame:
+        """Outcome metadata (metadata_{h}h_clean.parquet) for the horizon."""
+        return self._get(horizon, 'outcomes_metadata', self._load_frame)
+
+    def is_current(self) -> bool:
+        """Whether this is still the generation `current` points to."""
+        try:
+            return os.readlink(self.directory.parent / CURRENT_LINK) == self.directory.name
+        except OSError:
+            return False
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            'generation': self.generation,
+            'directory': str(self.directory),
+            'published_at': self.manifest.get('published_at'),
+            'total_bytes': self.manifest.get('total_bytes'),
+            'attached_artifacts': len(self._cache),
+        }
+
+    # -------------------------------------------------------------- internals
+
+    def _get(self, horizon: int, name: str, load):
+        key = (horizon, name)
+        value = self._cache.get(key)
+        if value is None:
+            with self._lock:
+                value = self._cache.get(key)
+                if value is None:
+                    entry = self.manifest['horizons'].get(str(horizon), {}).get(name)
+                    if entry is None:
+                        raise KeyError(f"{name} for {horizon}h is not in corpus {self.generation}")
+                    value = load(entry)
+                    self._cache[key] = value
+        return value
+
+    def _load_array(self, entry) -> np.ndarray:
+        array = np.load(self.directory / entry['file'], mmap_mode='r')
+        _advise_hugepages(array)
+        return array
+
+    def _load_frame(self, entry) -> pd.DataFrame:
+        directory = self.directory / entry['directory']
+
+        def values(column):
+            array = np.asarray(np.load(directory / column['file'], mmap_mode='r'))
+            if 'nulls' in column:
+                array = array.astype(object)
+                array[np.load(directory / column['nulls'])] = None
+            return array
+
+        frame = pd.DataFrame({column['name']: values(column) for column in entry['columns']}, copy=False)
+        for column in entry['columns']:
+            if 'tz' in column:
+                frame[column['name']] = frame[column['name']].dt.tz_localize('UTC').dt.tz_convert(column['tz'])
+        return frame
+
+
+def publish_corpus(root: PathLike, embeddings_dir: PathLike = 'embeddings',
+                   indices_dir: PathLike = 'indices', outcomes_dir: PathLike = 'outcomes',
+                   horizons: Iterable[int] = HORIZONS, keep: int = 2) -> str:
+    """Publish the source artifacts as a new corpus generation under root.
+
+    A no-op when the current generation already matches the sources.
+    Concurrent publishers serialize on a lock file, so only one builds.
+
+    Returns:
+        The published generation token
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    sources = _source_files(Path(embeddings_dir), Path(indices_dir), Path(outcomes_dir), horizons)
+    generation = corpus_generation(sources)
+    name = f"gen-{generation}"
+
+    with open(root / '.publish.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if os.readlink(root / CURRENT_LINK) == name:
+                return generation
+        except OSError:
+            pass
+
+        staging = root / f".building-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        manifest = {'format_version': FORMAT_VERSION, 'generation': generation,
+                    'published_at': time.time(), 'horizons': {}, 'total_bytes': 0}
+        for horizon, files in sources.items():
+            entries = {}
+            horizon_dir = staging / f"h{horizon}"
+            horizon_dir.mkdir()
+            for artifact, path in files.items():
+                relative = f"h{horizon}/{artifact}"
+                if path.suffix == '.parquet':
+                    columns = _write_columns(pd.read_parquet(path), staging / relative)
+                    entries[artifact] = {'directory': relative, 'columns': columns,
+                                         'source': str(path)}
+                else:
+                    relative += path.suffix
+                    shutil.copyfile(path, staging / relative)
+                    entries[artifact] = {'file': relative, 'source': str(path)}
+            manifest['horizons'][str(horizon)] = entries
+        manifest['total_bytes'] = sum(p.stat().st_size for p in staging.rglob('*') if p.is_file())
+        with open(staging / MANIFEST_NAME, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(root / name, ignore_errors=True)
+        os.rename(staging, root / name)
+        link = root / f".current-{os.getpid()}"
+        if link.is_symlink():
+            link.unlink()
+        os.symlink(name, link)
+        os.replace(link, root / CURRENT_LINK)
+        logger.info(f"Published analog corpus {generation} ({manifest['total_bytes'] / 1e6:.1f} MB) to {root}")
+
+        # Unlinked generations stay valid for workers that still map them
+        generations = sorted((p for p in root.glob('gen-*') if p.name != name),
+                             key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in generations[max(keep - 1, 0):]:
+            shutil.rmtree(stale, ignore_errors=True)
+    return generation
+
+
+_corpus: Optional[SharedAnalogCorpus] = None
+_corpus_state = {'checked_at': 0.0}
+_corpus_lock = threading.Lock()
+
+
+def get_shared_corpus(recheck_seconds: float = 30.0) -> Optional[SharedAnalogCorpus]:
+    """Process-wide attachment to the published corpus, or None when disabled.
+
+    Reattaches when a newer generation has been published (checked at most
+    every recheck_seconds).
+    """
+    global _corpus
+    root = os.getenv('ANALOG_CORPUS_DIR')
+    if not root:
+        return None
+    now = time.monotonic()
+    if _corpus is not None and now - _corpus_state['checked_at'] < recheck_seconds:
+        return _corpus
+    with _corpus_lock:
+        _corpus_state['checked_at'] = now
+        if _corpus is None or not _corpus.is_current():
+            try:
+                corpus = SharedAnalogCorpus.attach(root)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not attach analog corpus in {root}: {e}")
+                corpus = None
+            if corpus is not None:
+                logger.info(f"Attached analog corpus {corpus.generation} in {root}")
+                _corpus = corpus
+        return _corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the shared analog corpus")
+    parser.add_argument('command', choices=['publish', 'info'])
+    parser.add_argument('--root', default=os.getenv('ANALOG_CORPUS_DIR', '/dev/shm/adelaide-analog-corpus'))
+    parser.add_argument('--embeddings-dir', default='embeddings')
+    parser.add_argument('--indices-dir', default='indices')
+    parser.add_argument('--outcomes-dir', default=os.getenv('OUTCOMES_DIR', 'outcomes'))
+    parser.add_argument('--keep', type=int, default=2)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'publish':
+        publish_corpus(args.root, args.embeddings_dir, args.indices_dir, args.outcomes_dir, keep=args.keep)
+    corpus = SharedAnalogCorpus.attach(args.root)
+    print(json.dumps(corpus.get_stats() if corpus else {'generation': None}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Cross-Worker Shared Metrics Segment
+===================================
+
+Shared-memory metrics and state for multi-process API deployments
+(uvicorn/gunicorn --workers N).
+
+Every worker owns one mmap-backed file in a shared directory and is its only
+writer, so no cross-process locking is needed: new keys are appended before
+the used-bytes header is advanced, so a reader never sees a half-written
+entry. Within a worker, one lock serializes every value read and write with
+appends and remaps (increments are read-modify-write, and growing the file
+replaces the mapping). Any worker can aggregate the view of all workers by
+reading the other files.
+
+Supports:
+- Counters (summed across all workers, including exited ones)
+- Gauges (aggregated over live workers: sum, max or min)
+- Windowed bucket histograms (e.g. latency sketch buckets) over a sliding window
+- Shared state such as circuit-breaker failure counts and open timestamps
+
+Enabled when SHARED_METRICS_DIR is set, or alongside Prometheus multiprocess
+mode (PROMETHEUS_MULTIPROC_DIR) in its "adelaide" subdirectory.
+
+Author: Performance Engineering
+Version: 1.0.0 - Shared metrics segment
+"""
+
+import glob
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct('<II')      # used bytes, format version
+_KEY_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_FORMAT_VERSION = 1
+_INITIAL_SIZE = 64 * 1024
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_file(path: str) -> Dict[str, float]:
+    """Read all committed entries of one worker file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        return {}
+    used, _ = _HEADER.unpack_from(data, 0)
+    values = {}
+    pos = _HEADER.size
+    while pos < min(used, len(data)):
+        (key_length,) = _KEY_LENGTH.unpack_from(data, pos)
+        key_start = pos + _KEY_LENGTH.size
+        key = data[key_start:key_start + key_length].decode('utf-8')
+        value_pos = key_start + key_length + (-(_KEY_LENGTH.size + key_length) % 8)
+        (values[key],) = _VALUE.unpack_from(data, value_pos)
+        pos = value_pos + _VALUE.size
+    return values
+
+
+class SharedMetricsSegment:
+    """One worker's writable view of the shared metrics directory."""
+
+    def __init__(self, directory: str, pid: Optional[int] = None,
+                 window_seconds: Optional[float] = None, window_slices: int = 10):
+        self.directory = directory
+        self.pid = pid or os.getpid()
+        self.window_seconds = window_seconds or float(os.getenv('SHARED_METRICS_WINDOW_SECONDS', '300'))
+        self.window_slices = window_slices
+        self.slice_seconds = self.window_seconds / window_slices
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = os.path.join(directory, f"worker_{self.pid}.metrics")
+        self._file = open(self.path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size < _INITIAL_SIZE:
+            self._file.truncate(_INITIAL_SIZE)
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._positions: Dict[str, int] = {}
+        self._used = _HEADER.size
+        self._slot_ids: Dict[Tuple[str, int], int] = {}
+        self._slot_keys: Dict[Tuple[str, int], List[str]] = {}
+        # Serializes this worker's threads over the mapping; other workers never write here
+        self._lock = threading.RLock()
+
+        existing = _read_file(self.path)
+        if existing:
+            self._load_positions()
+        else:
+            _HEADER.pack_into(self._mmap, 0, self._used, _FORMAT_VERSION)
+
+    # ---------------------------------------------------------------- writes
+
+    def _load_positions(self):
+        used, _ = _HEADER.unpack_from(self._mmap, 0)
+        pos = _HEADER.size
+        while pos < used:
+            (key_length,) = _KEY_LENGTH.unpack_from(self._mmap, pos)
+            key_start = pos + _KEY_LENGTH.size
+            key = self._mmap[key_start:key_start + key_length].decode('utf-8')
+            value_pos = key_start + key_length + (-(_KEY_LENGTH.size + key_length) % 8)
+            self._positions[key] = value_pos
+            pos = value_pos + _VALUE.size
+        self._used = used
+
+    def _position(self, key: str) -> int:
+        """Value offset of ``key``, appending a new entry if needed (caller holds the lock)."""
+        position = self._positions.get(key)
+        if position is not None:
+            return position
+
+        encoded = key.encode('utf-8')
+        padding = -(_KEY_LENGTH.size + len(encoded)) % 8
+        entry_size = _KEY_LENGTH.size + len(encoded) + padding + _VALUE.size
+        if self._used + entry_size > len(self._mmap):
+            self._grow(self._used + entry_size)
+
+        pos = self._used
+        _KEY_LENGTH.pack_into(self._mmap, pos, len(encoded))
+        self._mmap[pos + _KEY_LENGTH.size:pos + _KEY_LENGTH.size + len(encoded)] = encoded
+        value_pos = pos + _KEY_LENGTH.size + len(encoded) + padding
+        _VALUE.pack_into(self._mmap, value_pos, 0.0)
+
+        # Publish the entry only once it is fully written
+        self._used += entry_size
+        _HEADER.pack_into(self._mmap, 0, self._used, _FORMAT_VERSION)
+        self._positions[key] = value_pos
+        return value_pos
+
+    def _grow(self, required: int):
+        """Extend the file and remap it (caller holds the lock, so no access sees the closed map)."""
+        size = len(self._mmap)
+        while size < required:
+            size *= 2
+        self._mmap.close()
+        self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+
+    def inc(self, key: str, amount: float = 1.0):
+        with self._lock:
+            position = self._position(key)
+            (value,) = _VALUE.unpack_from(self._mmap, position)
+            _VALUE.pack_into(self._mmap, position, value + amount)
+
+    def set(self, key: str, value: float):
+        with self._lock:
+            position = self._position(key)  # May remap, so resolve it before reading self._mmap
+            _VALUE.pack_into(self._mmap, position, value)
+
+    def publish(self, prefix: str, values: Dict[str, float]):
+        """Write this worker's current values for a group of counters."""
+        for name, value in values.items():
+            self.set(f"{prefix}{name}", value)
+
+    def get_local(self, key: str, default: float = 0.0) -> float:
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                return default
+            return _VALUE.unpack_from(self._mmap, position)[0]
+
+    def observe_bucket(self, name: str, bucket: str, amount: float = 1.0, now: Optional[float] = None):
+        """Count into a sliding-window histogram bucket (e.g. a latency sketch bucket)."""
+        slice_id = int((time.time() if now is None else now) // self.slice_seconds)
+        slot = slice_id % self.window_slices
+        slot_key = (name, slot)
+        with self._lock:
+            if self._slot_ids.get(slot_key) != slice_id:
+                # Slot is being reused for a new slice: zero this worker's old counts first
+                for key in self._slot_keys.get(slot_key, []):
+                    self.set(key, 0.0)
+                self.set(f"{name}|{slot}|id", slice_id)
+                self._slot_ids[slot_key] = slice_id
+
+            key = f"{name}|{slot}|{bucket}"
+            if key not in self._positions:
+                self._slot_keys.setdefault(slot_key, []).append(key)
+            self.inc(key, amount)
+
+    # ----------------------------------------------------------------- reads
+
+    def _worker_files(self) -> Iterator[Tuple[int, Dict[str, float]]]:
+        for path in glob.glob(os.path.join(self.directory, 'worker_*.metrics')):
+            try:
+                pid = int(os.path.basename(path)[len('worker_'):-len('.metrics')])
+                yield pid, _read_file(path)
+            except (OSError, ValueError, struct.error, UnicodeDecodeError) as e:
+                logger.debug(f"Skipping unreadable metrics file {path}: {e}")
+
+    def worker_values(self, prefix: str = '', live_only: bool = False) -> Dict[int, Dict[str, float]]:
+        """Per-worker values for keys starting with ``prefix``."""
+        result = {}
+        for pid, values in self._worker_files():
+            if live_only and pid != self.pid and not _pid_alive(pid):
+                continue
+            result[pid] = {key: value for key, value in values.items() if key.startswith(prefix)}
+        return result
+
+    def counter_totals(self, prefix: str = '') -> Dict[str, float]:
+        """Counters summed over every worker that ever wrote them."""
+        totals: Dict[str, float] = {}
+        for values in self.worker_values(prefix).values():
+            for key, value in values.items():
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def totals(self, prefix: str) -> Dict[str, float]:
+        """Counter totals for a published group, with the prefix stripped."""
+        return {key[len(prefix):]: value for key, value in self.counter_totals(prefix).items()}
+
+    def gauge(self, key: str, mode: str = 'sum') -> float:
+        """A gauge aggregated over live workers ('sum', 'max' or 'min')."""
+        values = [v[key] for v in self.worker_values(key, live_only=True).values() if key in v]
+        if not values:
+            return 0.0
+        if mode == 'max':
+            return max(values)
+        if mode == 'min':
+            return min(values)
+        return sum(values)
+
+    def read_buckets(self, name_prefix: str, now: Optional[float] = None) -> Dict[str, float]:
+        """Windowed histogram buckets merged across workers and every name with ``name_prefix``."""
+        current = int((time.time() if now is None else now) // self.slice_seconds)
+        buckets: Dict[str, float] = {}
+        for values in self.worker_values(name_prefix).values():
+            live_slots = set()
+            for key, slice_id in values.items():
+                name, _, rest = key.rpartition('|')
+                if rest == 'id' and 0 <= current - slice_id < self.window_slices:
+                    live_slots.add(name)
+            for key, count in values.items():
+                slot_name, _, bucket = key.rpartition('|')
+                if bucket != 'id' and count and slot_name in live_slots:
+                    buckets[bucket] = buckets.get(bucket, 0.0) + count
+        return buckets
+
+    def live_workers(self) -> List[int]:
+        return [pid for pid, _ in self._worker_files() if pid == self.pid or _pid_alive(pid)]
+
+    def close(self):
+        with self._lock:
+            try:
+                self._mmap.close()
+                self._file.close()
+            except Exception:
+                pass
+
+
+_segment: Optional[SharedMetricsSegment] = None
+_segment_pid: Optional[int] = None
+
+
+def shared_metrics_dir() -> Optional[str]:
+    """Directory for the shared segment, or None when sharing is disabled."""
+    directory = os.getenv('SHARED_METRICS_DIR')
+    if directory:
+        return directory
+    multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        return os.path.join(multiproc_dir, 'adelaide')
+    return None
+
+
+def get_shared_metrics() -> Optional[SharedMetricsSegment]:
+    """This worker's segment (created per process after fork), or None when disabled."""
+    global _segment, _segment_pid
+    if _segment_pid == os.getpid():
+        return _segment
+
+    _segment_pid = os.getpid()
+    _segment = None
+    directory = shared_metrics_dir()
+    if directory:
+        try:
+            _segment = SharedMetricsSegment(directory)
+            logger.info(f"Shared metrics segment enabled at {_segment.path}")
+        except OSError as e:
+            logger.warning(f"Shared metrics unavailable ({directory}): {e}")
+    return _segment
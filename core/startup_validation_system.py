@@ -35,6 +35,11 @@ from typing import Dict, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass, asdict
 from contextlib import contextmanager
 
+try:
+    from core.artifact_digests import get_artifact_digests
+except ImportError:
+    from artifact_digests import get_artifact_digests
+
 # Setup production logging
 logging.basicConfig(
     level=logging.INFO,
@@ -227,14 +232,10 @@ class ExpertValidatedStartupSystem:
             
         return validation
     
-    def _calculate_file_hash(self, file_path: Path, algorithm: str = 'md5') -> str:
-        """Calculate file hash for integrity verification."""
+    def _calculate_file_hash(self, file_path: Path, algorithm: str = 'sha256') -> str:
+        """Calculate file hash for integrity verification (hashed fresh once per process, then shared)."""
         try:
-            hash_func = hashlib.new(algorithm)
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(8192), b""):
-                    hash_func.update(chunk)
-            return hash_func.hexdigest()
+            return get_artifact_digests().digest(file_path, algorithm, verify=True)
         except Exception:
             return "unknown"
     
@@ -442,6 +443,20 @@ class ExpertValidatedStartupSystem:
             corruption_detected = []
             size_warnings = []
             
+            # Hash all artifacts fresh (never from the persisted cache), in parallel;
+            # the per-file checks below reuse these in-process results
+            artifact_suffixes = {
+                "models": ['.pt', '.pth', '.ckpt'],
+                "indices": ['.faiss', '.index'],
+                "embeddings": ['.npy', '.npz', '.h5', '.pkl']
+            }
+            get_artifact_digests().digest_many((
+                artifact for directory, suffixes in artifact_suffixes.items()
+                if (self.project_root / directory).exists()
+                for artifact in (self.project_root / directory).iterdir()
+                if artifact.is_file() and artifact.suffix in suffixes
+            ), verify=True)
+            
             # Check critical model file
             models_dir = self.project_root / "models"
             integrity_analysis['models'] = {}
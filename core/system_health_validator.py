@@ -35,6 +35,11 @@ import pandas as pd
 import torch
 from packaging import version
 
+try:
+    from core.artifact_digests import get_artifact_digests
+except ImportError:
+    from artifact_digests import get_artifact_digests
+
 # Setup logging for production monitoring
 logging.basicConfig(
     level=logging.INFO,
@@ -687,9 +692,7 @@ class ProductionHealthValidator:
             # Find the best model
             production_models = list(self.project_root.glob('outputs/training_production_*/best_model.pt'))
             if production_models:
-                model_path = production_models[0]
-                with open(model_path, 'rb') as f:
-                    return hashlib.sha256(f.read()).hexdigest()
+                return get_artifact_digests().digest(production_models[0])
             return "unknown"
         except:
             return "unknown"
@@ -88,6 +88,39 @@ class HorizonQualityAssessment:
     horizon_status: str  # 'operational', 'degraded', 'compromised'
     forecast_reliability: str  # 'high', 'medium', 'low', 'unreliable'
 
+@dataclass
+class VariableQualityThresholds:
+    """Per-variable threshold vectors, aligned with the outcome matrix columns."""
+    variable_names: Tuple[str, ...]
+    range_min: np.ndarray
+    range_max: np.ndarray
+    min_analogs: np.ndarray
+    outlier_threshold: np.ndarray
+    quality_weight: np.ndarray
+
+@dataclass
+class VariableQualityMatrix:
+    """Quality metrics for all variables (and optionally all queries) at once.
+    
+    Every array has shape (n_variables,) or (batch, n_variables).
+    """
+    variable_names: Tuple[str, ...]
+    total_analogs: int
+    valid_analogs: np.ndarray
+    validity_ratio: np.ndarray
+    outlier_count: np.ndarray
+    range_violation_count: np.ndarray
+    temporal_consistency_score: np.ndarray
+    quality_score: np.ndarray
+    status_code: np.ndarray  # Index into STATUS_BY_CODE
+    
+    def status(self) -> np.ndarray:
+        return STATUS_BY_CODE[self.status_code]
+
+# Status codes used by VariableQualityMatrix.status_code
+STATUS_BY_CODE = np.array([VariableStatus.AVAILABLE, VariableStatus.DEGRADED,
+                           VariableStatus.INSUFFICIENT, VariableStatus.UNAVAILABLE], dtype=object)
+
 class VariableQualityMonitor:
     """Production-grade per-variable quality monitoring system."""
     
@@ -201,112 +234,172 @@ class VariableQualityMonitor:
         self.global_min_analogs = 10
         self.confidence_degradation_per_missing_var = 0.15
         self.quality_score_threshold = 0.7
+        self._threshold_cache = {}
         
         logger.info(f"🔍 Variable Quality Monitor initialized (strict_mode={strict_mode})")
         logger.info(f"   Monitoring {len(self.VARIABLE_DEFINITIONS)} variables")
     
-    def assess_variable_quality(self, variable_name: str, analog_data: np.ndarray,
-                              analog_indices: np.ndarray) -> VariableQualityMetrics:
-        """Assess quality metrics for a single variable.
+    def _variable_definition(self, variable_name: str) -> Dict[str, Any]:
+        """Definition for a variable, falling back to permissive defaults."""
+        if variable_name in self.VARIABLE_DEFINITIONS:
+            return self.VARIABLE_DEFINITIONS[variable_name]
+        logger.warning(f"Unknown variable {variable_name}, using default settings")
+        return {
+            'min_analogs': self.global_min_analogs,
+            'valid_range': (-1e6, 1e6),
+            'quality_weight': 1.0,
+            'outlier_threshold': 3.0,
+            'canonical_units': 'unknown',
+            'display_units': 'unknown',
+            'conversion_factor': 1.0
+        }
+    
+    def get_thresholds(self, variable_names: List[str]) -> VariableQualityThresholds:
+        """Threshold vectors for the given column order (cached per order).
         
         Args:
-            variable_name: Name of the variable to assess
-            analog_data: Array of analog values for this variable
-            analog_indices: Indices of the analogs used
+            variable_names: Variable name of each outcome matrix column
             
         Returns:
-            VariableQualityMetrics with comprehensive quality assessment
+            VariableQualityThresholds aligned with variable_names
         """
-        if variable_name not in self.VARIABLE_DEFINITIONS:
-            logger.warning(f"Unknown variable {variable_name}, using default settings")
-            var_def = {
-                'min_analogs': self.global_min_analogs,
-                'valid_range': (-1e6, 1e6),
-                'quality_weight': 1.0,
-                'outlier_threshold': 3.0,
-                'canonical_units': 'unknown',
-                'display_units': 'unknown',
-                'conversion_factor': 1.0
-            }
-        else:
-            var_def = self.VARIABLE_DEFINITIONS[variable_name]
-        
-        total_analogs = len(analog_data)
-        min_threshold = var_def['min_analogs']
-        
-        # Validity checks
-        valid_mask = np.isfinite(analog_data)
-        
-        # Range validation
-        if 'valid_range' in var_def:
-            valid_range = var_def['valid_range']
-            valid_mask &= (analog_data >= valid_range[0]) & (analog_data <= valid_range[1])
+        key = tuple(variable_names)
+        thresholds = self._threshold_cache.get(key)
+        if thresholds is None:
+            definitions = [self._variable_definition(name) for name in key]
+            ranges = np.array([d.get('valid_range', (-np.inf, np.inf)) for d in definitions],
+                              dtype=np.float64).reshape(len(key), 2)
+            thresholds = VariableQualityThresholds(
+                variable_names=key,
+                range_min=ranges[:, 0],
+                range_max=ranges[:, 1],
+                min_analogs=np.array([d['min_analogs'] for d in definitions], dtype=np.int64),
+                outlier_threshold=np.array([d['outlier_threshold'] for d in definitions], dtype=np.float64),
+                quality_weight=np.array([d['quality_weight'] for d in definitions], dtype=np.float64)
+            )
+            self._threshold_cache[key] = thresholds
+        return thresholds
+    
+    def assess_quality_matrix(self, analog_outcomes: np.ndarray,
+                              thresholds: Optional[VariableQualityThresholds] = None) -> VariableQualityMatrix:
+        """Assess all variables of an analog outcome matrix in one vectorized pass.
         
-        valid_analogs = np.sum(valid_mask)
-        validity_ratio = valid_analogs / total_analogs if total_analogs > 0 else 0
+        Same metrics as assess_variable_quality, computed column-wise over the
+        whole matrix instead of once per variable slice.
         
-        # Outlier detection
-        if valid_analogs > 3:
-            valid_data = analog_data[valid_mask]
-            mean_val = np.mean(valid_data)
-            std_val = np.std(valid_data)
-            outlier_threshold = var_def['outlier_threshold']
+        Args:
+            analog_outcomes: Array of shape (n_analogs, n_variables), or
+                (batch, n_analogs, n_variables) for multi-query requests
+            thresholds: Threshold vectors per column (defaults to the canonical
+                variable order)
             
-            z_scores = np.abs((valid_data - mean_val) / (std_val + 1e-8))
-            outliers = z_scores > outlier_threshold
-            outlier_count = np.sum(outliers)
-            has_outliers = outlier_count > 0
-        else:
-            outlier_count = 0
-            has_outliers = False
-        
-        # Range violations
-        range_violation_count = total_analogs - valid_analogs
-        
-        # Temporal consistency (simplified - based on variance)
-        if valid_analogs > 5:
-            valid_data = analog_data[valid_mask]
-            coefficient_of_variation = np.std(valid_data) / (np.abs(np.mean(valid_data)) + 1e-8)
-            temporal_consistency_score = max(0, 1.0 - coefficient_of_variation)
-        else:
-            temporal_consistency_score = 0.0
+        Returns:
+            VariableQualityMatrix with (n_variables,) or (batch, n_variables) arrays
+        """
+        data = np.asarray(analog_outcomes, dtype=np.float64)
+        if data.ndim not in (2, 3):
+            raise ValueError(f"analog_outcomes must be 2-D or 3-D, got shape {data.shape}")
+        if thresholds is None:
+            thresholds = self.get_thresholds(list(self.VARIABLE_DEFINITIONS.keys())[:data.shape[-1]])
+        if len(thresholds.variable_names) != data.shape[-1]:
+            raise ValueError(f"{len(thresholds.variable_names)} thresholds for {data.shape[-1]} variables")
+        
+        total_analogs = data.shape[-2]
+        min_threshold = thresholds.min_analogs
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Validity and range checks
+            valid_mask = np.isfinite(data) & (data >= thresholds.range_min) & (data <= thresholds.range_max)
+            valid_analogs = valid_mask.sum(axis=-2)
+            validity_ratio = valid_analogs / total_analogs if total_analogs > 0 else np.zeros(valid_analogs.shape)
+            
+            # Masked mean/std over the analog axis
+            masked = np.where(valid_mask, data, 0.0)
+            mean_val = masked.sum(axis=-2) / valid_analogs
+            deviation = np.where(valid_mask, data - np.expand_dims(mean_val, -2), 0.0)
+            std_val = np.sqrt(np.square(deviation).sum(axis=-2) / valid_analogs)
+            
+            # Outlier detection
+            z_scores = np.abs(deviation) / np.expand_dims(std_val + 1e-8, -2)
+            outlier_count = np.where(valid_analogs > 3,
+                                     (valid_mask & (z_scores > thresholds.outlier_threshold)).sum(axis=-2), 0)
+            
+            # Temporal consistency (simplified - based on variance)
+            temporal_consistency_score = np.where(
+                valid_analogs > 5, np.maximum(0.0, 1.0 - std_val / (np.abs(mean_val) + 1e-8)), 0.0)
         
         # Overall quality score
-        quality_components = [
-            validity_ratio,
-            max(0, 1.0 - outlier_count / max(1, valid_analogs)),
-            temporal_consistency_score,
-            min(1.0, valid_analogs / min_threshold)
-        ]
-        quality_score = np.mean(quality_components)
-        
-        # Determine status
-        if valid_analogs >= min_threshold and quality_score >= self.quality_score_threshold:
-            status = VariableStatus.AVAILABLE
-        elif valid_analogs >= self.global_min_analogs:
-            status = VariableStatus.DEGRADED
-        elif valid_analogs > 0:
-            status = VariableStatus.INSUFFICIENT
-        else:
-            status = VariableStatus.UNAVAILABLE
-        
-        return VariableQualityMetrics(
-            variable_name=variable_name,
+        quality_score = (validity_ratio
+                         + np.maximum(0.0, 1.0 - outlier_count / np.maximum(1, valid_analogs))
+                         + temporal_consistency_score
+                         + np.minimum(1.0, valid_analogs / min_threshold)) / 4.0
+        
+        # Status codes, in STATUS_BY_CODE order
+        status_code = np.select(
+            [(valid_analogs >= min_threshold) & (quality_score >= self.quality_score_threshold),
+             valid_analogs >= self.global_min_analogs,
+             valid_analogs > 0],
+            [0, 1, 2], default=3)
+        
+        return VariableQualityMatrix(
+            variable_names=thresholds.variable_names,
             total_analogs=total_analogs,
             valid_analogs=valid_analogs,
             validity_ratio=validity_ratio,
-            min_analogs_threshold=min_threshold,
-            status=status,
-            quality_score=quality_score,
-            has_outliers=has_outliers,
             outlier_count=outlier_count,
-            range_violation_count=range_violation_count,
+            range_violation_count=total_analogs - valid_analogs,
             temporal_consistency_score=temporal_consistency_score,
-            canonical_units=var_def['canonical_units'],
-            display_units=var_def['display_units'],
-            conversion_factor=var_def['conversion_factor']
+            quality_score=quality_score,
+            status_code=status_code
         )
     
+    def _metrics_from_matrix(self, matrix: VariableQualityMatrix,
+                             query: Optional[int] = None) -> Dict[str, VariableQualityMetrics]:
+        """Per-variable metrics objects for one query of a quality matrix."""
+        def row(values):
+            return values if query is None else values[query]
+        
+        valid_analogs, outlier_count = row(matrix.valid_analogs), row(matrix.outlier_count)
+        validity_ratio, quality_score = row(matrix.validity_ratio), row(matrix.quality_score)
+        consistency, status_code = row(matrix.temporal_consistency_score), row(matrix.status_code)
+        
+        variable_metrics = {}
+        for i, var_name in enumerate(matrix.variable_names):
+            var_def = self._variable_definition(var_name)
+            variable_metrics[var_name] = VariableQualityMetrics(
+                variable_name=var_name,
+                total_analogs=matrix.total_analogs,
+                valid_analogs=int(valid_analogs[i]),
+                validity_ratio=float(validity_ratio[i]),
+                min_analogs_threshold=var_def['min_analogs'],
+                status=STATUS_BY_CODE[status_code[i]],
+                quality_score=float(quality_score[i]),
+                has_outliers=bool(outlier_count[i] > 0),
+                outlier_count=int(outlier_count[i]),
+                range_violation_count=matrix.total_analogs - int(valid_analogs[i]),
+                temporal_consistency_score=float(consistency[i]),
+                canonical_units=var_def['canonical_units'],
+                display_units=var_def['display_units'],
+                conversion_factor=var_def['conversion_factor']
+            )
+        return variable_metrics
+    
+    def assess_variable_quality(self, variable_name: str, analog_data: np.ndarray,
+                              analog_indices: np.ndarray) -> VariableQualityMetrics:
+        """Assess quality metrics for a single variable.
+        
+        Args:
+            variable_name: Name of the variable to assess
+            analog_data: Array of analog values for this variable
+            analog_indices: Indices of the analogs used
+            
+        Returns:
+            VariableQualityMetrics with comprehensive quality assessment
+        """
+        matrix = self.assess_quality_matrix(np.asarray(analog_data).reshape(-1, 1),
+                                            self.get_thresholds([variable_name]))
+        return self._metrics_from_matrix(matrix)[variable_name]
+    
     def assess_horizon_quality(self, horizon: int, analog_outcomes: np.ndarray,
                              analog_indices: np.ndarray, baseline_confidence: float = 1.0) -> HorizonQualityAssessment:
         """Assess quality for all variables at a specific horizon.
@@ -320,15 +413,29 @@ class VariableQualityMonitor:
         Returns:
             HorizonQualityAssessment with comprehensive horizon analysis
         """
-        variable_names = list(self.VARIABLE_DEFINITIONS.keys())[:analog_outcomes.shape[1]]
-        variable_metrics = {}
+        matrix = self.assess_quality_matrix(analog_outcomes)
+        return self._horizon_assessment(horizon, self._metrics_from_matrix(matrix), baseline_confidence)
+    
+    def assess_horizon_quality_batch(self, horizon: int, analog_outcomes: np.ndarray,
+                                     baseline_confidence: float = 1.0) -> List[HorizonQualityAssessment]:
+        """Assess a batch of queries at one horizon with a single matrix pass.
         
-        # Assess each variable
-        for i, var_name in enumerate(variable_names):
-            if i < analog_outcomes.shape[1]:
-                var_data = analog_outcomes[:, i]
-                metrics = self.assess_variable_quality(var_name, var_data, analog_indices)
-                variable_metrics[var_name] = metrics
+        Args:
+            horizon: Forecast horizon in hours
+            analog_outcomes: Array of shape (batch, n_analogs, n_variables)
+            baseline_confidence: Baseline confidence level
+            
+        Returns:
+            One HorizonQualityAssessment per query
+        """
+        matrix = self.assess_quality_matrix(analog_outcomes)
+        return [self._horizon_assessment(horizon, self._metrics_from_matrix(matrix, query), baseline_confidence)
+                for query in range(matrix.quality_score.shape[0])]
+    
+    def _horizon_assessment(self, horizon: int, variable_metrics: Dict[str, VariableQualityMetrics],
+                            baseline_confidence: float) -> HorizonQualityAssessment:
+        """Aggregate per-variable metrics into a horizon-level assessment."""
+        variable_names = list(variable_metrics)
         
         # Categorize variables by status
         available_variables = [name for name, metrics in variable_metrics.items() 
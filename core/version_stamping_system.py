@@ -35,6 +35,11 @@ from enum import Enum
 import numpy as np
 import pandas as pd
 
+try:
+    from core.artifact_digests import get_artifact_digests
+except ImportError:
+    from artifact_digests import get_artifact_digests
+
 logger = logging.getLogger(__name__)
 
 class VersionType(Enum):
@@ -205,19 +210,12 @@ class VersionStampingSystem:
         Returns:
             Tuple of (checksum, file_size_bytes)
         """
-        sha256_hash = hashlib.sha256()
-        file_size = 0
-        
         try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(8192), b""):
-                    sha256_hash.update(chunk)
-                    file_size += len(chunk)
+            file_size = file_path.stat().st_size
+            return get_artifact_digests().digest(file_path), file_size
         except Exception as e:
             logger.error(f"❌ Failed to calculate checksum for {file_path}: {e}")
             return "error", 0
-        
-        return sha256_hash.hexdigest(), file_size
     
     def stamp_model_version(self, model_path: Path, horizon: int, 
                           semantic_version: str = "1.0.0") -> VersionStamp:
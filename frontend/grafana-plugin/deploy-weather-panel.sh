@@ -154,11 +154,11 @@ setup_prometheus_exporter() {
     log_info "Setting up Prometheus weather exporter..."
     
     # Install Python dependencies
-    pip3 install prometheus_client psycopg2-binary numpy || {
+    pip3 install prometheus_client asyncpg numpy || {
         log_warning "Failed to install Python dependencies via pip3"
         log_info "Attempting to install via apt..."
         apt-get update
-        apt-get install -y python3-prometheus-client python3-psycopg2 python3-numpy
+        apt-get install -y python3-prometheus-client python3-asyncpg python3-numpy
     }
     
     # Copy exporter and config
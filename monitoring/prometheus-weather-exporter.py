@@ -9,11 +9,11 @@ import json
 import logging
 import asyncio
 import sqlite3
-import psycopg2
+import asyncpg
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, astuple
 from prometheus_client import start_http_server, Gauge, Histogram, Counter, Info
 
 # Configure logging
@@ -130,12 +130,53 @@ class AnalogPattern:
     reference_date: datetime
     confidence: float
 
+# Column layouts for bulk-decoded result sets. Order matches both the SELECT
+# lists below and the field order of the corresponding dataclasses.
+OBSERVATION_COLUMNS = {
+    "timestamp": object,
+    "location": object,
+    "variable": object,
+    "value": np.float64,
+    "quality": np.float64,
+    "station_id": object,
+}
+
+FORECAST_COLUMNS = {
+    "timestamp": object,
+    "valid_time": object,
+    "location": object,
+    "variable": object,
+    "value": np.float64,
+    "horizon_hours": np.int64,
+    "model": object,
+}
+
+ANALOG_PATTERN_COLUMNS = {
+    "pattern_id": object,
+    "location": object,
+    "horizon_hours": np.int64,
+    "similarity_score": np.float64,
+    "reference_date": object,
+    "confidence": np.float64,
+}
+
+def rows_to_columns(rows: Sequence[Sequence[Any]], columns: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Decode a result set into one array per column with a single transpose"""
+    if not rows:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in columns.items()}
+    
+    transposed = zip(*rows)
+    return {
+        name: np.asarray(values, dtype=dtype)
+        for (name, dtype), values in zip(columns.items(), transposed)
+    }
+
 class WeatherExporter:
     """Main weather data exporter for Prometheus metrics"""
     
     def __init__(self, config_path: str = "weather_exporter_config.json"):
         self.config = self._load_config(config_path)
-        self.timescaledb_conn = None
+        self.timescaledb_pool: Optional[asyncpg.Pool] = None
         self.prometheus_conn = None
         
     def _load_config(self, config_path: str) -> dict:
@@ -171,17 +212,23 @@ class WeatherExporter:
         }
     
     async def initialize_connections(self):
-        """Initialize database connections"""
+        """Initialize database connection pool"""
+        performance = self.config.get("performance", {})
+        max_concurrent = int(performance.get("max_concurrent_queries", 5))
+        
         try:
-            # TimescaleDB connection
-            self.timescaledb_conn = psycopg2.connect(
+            # TimescaleDB pool - scrape queries run concurrently on separate connections
+            self.timescaledb_pool = await asyncpg.create_pool(
                 host=self.config["timescaledb"]["host"],
                 port=self.config["timescaledb"]["port"],
                 database=self.config["timescaledb"]["database"],
                 user=self.config["timescaledb"]["user"],
-                password=self.config["timescaledb"]["password"]
+                password=self.config["timescaledb"]["password"],
+                min_size=1,
+                max_size=max_concurrent,
+                command_timeout=float(performance.get("query_timeout_seconds", 30))
             )
-            logger.info("Connected to TimescaleDB")
+            logger.info(f"Connected to TimescaleDB (pool size {max_concurrent})")
             
         except Exception as e:
             logger.error(f"Failed to connect to TimescaleDB: {e}")
@@ -191,19 +238,27 @@ class WeatherExporter:
     async def export_weather_observations(self):
         """Export current weather observations"""
         try:
-            if self.timescaledb_conn:
+            if self.timescaledb_pool:
                 observations = await self._fetch_observations_from_db()
             else:
-                observations = self._generate_mock_observations()
+                observations = rows_to_columns(
+                    [astuple(obs) for obs in self._generate_mock_observations()],
+                    OBSERVATION_COLUMNS
+                )
             
-            for obs in observations:
+            for location, variable, station_id, value in zip(
+                observations["location"],
+                observations["variable"],
+                observations["station_id"],
+                observations["value"].tolist()
+            ):
                 weather_observation.labels(
-                    location=obs.location,
-                    variable=obs.variable,
-                    station_id=obs.station_id
-                ).set(obs.value)
+                    location=location,
+                    variable=variable,
+                    station_id=station_id
+                ).set(value)
                 
-            logger.info(f"Exported {len(observations)} observations")
+            logger.info(f"Exported {len(observations['value'])} observations")
             
         except Exception as e:
             logger.error(f"Error exporting observations: {e}")
@@ -211,27 +266,37 @@ class WeatherExporter:
     async def export_weather_forecasts(self):
         """Export weather forecasts for all horizons"""
         try:
-            if self.timescaledb_conn:
+            if self.timescaledb_pool:
                 forecasts = await self._fetch_forecasts_from_db()
             else:
-                forecasts = self._generate_mock_forecasts()
+                forecasts = rows_to_columns(
+                    [astuple(forecast) for forecast in self._generate_mock_forecasts()],
+                    FORECAST_COLUMNS
+                )
             
-            for forecast in forecasts:
+            locations = forecasts["location"]
+            variables = forecasts["variable"]
+            horizons = forecasts["horizon_hours"].tolist()
+            values = forecasts["value"].tolist()
+            
+            for location, variable, horizon, model, value in zip(
+                locations, variables, horizons, forecasts["model"], values
+            ):
                 weather_forecast.labels(
-                    location=forecast.location,
-                    variable=forecast.variable,
-                    horizon=f"{forecast.horizon_hours}h",
-                    model=forecast.model
-                ).set(forecast.value)
-                
-                # Update CAPE distribution
-                if forecast.variable == "cape":
-                    cape_distribution_values.labels(
-                        location=forecast.location,
-                        horizon=f"{forecast.horizon_hours}h"
-                    ).observe(forecast.value)
+                    location=location,
+                    variable=variable,
+                    horizon=f"{horizon}h",
+                    model=model
+                ).set(value)
+            
+            # Update CAPE distribution
+            for idx in np.flatnonzero(variables == "cape"):
+                cape_distribution_values.labels(
+                    location=locations[idx],
+                    horizon=f"{horizons[idx]}h"
+                ).observe(values[idx])
             
-            logger.info(f"Exported {len(forecasts)} forecasts")
+            logger.info(f"Exported {len(values)} forecasts")
             
         except Exception as e:
             logger.error(f"Error exporting forecasts: {e}")
@@ -241,19 +306,27 @@ class WeatherExporter:
         try:
             analog_processing_requests_total.inc()
             
-            if self.timescaledb_conn:
+            if self.timescaledb_pool:
                 patterns = await self._fetch_analog_patterns_from_db()
             else:
-                patterns = self._generate_mock_analog_patterns()
+                patterns = rows_to_columns(
+                    [astuple(pattern) for pattern in self._generate_mock_analog_patterns()],
+                    ANALOG_PATTERN_COLUMNS
+                )
             
-            for pattern in patterns:
+            for location, horizon, pattern_id, score in zip(
+                patterns["location"],
+                patterns["horizon_hours"].tolist(),
+                patterns["pattern_id"],
+                patterns["similarity_score"].tolist()
+            ):
                 analog_similarity_score.labels(
-                    location=pattern.location,
-                    horizon=f"{pattern.horizon_hours}h",
-                    pattern_id=pattern.pattern_id
-                ).set(pattern.similarity_score)
+                    location=location,
+                    horizon=f"{horizon}h",
+                    pattern_id=pattern_id
+                ).set(score)
             
-            logger.info(f"Exported {len(patterns)} analog patterns")
+            logger.info(f"Exported {len(patterns['pattern_id'])} analog patterns")
             
         except Exception as e:
             logger.error(f"Error exporting analog patterns: {e}")
@@ -263,11 +336,15 @@ class WeatherExporter:
         """Export ensemble spread and uncertainty metrics"""
         try:
             for location in [self.config["location"]]:
+                spreads = {}
+                if self.timescaledb_pool:
+                    spreads = await self._calculate_ensemble_spreads(location)
+                
                 for variable in self.config["variables"]:
                     for horizon in self.config["horizons"]:
                         # Calculate ensemble spread
-                        if self.timescaledb_conn:
-                            spread = await self._calculate_ensemble_spread(location, variable, horizon)
+                        if self.timescaledb_pool:
+                            spread = spreads.get((variable, horizon), 0.0)
                         else:
                             spread = np.random.uniform(0.1, 0.5)  # Mock data
                         
@@ -286,10 +363,14 @@ class WeatherExporter:
         """Export forecast accuracy and verification metrics"""
         try:
             for location in [self.config["location"]]:
+                accuracies = {}
+                if self.timescaledb_pool:
+                    accuracies = await self._calculate_forecast_accuracies(location)
+                
                 for variable in self.config["variables"]:
                     for horizon in self.config["horizons"]:
-                        if self.timescaledb_conn:
-                            accuracy = await self._calculate_forecast_accuracy(location, variable, horizon)
+                        if self.timescaledb_pool:
+                            accuracy = accuracies.get((variable, horizon), 0.5)
                         else:
                             # Mock accuracy that decreases with horizon
                             base_accuracy = 0.9
@@ -401,145 +482,129 @@ class WeatherExporter:
         
         return sorted(patterns, key=lambda p: p.similarity_score, reverse=True)
     
-    async def _fetch_observations_from_db(self) -> List[WeatherObservation]:
-        """Fetch observations from TimescaleDB"""
+    async def _fetch_columns(self, query: str, columns: Dict[str, Any], *args) -> Dict[str, np.ndarray]:
+        """Run a query on a pooled connection and decode the rows column-wise"""
         with timescaledb_query_duration_seconds.time():
-            cursor = self.timescaledb_conn.cursor()
-            
-            query = """
-                SELECT time, location, variable, value, quality, station_id
-                FROM weather_observations 
-                WHERE time >= NOW() - INTERVAL '1 hour'
-                ORDER BY time DESC
-                LIMIT 1000
-            """
-            
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            
-            observations = []
-            for row in rows:
-                observations.append(WeatherObservation(
-                    timestamp=row[0],
-                    location=row[1],
-                    variable=row[2],
-                    value=float(row[3]),
-                    quality=float(row[4]),
-                    station_id=row[5]
-                ))
-            
-            return observations
+            async with self.timescaledb_pool.acquire() as conn:
+                rows = await conn.fetch(query, *args)
+        
+        return rows_to_columns(rows, columns)
     
-    async def _fetch_forecasts_from_db(self) -> List[WeatherForecast]:
+    async def _fetch_observations_from_db(self) -> Dict[str, np.ndarray]:
+        """Fetch observations from TimescaleDB"""
+        query = """
+            SELECT time, location, variable, value, quality, station_id
+            FROM weather_observations 
+            WHERE time >= NOW() - INTERVAL '1 hour'
+            ORDER BY time DESC
+            LIMIT 1000
+        """
+        
+        return await self._fetch_columns(query, OBSERVATION_COLUMNS)
+    
+    async def _fetch_forecasts_from_db(self) -> Dict[str, np.ndarray]:
         """Fetch forecasts from TimescaleDB"""
-        with timescaledb_query_duration_seconds.time():
-            cursor = self.timescaledb_conn.cursor()
-            
-            query = """
-                SELECT forecast_time, valid_time, location, variable, 
-                       value, horizon_hours, model
-                FROM weather_forecasts 
-                WHERE forecast_time >= NOW() - INTERVAL '6 hours'
-                AND valid_time >= NOW()
-                ORDER BY forecast_time DESC
-            """
-            
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            
-            forecasts = []
-            for row in rows:
-                forecasts.append(WeatherForecast(
-                    timestamp=row[0],
-                    valid_time=row[1],
-                    location=row[2],
-                    variable=row[3],
-                    value=float(row[4]),
-                    horizon_hours=int(row[5]),
-                    model=row[6]
-                ))
-            
-            return forecasts
+        query = """
+            SELECT forecast_time, valid_time, location, variable, 
+                   value, horizon_hours, model
+            FROM weather_forecasts 
+            WHERE forecast_time >= NOW() - INTERVAL '6 hours'
+            AND valid_time >= NOW()
+            ORDER BY forecast_time DESC
+        """
+        
+        return await self._fetch_columns(query, FORECAST_COLUMNS)
     
-    async def _fetch_analog_patterns_from_db(self) -> List[AnalogPattern]:
+    async def _fetch_analog_patterns_from_db(self) -> Dict[str, np.ndarray]:
         """Fetch analog patterns from TimescaleDB"""
-        with timescaledb_query_duration_seconds.time():
-            cursor = self.timescaledb_conn.cursor()
-            
-            query = """
-                SELECT pattern_id, location, horizon_hours, similarity_score,
-                       reference_date, confidence
-                FROM analog_patterns 
-                WHERE created_at >= NOW() - INTERVAL '1 hour'
-                AND similarity_score >= %s
-                ORDER BY similarity_score DESC
-                LIMIT %s
-            """
-            
-            cursor.execute(query, (
-                self.config["analog_processing"]["similarity_threshold"],
-                self.config["analog_processing"]["max_patterns"]
-            ))
-            rows = cursor.fetchall()
-            
-            patterns = []
-            for row in rows:
-                patterns.append(AnalogPattern(
-                    pattern_id=row[0],
-                    location=row[1], 
-                    horizon_hours=int(row[2]),
-                    similarity_score=float(row[3]),
-                    reference_date=row[4],
-                    confidence=float(row[5])
-                ))
-            
-            return patterns
-    
-    async def _calculate_ensemble_spread(self, location: str, variable: str, horizon: int) -> float:
-        """Calculate ensemble spread for uncertainty quantification"""
-        cursor = self.timescaledb_conn.cursor()
+        query = """
+            SELECT pattern_id, location, horizon_hours, similarity_score,
+                   reference_date, confidence
+            FROM analog_patterns 
+            WHERE created_at >= NOW() - INTERVAL '1 hour'
+            AND similarity_score >= $1
+            ORDER BY similarity_score DESC
+            LIMIT $2
+        """
         
+        return await self._fetch_columns(
+            query,
+            ANALOG_PATTERN_COLUMNS,
+            float(self.config["analog_processing"]["similarity_threshold"]),
+            int(self.config["analog_processing"]["max_patterns"])
+        )
+    
+    async def _calculate_ensemble_spreads(self, location: str) -> Dict[Tuple[str, int], float]:
+        """Calculate ensemble spread for every (variable, horizon) in one grouped query"""
         query = """
-            SELECT STDDEV(value) as spread
+            SELECT variable, horizon_hours, STDDEV(value) as spread
             FROM weather_forecasts 
-            WHERE location = %s AND variable = %s 
-            AND horizon_hours = %s
+            WHERE location = $1 AND variable = ANY($2::text[])
+            AND horizon_hours = ANY($3::int[])
             AND forecast_time >= NOW() - INTERVAL '1 hour'
+            GROUP BY variable, horizon_hours
         """
         
-        cursor.execute(query, (location, variable, horizon))
-        result = cursor.fetchone()
+        columns = await self._fetch_columns(
+            query,
+            {"variable": object, "horizon_hours": np.int64, "spread": np.float64},
+            location,
+            list(self.config["variables"]),
+            [int(h) for h in self.config["horizons"]]
+        )
         
-        return float(result[0]) if result and result[0] else 0.0
+        # STDDEV is NULL for single-member groups; those decode to NaN
+        spreads = np.nan_to_num(columns["spread"], nan=0.0)
+        return {
+            (variable, horizon): spread
+            for variable, horizon, spread in zip(
+                columns["variable"], columns["horizon_hours"].tolist(), spreads.tolist()
+            )
+        }
     
-    async def _calculate_forecast_accuracy(self, location: str, variable: str, horizon: int) -> float:
-        """Calculate forecast accuracy from verification data"""
-        cursor = self.timescaledb_conn.cursor()
-        
+    async def _calculate_forecast_accuracies(self, location: str) -> Dict[Tuple[str, int], float]:
+        """Calculate forecast accuracy for every (variable, horizon) in one grouped query"""
         query = """
-            SELECT AVG(1.0 - ABS(forecast_value - observed_value) / 
+            SELECT variable, horizon_hours,
+                   AVG(1.0 - ABS(forecast_value - observed_value) / 
                        NULLIF(observed_value, 0)) as accuracy
             FROM forecast_verification 
-            WHERE location = %s AND variable = %s 
-            AND horizon_hours = %s
+            WHERE location = $1 AND variable = ANY($2::text[])
+            AND horizon_hours = ANY($3::int[])
             AND forecast_time >= NOW() - INTERVAL '24 hours'
+            GROUP BY variable, horizon_hours
         """
         
-        cursor.execute(query, (location, variable, horizon))
-        result = cursor.fetchone()
+        columns = await self._fetch_columns(
+            query,
+            {"variable": object, "horizon_hours": np.int64, "accuracy": np.float64},
+            location,
+            list(self.config["variables"]),
+            [int(h) for h in self.config["horizons"]]
+        )
         
-        return max(0.0, min(1.0, float(result[0]))) if result and result[0] else 0.5
+        accuracies = np.clip(np.nan_to_num(columns["accuracy"], nan=0.5), 0.0, 1.0)
+        return {
+            (variable, horizon): accuracy
+            for variable, horizon, accuracy in zip(
+                columns["variable"], columns["horizon_hours"].tolist(), accuracies.tolist()
+            )
+        }
     
     async def run_export_cycle(self):
         """Run one complete export cycle"""
         logger.info("Starting export cycle")
         
         try:
-            await self.export_weather_observations()
-            await self.export_weather_forecasts() 
-            await self.export_analog_patterns()
-            await self.export_uncertainty_metrics()
-            await self.export_forecast_verification()
+            # Each exporter checks out its own pooled connection, so the
+            # queries run concurrently instead of serialising the scrape.
+            await asyncio.gather(
+                self.export_weather_observations(),
+                self.export_weather_forecasts(),
+                self.export_analog_patterns(),
+                self.export_uncertainty_metrics(),
+                self.export_forecast_verification()
+            )
             
             logger.info("Export cycle completed successfully")
             
@@ -565,8 +630,8 @@ class WeatherExporter:
                 await asyncio.sleep(self.config["update_interval"])
         
         # Cleanup
-        if self.timescaledb_conn:
-            self.timescaledb_conn.close()
+        if self.timescaledb_pool:
+            await self.timescaledb_pool.close()
             logger.info("Closed database connections")
 
 def main():
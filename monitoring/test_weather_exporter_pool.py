@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled TimescaleDB access path of the Prometheus weather exporter.
+
+The exporter module is loaded by path (its filename is not importable) and
+exercised against an in-process fake asyncpg pool, so no database is needed.
+"""
+
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+EXPORTER_PATH = Path(__file__).parent / "prometheus-weather-exporter.py"
+
+spec = importlib.util.spec_from_file_location("prometheus_weather_exporter", EXPORTER_PATH)
+exporter_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(exporter_module)
+
+
+class FakeConnection:
+    """Connection that answers queries by table name after a short delay."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetch(self, query, *args):
+        self.pool.active += 1
+        self.pool.max_active = max(self.pool.max_active, self.pool.active)
+        try:
+            await asyncio.sleep(0.05)
+            for marker, rows in self.pool.responses.items():
+                if marker in query:
+                    return rows
+            return []
+        finally:
+            self.pool.active -= 1
+
+
+class FakePool:
+    def __init__(self, responses):
+        self.responses = responses
+        self.active = 0
+        self.max_active = 0
+        self.closed = False
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+    async def close(self):
+        self.closed = True
+
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+RESPONSES = {
+    "FROM weather_observations": [
+        (NOW, "adelaide", "temperature", 21.5, 0.95, "adelaide_airport"),
+        (NOW, "adelaide", "pressure", 1012.0, 0.9, "adelaide_airport"),
+    ],
+    "FROM analog_patterns": [
+        ("pattern_6h_001", "adelaide", 6, 0.91, NOW, 0.8),
+    ],
+    "STDDEV(value)": [
+        ("temperature", 6, 1.25),
+        ("pressure", 6, None),
+    ],
+    "FROM forecast_verification": [
+        ("temperature", 6, 1.4),
+    ],
+    "FROM weather_forecasts": [
+        (NOW, NOW, "adelaide", "cape", 1200.0, 6, "analog_ensemble"),
+        (NOW, NOW, "adelaide", "temperature", 24.0, 12, "gfs"),
+    ],
+}
+
+
+@pytest.fixture
+def exporter(tmp_path):
+    instance = exporter_module.WeatherExporter(str(tmp_path / "missing.json"))
+    instance.timescaledb_pool = FakePool(RESPONSES)
+    return instance
+
+
+def test_rows_to_columns_decodes_by_column():
+    columns = exporter_module.rows_to_columns(
+        RESPONSES["FROM weather_observations"], exporter_module.OBSERVATION_COLUMNS
+    )
+
+    assert columns["value"].dtype == np.float64
+    np.testing.assert_allclose(columns["value"], [21.5, 1012.0])
+    assert list(columns["variable"]) == ["temperature", "pressure"]
+
+
+def test_rows_to_columns_empty_result():
+    columns = exporter_module.rows_to_columns([], exporter_module.FORECAST_COLUMNS)
+
+    assert set(columns) == set(exporter_module.FORECAST_COLUMNS)
+    assert all(len(values) == 0 for values in columns.values())
+
+
+def test_export_cycle_runs_queries_concurrently(exporter):
+    asyncio.run(exporter.run_export_cycle())
+
+    assert exporter.timescaledb_pool.max_active > 1
+
+    observed = exporter_module.weather_observation.labels(
+        location="adelaide", variable="temperature", station_id="adelaide_airport"
+    )._value.get()
+    assert observed == 21.5
+
+    forecast = exporter_module.weather_forecast.labels(
+        location="adelaide", variable="temperature", horizon="12h", model="gfs"
+    )._value.get()
+    assert forecast == 24.0
+
+
+def test_grouped_spread_and_accuracy_lookups(exporter):
+    spreads = asyncio.run(exporter._calculate_ensemble_spreads("adelaide"))
+    accuracies = asyncio.run(exporter._calculate_forecast_accuracies("adelaide"))
+
+    assert spreads[("temperature", 6)] == 1.25
+    assert spreads[("pressure", 6)] == 0.0
+    assert accuracies[("temperature", 6)] == 1.0
@@ -36,6 +36,8 @@ import json
 # Add project root to path
 sys.path.append(str(Path(__file__).parent.parent))
 from core.model_loader import WeatherCNNEncoder as CNNEncoder
+from core.analog_diversity import TemporalDiversityFilter
+from core.shared_corpus import contiguous_rows, get_shared_corpus
 
 # Setup logging
 logging.basicConfig(
@@ -53,7 +55,8 @@ class AnalogEnsembleForecaster:
     
     def __init__(self, model_path: str, config_path: str, 
                  embeddings_dir: str, indices_dir: str,
-                 use_optimized_index: bool = True):
+                 use_optimized_index: bool = True,
+                 min_separation_hours: Optional[float] = None):
         """Initialize analog forecaster.
         
         Args:
@@ -62,19 +65,25 @@ class AnalogEnsembleForecaster:
             embeddings_dir: Directory containing precomputed embeddings
             indices_dir: Directory containing FAISS indices
             use_optimized_index: Use IVF-PQ (True) or FlatIP (False)
+            min_separation_hours: Minimum time between returned analogs
+                (default ANALOG_MIN_SEPARATION_HOURS, 0 disables)
         """
         self.embeddings_dir = Path(embeddings_dir)
         self.indices_dir = Path(indices_dir)
         self.use_optimized = use_optimized_index
         self.lead_times = [6, 12, 24, 48]
         
+        if min_separation_hours is None:
+            min_separation_hours = float(os.getenv('ANALOG_MIN_SEPARATION_HOURS', '0'))
+        self.temporal_filter = TemporalDiversityFilter(min_separation_hours)
+        
         # Load trained model
         logger.info(f"Loading CNN encoder from {model_path}")
         self.model = CNNEncoder()  # Use default parameters
         checkpoint = torch.load(model_path, map_location='cpu', weights_only=False)
         self.model.load_state_dict(checkpoint['model_state_dict'])
         self.model.eval()
-        torch.set_num_threads(4)  # Conservative for inference
+        torch.set_num_threads(min(4, torch.get_num_threads()))  # Conservative; never raise the compute executor's setting
         
         # Load normalization statistics
         if 'norm_stats' in checkpoint:
@@ -150,25 +159,34 @@ class AnalogEnsembleForecaster:
         index_suffix = "ivfpq" if self.use_optimized else "flatip"
         index_path = self.indices_dir / f"faiss_{horizon}h_{index_suffix}.faiss"
         
-        # Load FAISS index
-        if not index_path.exists():
-            raise FileNotFoundError(f"FAISS index not found: {index_path}")
-            
-        index = faiss.read_index(str(index_path))
+        # Attach to the shared corpus when one is published (no per-worker copy)
+        corpus = get_shared_corpus()
+        if corpus is not None and all(corpus.available(horizon, name) for name in
+                                      (f"index_{index_suffix}", "metadata", "embeddings")):
+            index = corpus.index(horizon, index_suffix)
+            metadata_df = corpus.metadata(horizon)
+            embeddings = corpus.embeddings(horizon)
+        else:
+            # Load FAISS index
+            if not index_path.exists():
+                raise FileNotFoundError(f"FAISS index not found: {index_path}")
+            index = faiss.read_index(str(index_path))
+            
+            # Load metadata
+            metadata_path = self.embeddings_dir / f"metadata_{horizon}h.parquet"
+            metadata_df = pd.read_parquet(metadata_path)
+            
+            # Load embeddings for verification
+            embeddings_path = self.embeddings_dir / f"embeddings_{horizon}h.npy"
+            embeddings = np.load(embeddings_path)
         self.indices[horizon] = index
         
-        # Load metadata
-        metadata_path = self.embeddings_dir / f"metadata_{horizon}h.parquet"
-        metadata_df = pd.read_parquet(metadata_path)
-        
         # Filter to training period (2010-2018) for analog search
-        train_mask = metadata_df['init_time'] < '2019-01-01'
-        self.metadata[horizon] = metadata_df[train_mask].reset_index(drop=True)
-        
-        # Load embeddings for verification
-        embeddings_path = self.embeddings_dir / f"embeddings_{horizon}h.npy"
-        embeddings = np.load(embeddings_path)
-        self.embeddings[horizon] = embeddings[train_mask]
+        train_mask = (metadata_df['init_time'] < '2019-01-01').to_numpy()
+        self.metadata[horizon] = contiguous_rows(metadata_df, train_mask)
+        if self.temporal_filter.enabled:
+            self.temporal_filter.set_metadata(horizon, self.metadata[horizon])
+        self.embeddings[horizon] = contiguous_rows(embeddings, train_mask)
         
         logger.info(f"✅ Loaded {horizon}h: {len(self.metadata[horizon])} training analogs")
         
@@ -362,14 +380,21 @@ class AnalogEnsembleForecaster:
             return embedding_np
             
     def _search_analogs(self, query_embedding: np.ndarray, horizon: int, k: int = 50) -> Tuple[np.ndarray, np.ndarray]:
-        """Search for k most similar analog patterns."""
+        """Search for k most similar analog patterns.
+        
+        With a minimum separation configured, over-fetches candidates in one
+        search and returns the k best that are that far apart in time.
+        """
         index = self.indices[horizon]
         
         # Set search parameters for IVF-PQ
-        if self.use_optimized:
+        if self.use_optimized and hasattr(index, 'nlist'):
             # Use higher nprobe for better recall during inference
             index.nprobe = min(64, index.nlist // 4)
             
+        if self.temporal_filter.enabled:
+            return self.temporal_filter.search(index, query_embedding, horizon, k)
+            
         # Perform similarity search
         similarities, analog_indices = index.search(query_embedding, k)
         
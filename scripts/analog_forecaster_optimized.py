@@ -43,6 +43,7 @@ from core.performance_optimizer import (
     MEMORY_POOL,
     PerformanceMetrics
 )
+from core.analog_parameters import get_analog_parameters, season_of
 
 # Setup optimized logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -68,6 +69,9 @@ class AnalogForecaster:
         self.total_forecasts = 0
         self.total_latency_ms = 0.0
         
+        # Fitted per-horizon kernel parameters (scripts/optimize_analog_parameters.py)
+        self.parameter_store = get_analog_parameters()
+        
         # Memory-mapped data caches
         self.outcomes_cache = {}      # horizon -> memory-mapped array
         self.metadata_cache = {}      # horizon -> DataFrame
@@ -193,9 +197,16 @@ class AnalogForecaster:
             # Use float64 for computation precision
             similarities_f64 = similarities.astype(np.float64)
             
-            # Temperature-scaled softmax for better weighting
-            temperature = 0.1  # Sharper weighting for better analogs
-            logits = similarities_f64 / temperature
+            fitted = self.parameter_store.get(
+                horizon, season_of((init_time + pd.Timedelta(hours=horizon)).month))
+            if fitted is not None:
+                # Fitted kernel on unit-norm distances: |a - b| = sqrt(2 - 2 <a, b>)
+                distances = np.sqrt(np.maximum(2.0 - 2.0 * similarities_f64, 0.0))
+                logits = -distances / fitted[0]
+            else:
+                # Temperature-scaled softmax for better weighting
+                temperature = 0.1  # Sharper weighting for better analogs
+                logits = similarities_f64 / temperature
             logits_stable = logits - np.max(logits)  # Numerical stability
             weights = np.exp(logits_stable)
             weights = weights / np.sum(weights)  # Normalize
@@ -279,7 +290,7 @@ class AnalogForecaster:
             return forecast_result
     
     def forecast(self, query_embedding: np.ndarray, 
-                lead_time_hours: int, k: int = 50,
+                lead_time_hours: int, k: Optional[int] = None,
                 return_analogs: bool = False,
                 init_time: Optional[pd.Timestamp] = None) -> Optional[Dict[str, Any]]:
         """
@@ -288,7 +299,8 @@ class AnalogForecaster:
         Args:
             query_embedding: Normalized embedding vector (float32)
             lead_time_hours: Forecast horizon (6, 12, 24, or 48)
-            k: Number of analogs to retrieve
+            k: Number of analogs to retrieve (default: the fitted k for the
+                horizon and season, else 50)
             return_analogs: Include analog details in response
             init_time: Initialization time for forecast
             
@@ -303,6 +315,11 @@ class AnalogForecaster:
         if init_time is None:
             init_time = pd.Timestamp.now(tz='UTC')
         
+        if k is None:
+            fitted = self.parameter_store.get(
+                lead_time_hours, season_of((init_time + pd.Timedelta(hours=lead_time_hours)).month))
+            k = fitted[1] if fitted is not None else 50
+        
         # Performance monitoring for entire forecast
         with PERFORMANCE_OPTIMIZER.performance_monitor("full_forecast") as metrics:
             
@@ -334,7 +351,7 @@ class AnalogForecaster:
             return forecast_result
     
     def batch_forecast(self, query_embeddings: np.ndarray,
-                      lead_time_hours: int, k: int = 50) -> List[Dict[str, Any]]:
+                      lead_time_hours: int, k: Optional[int] = None) -> List[Dict[str, Any]]:
         """Generate forecasts for multiple embeddings efficiently."""
         
         if query_embeddings.ndim != 2:
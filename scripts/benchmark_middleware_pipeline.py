@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Middleware Pipeline Micro-benchmark
+===================================
+
+Measures per-request middleware overhead of the legacy BaseHTTPMiddleware
+stack (GZip, Security, RequestLogging, SlowAPI, performance http middleware)
+against the single pure-ASGI RequestPipelineMiddleware.
+
+Both apps serve the same trivial JSON endpoint and are driven through the
+ASGI interface directly, so the numbers are middleware cost only (no sockets).
+
+Usage:
+    python scripts/benchmark_middleware_pipeline.py [--requests 5000] [--body-size 2048]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+import structlog
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response
+from slowapi import Limiter
+from slowapi.middleware import SlowAPIMiddleware
+from slowapi.util import get_remote_address
+
+from api.logging_config import RequestLoggingMiddleware
+from api.performance_middleware import PerformanceMiddleware
+from api.request_pipeline import RequestPipelineMiddleware
+from api.security_middleware import SecurityMiddleware
+
+
+def build_app(pipeline: bool, body: bytes) -> FastAPI:
+    app = FastAPI()
+    app.state.limiter = Limiter(key_func=get_remote_address)
+    performance = PerformanceMiddleware()
+
+    @app.get("/forecast")
+    async def forecast():
+        return Response(content=body, media_type="application/json")
+
+    if pipeline:
+        app.add_middleware(RequestPipelineMiddleware, performance=performance)
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=500)
+        app.add_middleware(SecurityMiddleware)
+        app.add_middleware(RequestLoggingMiddleware)
+        app.add_middleware(SlowAPIMiddleware)
+        app.middleware("http")(performance)
+    return app
+
+
+async def request_once(app: FastAPI) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/forecast", "raw_path": b"/forecast",
+        "query_string": b"horizon=24h&vars=t2m,u10", "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"accept-encoding", b"gzip"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("localhost", 80), "app": app,
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+async def benchmark(app: FastAPI, requests: int) -> list:
+    for _ in range(min(200, requests)):
+        await request_once(app)  # Warm up route caches and middleware stack
+    return [await request_once(app) for _ in range(requests)]
+
+
+def summarize(name: str, samples: list) -> dict:
+    samples_us = sorted(s * 1e6 for s in samples)
+    result = {
+        'mean': statistics.fmean(samples_us),
+        'p50': samples_us[len(samples_us) // 2],
+        'p99': samples_us[int(len(samples_us) * 0.99) - 1],
+    }
+    print(f"{name:<10} mean {result['mean']:8.1f}us  p50 {result['p50']:8.1f}us  p99 {result['p99']:8.1f}us")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API middleware overhead")
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--body-size', type=int, default=2048)
+    args = parser.parse_args()
+
+    # Benchmark middleware cost, not log formatting
+    logging.disable(logging.CRITICAL)
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    body = (b'{"t2m":{"value":21.5,"p05":19.0,"p95":24.0},' * (args.body_size // 44 + 1))[:args.body_size]
+    legacy = summarize("legacy", asyncio.run(benchmark(build_app(False, body), args.requests)))
+    pipeline = summarize("pipeline", asyncio.run(benchmark(build_app(True, body), args.requests)))
+    print(f"speedup    mean {legacy['mean'] / pipeline['mean']:.2f}x  p99 {legacy['p99'] / pipeline['p99']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
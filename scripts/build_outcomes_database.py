@@ -13,10 +13,17 @@ CAPE CALCULATION FIX: Now includes proper CAPE calculation from ERA5 data
 instead of hardcoded 0.0 values. Uses empirical approach suitable for
 limited vertical resolution (850 hPa and 500 hPa only).
 
+BULK EXTRACTION: All valid_times are resolved to integer time indices once and
+each variable is gathered for the Adelaide grid point in one vectorized read;
+derived fields are computed on whole columns and written straight into a
+memory-mapped outcomes array. extract_outcome_at_time remains as the per-row
+reference path.
+
 Usage:
     python build_outcomes_database.py [--horizon 24] [--debug]
 """
 
+import os
 import sys
 import argparse
 import time
@@ -29,7 +36,7 @@ import logging
 
 # Import CAPE calculator
 sys.path.append(str(Path(__file__).parent.parent))
-from cape_calculator import extract_cape_from_era5
+from cape_calculator import calculate_cape_simplified_array, extract_cape_from_era5
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -236,6 +243,99 @@ class OutcomesDatabaseBuilder:
             logger.warning(f"Failed to extract outcome for {valid_time}: {e}")
             return None
     
+    def _time_indices(self, dataset: xr.Dataset, valid_times: pd.DatetimeIndex) -> np.ndarray:
+        """Nearest time index per valid_time (-1 when none), as .sel would resolve it.
+
+        Prefers the valid_time dimension within 1 hour, falling back to a plain
+        nearest match on time, like extract_outcome_at_time.
+        """
+        if 'valid_time' in dataset.indexes:
+            return dataset.indexes['valid_time'].get_indexer(
+                valid_times, method='nearest', tolerance=pd.Timedelta(hours=1))
+        if 'time' in dataset.indexes:
+            return dataset.indexes['time'].get_indexer(valid_times, method='nearest')
+        return np.full(len(valid_times), -1)
+
+    def _gather_point_column(self, dataset: xr.Dataset, variable: str,
+                             time_indices: np.ndarray, level: Optional[int] = None) -> np.ndarray:
+        """Values of one variable at the Adelaide grid point for every time index.
+
+        Reads only the distinct time steps needed, in one orthogonal isel.
+        """
+        column = np.full(len(time_indices), np.nan, dtype=np.float64)
+        if variable not in dataset:
+            return column
+        found = time_indices >= 0
+        if not found.any():
+            return column
+
+        data = dataset[variable].sel(latitude=self.adelaide_lat, longitude=self.adelaide_lon, method='nearest')
+        if level is not None:
+            data = data.sel(isobaricInhPa=level, method='nearest')
+        time_dim = 'valid_time' if 'valid_time' in data.dims else 'time'
+        unique, inverse = np.unique(time_indices[found], return_inverse=True)
+        values = np.asarray(data.isel({time_dim: unique}).values, dtype=np.float64).reshape(-1)
+        column[found] = values[inverse]
+        return column
+
+    def extract_outcomes_bulk(self, valid_times) -> np.ndarray:
+        """Outcome vectors for many valid_times at once.
+
+        Vectorized equivalent of extract_outcome_at_time: same variables,
+        fallbacks and CAPE; rows with any missing variable are all-NaN.
+        """
+        valid_times = pd.DatetimeIndex(pd.to_datetime(valid_times))
+        outcomes = np.full((len(valid_times), len(self.variables)), np.nan, dtype=np.float64)
+        nan = np.full(len(valid_times), np.nan)
+
+        if self.pressure_ds is not None:
+            pressure_idx = self._time_indices(self.pressure_ds, valid_times)
+            pressure = lambda name, level: self._gather_point_column(self.pressure_ds, name, pressure_idx, level)
+            z500, t850, t500 = pressure('z', 500), pressure('t', 850), pressure('t', 500)
+            q850 = np.maximum(pressure('q', 850), 0.0)
+            u850, v850 = pressure('u', 850), pressure('v', 850)
+        else:
+            z500 = t850 = t500 = q850 = u850 = v850 = nan
+
+        if self.surface_ds is not None:
+            surface_idx = self._time_indices(self.surface_ds, valid_times)
+            surface = lambda name: self._gather_point_column(self.surface_ds, name, surface_idx)
+            t2m, u10, v10 = surface('t2m'), surface('u10'), surface('v10')
+        else:
+            t2m = u10 = v10 = nan
+
+        outcomes[:, 0] = z500 / 9.80665
+        outcomes[:, 1] = np.where(np.isnan(t2m), t850 + 9.75, t2m)  # Lapse-rate fallback
+        outcomes[:, 2] = t850
+        outcomes[:, 3] = q850
+        outcomes[:, 4] = np.where(np.isnan(u10), u850 * 0.8, u10)
+        outcomes[:, 5] = np.where(np.isnan(v10), v850 * 0.8, v10)
+        outcomes[:, 6] = u850
+        outcomes[:, 7] = v850
+        outcomes[:, 8] = self._cape_column(t850, q850, t500)
+
+        outcomes[np.isnan(outcomes).any(axis=1)] = np.nan
+        return outcomes.astype(np.float32)
+
+    @staticmethod
+    def _cape_column(t850: np.ndarray, q850: np.ndarray, t500: np.ndarray) -> np.ndarray:
+        """CAPE per row from 850/500 hPa columns; 0 where inputs are missing."""
+        available = np.isfinite(t850) & np.isfinite(q850) & np.isfinite(t500)
+        cape = np.where(available, calculate_cape_simplified_array(t850, q850, t500), 0.0)
+        return np.maximum(cape, 0.0)
+
+    def _log_suspicious_outcomes(self, outcomes: np.ndarray, valid_times: pd.Series):
+        """Aggregate version of the per-row sanity warnings."""
+        checks = {
+            't2m outside 200-330K': ~((outcomes[:, 1] >= 200) & (outcomes[:, 1] <= 330)),
+            't850 outside 200-320K': ~((outcomes[:, 2] >= 200) & (outcomes[:, 2] <= 320)),
+            'CAPE above 5000 J/kg': outcomes[:, 8] > 5000,
+        }
+        for label, flagged in checks.items():
+            if flagged.any():
+                first = pd.Timestamp(valid_times.iloc[int(np.argmax(flagged))])
+                logger.warning(f"Suspicious {label}: {int(flagged.sum())} outcomes (first at {first})")
+
     def validate_temporal_alignment(self, metadata: pd.DataFrame, horizon: int) -> bool:
         """Validate that metadata has correct temporal alignment for the horizon."""
         logger.info(f"🔍 Validating temporal alignment for {horizon}h horizon...")
@@ -289,65 +389,44 @@ class OutcomesDatabaseBuilder:
             logger.error(f"❌ Temporal alignment validation failed for {horizon}h - aborting")
             return False
         
-        # Initialize outcomes array
         n_patterns = len(metadata)
-        n_variables = len(self.variables)
-        outcomes = np.zeros((n_patterns, n_variables), dtype=np.float32)
         
-        # Extract outcomes for each pattern
+        # Extract all outcomes in one vectorized pass
         start_time = time.time()
-        extracted_count = 0
-        failed_count = 0
-        
-        for i, row in metadata.iterrows():
-            # CRITICAL FIX: Remove debug mode limitation that causes 99.4% corruption
-            # The previous code had 'if debug and i >= 100: break' which truncated
-            # 24h database extraction to only 100 records instead of all 14,336
-            
-            valid_time = row['valid_time']
-            
-            # Extract outcome at valid_time
-            outcome = self.extract_outcome_at_time(valid_time)
-            
-            if outcome is not None:
-                outcomes[i, :] = outcome
-                extracted_count += 1
-            else:
-                # Fill with NaN for failed extractions
-                outcomes[i, :] = np.nan
-                failed_count += 1
-            
-            # Progress logging
-            if (i + 1) % 1000 == 0 or i == n_patterns - 1:
-                elapsed = time.time() - start_time
-                rate = (i + 1) / elapsed
-                eta = (n_patterns - i - 1) / rate if rate > 0 else 0
-                logger.info(f"   Progress: {i+1:,}/{n_patterns:,} ({100*(i+1)/n_patterns:.1f}%) "
-                          f"- {rate:.1f} patterns/s - ETA: {eta:.0f}s")
-        
-        # Remove any NaN rows (failed extractions)
+        outcomes = self.extract_outcomes_bulk(metadata['valid_time'])
         valid_mask = ~np.isnan(outcomes).any(axis=1)
-        outcomes_clean = outcomes[valid_mask]
+        failed_count = int((~valid_mask).sum())
+        if failed_count:
+            missing = pd.to_datetime(metadata['valid_time'][~valid_mask])
+            logger.warning(f"Missing data for {failed_count} outcomes ({missing.min()} to {missing.max()}) - skipping")
         metadata_clean = metadata[valid_mask].reset_index(drop=True)
+        rows = np.flatnonzero(valid_mask)
+        logger.info(f"   Extracted {n_patterns:,} patterns in {time.time() - start_time:.1f}s")
         
         # Optional deterministic shuffle to reduce cross-horizon correlation while
         # keeping metadata/outcomes aligned. Seeded for reproducibility.
         if self.shuffle_horizons.get(horizon):
             rng = np.random.default_rng(42 + horizon)
-            permutation = rng.permutation(len(outcomes_clean))
-            outcomes_clean = outcomes_clean[permutation]
+            permutation = rng.permutation(len(rows))
+            rows = rows[permutation]
             metadata_clean = metadata_clean.iloc[permutation].reset_index(drop=True)
         
-        extraction_rate = len(outcomes_clean) / n_patterns
-        logger.info(f"✅ Extraction complete: {len(outcomes_clean):,}/{n_patterns:,} patterns "
+        self._log_suspicious_outcomes(outcomes[rows], metadata_clean['valid_time'])
+        extraction_rate = len(rows) / n_patterns
+        logger.info(f"✅ Extraction complete: {len(rows):,}/{n_patterns:,} patterns "
                    f"({extraction_rate*100:.1f}% success rate)")
         
-        # Save outcomes array
+        # Write the outcomes array through a memmap and publish it atomically
         outcomes_dir = Path("outcomes")
         outcomes_dir.mkdir(exist_ok=True)
         
         outcomes_path = outcomes_dir / f"outcomes_{horizon}h.npy"
-        np.save(outcomes_path, outcomes_clean)
+        staging_path = outcomes_dir / f".outcomes_{horizon}h.{os.getpid()}.npy"
+        outcomes_clean = np.lib.format.open_memmap(
+            staging_path, mode='w+', dtype=np.float32, shape=(len(rows), len(self.variables)))
+        np.take(outcomes, rows, axis=0, out=outcomes_clean)
+        outcomes_clean.flush()
+        os.replace(staging_path, outcomes_path)
         logger.info(f"✅ Saved outcomes: {outcomes_path}")
         logger.info(f"   Shape: {outcomes_clean.shape} (patterns × variables)")
         logger.info(f"   Size: {outcomes_clean.nbytes / 1024 / 1024:.1f} MB")
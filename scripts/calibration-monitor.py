@@ -21,6 +21,7 @@ Usage:
     python calibration-monitor.py --baseline        # Establish performance baseline
     python calibration-monitor.py --report          # Generate calibration report
     python calibration-monitor.py --regression      # Run regression analysis
+    python calibration-monitor.py --stored          # Bulk CRPS/PIT/reliability over stored forecasts
 """
 
 import os
@@ -42,6 +43,10 @@ from scipy import stats
 import warnings
 warnings.filterwarnings('ignore')
 
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+from core.calibration_engine import CalibrationEngine, ForecastArchive
+
 
 @dataclass
 class CalibrationMetrics:
@@ -566,9 +571,28 @@ async def main():
                        help="API URL to monitor")
     parser.add_argument("--api-token", default="dev-token-change-in-production", 
                        help="API authentication token")
+    parser.add_argument("--stored", action="store_true",
+                       help="Calibrate stored forecasts against verifying outcomes in bulk")
+    parser.add_argument("--forecast-archive", default="calibration_data/forecasts",
+                       help="ForecastArchive directory for --stored")
+    parser.add_argument("--outcomes-dir", default="outcomes",
+                       help="Outcomes database directory for --stored")
+    parser.add_argument("--window-days", type=int, default=30,
+                       help="Rolling window in days for --stored")
     
     args = parser.parse_args()
     
+    if args.stored:
+        # Incremental: only forecasts newer than the saved watermark are scored
+        print("📊 Updating stored-forecast calibration...")
+        engine = CalibrationEngine(ForecastArchive(args.forecast_archive),
+                                   Path("calibration_data") / "calibration_state.npz")
+        processed = engine.update(args.outcomes_dir)
+        for horizon, count in processed.items():
+            print(f"   {horizon}h: {count} new forecasts verified")
+        print(json.dumps(engine.report(args.window_days), indent=2, default=str))
+        return
+    
     async with CalibrationMonitor(args.api_url, args.api_token) as monitor:
         # Load existing data
         monitor.load_calibration_data()
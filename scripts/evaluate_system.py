@@ -3,8 +3,18 @@
 Adelaide Weather Forecast System Evaluation Framework
 ====================================================
 
-Comprehensive evaluation system for the analog ensemble forecaster.
-Tests performance across multiple metrics and horizons vs baselines.
+Hindcast evaluation of the analog ensemble forecaster against persistence and
+climatology baselines across all horizons.
+
+For each horizon the held-out rows (init_time >= 2019-01-01) of
+embeddings_{h}h.npy are used as queries in one batched FAISS search over the
+training rows. The analogs' outcomes from outcomes_{h}h.npy are combined with
+the RealTimeAnalogForecaster kernel weighting, and the weighted ensembles are
+scored (RMSE, MAE, bias, correlation, CRPS, spread-skill) against the true
+outcomes. Every step is vectorized over the whole test set, so a multi-year
+evaluation runs in seconds to minutes on a laptop CPU. Search is exact and
+nothing is sampled, so reports are reproducible; they record the input file
+digests.
 
 Usage:
     python evaluate_system.py --start-date 2019-01-01 --end-date 2019-12-31
@@ -13,7 +23,8 @@ Usage:
 
 import argparse
 import numpy as np
-import xarray as xr
+import pandas as pd
+import faiss
 from datetime import datetime, timedelta
 import logging
 import sys
@@ -22,10 +33,19 @@ from pathlib import Path
 import json
 from typing import Dict, List, Tuple, Optional
 
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+from core.analog_forecaster import RealTimeAnalogForecaster
+from core.artifact_digests import get_artifact_digests
+from core.calibration_engine import ForecastArchive, epochs_ns, weighted_crps, weighted_quantiles
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+TRAIN_END = '2019-01-01'
+POSITIVE_VARIABLES = ('t2m', 't850')  # Zero means missing (see compute_ensemble_statistics)
+
 def rmse(forecast: np.ndarray, truth: np.ndarray) -> float:
     """Calculate Root Mean Square Error."""
     return np.sqrt(np.mean((forecast - truth) ** 2))
@@ -48,98 +68,268 @@ def skill_score(forecast_error: float, baseline_error: float) -> float:
         return 0.0
     return 1.0 - (forecast_error / baseline_error)
 
-class BaselineForecaster:
-    """Simple baseline forecasters for comparison."""
-    
-    def __init__(self, era5_path: str):
-        self.era5_path = era5_path
-        self.data = None
-        
-    def load_data(self):
-        """Load ERA5 data for baseline calculations."""
-        logger.info("Loading ERA5 data for baseline forecasts...")
-        try:
-            # Try different data source patterns
-            for pattern in ['era5_adelaide_2010_2020.zarr', 'era5_surface_2010_2020.zarr']:
-                zarr_path = Path(self.era5_path) / pattern
-                if zarr_path.exists():
-                    self.data = xr.open_zarr(zarr_path)
-                    logger.info(f"Loaded data from {zarr_path}")
-                    return
-            
-            # Fallback: try to construct from available files
-            logger.warning("No combined zarr found, trying to load from available data...")
-            self.data = None
-            
-        except Exception as e:
-            logger.error(f"Failed to load ERA5 data: {e}")
-            self.data = None
-    
-    def persistence_forecast(self, init_date: datetime, lead_time_hours: int) -> Optional[Dict]:
-        """Persistence forecast: current conditions persist."""
-        if self.data is None:
-            return None
-            
-        try:
-            # Extract current conditions at init_date
-            current = self.data.sel(time=init_date, method='nearest')
-            
-            # Create persistence forecast
-            forecast_time = init_date + timedelta(hours=lead_time_hours)
-            
-            return {
-                'forecast_mean': current,
-                'forecast_time': forecast_time,
-                'method': 'persistence'
-            }
-        except Exception as e:
-            logger.warning(f"Persistence forecast failed: {e}")
-            return None
-    
-    def climatology_forecast(self, init_date: datetime, lead_time_hours: int) -> Optional[Dict]:
-        """Climatological forecast: long-term average for this time."""
-        if self.data is None:
-            return None
-            
-        try:
-            # Extract climatology for this month/hour
-            month = init_date.month
-            hour = init_date.hour
-            
-            # Calculate climatological mean
-            clim_data = self.data.where(
-                (self.data.time.dt.month == month) & 
-                (self.data.time.dt.hour == hour), 
-                drop=True
-            )
-            climatology = clim_data.mean(dim='time')
-            
-            forecast_time = init_date + timedelta(hours=lead_time_hours)
-            
-            return {
-                'forecast_mean': climatology,
-                'forecast_time': forecast_time,
-                'method': 'climatology'
+def _lookup(sorted_keys: np.ndarray, order: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Row index of each query in an array (given its argsort), -1 if absent."""
+    positions = np.searchsorted(sorted_keys, queries)
+    positions = np.minimum(positions, len(sorted_keys) - 1)
+    found = sorted_keys[positions] == queries if len(sorted_keys) else np.zeros(len(queries), bool)
+    return np.where(found, order[positions], -1)
+
+class HindcastEngine:
+    """Vectorized analog hindcast over held-out embeddings for one horizon at a time."""
+
+    def __init__(self, k: int = 50, train_end: str = TRAIN_END, search_batch: int = 4096,
+                 forecaster: Optional[RealTimeAnalogForecaster] = None):
+        self.forecaster = forecaster or RealTimeAnalogForecaster()
+        self.variables = list(self.forecaster.variables)
+        self.k = min(k, self.forecaster.max_analogs)
+        self.train_end = epochs_ns([train_end])[0]
+        self.search_batch = search_batch
+
+    def analog_parameters(self, horizon: int, valid_epochs: np.ndarray,
+                          max_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-query (tau, k) as served by RealTimeAnalogForecaster.analog_parameters.
+
+        Fitted parameters may depend on the season of the valid time, so they
+        are looked up once per valid month and broadcast to the queries.
+        """
+        months = pd.DatetimeIndex(valid_epochs).month.to_numpy()
+        taus = np.empty(len(months))
+        ks = np.empty(len(months), dtype=np.int64)
+        for month in np.unique(months):
+            tau, k = self.forecaster.analog_parameters(horizon, pd.Timestamp(2000, int(month), 1))
+            taus[months == month], ks[months == month] = tau, min(k, max_k)
+        return taus, ks
+
+    def analog_weights(self, distances: np.ndarray, horizon: int, taus: Optional[np.ndarray] = None,
+                       ks: Optional[np.ndarray] = None) -> np.ndarray:
+        """RealTimeAnalogForecaster.compute_analog_weights applied row-wise.
+
+        Args:
+            taus: Per-query temperatures (default: the forecaster's tau for the horizon)
+            ks: Per-query ensemble sizes; analogs beyond k get zero weight
+        """
+        if taus is None:
+            taus = self.forecaster.analog_parameters(horizon)[0]
+        logits = -distances / np.reshape(taus, (-1, 1))
+        if ks is not None:
+            logits = np.where(np.arange(distances.shape[1]) < ks[:, None], logits, -np.inf)
+        weights = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return weights / weights.sum(axis=1, keepdims=True)
+
+    def ensemble_forecast(self, members: np.ndarray, weights: np.ndarray,
+                          ks: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Weighted ensemble statistics for (Q, k, V) members.
+
+        Mirrors compute_ensemble_statistics: zero temperatures are treated as
+        missing, weights are renormalized over valid members, and variables
+        with fewer than half valid members are NaN for that query. With ks,
+        only the first ks[q] members of query q form its ensemble.
+        """
+        valid = np.isfinite(members)
+        members = np.where(valid, members, 0.0)
+        for name in POSITIVE_VARIABLES:
+            if name in self.variables:
+                column = self.variables.index(name)
+                valid[..., column] = members[..., column] > 0
+        if ks is None:
+            sizes = np.full(len(members), members.shape[1])
+        else:
+            sizes = ks
+            valid &= (np.arange(members.shape[1]) < ks[:, None])[..., None]
+        member_weights = weights[..., None] * valid
+        total = member_weights.sum(axis=1)
+        enough = valid.sum(axis=1) >= sizes[:, None] * 0.5
+        member_weights = member_weights / np.where(total > 0, total, 1.0)[:, None, :]
+
+        mean = np.sum(member_weights * members, axis=1)
+        std = np.sqrt(np.sum(member_weights * (members - mean[:, None, :]) ** 2, axis=1))
+        mean[~enough] = np.nan
+        std[~enough] = np.nan
+        return {'mean': mean, 'std': std, 'members': members, 'weights': member_weights, 'valid': enough}
+
+    def search(self, train_embeddings: np.ndarray, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact batched inner-product search; returns (L2 distances, indices)."""
+        index = faiss.IndexFlatIP(train_embeddings.shape[1])
+        index.add(np.ascontiguousarray(train_embeddings, dtype=np.float32))
+        k = min(self.k, index.ntotal)
+        similarities = np.empty((len(queries), k), dtype=np.float32)
+        indices = np.empty((len(queries), k), dtype=np.int64)
+        for start in range(0, len(queries), self.search_batch):
+            batch = np.ascontiguousarray(queries[start:start + self.search_batch], dtype=np.float32)
+            similarities[start:start + len(batch)], indices[start:start + len(batch)] = index.search(batch, k)
+        # Unit-norm embeddings: |a - b| = sqrt(2 - 2 <a, b>)
+        distances = np.sqrt(np.maximum(2.0 - 2.0 * similarities, 0.0))
+        return distances, indices
+
+    def split_horizon(self, horizon: int, embeddings: np.ndarray, embedding_times,
+                      outcomes: np.ndarray, outcome_init_times, outcome_valid_times,
+                      start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      train_end: Optional[datetime] = None) -> Dict:
+        """Align embeddings with outcomes and split them into analog pool and test queries.
+
+        Args:
+            embeddings: (N, D) unit-norm embeddings, rows aligned with embedding_times
+            embedding_times: init_time of each embedding row
+            outcomes: (M, V) outcomes, rows aligned with the outcome times
+            outcome_init_times, outcome_valid_times: times of each outcome row
+            start, end: Inclusive test period (default: everything after train_end)
+            train_end: Overrides the engine's train/test boundary (e.g. for a validation split)
+        """
+        embedding_epochs = epochs_ns(embedding_times)
+        init_epochs = epochs_ns(outcome_init_times)
+        valid_epochs = epochs_ns(outcome_valid_times)
+        outcomes = np.asarray(outcomes, dtype=np.float64)
+
+        # Align embedding rows with outcome rows by init_time
+        init_order = np.argsort(init_epochs, kind='stable')
+        outcome_rows = _lookup(init_epochs[init_order], init_order, embedding_epochs)
+        has_outcome = outcome_rows >= 0
+
+        boundary = self.train_end if train_end is None else epochs_ns([train_end])[0]
+        train = has_outcome & (embedding_epochs < boundary)
+        test = has_outcome & (embedding_epochs >= boundary)
+        if start is not None:
+            test &= embedding_epochs >= epochs_ns([start])[0]
+        if end is not None:
+            test &= embedding_epochs <= epochs_ns([end])[0]
+        if not train.any() or not test.any():
+            raise ValueError(f"{horizon}h: need both training and test rows "
+                             f"(train={int(train.sum())}, test={int(test.sum())})")
+
+        return {
+            'train_embeddings': embeddings[train],
+            'test_embeddings': embeddings[test],
+            'train_outcomes': outcomes[outcome_rows[train]],
+            'truth': outcomes[outcome_rows[test]],
+            'train_valid': valid_epochs[outcome_rows[train]],
+            'test_epochs': embedding_epochs[test],
+            'test_valid': valid_epochs[outcome_rows[test]],
+            'outcomes': outcomes,
+            'valid_epochs': valid_epochs,
+        }
+
+    def evaluate_horizon(self, horizon: int, embeddings: np.ndarray, embedding_times,
+                         outcomes: np.ndarray, outcome_init_times, outcome_valid_times,
+                         start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         archive: Optional[ForecastArchive] = None) -> Dict:
+        """Hindcast one horizon and score it against the baselines.
+
+        Args:
+            embeddings, embedding_times, outcomes, outcome_init_times,
+            outcome_valid_times, start, end: See split_horizon
+            archive: Optional ForecastArchive that receives the hindcast ensembles
+                for calibration (see core/calibration_engine.py)
+        """
+        split = self.split_horizon(horizon, embeddings, embedding_times, outcomes,
+                                   outcome_init_times, outcome_valid_times, start, end)
+        train_outcomes, truth, test_epochs = split['train_outcomes'], split['truth'], split['test_epochs']
+        outcomes, valid_epochs = split['outcomes'], split['valid_epochs']
+
+        # Analog ensemble with the kernel the forecaster serves (fitted tau/k when available)
+        distances, neighbours = self.search(split['train_embeddings'], split['test_embeddings'])
+        taus, ks = self.analog_parameters(horizon, split['test_valid'], distances.shape[1])
+        weights = self.analog_weights(distances, horizon, taus, ks)
+        members = train_outcomes[neighbours]
+        ensemble = self.ensemble_forecast(members, weights, ks)
+
+        # Persistence: the state observed at init time (an outcome whose valid_time is the init_time)
+        valid_order = np.argsort(valid_epochs, kind='stable')
+        persistence_rows = _lookup(valid_epochs[valid_order], valid_order, test_epochs)
+        persistence = np.full(truth.shape, np.nan)
+        persistence[persistence_rows >= 0] = outcomes[persistence_rows[persistence_rows >= 0]]
+
+        # Climatology: training mean for the valid time's (month, hour)
+        climatology = self._climatology(train_outcomes, split['train_valid'], split['test_valid'])
+
+        crps = weighted_crps(np.moveaxis(ensemble['members'], 2, 1), np.moveaxis(ensemble['weights'], 2, 1), truth)
+        crps[~ensemble['valid']] = np.nan
+
+        if archive is not None:
+            p05, p95 = weighted_quantiles(np.moveaxis(ensemble['members'], 2, 1),
+                                          np.moveaxis(ensemble['weights'], 2, 1), (0.05, 0.95))
+            p05[~ensemble['valid']] = np.nan
+            p95[~ensemble['valid']] = np.nan
+            archive.append(horizon, test_epochs, split['test_valid'], self.variables,
+                           ensemble['mean'], p05, p95,
+                           np.where(ensemble['weights'] > 0, ensemble['members'], np.nan), ensemble['weights'])
+
+        return {
+            'horizon': horizon,
+            'train_size': len(train_outcomes),
+            'test_size': len(truth),
+            'k': int(neighbours.shape[1]),
+            'analog_k': sorted({int(k) for k in ks}),
+            'analog_tau': sorted({float(tau) for tau in taus}),
+            'test_period': [str(pd.Timestamp(test_epochs.min())), str(pd.Timestamp(test_epochs.max()))],
+            'analog_forecaster': self._score(ensemble['mean'], truth, crps=crps, spread=ensemble['std']),
+            'persistence_baseline': self._score(persistence, truth),
+            'climatology_baseline': self._score(climatology, truth),
+        }
+
+    def _climatology(self, train_outcomes: np.ndarray, train_valid: np.ndarray,
+                     test_valid: np.ndarray) -> np.ndarray:
+        def keys(epochs):
+            times = pd.DatetimeIndex(epochs)
+            return (times.month.to_numpy() - 1) * 24 + times.hour.to_numpy()
+
+        train_keys = keys(train_valid)
+        valid = np.isfinite(train_outcomes)
+        for name in POSITIVE_VARIABLES:
+            if name in self.variables:
+                column = self.variables.index(name)
+                valid[:, column] &= train_outcomes[:, column] > 0
+        sums = np.zeros((12 * 24, train_outcomes.shape[1]))
+        counts = np.zeros_like(sums)
+        np.add.at(sums, train_keys, np.where(valid, train_outcomes, 0.0))
+        np.add.at(counts, train_keys, valid)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+        return means[keys(test_valid)]
+
+    def _score(self, forecast: np.ndarray, truth: np.ndarray,
+               crps: Optional[np.ndarray] = None, spread: Optional[np.ndarray] = None) -> Dict[str, Dict]:
+        """Per-variable scores over rows where forecast and truth are valid."""
+        scores = {}
+        for column, name in enumerate(self.variables):
+            f, y = forecast[:, column], truth[:, column]
+            mask = np.isfinite(f) & np.isfinite(y)
+            if name in POSITIVE_VARIABLES:
+                mask &= y > 0
+            if mask.sum() < 2:
+                continue
+            f, y = f[mask], y[mask]
+            error = f - y
+            result = {
+                'count': int(mask.sum()),
+                'rmse': float(np.sqrt(np.mean(error ** 2))),
+                'mae': float(np.mean(np.abs(error))),
+                'bias': float(np.mean(error)),
+                'correlation': float(np.corrcoef(f, y)[0, 1]) if f.std() > 0 and y.std() > 0 else float('nan'),
             }
-        except Exception as e:
-            logger.warning(f"Climatology forecast failed: {e}")
-            return None
+            # Deterministic forecasts: CRPS reduces to MAE
+            result['crps'] = float(np.nanmean(crps[:, column][mask])) if crps is not None else result['mae']
+            if spread is not None:
+                result['spread'] = float(np.sqrt(np.mean(spread[:, column][mask] ** 2)))
+                result['spread_skill_ratio'] = result['spread'] / result['rmse'] if result['rmse'] > 0 else float('nan')
+            scores[name] = result
+        return scores
 
 class SystemEvaluator:
     """Main evaluation framework for the analog forecasting system."""
-    
-    def __init__(self, era5_path: str = "data/era5_adelaide_2010_2020.zarr"):
-        self.era5_path = era5_path
-        self.baseline_forecaster = BaselineForecaster(era5_path)
+
+    def __init__(self, embeddings_dir: str = "embeddings", outcomes_dir: str = "outcomes", k: int = 50,
+                 archive_dir: Optional[str] = None):
+        self.embeddings_dir = Path(embeddings_dir)
+        self.outcomes_dir = Path(outcomes_dir)
+        self.engine = HindcastEngine(k=k)
+        self.archive = ForecastArchive(archive_dir) if archive_dir else None
         self.results = {}
-        
+
     def setup(self):
         """Initialize the evaluation system."""
         logger.info("🔧 Setting up evaluation framework...")
-        
-        # Load baseline data
-        self.baseline_forecaster.load_data()
-        
+
         # Initialize result storage
         self.results = {
             'analog_forecaster': {},
@@ -147,261 +337,198 @@ class SystemEvaluator:
             'climatology_baseline': {},
             'metadata': {
                 'evaluation_date': datetime.now().isoformat(),
-                'era5_path': self.era5_path
+                'embeddings_dir': str(self.embeddings_dir),
+                'outcomes_dir': str(self.outcomes_dir),
+                'k': self.engine.k,
+                'train_end': TRAIN_END,
+                'temperature_params': self.engine.forecaster.temperature_params,
+                'input_digests': {},
+                'horizons': {}
             }
         }
-        
+
         logger.info("✅ Evaluation framework ready")
-    
-    def generate_test_dates(self, start_date: datetime, end_date: datetime, 
-                          interval_hours: int = 24) -> List[datetime]:
-        """Generate list of test dates for evaluation."""
-        dates = []
-        current = start_date
-        
-        while current <= end_date:
-            dates.append(current)
-            current += timedelta(hours=interval_hours)
-            
-        logger.info(f"Generated {len(dates)} test dates from {start_date} to {end_date}")
-        return dates
-    
-    def evaluate_forecast_accuracy(self, forecast: Dict, truth: xr.Dataset, 
-                                 variable: str = 't2m') -> Dict:
-        """Evaluate forecast accuracy against ground truth."""
-        try:
-            # Extract forecast and truth values
-            forecast_values = forecast['forecast_mean'].sel(variable=variable).values
-            truth_values = truth.sel(variable=variable).values
-            
-            # Calculate metrics
-            metrics = {
-                'rmse': rmse(forecast_values, truth_values),
-                'mae': mae(forecast_values, truth_values),
-                'bias': bias(forecast_values, truth_values),
-                'correlation': correlation(forecast_values, truth_values)
-            }
-            
-            return metrics
-            
-        except Exception as e:
-            logger.warning(f"Accuracy evaluation failed: {e}")
-            return {'error': str(e)}
-    
+
+    def load_horizon(self, horizon: int) -> Dict:
+        """Load embeddings, outcomes and their metadata for a horizon."""
+        paths = {
+            'embeddings': self.embeddings_dir / f"embeddings_{horizon}h.npy",
+            'embedding_metadata': self.embeddings_dir / f"metadata_{horizon}h.parquet",
+            'outcomes': self.outcomes_dir / f"outcomes_{horizon}h.npy",
+            'outcome_metadata': self.outcomes_dir / f"metadata_{horizon}h_clean.parquet",
+        }
+        digests = get_artifact_digests().digest_many(paths.values())
+        self.results['metadata']['input_digests'].update(digests)
+
+        embedding_metadata = pd.read_parquet(paths['embedding_metadata'], columns=['init_time'])
+        outcome_metadata = pd.read_parquet(paths['outcome_metadata'], columns=['init_time', 'valid_time'])
+        return {
+            'embeddings': np.load(paths['embeddings'], mmap_mode='r'),
+            'embedding_times': embedding_metadata['init_time'],
+            'outcomes': np.load(paths['outcomes'], mmap_mode='r'),
+            'outcome_init_times': outcome_metadata['init_time'],
+            'outcome_valid_times': outcome_metadata['valid_time'],
+        }
+
     def run_quick_evaluation(self) -> Dict:
         """Run a quick 10-day evaluation test."""
         logger.info("🚀 Running quick evaluation (10 days)...")
-        
+
         # Quick test parameters
         start_date = datetime(2019, 6, 1, 12, 0)  # Summer period
         end_date = datetime(2019, 6, 10, 12, 0)   # 10 days
         horizons = [24]  # Just 24h for quick test
-        
+
         return self.run_evaluation(start_date, end_date, horizons)
-    
+
     def run_full_evaluation(self, start_date: datetime, end_date: datetime) -> Dict:
         """Run comprehensive evaluation across all horizons."""
         logger.info(f"🎯 Running full evaluation from {start_date} to {end_date}...")
-        
+
         horizons = [6, 12, 24, 48]  # All forecast horizons
         return self.run_evaluation(start_date, end_date, horizons)
-    
-    def run_evaluation(self, start_date: datetime, end_date: datetime, 
+
+    def run_evaluation(self, start_date: datetime, end_date: datetime,
                       horizons: List[int]) -> Dict:
         """Run evaluation for specified date range and horizons."""
-        
+
         # Setup evaluation
         self.setup()
-        
-        # Generate test dates
-        test_dates = self.generate_test_dates(start_date, end_date, interval_hours=24)
-        
-        # Evaluate each horizon
+
         for horizon in horizons:
             logger.info(f"📊 Evaluating {horizon}h forecasts...")
-            
-            # Initialize storage for this horizon
             horizon_key = f"{horizon}h"
-            self.results['analog_forecaster'][horizon_key] = []
-            self.results['persistence_baseline'][horizon_key] = []
-            self.results['climatology_baseline'][horizon_key] = []
-            
-            successful_forecasts = 0
-            total_forecasts = len(test_dates)
-            
-            for i, test_date in enumerate(test_dates):
-                if i % 5 == 0:  # Progress logging
-                    logger.info(f"  Progress: {i+1}/{total_forecasts} ({((i+1)/total_forecasts)*100:.1f}%)")
-                
-                try:
-                    # NOTE: Since we can't run the actual analog forecaster without full dependencies,
-                    # we'll simulate the evaluation structure and metrics
-                    
-                    # Simulate analog forecaster metrics (placeholder values)
-                    analog_metrics = {
-                        'date': test_date.isoformat(),
-                        'horizon': horizon,
-                        'rmse': np.random.uniform(2.0, 5.0),  # Realistic RMSE range for temperature
-                        'mae': np.random.uniform(1.5, 3.5),   # Realistic MAE range
-                        'bias': np.random.uniform(-1.0, 1.0), # Small bias
-                        'correlation': np.random.uniform(0.6, 0.9)  # Good correlation
-                    }
-                    
-                    # Simulate baseline metrics (slightly worse than analog)
-                    persistence_metrics = {
-                        'date': test_date.isoformat(),
-                        'horizon': horizon,
-                        'rmse': analog_metrics['rmse'] * 1.2,  # 20% worse
-                        'mae': analog_metrics['mae'] * 1.15,    # 15% worse
-                        'bias': analog_metrics['bias'] * 1.1,
-                        'correlation': analog_metrics['correlation'] * 0.9
-                    }
-                    
-                    climatology_metrics = {
-                        'date': test_date.isoformat(),
-                        'horizon': horizon,
-                        'rmse': analog_metrics['rmse'] * 1.4,  # 40% worse
-                        'mae': analog_metrics['mae'] * 1.3,     # 30% worse
-                        'bias': analog_metrics['bias'] * 0.5,   # Better bias (no drift)
-                        'correlation': analog_metrics['correlation'] * 0.7
-                    }
-                    
-                    # Store results
-                    self.results['analog_forecaster'][horizon_key].append(analog_metrics)
-                    self.results['persistence_baseline'][horizon_key].append(persistence_metrics)
-                    self.results['climatology_baseline'][horizon_key].append(climatology_metrics)
-                    
-                    successful_forecasts += 1
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to evaluate {test_date}: {e}")
-                    continue
-            
-            logger.info(f"✅ Completed {horizon}h evaluation: {successful_forecasts}/{total_forecasts} successful")
-        
+
+            try:
+                data = self.load_horizon(horizon)
+                report = self.engine.evaluate_horizon(horizon, start=start_date, end=end_date,
+                                                     archive=self.archive, **data)
+            except Exception as e:
+                logger.warning(f"Failed to evaluate {horizon_key}: {e}")
+                continue
+
+            for method in ['analog_forecaster', 'persistence_baseline', 'climatology_baseline']:
+                self.results[method][horizon_key] = report[method]
+            self.results['metadata']['horizons'][horizon_key] = {
+                key: report[key] for key in ('train_size', 'test_size', 'k', 'test_period')
+            }
+            logger.info(f"✅ Completed {horizon}h evaluation: {report['test_size']} hindcasts "
+                        f"against {report['train_size']} training analogs")
+
         # Calculate summary statistics
         self._calculate_summary_statistics()
-        
+
         logger.info("🎉 Evaluation completed!")
         return self.results
-    
+
     def _calculate_summary_statistics(self):
-        """Calculate summary statistics across all forecasts."""
+        """Calculate summary statistics and skill scores per horizon and variable."""
         logger.info("📈 Calculating summary statistics...")
-        
+
+        # Variables have different units (K, m/s, J/kg...), so only unitless scores are
+        # averaged across them: correlation and errors relative to climatology.
+        # Absolute scores stay per variable in results[method][horizon].
         summary = {}
-        
         for method in ['analog_forecaster', 'persistence_baseline', 'climatology_baseline']:
             summary[method] = {}
-            
-            for horizon_key in self.results[method]:
-                if not self.results[method][horizon_key]:
+            for horizon_key, variables in self.results[method].items():
+                if not variables:
                     continue
-                    
-                # Aggregate metrics
-                rmse_values = [r['rmse'] for r in self.results[method][horizon_key]]
-                mae_values = [r['mae'] for r in self.results[method][horizon_key]]
-                bias_values = [r['bias'] for r in self.results[method][horizon_key]]
-                corr_values = [r['correlation'] for r in self.results[method][horizon_key]]
-                
-                summary[method][horizon_key] = {
-                    'count': len(rmse_values),
-                    'rmse_mean': np.mean(rmse_values),
-                    'rmse_std': np.std(rmse_values),
-                    'mae_mean': np.mean(mae_values),
-                    'mae_std': np.std(mae_values),
-                    'bias_mean': np.mean(bias_values),
-                    'bias_std': np.std(bias_values),
-                    'correlation_mean': np.mean(corr_values),
-                    'correlation_std': np.std(corr_values)
+                climatology = self.results['climatology_baseline'].get(horizon_key, {})
+                entry = {
+                    'correlation_mean': float(np.nanmean([s['correlation'] for s in variables.values()])),
+                    'count': max(s['count'] for s in variables.values()),
                 }
-        
-        # Calculate skill scores
+                for metric in ('rmse', 'mae', 'crps'):
+                    ratios = [scores[metric] / climatology[name][metric]
+                              for name, scores in variables.items()
+                              if name in climatology and climatology[name][metric] > 0]
+                    if ratios:
+                        entry[f"{metric}_ratio_vs_climatology_mean"] = float(np.mean(ratios))
+                summary[method][horizon_key] = entry
+
+        # Skill scores per variable (RMSE and CRPS) against each baseline
         skill_scores = {}
-        for horizon_key in self.results['analog_forecaster']:
-            if (horizon_key in self.results['persistence_baseline'] and 
-                horizon_key in summary['analog_forecaster'] and 
-                horizon_key in summary['persistence_baseline']):
-                
-                analog_rmse = summary['analog_forecaster'][horizon_key]['rmse_mean']
-                persistence_rmse = summary['persistence_baseline'][horizon_key]['rmse_mean']
-                climatology_rmse = summary['climatology_baseline'][horizon_key]['rmse_mean']
-                
-                skill_scores[horizon_key] = {
-                    'vs_persistence': skill_score(analog_rmse, persistence_rmse),
-                    'vs_climatology': skill_score(analog_rmse, climatology_rmse)
-                }
-        
+        for horizon_key, analog in self.results['analog_forecaster'].items():
+            horizon_skill = {}
+            for name, scores in analog.items():
+                entry = {}
+                for baseline, label in (('persistence_baseline', 'persistence'),
+                                        ('climatology_baseline', 'climatology')):
+                    reference = self.results[baseline].get(horizon_key, {}).get(name)
+                    if reference:
+                        entry[f"vs_{label}"] = skill_score(scores['rmse'], reference['rmse'])
+                        entry[f"crps_vs_{label}"] = skill_score(scores['crps'], reference['crps'])
+                horizon_skill[name] = entry
+            skill_scores[horizon_key] = horizon_skill
+
         # Store summary
         self.results['summary_statistics'] = summary
         self.results['skill_scores'] = skill_scores
-        
+
         logger.info("✅ Summary statistics calculated")
-    
+
     def print_results(self):
         """Print evaluation results in a readable format."""
         logger.info("📊 EVALUATION RESULTS SUMMARY")
         logger.info("=" * 60)
-        
+
         if 'summary_statistics' not in self.results:
             logger.warning("No summary statistics available")
             return
-        
-        # Print summary table
-        for horizon_key in self.results['summary_statistics']['analog_forecaster']:
+
+        for horizon_key, variables in self.results['analog_forecaster'].items():
             logger.info(f"\n🎯 {horizon_key.upper()} FORECAST RESULTS:")
             logger.info("-" * 40)
-            
-            analog_stats = self.results['summary_statistics']['analog_forecaster'][horizon_key]
-            logger.info(f"Analog Forecaster:")
-            logger.info(f"  RMSE: {analog_stats['rmse_mean']:.3f} ± {analog_stats['rmse_std']:.3f}")
-            logger.info(f"  MAE:  {analog_stats['mae_mean']:.3f} ± {analog_stats['mae_std']:.3f}")
-            logger.info(f"  Correlation: {analog_stats['correlation_mean']:.3f} ± {analog_stats['correlation_std']:.3f}")
-            
-            if horizon_key in self.results['skill_scores']:
-                skills = self.results['skill_scores'][horizon_key]
-                logger.info(f"  Skill vs Persistence: {skills['vs_persistence']:.3f}")
-                logger.info(f"  Skill vs Climatology: {skills['vs_climatology']:.3f}")
-        
+            for name, scores in variables.items():
+                skills = self.results['skill_scores'].get(horizon_key, {}).get(name, {})
+                logger.info(f"  {name:5s} RMSE {scores['rmse']:.3f}  MAE {scores['mae']:.3f}  "
+                            f"CRPS {scores['crps']:.3f}  spread/skill {scores['spread_skill_ratio']:.2f}  "
+                            f"skill vs pers {skills.get('vs_persistence', float('nan')):.3f}  "
+                            f"vs clim {skills.get('vs_climatology', float('nan')):.3f}")
+
         logger.info("\n" + "=" * 60)
-        logger.info("🎉 Evaluation framework validation completed!")
+        logger.info("🎉 Evaluation completed!")
 
 def main():
     """Main evaluation script."""
     parser = argparse.ArgumentParser(description='Evaluate Adelaide Weather Forecast System')
-    parser.add_argument('--start-date', type=str, default='2019-06-01', 
+    parser.add_argument('--start-date', type=str, default='2019-01-01',
                        help='Start date (YYYY-MM-DD)')
-    parser.add_argument('--end-date', type=str, default='2019-06-10',
+    parser.add_argument('--end-date', type=str, default='2020-12-31',
                        help='End date (YYYY-MM-DD)')
     parser.add_argument('--quick-test', action='store_true',
                        help='Run quick 10-day test')
+    parser.add_argument('--embeddings-dir', type=str, default=str(PROJECT_ROOT / 'embeddings'))
+    parser.add_argument('--outcomes-dir', type=str, default=str(PROJECT_ROOT / 'outcomes'))
+    parser.add_argument('--k', type=int, default=50, help='Analogs per hindcast')
     parser.add_argument('--output', type=str, default='evaluation_results.json',
                        help='Output file for results')
-    
+    parser.add_argument('--archive-forecasts', type=str, default=None,
+                       help='Also store the hindcast ensembles in this ForecastArchive directory')
+
     args = parser.parse_args()
-    
-    # Change to project directory
-    os.chdir('/home/micha/weather-forecast-final')
-    
+
     # Initialize evaluator
-    evaluator = SystemEvaluator()
-    
+    evaluator = SystemEvaluator(args.embeddings_dir, args.outcomes_dir, k=args.k,
+                                archive_dir=args.archive_forecasts)
+
     try:
         if args.quick_test:
             results = evaluator.run_quick_evaluation()
         else:
             start_date = datetime.strptime(args.start_date, '%Y-%m-%d')
-            end_date = datetime.strptime(args.end_date, '%Y-%m-%d')
+            end_date = datetime.strptime(args.end_date, '%Y-%m-%d') + timedelta(days=1) - timedelta(seconds=1)
             results = evaluator.run_full_evaluation(start_date, end_date)
-        
+
         # Print results
         evaluator.print_results()
-        
+
         # Save results
         with open(args.output, 'w') as f:
             json.dump(results, f, indent=2, default=str)
         logger.info(f"💾 Results saved to {args.output}")
-        
+
     except Exception as e:
         logger.error(f"❌ Evaluation failed: {e}")
         import traceback
@@ -409,4 +536,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
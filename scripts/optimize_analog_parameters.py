@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Analog Kernel Parameter Optimizer
+=================================
+
+Fits the kernel temperature (tau) and effective ensemble size (k) of the
+analog forecaster per horizon, and optionally per season of the valid time,
+by minimizing the CRPS of batched hindcasts over a validation slice.
+
+The parameters are fitted on the last training year (init times in
+[2018-01-01, 2019-01-01), valid times before 2019-01-01), with analogs drawn
+from the rows before it, so the held-out period that evaluate_system.py
+reports skill on is never used for tuning. For each horizon the validation
+rows are searched once at k = max_analogs against the earlier rows (see
+HindcastEngine in evaluate_system.py). The ensembles for a smaller k are prefixes of that
+result, so the whole tau x k grid is scored without searching again: the
+members of each prefix are sorted once and every temperature re-weights the
+same sorted members. The best grid point is then refined on a finer tau
+grid. Each variable's CRPS is divided by its CRPS under the current default
+parameters (tau from temperature_params, k = max_analogs), and the objective
+is the mean of these ratios, so 1.0 means "no better than the defaults".
+
+The fitted values are written to a versioned parameter file (see
+core/analog_parameters.py) that running forecasters hot-load.
+
+Usage:
+    python optimize_analog_parameters.py
+    python optimize_analog_parameters.py --horizons 24 48 --no-seasons
+    python optimize_analog_parameters.py --validation-start 2017-01-01
+    python optimize_analog_parameters.py --output /tmp/analog_parameters.json
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+from core.analog_parameters import DEFAULT_PATH, FORMAT_VERSION, SEASONS, write_parameters
+from core.calibration_engine import weighted_crps
+from scripts.evaluate_system import POSITIVE_VARIABLES, TRAIN_END, HindcastEngine, SystemEvaluator
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAUS = tuple(np.round(np.geomspace(0.02, 1.0, 12), 4))
+DEFAULT_KS = (10, 15, 20, 25, 30, 40, 50)
+VALIDATION_START = '2018-01-01'  # Validation slice ends at TRAIN_END
+
+
+def season_index(valid_epochs: np.ndarray) -> np.ndarray:
+    """Index into SEASONS of each valid time (int64 ns epochs)."""
+    months = pd.DatetimeIndex(valid_epochs).month.to_numpy()
+    return (months % 12) // 3
+
+
+class ParameterOptimizer:
+    """Vectorized tau x k grid search over batched hindcasts."""
+
+    def __init__(self, engine: Optional[HindcastEngine] = None, taus: Sequence[float] = DEFAULT_TAUS,
+                 ks: Sequence[int] = DEFAULT_KS, by_season: bool = True, min_season_rows: int = 500,
+                 refine_steps: int = 9, validation_start: str = VALIDATION_START):
+        """
+        Args:
+            engine: Hindcast engine (search, ensemble rules and default parameters)
+            taus: Coarse temperature grid
+            ks: Candidate ensemble sizes (capped at the engine's k)
+            by_season: Also fit per season of the valid time
+            min_season_rows: Seasons with fewer scored validation queries use the horizon entry
+            refine_steps: Points of the fine tau grid around the coarse optimum (0 disables)
+            validation_start: First init time of the validation slice (which ends at the
+                engine's train_end, where the evaluation period begins)
+        """
+        self.engine = engine or HindcastEngine()
+        self.variables = self.engine.variables
+        self.taus = np.asarray(sorted(taus), dtype=np.float64)
+        self.ks = np.asarray(sorted({min(int(k), self.engine.k) for k in ks}))
+        self.by_season = by_season
+        self.min_season_rows = min_season_rows
+        self.refine_steps = refine_steps
+        self.validation_start = validation_start
+
+    def scored_mask(self, members: np.ndarray, truth: np.ndarray, ks: Sequence[int]) -> np.ndarray:
+        """(Q, V) entries with a valid truth and a forecast for every candidate k.
+
+        Scoring every grid point on the same entries keeps the CRPS comparable
+        across k (the half-valid-members rule depends on k).
+        """
+        valid = self._valid_members(members)
+        mask = np.isfinite(truth)
+        for name in POSITIVE_VARIABLES:
+            if name in self.variables:
+                column = self.variables.index(name)
+                mask[:, column] &= truth[:, column] > 0
+        counts = np.cumsum(valid, axis=1)
+        for k in ks:
+            mask &= counts[:, k - 1] >= k * 0.5
+        return mask
+
+    def grid_crps(self, distances: np.ndarray, members: np.ndarray, truth: np.ndarray,
+                  mask: np.ndarray, groups: np.ndarray, n_groups: int,
+                  taus: Sequence[float], ks: Sequence[int]) -> np.ndarray:
+        """Summed CRPS over masked entries per group: (len(taus), len(ks), n_groups, V).
+
+        Args:
+            distances: (Q, K) analog distances, ascending
+            members: (Q, K, V) analog outcomes in distance order
+            truth: (Q, V) verifying outcomes
+            mask: (Q, V) entries to score (see scored_mask)
+            groups: (Q,) group label in [0, n_groups) of each query
+        """
+        valid = self._valid_members(members)
+        values = np.where(valid, members, 0.0)
+        truth = np.where(mask, truth, 0.0)
+        sums = np.zeros((len(taus), len(ks), n_groups, members.shape[2]))
+        for j, k in enumerate(ks):
+            # (Q, V, k) members sorted once per prefix, shared by every temperature
+            order = np.argsort(np.moveaxis(values[:, :k], 2, 1), axis=-1)
+            sorted_members = np.take_along_axis(np.moveaxis(values[:, :k], 2, 1), order, axis=-1)
+            sorted_valid = np.take_along_axis(np.moveaxis(valid[:, :k], 2, 1), order, axis=-1)
+            rows = np.arange(len(distances))[:, None, None]
+            for i, tau in enumerate(taus):
+                logits = -distances[:, :k] / tau
+                weights = np.exp(logits - logits.max(axis=1, keepdims=True))
+                sorted_weights = weights[rows, order] * sorted_valid
+                total = sorted_weights.sum(axis=-1, keepdims=True)
+                sorted_weights /= np.where(total > 0, total, 1.0)
+                crps = weighted_crps(sorted_members, sorted_weights, truth, presorted=True)
+                for g in range(n_groups):
+                    sums[i, j, g] = np.sum(np.where(mask, crps, 0.0)[groups == g], axis=0)
+        return sums
+
+    def fit_horizon(self, horizon: int, distances: np.ndarray, members: np.ndarray,
+                    truth: np.ndarray, valid_epochs: np.ndarray) -> Dict:
+        """Fit (tau, k) for one horizon from a k = max search.
+
+        Returns:
+            Parameter entry for the horizon ({'tau', 'k', 'rows', 'relative_crps',
+            'seasons': {...}}), see core/analog_parameters.py
+        """
+        default_tau = self.engine.forecaster.temperature_params.get(horizon, 0.2)
+        default_k = min(self.engine.k, distances.shape[1])
+        ks = [int(k) for k in self.ks if k <= distances.shape[1]]
+        mask = self.scored_mask(members, truth, sorted(set(ks) | {default_k}))
+
+        if self.by_season:
+            groups, n_groups = season_index(valid_epochs), len(SEASONS)
+        else:
+            groups, n_groups = np.zeros(len(truth), dtype=np.int64), 1
+        counts = np.stack([mask[groups == g].sum(axis=0) for g in range(n_groups)])
+        grid = self.grid_crps(distances, members, truth, mask, groups, n_groups, self.taus, ks)
+        baseline = self.grid_crps(distances, members, truth, mask, groups, n_groups,
+                                  [default_tau], [default_k])[0, 0]
+
+        def fit(selected: np.ndarray) -> Dict:
+            n, base = counts[selected].sum(axis=0), baseline[selected].sum(axis=0)
+            scored = (n > 0) & (base > 0)
+            relative = (grid[:, :, selected].sum(axis=2)[..., scored] / base[scored]).mean(axis=-1)
+            i, j = np.unravel_index(np.argmin(relative), relative.shape)
+            tau, k, best = float(self.taus[i]), ks[j], float(relative[i, j])
+            if self.refine_steps:
+                low = self.taus[max(i - 1, 0)]
+                high = self.taus[min(i + 1, len(self.taus) - 1)]
+                fine = np.geomspace(low, high, self.refine_steps)
+                rows = np.isin(groups, np.flatnonzero(selected))
+                fine_grid = self.grid_crps(distances[rows], members[rows], truth[rows], mask[rows],
+                                           np.searchsorted(np.flatnonzero(selected), groups[rows]),
+                                           int(selected.sum()), fine, [k])
+                fine_relative = (fine_grid[:, 0].sum(axis=1)[:, scored] / base[scored]).mean(axis=-1)
+                if fine_relative.min() < best:
+                    tau, best = float(fine[np.argmin(fine_relative)]), float(fine_relative.min())
+            return {'tau': round(tau, 5), 'k': int(k), 'rows': int(n.max()),
+                    'relative_crps': round(best, 5)}
+
+        entry = fit(np.ones(n_groups, dtype=bool))
+        entry['default'] = {'tau': default_tau, 'k': default_k}
+        if self.by_season:
+            seasons = {}
+            for g, season in enumerate(SEASONS):
+                if counts[g].max() >= self.min_season_rows:
+                    selected = np.zeros(n_groups, dtype=bool)
+                    selected[g] = True
+                    seasons[season] = fit(selected)
+            if seasons:
+                entry['seasons'] = seasons
+        logger.info(f"✅ {horizon}h: tau={entry['tau']}, k={entry['k']} "
+                    f"(relative CRPS {entry['relative_crps']:.4f} over {entry['rows']} queries)")
+        return entry
+
+    def optimize_horizon(self, horizon: int, embeddings: np.ndarray, embedding_times,
+                         outcomes: np.ndarray, outcome_init_times, outcome_valid_times) -> Dict:
+        """Hindcast the validation slice of one horizon and fit its parameters.
+
+        Arguments as HindcastEngine.split_horizon. Queries are the rows from
+        validation_start up to the engine's train_end whose valid time is
+        also before train_end; analogs come from the rows before validation_start.
+        """
+        split = self.engine.split_horizon(horizon, embeddings, embedding_times, outcomes,
+                                          outcome_init_times, outcome_valid_times,
+                                          train_end=self.validation_start)
+        queries = split['test_valid'] < self.engine.train_end  # Also excludes the evaluation period
+        if not queries.any():
+            raise ValueError(f"{horizon}h: no validation rows between {self.validation_start} and the train end")
+        distances, neighbours = self.engine.search(split['train_embeddings'], split['test_embeddings'][queries])
+        members = split['train_outcomes'][neighbours]
+        return self.fit_horizon(horizon, distances, members, split['truth'][queries],
+                                split['test_valid'][queries])
+
+    def _valid_members(self, members: np.ndarray) -> np.ndarray:
+        """Members used by compute_ensemble_statistics (zero temperatures are missing)."""
+        valid = np.isfinite(members)
+        for name in POSITIVE_VARIABLES:
+            if name in self.variables:
+                column = self.variables.index(name)
+                valid[..., column] &= members[..., column] > 0
+        return valid
+
+
+def build_document(horizons: Dict[int, Dict], input_digests: Dict[str, str], settings: Dict) -> Dict:
+    """Versioned parameter document; the version changes whenever the parameters do."""
+    body = {str(h): entry for h, entry in sorted(horizons.items())}
+    generated = datetime.now(timezone.utc)
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()[:8]
+    return {
+        'format_version': FORMAT_VERSION,
+        'version': f"{generated.strftime('%Y%m%dT%H%M%SZ')}-{digest}",
+        'generated_at': generated.isoformat(),
+        'objective': 'crps_relative_to_defaults',
+        'settings': settings,
+        'input_digests': input_digests,
+        'horizons': body,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit per-horizon analog kernel parameters from hindcasts')
+    parser.add_argument('--embeddings-dir', default='embeddings', help='Directory with embeddings_{h}h.npy')
+    parser.add_argument('--outcomes-dir', default='outcomes', help='Directory with outcomes_{h}h.npy')
+    parser.add_argument('--horizons', type=int, nargs='+', default=[6, 12, 24, 48], help='Horizons to fit')
+    parser.add_argument('--validation-start', type=str, default=VALIDATION_START,
+                        help=f'First init time of the validation slice, which ends at {TRAIN_END} (YYYY-MM-DD)')
+    parser.add_argument('--no-seasons', action='store_true', help='Fit one entry per horizon only')
+    parser.add_argument('--min-season-rows', type=int, default=500,
+                        help='Minimum validation queries for a season-specific entry')
+    parser.add_argument('--output', default=str(DEFAULT_PATH), help='Parameter file to write')
+
+    args = parser.parse_args()
+    evaluator = SystemEvaluator(args.embeddings_dir, args.outcomes_dir)
+    evaluator.setup()
+    optimizer = ParameterOptimizer(evaluator.engine, by_season=not args.no_seasons,
+                                   min_season_rows=args.min_season_rows,
+                                   validation_start=args.validation_start)
+
+    fitted = {}
+    for horizon in args.horizons:
+        try:
+            fitted[horizon] = optimizer.optimize_horizon(horizon, **evaluator.load_horizon(horizon))
+        except Exception as e:
+            logger.error(f"❌ {horizon}h: optimization failed: {e}")
+    if not fitted:
+        logger.error("❌ No horizon could be fitted; parameter file not written")
+        return 1
+
+    settings = {'train_end': TRAIN_END, 'taus': optimizer.taus.tolist(), 'ks': optimizer.ks.tolist(),
+                'by_season': optimizer.by_season, 'min_season_rows': optimizer.min_season_rows,
+                'validation_start': optimizer.validation_start, 'validation_end': TRAIN_END}
+    document = build_document(fitted, evaluator.results['metadata']['input_digests'], settings)
+    write_parameters(args.output, document)
+    logger.info(f"💾 Wrote analog parameters {document['version']} to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
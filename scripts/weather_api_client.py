@@ -13,10 +13,13 @@ Usage:
 """
 
 import requests
+import httpx
 import json
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 import time
 from pathlib import Path
 
@@ -38,6 +41,23 @@ class WeatherApiClient:
         'adelaide_west_terrace': '94675',  # West Terrace
     }
     
+    # Provider endpoints; override via the 'endpoints' section of weather_api.yaml
+    PROVIDER_ENDPOINTS = {
+        'gfs': 'https://api.open-meteo.com/v1/gfs',
+        'open_meteo': 'https://api.open-meteo.com/v1/forecast',
+        'bom_api': 'https://api.weather.bom.gov.au/v1/observations/current',
+        'bom': 'http://www.bom.gov.au/fwo/IDS60801/IDS60801.{station_id}.json',
+        'openweathermap': 'http://api.openweathermap.org/data/2.5/weather',
+        'weatherapi': 'http://api.weatherapi.com/v1/current.json',
+    }
+    
+    # API key each provider needs before it is tried
+    PROVIDER_KEYS = {
+        'bom_api': 'bom_api_key',
+        'openweathermap': 'openweathermap',
+        'weatherapi': 'weatherapi',
+    }
+    
     def __init__(self, api_keys: Optional[Dict[str, str]] = None):
         """Initialize weather API client with optional API keys."""
         self.api_keys = api_keys or {}
@@ -55,6 +75,18 @@ class WeatherApiClient:
         
         # API priority order - put GFS first for complete atmospheric data
         self.api_priority = ['gfs', 'weatherapi', 'open_meteo', 'bom_api', 'bom', 'openweathermap']
+        self.endpoints = {**self.PROVIDER_ENDPOINTS, **self.config.get('endpoints', {})}
+        
+        # Hedged fetch tuning: a new provider is started every hedge_delay_s
+        # until one returns data that passes validation
+        hedging = self.config.get('hedging', {})
+        self.hedge_delay_s = float(hedging.get('hedge_delay_s', 0.75))
+        self.max_in_flight = int(hedging.get('max_in_flight', 3))
+        self.overall_timeout_s = float(hedging.get('overall_timeout_s', 20.0))
+        self.cache_ttl_s = float(hedging.get('cache_ttl_s', 300.0))
+        
+        # include_upper_air -> (monotonic timestamp, raw weather, ERA5 data)
+        self._response_cache: Dict[bool, Tuple[float, Dict, Dict]] = {}
         
     def _load_config(self) -> Dict:
         """Load configuration from file if available."""
@@ -63,7 +95,7 @@ class WeatherApiClient:
             try:
                 import yaml
                 with open(config_file, 'r') as f:
-                    return yaml.safe_load(f)
+                    return yaml.safe_load(f) or {}
             except ImportError:
                 logger.warning("PyYAML not available, using default config")
             except Exception as e:
@@ -72,286 +104,393 @@ class WeatherApiClient:
     
     def get_current_weather(self, include_upper_air: bool = True) -> Optional[Dict]:
         """Get current weather observations with optional upper-air data."""
+        weather_data, _ = self._run_sync(self._hedged_fetch(include_upper_air))
         
-        # Try APIs in priority order
+        if weather_data is None:
+            logger.error("Failed to retrieve weather data from all sources")
+        return weather_data
+    
+    async def get_current_weather_async(self, include_upper_air: bool = True) -> Optional[Dict]:
+        """Async variant of get_current_weather for callers already on an event loop."""
+        weather_data, _ = await self._hedged_fetch(include_upper_air)
+        return weather_data
+    
+    async def get_forecast_ready_data_async(self, include_upper_air: bool = True) -> Optional[Dict]:
+        """Async variant of get_forecast_ready_data."""
+        _, era5_data = await self._hedged_fetch(include_upper_air)
+        return era5_data
+    
+    def _enabled_providers(self) -> List[str]:
+        """Providers from api_priority that can be queried with the configured keys."""
+        enabled = []
         for api_name in self.api_priority:
+            required_key = self.PROVIDER_KEYS.get(api_name)
+            if required_key is not None and required_key not in self.api_keys:
+                continue
+            if api_name in self.endpoints:
+                enabled.append(api_name)
+        return enabled
+    
+    async def _hedged_fetch(self, include_upper_air: bool) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """Race providers in priority order and return the first (raw, era5) pair that validates.
+        
+        The top provider is started immediately; each further provider is started
+        either when every in-flight request has failed or after hedge_delay_s
+        without a usable answer, up to max_in_flight concurrent requests. The
+        first response that passes validate_data_quality wins and the remaining
+        requests are cancelled. If nothing validates, the highest-priority raw
+        response is returned with era5 set to None.
+        """
+        cached = self._response_cache.get(include_upper_air)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl_s:
+            return cached[1], cached[2]
+        
+        queue = self._enabled_providers()
+        if not queue:
+            logger.warning("No weather providers enabled")
+            return None, None
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.overall_timeout_s
+        pending: Dict[asyncio.Task, str] = {}
+        unvalidated: Dict[str, Dict] = {}
+        priority = {name: rank for rank, name in enumerate(queue)}
+        
+        async with httpx.AsyncClient(headers={'User-Agent': self.session.headers['User-Agent']}) as http:
+            def launch_next():
+                api_name = queue.pop(0)
+                task = asyncio.create_task(self._fetch_provider_async(http, api_name, include_upper_air))
+                pending[task] = api_name
+            
+            launch_next()
             try:
-                if api_name == 'gfs':
-                    data = self._get_gfs_weather(include_upper_air)
-                elif api_name == 'open_meteo':
-                    data = self._get_open_meteo_weather(include_upper_air)
-                elif api_name == 'bom_api' and 'bom_api_key' in self.api_keys:
-                    data = self._get_bom_api_weather()
-                elif api_name == 'bom':
-                    data = self._get_bom_weather('adelaide_airport')
-                elif api_name == 'openweathermap' and 'openweathermap' in self.api_keys:
-                    data = self._get_openweather_data()
-                elif api_name == 'weatherapi' and 'weatherapi' in self.api_keys:
-                    data = self._get_weatherapi_data()
-                else:
-                    continue
+                while pending:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        logger.warning(f"Weather fetch deadline reached with {len(pending)} providers in flight")
+                        break
                     
-                if data:
-                    logger.info(f"Successfully retrieved weather data from {api_name}")
-                    return data
+                    can_hedge = bool(queue) and len(pending) < self.max_in_flight
+                    done, _ = await asyncio.wait(
+                        pending,
+                        timeout=min(self.hedge_delay_s, remaining) if can_hedge else remaining,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
                     
-            except Exception as e:
-                logger.warning(f"API {api_name} failed: {e}")
-                continue
+                    for task in done:
+                        api_name = pending.pop(task)
+                        weather_data = task.result()
+                        if not weather_data:
+                            continue
+                        
+                        era5_data = self.convert_to_era5_format(weather_data)
+                        if self.validate_data_quality(era5_data):
+                            logger.info(f"Successfully retrieved weather data from {api_name}")
+                            self._response_cache[include_upper_air] = (time.monotonic(), weather_data, era5_data)
+                            return weather_data, era5_data
+                        unvalidated[api_name] = weather_data
+                    
+                    # Hedge on a slow provider, or replace ones that failed outright
+                    if queue and len(pending) < self.max_in_flight:
+                        launch_next()
+            finally:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
         
-        logger.error("Failed to retrieve weather data from all sources")
-        return None
+        if unvalidated:
+            best = min(unvalidated, key=priority.__getitem__)
+            logger.warning(f"No provider passed data quality validation, returning raw data from {best}")
+            return unvalidated[best], None
+        
+        return None, None
     
-    def _get_open_meteo_weather(self, include_upper_air: bool = True) -> Optional[Dict]:
-        """Get comprehensive weather data from Open-Meteo API including upper-air data."""
+    async def _fetch_provider_async(self, http: "httpx.AsyncClient", api_name: str,
+                                    include_upper_air: bool) -> Optional[Dict]:
+        """Fetch and parse one provider response; failures are logged and return None."""
+        url, params, timeout = self._provider_request(api_name, include_upper_air)
         try:
-            url = "https://api.open-meteo.com/v1/forecast"
-            
-            # Base parameters
-            params = {
-                'latitude': self.ADELAIDE_LAT,
-                'longitude': self.ADELAIDE_LON,
-                'current': [
-                    'temperature_2m',
-                    'relative_humidity_2m', 
-                    'surface_pressure',
-                    'wind_speed_10m',
-                    'wind_direction_10m'
-                ],
-                'models': 'gfs_seamless',  # Use GFS model
-                'timezone': 'Australia/Adelaide'
-            }
-            
-            # Add upper-air data if requested
-            if include_upper_air:
-                params['hourly'] = [
-                    'temperature_500hPa',
-                    'temperature_850hPa',
-                    'geopotential_height_500hPa',
-                    'geopotential_height_850hPa',
-                    'relative_humidity_850hPa',
-                    'wind_speed_500hPa',
-                    'wind_direction_500hPa',
-                    'wind_speed_850hPa', 
-                    'wind_direction_850hPa',
-                    'wind_speed_10m',
-                    'wind_direction_10m',
-                    'cape'
-                ]
-                params['forecast_hours'] = 1  # Just get the first hour (current conditions)
-            
-            logger.info("Fetching from Open-Meteo API...")
-            response = self.session.get(url, params=params, timeout=15)
+            logger.info(f"Fetching from {api_name}...")
+            response = await http.get(url, params=params, timeout=timeout)
             response.raise_for_status()
-            
-            data = response.json()
-            
-            # Extract current conditions
-            current = data.get('current', {})
-            
-            result = {
-                'source': 'open_meteo',
-                'station_name': f"Adelaide (Open-Meteo GFS)",
-                'observation_time': current.get('time'),
-                'temperature': current.get('temperature_2m'),
-                'humidity': current.get('relative_humidity_2m'),
-                'pressure': current.get('surface_pressure'),  # Already in hPa
-                'wind_speed': current.get('wind_speed_10m') * 3.6 if current.get('wind_speed_10m') else None,  # Convert m/s to km/h
-                'wind_direction': current.get('wind_direction_10m'),
-                'latitude': self.ADELAIDE_LAT,
-                'longitude': self.ADELAIDE_LON,
-                'raw_data': data
-            }
-            
-            # Add upper-air data if available
-            if include_upper_air and 'hourly' in data:
-                hourly = data['hourly']
-                # Get first hour data (current conditions)
-                if hourly.get('time') and len(hourly['time']) > 0:
-                    result['upper_air'] = {
-                        't500': hourly.get('temperature_500hPa', [None])[0],
-                        't850': hourly.get('temperature_850hPa', [None])[0],
-                        'z500': hourly.get('geopotential_height_500hPa', [None])[0],
-                        'z850': hourly.get('geopotential_height_850hPa', [None])[0],
-                        'rh850': hourly.get('relative_humidity_850hPa', [None])[0],
-                        'wind_speed_500': hourly.get('wind_speed_500hPa', [None])[0],
-                        'wind_dir_500': hourly.get('wind_direction_500hPa', [None])[0],
-                        'wind_speed_850': hourly.get('wind_speed_850hPa', [None])[0],
-                        'wind_dir_850': hourly.get('wind_direction_850hPa', [None])[0],
-                        'cape': hourly.get('cape', [None])[0]
-                    }
-                    result['data_completeness'] = 'full_profile'
-                else:
-                    result['data_completeness'] = 'surface_only'
-            else:
-                result['data_completeness'] = 'surface_only'
-            
-            return result
-            
+            return self._parse_provider_response(api_name, response.json(), include_upper_air)
+        except httpx.HTTPError as e:
+            logger.warning(f"{api_name} request failed: {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"{api_name} error: {e}")
+            return None
+    
+    def _fetch_provider_sync(self, api_name: str, include_upper_air: bool = True) -> Optional[Dict]:
+        """Blocking single-provider fetch over the shared requests session."""
+        url, params, timeout = self._provider_request(api_name, include_upper_air)
+        try:
+            logger.info(f"Fetching from {api_name}...")
+            response = self.session.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            return self._parse_provider_response(api_name, response.json(), include_upper_air)
         except requests.RequestException as e:
-            logger.warning(f"Open-Meteo request failed: {e}")
+            logger.warning(f"{api_name} request failed: {e}")
             return None
         except Exception as e:
-            logger.warning(f"Open-Meteo error: {e}")
+            logger.warning(f"{api_name} error: {e}")
             return None
     
-    def _get_gfs_weather(self, include_upper_air: bool = True) -> Optional[Dict]:
-        """Get weather data directly from Open-Meteo GFS API with atmospheric profile."""
+    @staticmethod
+    def _run_sync(coro):
+        """Run a coroutine to completion from synchronous code."""
         try:
-            url = "https://api.open-meteo.com/v1/gfs"
-            
-            # Current surface variables
-            current_vars = [
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        
+        # Called from inside an event loop - drive the coroutine on a helper thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+    
+    def _provider_request(self, api_name: str, include_upper_air: bool) -> Tuple[str, Dict, float]:
+        """Build (url, params, timeout) for a provider."""
+        builder = getattr(self, f"_{api_name}_request")
+        return builder(include_upper_air)
+    
+    def _parse_provider_response(self, api_name: str, data: Dict, include_upper_air: bool) -> Optional[Dict]:
+        """Convert a provider JSON payload to the standard observation dict."""
+        parser = getattr(self, f"_parse_{api_name}")
+        return parser(data, include_upper_air)
+    
+    def _open_meteo_request(self, include_upper_air: bool = True) -> Tuple[str, Dict, float]:
+        # Base parameters
+        params = {
+            'latitude': self.ADELAIDE_LAT,
+            'longitude': self.ADELAIDE_LON,
+            'current': [
                 'temperature_2m',
                 'relative_humidity_2m', 
                 'surface_pressure',
                 'wind_speed_10m',
                 'wind_direction_10m'
+            ],
+            'models': 'gfs_seamless',  # Use GFS model
+            'timezone': 'Australia/Adelaide'
+        }
+        
+        # Add upper-air data if requested
+        if include_upper_air:
+            params['hourly'] = [
+                'temperature_500hPa',
+                'temperature_850hPa',
+                'geopotential_height_500hPa',
+                'geopotential_height_850hPa',
+                'relative_humidity_850hPa',
+                'wind_speed_500hPa',
+                'wind_direction_500hPa',
+                'wind_speed_850hPa', 
+                'wind_direction_850hPa',
+                'wind_speed_10m',
+                'wind_direction_10m',
+                'cape'
             ]
-            
-            # Add atmospheric profile variables if requested
-            if include_upper_air:
-                current_vars.extend([
-                    'geopotential_height_500hPa',
-                    'temperature_500hPa',
-                    'temperature_850hPa',
-                    'relative_humidity_850hPa'
-                ])
-            
-            params = {
-                'latitude': self.ADELAIDE_LAT,
-                'longitude': self.ADELAIDE_LON,
-                'current': ','.join(current_vars),
-                'timezone': 'Australia/Adelaide'
+            params['forecast_hours'] = 1  # Just get the first hour (current conditions)
+        
+        return self.endpoints['open_meteo'], params, 15
+    
+    def _parse_open_meteo(self, data: Dict, include_upper_air: bool = True) -> Optional[Dict]:
+        # Extract current conditions
+        current = data.get('current', {})
+        
+        result = {
+            'source': 'open_meteo',
+            'station_name': f"Adelaide (Open-Meteo GFS)",
+            'observation_time': current.get('time'),
+            'temperature': current.get('temperature_2m'),
+            'humidity': current.get('relative_humidity_2m'),
+            'pressure': current.get('surface_pressure'),  # Already in hPa
+            'wind_speed': current.get('wind_speed_10m') * 3.6 if current.get('wind_speed_10m') else None,  # Convert m/s to km/h
+            'wind_direction': current.get('wind_direction_10m'),
+            'latitude': self.ADELAIDE_LAT,
+            'longitude': self.ADELAIDE_LON,
+            'raw_data': data
+        }
+        
+        # Add upper-air data if available
+        if include_upper_air and 'hourly' in data:
+            hourly = data['hourly']
+            # Get first hour data (current conditions)
+            if hourly.get('time') and len(hourly['time']) > 0:
+                result['upper_air'] = {
+                    't500': hourly.get('temperature_500hPa', [None])[0],
+                    't850': hourly.get('temperature_850hPa', [None])[0],
+                    'z500': hourly.get('geopotential_height_500hPa', [None])[0],
+                    'z850': hourly.get('geopotential_height_850hPa', [None])[0],
+                    'rh850': hourly.get('relative_humidity_850hPa', [None])[0],
+                    'wind_speed_500': hourly.get('wind_speed_500hPa', [None])[0],
+                    'wind_dir_500': hourly.get('wind_direction_500hPa', [None])[0],
+                    'wind_speed_850': hourly.get('wind_speed_850hPa', [None])[0],
+                    'wind_dir_850': hourly.get('wind_direction_850hPa', [None])[0],
+                    'cape': hourly.get('cape', [None])[0]
+                }
+                result['data_completeness'] = 'full_profile'
+            else:
+                result['data_completeness'] = 'surface_only'
+        else:
+            result['data_completeness'] = 'surface_only'
+        
+        return result
+    
+    def _get_open_meteo_weather(self, include_upper_air: bool = True) -> Optional[Dict]:
+        """Get comprehensive weather data from Open-Meteo API including upper-air data."""
+        return self._fetch_provider_sync('open_meteo', include_upper_air)
+    
+    def _gfs_request(self, include_upper_air: bool = True) -> Tuple[str, Dict, float]:
+        # Current surface variables
+        current_vars = [
+            'temperature_2m',
+            'relative_humidity_2m', 
+            'surface_pressure',
+            'wind_speed_10m',
+            'wind_direction_10m'
+        ]
+        
+        # Add atmospheric profile variables if requested
+        if include_upper_air:
+            current_vars.extend([
+                'geopotential_height_500hPa',
+                'temperature_500hPa',
+                'temperature_850hPa',
+                'relative_humidity_850hPa'
+            ])
+        
+        params = {
+            'latitude': self.ADELAIDE_LAT,
+            'longitude': self.ADELAIDE_LON,
+            'current': ','.join(current_vars),
+            'timezone': 'Australia/Adelaide'
+        }
+        
+        # Also get hourly data for wind components and CAPE
+        if include_upper_air:
+            params['hourly'] = ','.join([
+                'wind_speed_850hPa',
+                'wind_direction_850hPa',
+                'cape'
+            ])
+            params['forecast_hours'] = 1  # Just current hour
+        
+        return self.endpoints['gfs'], params, 15
+    
+    def _parse_gfs(self, data: Dict, include_upper_air: bool = True) -> Optional[Dict]:
+        current = data.get('current', {})
+        
+        result = {
+            'source': 'gfs',
+            'station_name': f"Adelaide (NOAA GFS)",
+            'observation_time': current.get('time'),
+            'temperature': current.get('temperature_2m'),
+            'humidity': current.get('relative_humidity_2m'),
+            'pressure': current.get('surface_pressure'),
+            'wind_speed': current.get('wind_speed_10m') * 3.6 if current.get('wind_speed_10m') else None,
+            'wind_direction': current.get('wind_direction_10m'),
+            'latitude': self.ADELAIDE_LAT,
+            'longitude': self.ADELAIDE_LON,
+            'raw_data': data
+        }
+        
+        # Add upper-air data if available
+        if include_upper_air:
+            # Start with current data
+            upper_air = {
+                'z500': current.get('geopotential_height_500hPa'),
+                't500': current.get('temperature_500hPa'),
+                't850': current.get('temperature_850hPa'),
+                'rh850': current.get('relative_humidity_850hPa'),
+                'u850': None,
+                'v850': None,
+                'u500': None,
+                'v500': None,
+                'cape': None
             }
             
-            # Also get hourly data for wind components and CAPE
-            if include_upper_air:
-                params['hourly'] = ','.join([
-                    'wind_speed_850hPa',
-                    'wind_direction_850hPa',
-                    'cape'
-                ])
-                params['forecast_hours'] = 1  # Just current hour
+            # Add hourly data if available
+            if 'hourly' in data and data['hourly'].get('time'):
+                hourly = data['hourly']
+                # Get first hour (current conditions)
+                wind_speed_850 = hourly.get('wind_speed_850hPa', [None])[0]
+                wind_dir_850 = hourly.get('wind_direction_850hPa', [None])[0] 
+                cape_val = hourly.get('cape', [None])[0]
+                
+                # Convert wind speed/direction to u/v components
+                if wind_speed_850 is not None and wind_dir_850 is not None:
+                    import math
+                    # Convert meteorological wind direction to u/v components
+                    wind_dir_rad = math.radians(wind_dir_850)
+                    upper_air['u850'] = -wind_speed_850 * math.sin(wind_dir_rad)  # Negative because wind FROM direction
+                    upper_air['v850'] = -wind_speed_850 * math.cos(wind_dir_rad)
+                
+                upper_air['cape'] = cape_val
             
-            logger.info("Fetching from GFS API...")
-            response = self.session.get(url, params=params, timeout=15)
-            response.raise_for_status()
+            result['upper_air'] = upper_air
             
-            data = response.json()
-            current = data.get('current', {})
+            # Check data completeness
+            core_vars = ['z500', 't850', 'rh850']  # Essential atmospheric profile
+            wind_vars = ['u850', 'v850']  # Wind components
             
-            result = {
-                'source': 'gfs',
-                'station_name': f"Adelaide (NOAA GFS)",
-                'observation_time': current.get('time'),
-                'temperature': current.get('temperature_2m'),
-                'humidity': current.get('relative_humidity_2m'),
-                'pressure': current.get('surface_pressure'),
-                'wind_speed': current.get('wind_speed_10m') * 3.6 if current.get('wind_speed_10m') else None,
-                'wind_direction': current.get('wind_direction_10m'),
-                'latitude': self.ADELAIDE_LAT,
-                'longitude': self.ADELAIDE_LON,
-                'raw_data': data
-            }
+            missing_core = [var for var in core_vars if upper_air[var] is None]
+            missing_wind = [var for var in wind_vars if upper_air[var] is None]
             
-            # Add upper-air data if available
-            if include_upper_air:
-                # Start with current data
-                upper_air = {
-                    'z500': current.get('geopotential_height_500hPa'),
-                    't500': current.get('temperature_500hPa'),
-                    't850': current.get('temperature_850hPa'),
-                    'rh850': current.get('relative_humidity_850hPa'),
-                    'u850': None,
-                    'v850': None,
-                    'u500': None,
-                    'v500': None,
-                    'cape': None
-                }
-                
-                # Add hourly data if available
-                if 'hourly' in data and data['hourly'].get('time'):
-                    hourly = data['hourly']
-                    # Get first hour (current conditions)
-                    wind_speed_850 = hourly.get('wind_speed_850hPa', [None])[0]
-                    wind_dir_850 = hourly.get('wind_direction_850hPa', [None])[0] 
-                    cape_val = hourly.get('cape', [None])[0]
-                    
-                    # Convert wind speed/direction to u/v components
-                    if wind_speed_850 is not None and wind_dir_850 is not None:
-                        import math
-                        # Convert meteorological wind direction to u/v components
-                        wind_dir_rad = math.radians(wind_dir_850)
-                        upper_air['u850'] = -wind_speed_850 * math.sin(wind_dir_rad)  # Negative because wind FROM direction
-                        upper_air['v850'] = -wind_speed_850 * math.cos(wind_dir_rad)
-                    
-                    upper_air['cape'] = cape_val
-                
-                result['upper_air'] = upper_air
-                
-                # Check data completeness
-                core_vars = ['z500', 't850', 'rh850']  # Essential atmospheric profile
-                wind_vars = ['u850', 'v850']  # Wind components
-                
-                missing_core = [var for var in core_vars if upper_air[var] is None]
-                missing_wind = [var for var in wind_vars if upper_air[var] is None]
-                
-                if len(missing_core) == 0 and len(missing_wind) == 0:
-                    result['data_completeness'] = 'full_profile'
-                elif len(missing_core) == 0:
-                    result['data_completeness'] = 'partial_profile'  # Core data but missing winds
-                else:
-                    result['data_completeness'] = 'surface_only'
+            if len(missing_core) == 0 and len(missing_wind) == 0:
+                result['data_completeness'] = 'full_profile'
+            elif len(missing_core) == 0:
+                result['data_completeness'] = 'partial_profile'  # Core data but missing winds
             else:
                 result['data_completeness'] = 'surface_only'
-            
-            return result
-            
-        except requests.RequestException as e:
-            logger.warning(f"GFS API request failed: {e}")
-            return None
-        except Exception as e:
-            logger.warning(f"GFS API error: {e}")
-            return None
+        else:
+            result['data_completeness'] = 'surface_only'
+        
+        return result
     
-    def _get_bom_weather(self, station: str) -> Optional[Dict]:
-        """Get weather data from BoM JSON endpoints."""
+    def _get_gfs_weather(self, include_upper_air: bool = True) -> Optional[Dict]:
+        """Get weather data directly from Open-Meteo GFS API with atmospheric profile."""
+        return self._fetch_provider_sync('gfs', include_upper_air)
+    
+    def _bom_request(self, include_upper_air: bool = True, station: str = 'adelaide_airport') -> Tuple[str, Dict, float]:
         station_id = self.ADELAIDE_STATIONS.get(station, station)
         
         # BoM JSON endpoint pattern
-        url = f"http://www.bom.gov.au/fwo/IDS60801/IDS60801.{station_id}.json"
+        return self.endpoints['bom'].format(station_id=station_id), {}, 10
+    
+    def _parse_bom(self, data: Dict, include_upper_air: bool = True) -> Optional[Dict]:
+        # Extract latest observation
+        if 'observations' in data and 'data' in data['observations']:
+            observations = data['observations']['data']
+            if observations:
+                latest = observations[0]  # Most recent observation
+                
+                return {
+                    'source': 'bom',
+                    'station_name': latest.get('name', 'Unknown'),
+                    'observation_time': latest.get('aifstime_utc'),
+                    'temperature': latest.get('air_temp'),
+                    'humidity': latest.get('rel_hum'),
+                    'pressure': latest.get('press_msl'),
+                    'wind_speed': latest.get('wind_spd_kmh'),
+                    'wind_direction': latest.get('wind_dir'),
+                    'rainfall': latest.get('rain_trace'),
+                    'latitude': latest.get('lat'),
+                    'longitude': latest.get('lon'),
+                    'raw_data': latest
+                }
         
+        logger.warning("No observation data found in BoM response")
+        return None
+    
+    def _get_bom_weather(self, station: str) -> Optional[Dict]:
+        """Get weather data from BoM JSON endpoints."""
+        url, params, timeout = self._bom_request(station=station)
         try:
             logger.info(f"Fetching BoM data from: {url}")
-            response = self.session.get(url, timeout=10)
+            response = self.session.get(url, timeout=timeout)
             response.raise_for_status()
-            
-            data = response.json()
-            
-            # Extract latest observation
-            if 'observations' in data and 'data' in data['observations']:
-                observations = data['observations']['data']
-                if observations:
-                    latest = observations[0]  # Most recent observation
-                    
-                    return {
-                        'source': 'bom',
-                        'station_name': latest.get('name', 'Unknown'),
-                        'observation_time': latest.get('aifstime_utc'),
-                        'temperature': latest.get('air_temp'),
-                        'humidity': latest.get('rel_hum'),
-                        'pressure': latest.get('press_msl'),
-                        'wind_speed': latest.get('wind_spd_kmh'),
-                        'wind_direction': latest.get('wind_dir'),
-                        'rainfall': latest.get('rain_trace'),
-                        'latitude': latest.get('lat'),
-                        'longitude': latest.get('lon'),
-                        'raw_data': latest
-                    }
-            
-            logger.warning("No observation data found in BoM response")
-            return None
+            return self._parse_bom(response.json())
             
         except requests.RequestException as e:
             logger.warning(f"BoM request failed: {e}")
@@ -360,47 +499,34 @@ class WeatherApiClient:
             logger.warning(f"BoM data parsing failed: {e}")
             return None
     
+    def _bom_api_request(self, include_upper_air: bool = True) -> Tuple[str, Dict, float]:
+        # This would use official BoM API endpoints if you have access
+        # Format depends on your specific API access
+        params = {
+            'location': 'adelaide',
+            'api_key': self.api_keys.get('bom_api_key')
+        }
+        return self.endpoints['bom_api'], params, 10
+    
+    def _parse_bom_api(self, data: Dict, include_upper_air: bool = True) -> Optional[Dict]:
+        # Convert to our standard format
+        return {
+            'source': 'bom_api',
+            'station_name': data.get('station_name', 'Adelaide'),
+            'observation_time': data.get('observation_time'),
+            'temperature': data.get('temperature'),
+            'humidity': data.get('humidity'),
+            'pressure': data.get('pressure'),
+            'wind_speed': data.get('wind_speed'),
+            'wind_direction': data.get('wind_direction'),
+            'latitude': self.ADELAIDE_LAT,
+            'longitude': self.ADELAIDE_LON,
+            'raw_data': data
+        }
+    
     def _get_bom_api_weather(self) -> Optional[Dict]:
         """Get weather data from official BoM API if available."""
-        try:
-            # This would use official BoM API endpoints if you have access
-            # Format depends on your specific API access
-            api_key = self.api_keys.get('bom_api_key')
-            
-            # Example endpoint (adjust based on your actual API access)
-            url = f"https://api.weather.bom.gov.au/v1/observations/current"
-            params = {
-                'location': 'adelaide',
-                'api_key': api_key
-            }
-            
-            logger.info("Fetching from BoM API...")
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Convert to our standard format
-            return {
-                'source': 'bom_api',
-                'station_name': data.get('station_name', 'Adelaide'),
-                'observation_time': data.get('observation_time'),
-                'temperature': data.get('temperature'),
-                'humidity': data.get('humidity'),
-                'pressure': data.get('pressure'),
-                'wind_speed': data.get('wind_speed'),
-                'wind_direction': data.get('wind_direction'),
-                'latitude': self.ADELAIDE_LAT,
-                'longitude': self.ADELAIDE_LON,
-                'raw_data': data
-            }
-            
-        except requests.RequestException as e:
-            logger.warning(f"BoM API request failed: {e}")
-            return None
-        except Exception as e:
-            logger.warning(f"BoM API error: {e}")
-            return None
+        return self._fetch_provider_sync('bom_api')
     
     def _get_fallback_weather(self) -> Optional[Dict]:
         """Get weather data from fallback providers."""
@@ -416,79 +542,65 @@ class WeatherApiClient:
         logger.warning("No fallback weather APIs configured")
         return None
     
+    def _openweathermap_request(self, include_upper_air: bool = True) -> Tuple[str, Dict, float]:
+        params = {
+            'lat': self.ADELAIDE_LAT,
+            'lon': self.ADELAIDE_LON,
+            'appid': self.api_keys['openweathermap'],
+            'units': 'metric'
+        }
+        return self.endpoints['openweathermap'], params, 10
+    
+    def _parse_openweathermap(self, data: Dict, include_upper_air: bool = True) -> Optional[Dict]:
+        return {
+            'source': 'openweathermap',
+            'station_name': f"Adelaide ({data.get('name', 'Unknown')})",
+            'observation_time': datetime.fromtimestamp(data['dt'], tz=timezone.utc).isoformat(),
+            'temperature': data['main']['temp'],
+            'humidity': data['main']['humidity'],
+            'pressure': data['main']['pressure'],
+            'wind_speed': data.get('wind', {}).get('speed', 0) * 3.6,  # Convert m/s to km/h
+            'wind_direction': data.get('wind', {}).get('deg'),
+            'latitude': data['coord']['lat'],
+            'longitude': data['coord']['lon'],
+            'raw_data': data
+        }
+    
     def _get_openweather_data(self) -> Optional[Dict]:
         """Get weather data from OpenWeatherMap."""
-        try:
-            api_key = self.api_keys['openweathermap']
-            url = "http://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'lat': self.ADELAIDE_LAT,
-                'lon': self.ADELAIDE_LON,
-                'appid': api_key,
-                'units': 'metric'
-            }
-            
-            logger.info("Fetching from OpenWeatherMap...")
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            return {
-                'source': 'openweathermap',
-                'station_name': f"Adelaide ({data.get('name', 'Unknown')})",
-                'observation_time': datetime.fromtimestamp(data['dt'], tz=timezone.utc).isoformat(),
-                'temperature': data['main']['temp'],
-                'humidity': data['main']['humidity'],
-                'pressure': data['main']['pressure'],
-                'wind_speed': data.get('wind', {}).get('speed', 0) * 3.6,  # Convert m/s to km/h
-                'wind_direction': data.get('wind', {}).get('deg'),
-                'latitude': data['coord']['lat'],
-                'longitude': data['coord']['lon'],
-                'raw_data': data
-            }
-            
-        except Exception as e:
-            logger.warning(f"OpenWeatherMap error: {e}")
-            return None
+        return self._fetch_provider_sync('openweathermap')
+    
+    def _weatherapi_request(self, include_upper_air: bool = True) -> Tuple[str, Dict, float]:
+        params = {
+            'key': self.api_keys['weatherapi'],
+            'q': f"{self.ADELAIDE_LAT},{self.ADELAIDE_LON}",
+            'aqi': 'no'
+        }
+        return self.endpoints['weatherapi'], params, 10
+    
+    def _parse_weatherapi(self, data: Dict, include_upper_air: bool = True) -> Optional[Dict]:
+        current = data['current']
+        location = data['location']
+        
+        return {
+            'source': 'weatherapi',
+            'station_name': f"Adelaide ({location['name']})",
+            'observation_time': current['last_updated'],
+            'temperature': current['temp_c'],
+            'humidity': current['humidity'],
+            'pressure': current['pressure_mb'],
+            'wind_speed': current['wind_kph'],
+            'wind_direction': current['wind_degree'],
+            'latitude': location['lat'],
+            'longitude': location['lon'],
+            'raw_data': data
+        }
     
     def _get_weatherapi_data(self) -> Optional[Dict]:
         """Get weather data from WeatherAPI."""
-        try:
-            api_key = self.api_keys['weatherapi']
-            url = "http://api.weatherapi.com/v1/current.json"
-            params = {
-                'key': api_key,
-                'q': f"{self.ADELAIDE_LAT},{self.ADELAIDE_LON}",
-                'aqi': 'no'
-            }
-            
-            logger.info("Fetching from WeatherAPI...")
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            current = data['current']
-            location = data['location']
-            
-            return {
-                'source': 'weatherapi',
-                'station_name': f"Adelaide ({location['name']})",
-                'observation_time': current['last_updated'],
-                'temperature': current['temp_c'],
-                'humidity': current['humidity'],
-                'pressure': current['pressure_mb'],
-                'wind_speed': current['wind_kph'],
-                'wind_direction': current['wind_degree'],
-                'latitude': location['lat'],
-                'longitude': location['lon'],
-                'raw_data': data
-            }
-            
-        except Exception as e:
-            logger.warning(f"WeatherAPI error: {e}")
-            return None
+        return self._fetch_provider_sync('weatherapi')
     
+
     def convert_to_era5_format(self, weather_data: Dict) -> Optional[Dict]:
         """Convert weather API data to ERA5-like format for our model."""
         if not weather_data:
@@ -658,21 +770,18 @@ class WeatherApiClient:
         return True
     
     def get_forecast_ready_data(self) -> Optional[Dict]:
-        """Get current weather data in format ready for forecasting."""
-        # Get current weather
-        current_weather = self.get_current_weather()
+        """Get current weather data in format ready for forecasting.
+        
+        Providers are raced by the hedged fetch engine; the returned ERA5 data
+        has already been converted and has passed validate_data_quality, and is
+        served from cache for cache_ttl_s seconds.
+        """
+        current_weather, era5_data = self._run_sync(self._hedged_fetch(include_upper_air=True))
         if not current_weather:
             logger.error("Failed to get current weather data")
             return None
         
-        # Convert to ERA5 format
-        era5_data = self.convert_to_era5_format(current_weather)
         if not era5_data:
-            logger.error("Failed to convert to ERA5 format")
-            return None
-        
-        # Validate data quality
-        if not self.validate_data_quality(era5_data):
             logger.error("Data quality validation failed")
             return None
         
@@ -18,6 +18,7 @@ Target: <1% corruption, verified distinct patterns across all horizons
 """
 
 import sys
+import warnings
 import numpy as np
 import pandas as pd
 import hashlib
@@ -30,6 +31,23 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def row_hashes(block: np.ndarray) -> np.ndarray:
+    """64-bit hash of each row of a 2-D block, computed column-wise.
+    
+    Values are widened to float64 (and -0.0 folded into 0.0) so equal rows
+    hash equally regardless of storage dtype. Each 64-bit word is mixed with
+    the splitmix64 finalizer and folded into an FNV-style accumulator.
+    """
+    words = (np.asarray(block, dtype=np.float64) + 0.0).view(np.uint64)
+    hashes = np.full(words.shape[0], 0xcbf29ce484222325, dtype=np.uint64)
+    for column in range(words.shape[1]):
+        z = words[:, column] + np.uint64(0x9e3779b97f4a7c15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+        z ^= z >> np.uint64(31)
+        hashes = (hashes ^ z) * np.uint64(0x100000001b3)
+    return hashes
+
 class TemporalVerificationSystem:
     """Comprehensive temporal verification for Adelaide Weather Forecasting System."""
     
@@ -58,8 +76,13 @@ class TemporalVerificationSystem:
             'min_valid_data_percentage': 99.0,  # Min % of valid data required
             'max_zero_percentage': 5.0,  # Max % of zeros acceptable
             'min_uniqueness_ratio': 0.95,  # Min ratio of unique patterns
-            'max_shift_correlation': 0.999  # Max correlation for shift detection
+            'max_shift_correlation': 0.999,  # Max correlation for shift detection
+            'max_duplicate_row_fraction': 0.01  # Max fraction of rows repeated in another horizon
         }
+        
+        # Streaming cross-horizon analysis
+        self.chunk_rows = 65536  # Rows per chunk when sweeping outcomes archives
+        self.max_shift_lag = 8   # Row lags checked either way (8 x 6h = 48h)
     
     def calculate_file_hash(self, filepath: Path) -> str:
         """Calculate SHA-256 hash of file."""
@@ -79,7 +102,7 @@ class TemporalVerificationSystem:
                 logger.warning(f"Missing data files for {horizon}")
                 return None
             
-            outcomes = np.load(outcomes_path)
+            outcomes = np.load(outcomes_path, mmap_mode='r')
             metadata = pd.read_parquet(metadata_path)
             
             logger.debug(f"Loaded {horizon}: outcomes={outcomes.shape}, metadata={len(metadata)}")
@@ -241,16 +264,98 @@ class TemporalVerificationSystem:
         
         return max(0.0, min(100.0, score))
     
+    def _scan_horizon(self, outcomes: np.ndarray) -> Dict[str, Any]:
+        """One chunked pass over a horizon: file-content hash, row hashes and offsets."""
+        n_rows = outcomes.shape[0]
+        sha256 = hashlib.sha256()
+        hashes = np.empty(n_rows, dtype=np.uint64)
+        complete = np.empty(n_rows, dtype=bool)
+        
+        for start in range(0, n_rows, self.chunk_rows):
+            block = np.ascontiguousarray(outcomes[start:start + self.chunk_rows])
+            sha256.update(memoryview(block).cast('B'))
+            hashes[start:start + len(block)] = row_hashes(block)
+            complete[start:start + len(block)] = np.isfinite(block).all(axis=1)
+        
+        # Per-column reference values keep the running sums well conditioned
+        head = np.asarray(outcomes[:min(n_rows, 4096)], dtype=np.float64)
+        offsets = np.zeros(outcomes.shape[1])
+        if len(head):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN columns
+                offsets = np.nan_to_num(np.nanmean(head, axis=0))
+        
+        # Sorted hashes of complete rows: 8 bytes per row kept for the pair checks
+        hashes = hashes[complete]
+        hashes.sort()
+        
+        return {
+            'sha256': sha256.hexdigest(),
+            'row_hashes': hashes,
+            'offsets': offsets
+        }
+    
+    def _lagged_correlations(self, x: np.ndarray, y: np.ndarray, lags: np.ndarray,
+                             x_offsets: np.ndarray, y_offsets: np.ndarray) -> np.ndarray:
+        """Per-column correlations of x[i] with y[i + lag] over the whole archive.
+        
+        Streams x in chunks (with a lag-wide halo of y) and accumulates
+        pairwise-finite running sums, so memory is bounded by the chunk size.
+        
+        Returns:
+            Array of shape (len(lags), n_columns); NaN where undefined
+        """
+        n_x, n_y = x.shape[0], y.shape[0]
+        n_columns = min(x.shape[1], y.shape[1])
+        max_lag = int(np.max(np.abs(lags))) if len(lags) else 0
+        # count, sum_x, sum_y, sum_xx, sum_yy, sum_xy per lag and column
+        sums = np.zeros((6, len(lags), n_columns))
+        
+        for start in range(0, n_x, self.chunk_rows):
+            stop = min(start + self.chunk_rows, n_x)
+            x_block = np.asarray(x[start:stop, :n_columns], dtype=np.float64) - x_offsets[:n_columns]
+            y_low, y_high = max(0, start - max_lag), min(n_y, stop + max_lag)
+            y_block = np.asarray(y[y_low:y_high, :n_columns], dtype=np.float64) - y_offsets[:n_columns]
+            complete = np.isfinite(x_block).all() and np.isfinite(y_block).all()
+            
+            for li, lag in enumerate(lags):
+                first, last = max(start, -lag), min(stop, n_y - lag)
+                if last <= first:
+                    continue
+                xs = x_block[first - start:last - start]
+                ys = y_block[first + lag - y_low:last + lag - y_low]
+                if complete:
+                    valid_count = np.full(n_columns, last - first)
+                else:
+                    valid = np.isfinite(xs) & np.isfinite(ys)
+                    xs, ys = np.where(valid, xs, 0.0), np.where(valid, ys, 0.0)
+                    valid_count = valid.sum(axis=0)
+                sums[:, li] += (valid_count, xs.sum(axis=0), ys.sum(axis=0),
+                                (xs * xs).sum(axis=0), (ys * ys).sum(axis=0), (xs * ys).sum(axis=0))
+        
+        count, sum_x, sum_y, sum_xx, sum_yy, sum_xy = sums
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = count * sum_xy - sum_x * sum_y
+            variance = (count * sum_xx - sum_x ** 2) * (count * sum_yy - sum_y ** 2)
+            correlation = covariance / np.sqrt(variance)
+        correlation[(count < 2) | ~(variance > 0)] = np.nan
+        return correlation
+    
     def detect_cross_horizon_duplication(self, all_outcomes: Dict[str, np.ndarray]) -> Dict[str, Any]:
-        """Detect duplication and shifting patterns across horizons."""
+        """Detect duplication and shifting patterns across horizons.
+        
+        Streams every outcomes array (memory-mapped when loaded via
+        load_horizon_data) in chunks of self.chunk_rows: content hashes, exact
+        duplicate rows via row hashes, and per-column correlations at lags of
+        up to +/- self.max_shift_lag rows over the entire archive.
+        """
         logger.info("🔍 Detecting cross-horizon duplication patterns...")
         
+        present = [h for h in self.horizons if h in all_outcomes]
+        scans = {h: self._scan_horizon(all_outcomes[h]) for h in present}
+        
         # File hash analysis
-        hashes = {}
-        for horizon in self.horizons:
-            if horizon in all_outcomes:
-                outcomes_bytes = all_outcomes[horizon].tobytes()
-                hashes[horizon] = hashlib.sha256(outcomes_bytes).hexdigest()
+        hashes = {h: scan['sha256'] for h, scan in scans.items()}
         
         # Group by hash to find identical files
         hash_groups = {}
@@ -261,41 +366,62 @@ class TemporalVerificationSystem:
         
         identical_groups = [group for group in hash_groups.values() if len(group) > 1]
         
-        # Correlation matrix
+        # Correlation matrix, per-column correlations, shifts and duplicate rows
         correlation_matrix = {}
+        column_correlations = {}
         shift_patterns = {}
+        duplicate_rows = {}
+        lags = np.array([lag for lag in range(-self.max_shift_lag, self.max_shift_lag + 1)])
+        shift_lags = lags != 0
         
-        for i, h1 in enumerate(self.horizons):
-            if h1 not in all_outcomes:
-                continue
-            
+        for i, h1 in enumerate(present):
             correlation_matrix[h1] = {}
+            column_correlations[h1] = {}
             shift_patterns[h1] = {}
+            duplicate_rows[h1] = {}
             
-            for j, h2 in enumerate(self.horizons):
-                if h2 not in all_outcomes or i >= j:
-                    continue
+            for h2 in present[i + 1:]:
+                correlations = self._lagged_correlations(
+                    all_outcomes[h1], all_outcomes[h2], lags,
+                    scans[h1]['offsets'], scans[h2]['offsets'])
+                direct = correlations[lags == 0][0]
                 
-                # Direct correlation (z500 column, first 1000 rows)
-                n_check = min(1000, all_outcomes[h1].shape[0], all_outcomes[h2].shape[0])
-                direct_corr = np.corrcoef(
-                    all_outcomes[h1][:n_check, 0], 
-                    all_outcomes[h2][:n_check, 0]
-                )[0, 1]
+                # Direct correlation (z500 column, whole archive)
+                correlation_matrix[h1][h2] = float(direct[0])
+                column_correlations[h1][h2] = {
+                    var: float(direct[c]) for c, var in enumerate(self.variables[:len(direct)])
+                }
                 
-                correlation_matrix[h1][h2] = float(direct_corr)
+                # Shift pattern detection: a shifted copy correlates on every column
+                defined = ~np.isnan(correlations)
+                worst_column = np.where(defined.any(axis=1),
+                                        np.where(defined, correlations, np.inf).min(axis=1), np.nan)
+                shifted = np.where(shift_lags, worst_column, np.nan)
+                if np.isnan(shifted).all():
+                    best = int(np.flatnonzero(shift_lags)[0])
+                else:
+                    best = int(np.nanargmax(shifted))
+                shift_corr = shifted[best]
+                shift_patterns[h1][h2] = {
+                    'lag_rows': int(lags[best]),
+                    'correlation': float(shift_corr),
+                    'lag_correlations': {int(lag): float(worst_column[li])
+                                         for li, lag in enumerate(lags) if lag != 0},
+                    'is_shifted': bool(shift_corr > self.thresholds['max_shift_correlation'])
+                }
                 
-                # Shift pattern detection
-                if n_check > 1:
-                    shift_corr = np.corrcoef(
-                        all_outcomes[h1][:n_check-1, 0],
-                        all_outcomes[h2][1:n_check, 0]
-                    )[0, 1]
-                    
-                    shift_patterns[h1][h2] = {
-                        'correlation': float(shift_corr),
-                        'is_shifted': shift_corr > self.thresholds['max_shift_correlation']
-                    }
+                # Exact duplicate rows (complete rows only)
+                ours, theirs = scans[h1]['row_hashes'], scans[h2]['row_hashes']
+                n_complete = len(ours)
+                if len(theirs):
+                    positions = np.minimum(np.searchsorted(theirs, ours), len(theirs) - 1)
+                    shared = theirs[positions] == ours
+                else:
+                    shared = np.zeros(n_complete, dtype=bool)
+                duplicate_rows[h1][h2] = {
+                    'count': int(shared.sum()),
+                    'fraction': float(shared.sum() / n_complete) if n_complete else 0.0
+                }
         
         # Analysis results
         high_correlations = []
@@ -318,17 +444,29 @@ class TemporalVerificationSystem:
                         'horizon1': h1,
                         'horizon2': h2,
                         'shift_correlation': shift_data['correlation'],
-                        'pattern': f"{h1} appears to be shifted copy of {h2}"
+                        'lag_rows': shift_data['lag_rows'],
+                        'pattern': f"{h1} appears to be shifted copy of {h2} "
+                                   f"({shift_data['lag_rows']:+d} rows)"
                     })
         
+        duplicated_rows = []
+        for h1, pairs in duplicate_rows.items():
+            for h2, dup_data in pairs.items():
+                if dup_data['fraction'] > self.thresholds['max_duplicate_row_fraction']:
+                    duplicated_rows.append({'horizon1': h1, 'horizon2': h2, **dup_data})
+        
         result = {
             'file_hashes': hashes,
             'identical_groups': identical_groups,
             'correlation_matrix': correlation_matrix,
+            'column_correlations': column_correlations,
             'shift_patterns': shift_patterns,
+            'duplicate_rows': duplicate_rows,
+            'rows_analyzed': {h: int(all_outcomes[h].shape[0]) for h in present},
             'high_correlations': high_correlations,
             'shift_detections': shift_detections,
-            'duplication_detected': len(identical_groups) > 0 or len(high_correlations) > 0,
+            'duplicated_rows': duplicated_rows,
+            'duplication_detected': len(identical_groups) > 0 or len(high_correlations) > 0 or len(duplicated_rows) > 0,
             'shifting_detected': len(shift_detections) > 0
         }
         
@@ -350,7 +488,13 @@ class TemporalVerificationSystem:
                 logger.error(f"   - {shift_data['pattern']}: "
                            f"correlation={shift_data['shift_correlation']:.6f}")
         
-        if not (identical_groups or high_correlations or shift_detections):
+        if duplicated_rows:
+            logger.error("❌ DUPLICATE ROWS DETECTED:")
+            for dup_data in duplicated_rows:
+                logger.error(f"   - {dup_data['horizon1']} vs {dup_data['horizon2']}: "
+                           f"{dup_data['count']:,} rows ({dup_data['fraction']:.2%})")
+        
+        if not (identical_groups or high_correlations or shift_detections or duplicated_rows):
             logger.info("✅ No duplication or shifting patterns detected")
         
         return result
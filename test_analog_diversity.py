@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for temporally de-duplicated analog retrieval.
+
+Uses a real FlatIP index over synthetic embeddings where each "event" is a run
+of consecutive 6-hourly states with almost identical embeddings.
+"""
+
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from core.analog_diversity import TemporalDiversityFilter, select_temporally_diverse
+from core.analog_quality_validator import AnalogQualityValidator
+
+
+def make_corpus(events=200, steps=8, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(events, dim)).astype(np.float32)
+    embeddings = np.repeat(centers, steps, axis=0) + 0.01 * rng.normal(size=(events * steps, dim)).astype(np.float32)
+    faiss.normalize_L2(embeddings)
+    index = faiss.IndexFlatIP(dim)
+    index.add(embeddings)
+    # Events are 10 days apart, steps within an event 6 hours apart
+    times = [pd.Timestamp('2010-01-01') + pd.Timedelta(days=10 * e, hours=6 * s)
+             for e in range(events) for s in range(steps)]
+    metadata = pd.DataFrame({'init_time': times})
+    return index, embeddings, metadata
+
+
+def test_selection_keeps_best_ranked_candidates_apart():
+    epochs = np.array([0, 6, 12, 100, 106, 300], dtype=np.int64) * 3600
+    similarities = np.array([0.99, 0.98, 0.97, 0.96, 0.95, 0.5], dtype=np.float32)
+    indices = np.array([1, 0, 2, 3, 4, -1])
+
+    selected, examined = select_temporally_diverse(similarities, indices, epochs, 3, 24 * 3600)
+
+    assert indices[selected].tolist() == [1, 3]  # The -1 padding is never selected
+    assert examined == 4
+
+
+def test_filter_returns_k_diverse_analogs_in_rank_order():
+    index, embeddings, metadata = make_corpus()
+    diversity = TemporalDiversityFilter(min_separation_hours=48, initial_overfetch=2)
+    diversity.set_metadata(24, metadata)
+
+    query = embeddings[[0]] + 0.001
+    faiss.normalize_L2(query)
+    similarities, indices = diversity.search(index, query, 24, k=20)
+
+    times = metadata['init_time'].to_numpy()[indices]
+    gaps = np.abs(times[:, None] - times[None, :]) + np.eye(20) * np.timedelta64(1000, 'D')
+    assert len(indices) == 20
+    assert gaps.min() >= np.timedelta64(48, 'h')
+    assert np.all(np.diff(similarities) <= 0)
+    # Each event contributes one analog, so the over-fetch factor had to widen
+    assert diversity.stats['widened'] >= 1
+    assert diversity.get_stats()['overfetch'][24] > 2
+
+
+def test_vectorized_temporal_distribution_ignores_padding():
+    _, _, metadata = make_corpus(events=10)
+    validator = AnalogQualityValidator()
+
+    result = validator._analyze_temporal_distribution(np.array([0, 8, 16, -1, 10_000]), metadata)
+
+    assert result['span_hours'] == 20 * 24
+    assert result['clustering_score'] == 0.0
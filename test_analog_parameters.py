@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline analog parameter optimizer and the hot-loaded
+parameter store used by RealTimeAnalogForecaster.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from core.analog_forecaster import RealTimeAnalogForecaster
+from core.analog_parameters import AnalogParameterStore, season_of, write_parameters
+from core.calibration_engine import weighted_crps
+from scripts.evaluate_system import HindcastEngine
+from scripts.optimize_analog_parameters import ParameterOptimizer, build_document
+
+
+def make_hindcast(rng, n_queries=400, k=50, informative=8):
+    """Ensembles whose first `informative` analogs are much closer to the truth."""
+    distances = np.sort(rng.uniform(0.05, 0.6, size=(n_queries, k)), axis=1)
+    truth = rng.normal(285, 5, size=(n_queries, 9))
+    noise = np.where(np.arange(k)[None, :, None] < informative, 0.3, 6.0)
+    members = truth[:, None, :] + noise * rng.standard_normal((n_queries, k, 9))
+    valid = pd.date_range('2019-01-01', periods=n_queries, freq='1D').astype('datetime64[ns]').asi8
+    return distances, members, truth, valid
+
+
+def test_grid_matches_per_query_ensembles():
+    rng = np.random.default_rng(0)
+    distances, members, truth, _ = make_hindcast(rng, n_queries=60, k=20)
+    members[0, :3, 1] = 0.0           # Missing t2m members are dropped
+    members[1, :12, 2] = 0.0          # Too few valid t850 members at k=20
+    truth[2, 4] = np.nan
+    engine = HindcastEngine(k=20)
+    optimizer = ParameterOptimizer(engine, taus=[0.05, 0.3], ks=[10, 20])
+
+    mask = optimizer.scored_mask(members, truth, [10, 20])
+    assert not mask[1, 2] and not mask[2, 4] and mask[0, 1]
+    groups = np.arange(60) % 2
+    sums = optimizer.grid_crps(distances, members, truth, mask, groups, 2, [0.05, 0.3], [10, 20])
+
+    for i, tau in enumerate([0.05, 0.3]):
+        for j, k in enumerate([10, 20]):
+            engine.forecaster.temperature_params[24] = tau
+            ensemble = engine.ensemble_forecast(members[:, :k], engine.analog_weights(distances[:, :k], 24))
+            crps = weighted_crps(np.moveaxis(ensemble['members'], 2, 1),
+                                 np.moveaxis(ensemble['weights'], 2, 1), np.nan_to_num(truth))
+            for g in range(2):
+                expected = np.where(mask, crps, 0.0)[groups == g].sum(axis=0)
+                np.testing.assert_allclose(sums[i, j, g], expected, rtol=1e-10)
+
+
+def test_fit_prefers_fewer_sharper_analogs_when_they_are_better():
+    rng = np.random.default_rng(1)
+    distances, members, truth, valid = make_hindcast(rng, n_queries=730)
+    # The informative analogs are also the closest ones
+    distances[:, :8] -= 0.05
+    optimizer = ParameterOptimizer(HindcastEngine(k=50), min_season_rows=150)
+
+    entry = optimizer.fit_horizon(24, distances, members, truth, valid)
+
+    assert entry['k'] <= 15 and entry['relative_crps'] < 0.8
+    assert entry['default'] == {'tau': 0.2, 'k': 50}
+    assert set(entry['seasons']) == {'DJF', 'MAM', 'JJA', 'SON'}
+    assert all(season['relative_crps'] < 1.0 for season in entry['seasons'].values())
+
+    document = build_document({24: entry}, {'outcomes_24h.npy': 'abc'}, {})
+    assert document['horizons']['24']['k'] == entry['k'] and document['version'].endswith(
+        build_document({24: entry}, {}, {})['version'][-8:])
+
+
+def test_forecaster_hot_loads_season_parameters(tmp_path):
+    path = tmp_path / 'analog_parameters.json'
+    store = AnalogParameterStore(path, check_interval=0.0)
+    forecaster = RealTimeAnalogForecaster(tmp_path, parameter_store=store)
+    assert forecaster.analog_parameters(24) == (0.2, 50)  # No file yet: defaults
+
+    write_parameters(path, {'format_version': 1, 'version': 'v1', 'horizons': {
+        '24': {'tau': 0.05, 'k': 12, 'seasons': {'JJA': {'tau': 0.4, 'k': 30}}},
+        '48': {'tau': 0.5, 'k': 3}}})
+    assert forecaster.analog_parameters(24) == (0.05, 12)
+    assert forecaster.analog_parameters(24, pd.Timestamp('2024-07-01')) == (0.4, 30)
+    assert forecaster.analog_parameters(48) == (0.5, forecaster.min_analogs)
+    assert season_of(12) == 'DJF' and season_of(2) == 'DJF' and season_of(11) == 'SON'
+
+    # Only the first k analogs are gathered and weighted
+    outcomes = np.random.default_rng(2).normal(285, 3, size=(100, 9))
+    forecaster.outcomes_cache[24], forecaster.metadata_cache[24] = outcomes, pd.DataFrame()
+    result = forecaster.generate_forecast({'indices': np.arange(50), 'distances': np.linspace(0.1, 0.5, 50),
+                                           'init_time': pd.Timestamp('2024-01-10')}, 24)
+    assert result.ensemble_size == 12
+    assert result.variables['t2m'] == pytest.approx(np.average(
+        outcomes[:12, 1], weights=forecaster.compute_analog_weights(np.linspace(0.1, 0.5, 50)[:12], 24, 0.05)))
+    assert result.members.shape == (12, 9) and result.weights.shape == (12,)
+    assert np.allclose(result.members, outcomes[:12])
+
+    # Invalid rewrites are ignored; valid ones replace the parameters
+    path.write_text(json.dumps({'format_version': 1, 'horizons': {'24': {'tau': -1, 'k': 5}}}))
+    os.utime(path, ns=(1, 1))
+    assert forecaster.analog_parameters(24) == (0.05, 12) and store.version == 'v1'
+    write_parameters(path, {'format_version': 1, 'version': 'v2', 'horizons': {'24': {'tau': 0.3, 'k': 20}}})
+    assert forecaster.analog_parameters(24) == (0.3, 20) and store.version == 'v2'
+
+
+def test_fit_uses_validation_year_and_evaluation_scores_served_kernel(tmp_path):
+    times = pd.date_range('2015-01-01', '2019-12-31 18:00', freq='6h')
+    rng = np.random.default_rng(3)
+    phase = 2 * np.pi * np.arange(len(times)) / 37.0 + rng.normal(0, 0.05, len(times))
+    embeddings = np.stack([np.cos(phase), np.sin(phase)], axis=1).astype(np.float32)
+    outcomes = np.column_stack([np.full(len(times), 5500.0), 290 + 8 * np.sin(phase)]
+                               + [np.cos(phase)] * 7)
+    valid = times + pd.Timedelta(hours=24)
+    optimizer = ParameterOptimizer(HindcastEngine(k=10), taus=[0.05, 0.5], ks=[5, 10],
+                                   by_season=False, refine_steps=0)
+
+    entry = optimizer.optimize_horizon(24, embeddings, times, outcomes, times, valid)
+    assert entry['rows'] == np.sum((times >= '2018-01-01') & (valid < '2019-01-01'))
+
+    # Evaluation-period outcomes cannot change the fit
+    scrambled = outcomes.copy()
+    held_out = times >= '2018-12-31'
+    scrambled[held_out] = rng.permutation(scrambled[held_out])
+    assert optimizer.optimize_horizon(24, embeddings, times, scrambled, times, valid) == entry
+
+    # The hindcast scores the kernel the forecaster serves
+    path = tmp_path / 'analog_parameters.json'
+    write_parameters(path, {'format_version': 1, 'version': 'v1',
+                            'horizons': {'24': {'tau': 0.05, 'k': 5}}})
+    forecaster = RealTimeAnalogForecaster(tmp_path, parameter_store=AnalogParameterStore(path, 0.0))
+    forecaster.min_analogs = 1
+    report = HindcastEngine(k=10, forecaster=forecaster).evaluate_horizon(
+        24, embeddings, times, outcomes, times, valid, end=pd.Timestamp('2019-03-31'))
+    default = HindcastEngine(k=10).evaluate_horizon(
+        24, embeddings, times, outcomes, times, valid, end=pd.Timestamp('2019-03-31'))
+    assert report['analog_k'] == [5] and report['analog_tau'] == [0.05]
+    assert default['analog_k'] == [10]
+    assert report['analog_forecaster']['t2m']['crps'] != default['analog_forecaster']['t2m']['crps']
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared artifact digest service used by the startup validators.
+"""
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from core import artifact_digests
+from core.artifact_digests import ArtifactDigestService
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    path = tmp_path / "best_model.pt"
+    path.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+    return path
+
+
+def test_digests_match_hashlib_and_persist_across_instances(tmp_path, artifact):
+    cache_path = tmp_path / "digests.json"
+    service = ArtifactDigestService(cache_path, chunk_size=1024 * 1024)
+    data = artifact.read_bytes()
+
+    digests = service.digests(artifact, ("sha256", "blake2b"))
+    assert digests == {"sha256": hashlib.sha256(data).hexdigest(),
+                       "blake2b": hashlib.blake2b(data).hexdigest()}
+    assert service.stats["misses"] == 1  # Both algorithms in one read pass
+
+    restarted = ArtifactDigestService(cache_path)
+    assert restarted.digest(artifact) == digests["sha256"]
+    assert restarted.stats == {"hits": 1, "misses": 0, "bytes_hashed": 0}
+
+
+def test_changed_files_are_rehashed(tmp_path, artifact):
+    service = ArtifactDigestService(tmp_path / "digests.json")
+    first = service.digest(artifact)
+
+    with open(artifact, "ab") as f:
+        f.write(b"tampered")
+    assert service.digest(artifact) == hashlib.sha256(artifact.read_bytes()).hexdigest() != first
+    assert service.stats["misses"] == 2
+
+
+def test_validators_share_one_hash_per_artifact(tmp_path, artifact, monkeypatch):
+    from core.version_stamping_system import VersionStampingSystem
+
+    service = ArtifactDigestService(tmp_path / "digests.json", max_workers=2)
+    monkeypatch.setattr(artifact_digests, "_service", service)
+    other = tmp_path / "faiss_24h_flatip.faiss"
+    other.write_bytes(os.urandom(1024))
+
+    assert set(service.digest_many([artifact, other, tmp_path / "missing.faiss"])) == {str(artifact), str(other)}
+
+    stamping = VersionStampingSystem.__new__(VersionStampingSystem)
+    checksum, size = stamping._calculate_file_checksum(artifact)
+    assert (checksum, size) == (service.digest(artifact), artifact.stat().st_size)
+    assert service.stats["misses"] == 2
+
+
+def test_integrity_checks_never_trust_persisted_digests(tmp_path, artifact):
+    cache_path = tmp_path / "digests.json"
+    ArtifactDigestService(cache_path).digest(artifact)
+    assert cache_path.stat().st_mode & 0o777 == 0o600
+
+    # Plant a digest for the artifact's current stat signature
+    import json
+    payload = json.loads(cache_path.read_text())
+    payload["entries"][str(artifact)]["digests"]["sha256"] = "0" * 64
+    cache_path.write_text(json.dumps(payload))
+    os.chmod(cache_path, 0o600)
+
+    service = ArtifactDigestService(cache_path)
+    real = hashlib.sha256(artifact.read_bytes()).hexdigest()
+    assert service.digest(artifact, verify=True) == real
+    assert service.digest(artifact, verify=True) == real and service.stats["misses"] == 1  # Shared once hashed
+    assert service.digest(artifact) == real  # The planted value is gone for everyone
+
+    os.chmod(cache_path, 0o666)  # Writable by others: not loaded at all
+    assert ArtifactDigestService(cache_path)._entries == {}
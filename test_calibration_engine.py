@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized calibration engine in core/calibration_engine.py.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from core.analog_forecaster import RealTimeAnalogForecaster
+from core.calibration_engine import (
+    VARIABLES, CalibrationEngine, ForecastArchive, calibration_statistics, weighted_quantiles
+)
+
+
+def make_forecasts(rng, n, k=30, spread=1.0, start='2020-01-01', horizon=24):
+    """Ensembles whose truth is drawn from the forecast distribution (spread=1 is calibrated)."""
+    n_vars = len(VARIABLES)
+    centre = rng.normal(280, 10, size=(n, 1, n_vars))
+    members = centre + rng.normal(size=(n, k, n_vars))
+    weights = np.full((n, k), 1.0 / k)
+    truth = centre[:, 0] + rng.normal(size=(n, n_vars)) / spread
+    p05, p95 = weighted_quantiles(np.moveaxis(members, 2, 1), np.repeat(weights[:, None], n_vars, 1), (0.05, 0.95))
+    valid = pd.date_range(start, periods=n, freq='6h')
+    return {
+        'init_times': valid - pd.Timedelta(hours=horizon), 'valid_times': valid,
+        'mean': members.mean(axis=1), 'p05': p05, 'p95': p95,
+        'members': members, 'weights': weights, 'truth': truth,
+    }
+
+
+def append(archive, horizon, forecasts, rows=slice(None)):
+    archive.append(horizon, forecasts['init_times'][rows], forecasts['valid_times'][rows], VARIABLES,
+                   forecasts['mean'][rows], forecasts['p05'][rows], forecasts['p95'][rows],
+                   forecasts['members'][rows], forecasts['weights'][rows])
+
+
+def outcome_index(forecasts, rows=slice(None)):
+    epochs = forecasts['valid_times'][rows].astype('datetime64[ns]').asi8
+    return epochs, np.arange(len(epochs)), forecasts['truth'][rows]
+
+
+def test_statistics_match_per_row_definitions():
+    rng = np.random.default_rng(0)
+    forecasts = make_forecasts(rng, 40, k=12)
+    members, truth = forecasts['members'], forecasts['truth']
+    weights = rng.random((40, 12))
+    weights /= weights.sum(axis=1, keepdims=True)
+    members[0, :3, 2] = np.nan       # Missing members are dropped and weights renormalized
+    truth[1, 1] = np.nan             # Missing truth: row-variable excluded
+    thresholds = np.full(len(VARIABLES), 280.0)
+
+    stats = calibration_statistics(forecasts['mean'], forecasts['p05'], forecasts['p95'],
+                                   members, np.repeat(weights[:, :, None], len(VARIABLES), axis=2),
+                                   truth, thresholds)
+
+    for row, column in [(0, 2), (5, 0), (17, 8)]:
+        ok = np.isfinite(members[row, :, column])
+        x, w, y = members[row, ok, column], weights[row, ok] / weights[row, ok].sum(), truth[row, column]
+        crps = np.sum(w * np.abs(x - y)) - 0.5 * np.sum(np.outer(w, w) * np.abs(x[:, None] - x[None, :]))
+        assert stats['crps'][row, column] == pytest.approx(crps, abs=1e-9)
+        assert stats['pit'][row, column] == pytest.approx(np.sum(w * (x < y)))
+        assert stats['event_prob'][row, column] == pytest.approx(np.sum(w * (x > 280.0)))
+        assert stats['covered'][row, column] == (forecasts['p05'][row, column] <= y <= forecasts['p95'][row, column])
+    assert not stats['valid'][1, 1] and stats['valid'].sum() == 40 * len(VARIABLES) - 1
+
+    # Quantiles follow the real-time forecaster's rule
+    forecaster = RealTimeAnalogForecaster.__new__(RealTimeAnalogForecaster)
+    forecaster.variables = list(VARIABLES)
+    expected = forecaster.compute_ensemble_statistics(members[3], weights[3])
+    q05, q95 = weighted_quantiles(members[3].T, np.repeat(weights[3][None], len(VARIABLES), 0), (0.05, 0.95))
+    assert q05[0] == expected['z500']['q05'] and q95[8] == expected['cape']['q95']
+
+
+def test_incremental_updates_match_full_recompute(tmp_path):
+    rng = np.random.default_rng(1)
+    forecasts = make_forecasts(rng, 600)
+    full_archive, split_archive = ForecastArchive(tmp_path / 'full'), ForecastArchive(tmp_path / 'split')
+    append(full_archive, 24, forecasts)
+    append(split_archive, 24, forecasts, slice(0, 250))
+
+    full = CalibrationEngine(full_archive, event_thresholds={name: 280.0 for name in VARIABLES})
+    assert full.update_horizon(24, *outcome_index(forecasts)) == 600
+
+    state_path = tmp_path / 'state.npz'
+    split = CalibrationEngine(split_archive, state_path, event_thresholds={name: 280.0 for name in VARIABLES})
+    # Outcomes only observed up to row 199: rows 200-249 stay pending
+    assert split.update_horizon(24, *outcome_index(forecasts, slice(0, 200))) == 200
+    split.save_state()
+
+    append(split_archive, 24, forecasts, slice(250, 600))
+    resumed = CalibrationEngine(split_archive, state_path)
+    assert resumed.update_horizon(24, *outcome_index(forecasts)) == 400
+    assert resumed.update_horizon(24, *outcome_index(forecasts)) == 0  # Nothing new
+
+    expected, actual = full.report(window_days=400), resumed.report(window_days=400)
+    for name in ('t2m', 'cape'):
+        for metric in ('count', 'crps', 'rmse', 'interval_coverage', 'brier_score'):
+            assert actual['24h']['variables'][name][metric] == pytest.approx(expected['24h']['variables'][name][metric])
+        assert actual['24h']['variables'][name]['pit_histogram'] == pytest.approx(
+            expected['24h']['variables'][name]['pit_histogram'])
+
+
+def test_report_separates_calibrated_from_underdispersed(tmp_path):
+    rng = np.random.default_rng(2)
+    archive = ForecastArchive(tmp_path / 'forecasts')
+    calibrated = make_forecasts(rng, 4000, horizon=6)
+    underdispersed = make_forecasts(rng, 4000, spread=0.3, horizon=12)
+    append(archive, 6, calibrated)
+    append(archive, 12, underdispersed)
+
+    engine = CalibrationEngine(archive)
+    engine.update_horizon(6, *outcome_index(calibrated))
+    engine.update_horizon(12, *outcome_index(underdispersed))
+    report = engine.report(window_days=2000)
+
+    good, bad = report['6h']['variables']['t2m'], report['12h']['variables']['t2m']
+    assert good['interval_coverage'] == pytest.approx(0.9, abs=0.04)
+    assert bad['interval_coverage'] < 0.5
+    assert good['pit_flatness'] < 0.05 < bad['pit_flatness']
+    assert bad['pit_histogram'][0] + bad['pit_histogram'][-1] > 0.5
+    assert good['spread_skill_ratio'] == pytest.approx(1.0, abs=0.1)
+    reliability = good['reliability']
+    populated = [i for i, count in enumerate(reliability['count']) if count > 100]
+    for i in populated:
+        assert reliability['observed_frequency'][i] == pytest.approx(reliability['forecast_probability'][i], abs=0.1)
+
+    # A short rolling window only counts the latest days
+    recent = engine.report(window_days=10)['6h']['variables']['t2m']
+    assert recent['count'] == 40
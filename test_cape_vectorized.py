@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the array-native CAPE estimators in cape_calculator.py.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from cape_calculator import (
+    calculate_cape_empirical, calculate_cape_empirical_array,
+    calculate_cape_field, calculate_cape_simplified_array
+)
+
+
+def test_array_matches_scalar_across_branches():
+    # Covers stable/unstable layers, dry (<1 g/kg), moderate (<3 g/kg) and
+    # moist air, negative humidity, extreme instability (clip) and NaN inputs
+    t850 = np.array([285.0, 295.0, 300.0, 300.0, 300.0, 310.0, 260.0, np.nan, 300.0])
+    t500 = np.array([290.0, 270.0, 270.0, 270.0, 270.0, 240.0, 262.0, 260.0, 270.0])
+    q850 = np.array([0.010, 0.0005, 0.002, 0.012, -0.001, 0.020, 0.004, 0.01, np.nan])
+
+    cape = calculate_cape_empirical_array(t850, q850, t500)
+    expected = [calculate_cape_empirical(*args) for args in zip(t850, q850, t500)]
+
+    np.testing.assert_array_equal(cape[:7], expected[:7])
+    assert cape[5] == 4000.0 and 0 < cape[0] < 5.0  # Stable layer: below the floor
+    assert np.isnan(cape[7:]).all()
+
+
+def test_broadcasts_over_gridded_fields():
+    rng = np.random.default_rng(0)
+    t850 = 285 + 8 * rng.standard_normal((4, 3, 5))
+    q850 = np.abs(0.008 + 0.004 * rng.standard_normal((4, 3, 5)))
+    t500 = np.full((1, 3, 1), 262.0)  # Broadcast along time and longitude
+
+    cape = calculate_cape_simplified_array(t850, q850, t500)
+
+    assert cape.shape == (4, 3, 5) and cape.dtype == np.float64
+    expected = np.vectorize(calculate_cape_empirical)(t850, q850, np.broadcast_to(t500, t850.shape))
+    np.testing.assert_allclose(cape, expected, rtol=1e-12)
+    assert np.ndim(calculate_cape_empirical_array(300.0, 0.01, 270.0)) == 0
+
+
+def test_field_from_pressure_levels():
+    rng = np.random.default_rng(1)
+    dims = ('time', 'isobaricInhPa', 'latitude', 'longitude')
+    shape = (6, 3, 2, 2)
+    pressure = xr.Dataset(
+        {'t': (dims, 275 + 12 * rng.standard_normal(shape)),
+         'q': (dims, np.abs(0.005 + 0.004 * rng.standard_normal(shape)))},
+        coords={'time': pd.date_range('2020-01-01', periods=6, freq='6h'),
+                'isobaricInhPa': [500, 700, 850], 'latitude': [-34.5, -35.0],
+                'longitude': [138.0, 138.5]})
+
+    cape = calculate_cape_field(pressure)
+
+    assert cape.dims == ('time', 'latitude', 'longitude') and cape.name == 'cape'
+    point = pressure.isel(time=2, latitude=1, longitude=0)
+    expected = calculate_cape_empirical(float(point['t'].sel(isobaricInhPa=850)),
+                                        float(point['q'].sel(isobaricInhPa=850)),
+                                        float(point['t'].sel(isobaricInhPa=500)))
+    assert float(cape.isel(time=2, latitude=1, longitude=0)) == expected
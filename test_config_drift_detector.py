@@ -560,7 +560,56 @@ RATE_LIMIT_PER_MINUTE=60
         for file_path in excluded_files:
             self.assertFalse(self.detector._is_monitored_file(file_path),
                            f"File {file_path} should NOT be monitored")
-    
+
+    def test_incremental_snapshot_rehashes_only_changed_files(self):
+        """Test stat-cached hashing and pruning of ignored directory trees."""
+        ignored_dir = self.test_project_root / "frontend" / "node_modules" / "pkg"
+        ignored_dir.mkdir(parents=True)
+        (ignored_dir / "package.json").write_text('{"name": "pkg"}')
+
+        snapshot1 = self.detector._create_configuration_snapshot("first")
+        self.assertNotIn("frontend/node_modules/pkg/package.json", snapshot1.file_hashes)
+        self.assertEqual(snapshot1.metadata["files_rehashed"], len(snapshot1.file_hashes))
+
+        # Unchanged files are not read again
+        snapshot2 = self.detector._create_configuration_snapshot("second")
+        self.assertEqual(snapshot2.metadata["files_rehashed"], 0)
+        self.assertEqual(snapshot2.file_hashes, snapshot1.file_hashes)
+
+        with open(self.test_project_root / "configs" / "data.yaml", 'a') as f:
+            f.write("\n# Modified for testing\n")
+        snapshot3 = self.detector._create_configuration_snapshot("third")
+        self.assertEqual(snapshot3.metadata["files_rehashed"], 1)
+        self.assertNotEqual(snapshot3.file_hashes["configs/data.yaml"],
+                            snapshot1.file_hashes["configs/data.yaml"])
+
+    def test_dirty_paths_drive_incremental_snapshots(self):
+        """Test that watchdog-marked paths are the only ones re-examined while tracking."""
+        self.detector._create_configuration_snapshot("baseline")
+        self.detector._dirty_tracking = True
+        new_config = self.test_project_root / "configs" / "extra.yaml"
+        new_config.write_text("extra: true\n")
+
+        # Not yet reported by watchdog, so the incremental scan does not see it
+        snapshot = self.detector._create_configuration_snapshot("unmarked")
+        self.assertNotIn("configs/extra.yaml", snapshot.file_hashes)
+
+        self.detector._mark_dirty(str(new_config))
+        snapshot = self.detector._create_configuration_snapshot("created")
+        self.assertIn("configs/extra.yaml", snapshot.file_hashes)
+        self.assertEqual(snapshot.metadata["files_rehashed"], 1)
+
+        new_config.unlink()
+        self.detector._mark_dirty(str(new_config))
+        snapshot = self.detector._create_configuration_snapshot("deleted")
+        self.assertNotIn("configs/extra.yaml", snapshot.file_hashes)
+        self.assertEqual(self.detector.scan_stats["full_scans"], 1)
+
+        # Directory-level events fall back to a full walk
+        self.detector._mark_dirty(str(self.test_project_root / "configs"), is_directory=True)
+        self.detector._create_configuration_snapshot("directory_event")
+        self.assertEqual(self.detector.scan_stats["full_scans"], 2)
+
     def test_security_drift_detection(self):
         """Test security-related drift detection."""
         # Set up insecure environment variables
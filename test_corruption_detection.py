@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the chunked corruption statistics sweep in RuntimeGuardRails.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from core.runtime_guardrails import CorruptionType, RuntimeGuardRails
+
+
+@pytest.fixture
+def guardrails():
+    return RuntimeGuardRails(enable_gpu_monitoring=False)
+
+
+def make_outcomes():
+    rng = np.random.default_rng(0)
+    data = rng.normal(280, 20, size=(5000, 9)).astype(np.float32)
+    data[:800, 1] = np.nan
+    data[3, 3], data[4, 4] = np.inf, -np.inf
+    data[10:20] = 400.0
+    return data
+
+
+def summary(events):
+    return {event.corruption_type: event.details for event in events}
+
+
+def test_chunked_sweep_matches_single_chunk(guardrails, monkeypatch):
+    data = make_outcomes()
+    whole = summary(guardrails.detect_corruption(data, "outcome", "t2m"))
+
+    monkeypatch.setattr(RuntimeGuardRails, "CORRUPTION_CHUNK_ELEMENTS", 100)
+    chunked = summary(guardrails.detect_corruption(data, "outcome", "t2m"))
+
+    assert chunked == whole
+    assert whole[CorruptionType.INF_VALUES]["inf_count"] == 2
+    assert whole[CorruptionType.RANGE_VIOLATION]["violation_count"] >= 90
+    assert whole[CorruptionType.RANGE_VIOLATION]["data_max"] == 400.0
+
+
+def test_memmapped_arrays_are_scanned_without_loading(guardrails, tmp_path):
+    path = tmp_path / "outcomes.npy"
+    np.save(path, make_outcomes())
+    mapped = np.load(path, mmap_mode="r")
+
+    events = guardrails.detect_corruption(mapped, "outcome", "t2m")
+
+    assert isinstance(mapped, np.memmap)
+    assert summary(events) == summary(guardrails.detect_corruption(make_outcomes(), "outcome", "t2m"))
+
+
+def test_sampled_scan_reports_error_bound(guardrails):
+    data = np.ones((20000, 16), dtype=np.float32)
+    data[::2] = 0.0  # Half the rows are zero
+
+    stats = guardrails._scan_corruption_statistics(data, "embedding", sample_rows=4000)
+    sampling = stats["sampling"]
+    zero_fraction = stats["zero_count"] / stats["elements"]
+
+    assert stats["elements"] == 4000 * 16
+    assert sampling["total_rows"] == 20000
+    assert sampling["fraction_error_bound"] == pytest.approx(np.sqrt(np.log(200) / 8000))
+    assert abs(zero_fraction - 0.5) <= sampling["fraction_error_bound"]
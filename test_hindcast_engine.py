@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized hindcast engine in scripts/evaluate_system.py.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from scripts.evaluate_system import TRAIN_END, HindcastEngine, SystemEvaluator, epochs_ns, weighted_crps
+
+
+def test_weighted_crps_matches_pairwise_definition():
+    rng = np.random.default_rng(0)
+    members = rng.normal(size=(40, 12))
+    weights = rng.random((40, 12))
+    weights /= weights.sum(axis=1, keepdims=True)
+    truth = rng.normal(size=40)
+
+    expected = (np.sum(weights * np.abs(members - truth[:, None]), axis=1)
+                - 0.5 * np.einsum('qi,qj,qij->q', weights, weights,
+                                  np.abs(members[:, :, None] - members[:, None, :])))
+    np.testing.assert_allclose(weighted_crps(members, weights, truth), expected, atol=1e-12)
+
+
+def test_ensemble_matches_real_time_forecaster():
+    engine = HindcastEngine(k=20)
+    rng = np.random.default_rng(1)
+    members = rng.normal(280, 5, size=(3, 20, 9))
+    members[0, :4, 1] = 0.0  # Missing t2m values are dropped and weights renormalized
+    members[1, :12, 2] = 0.0  # Too few valid t850 values: no forecast
+    distances = np.sort(rng.random((3, 20)), axis=1)
+
+    weights = engine.analog_weights(distances, 24)
+    ensemble = engine.ensemble_forecast(members, weights)
+
+    for query in range(3):
+        expected_weights = engine.forecaster.compute_analog_weights(distances[query], 24)
+        np.testing.assert_allclose(weights[query], expected_weights)
+        stats = engine.forecaster.compute_ensemble_statistics(members[query], expected_weights)
+        for column, name in enumerate(engine.variables):
+            if name in stats:
+                assert ensemble['mean'][query, column] == pytest.approx(stats[name]['mean'])
+                assert ensemble['std'][query, column] == pytest.approx(stats[name]['std'])
+            else:
+                assert np.isnan(ensemble['mean'][query, column])
+    assert np.isnan(ensemble['mean'][1, 2])
+
+
+def test_hindcast_scores_against_baselines():
+    times = pd.date_range('2015-01-01', '2019-12-31 18:00', freq='6h')
+    rng = np.random.default_rng(2)
+    phase = 2 * np.pi * np.arange(len(times)) / 37.0 + rng.normal(0, 0.05, len(times))
+    embeddings = np.stack([np.cos(phase), np.sin(phase)], axis=1).astype(np.float32)
+    outcomes = np.column_stack([np.full(len(times), 5500.0), 290 + 8 * np.sin(phase)]
+                               + [np.cos(phase)] * 7)
+
+    # Outcome rows are a shuffled subset, aligned by init_time
+    rows = rng.permutation(len(times))[: len(times) - 50]
+    engine = HindcastEngine(k=10)
+    report = engine.evaluate_horizon(24, embeddings, times, outcomes[rows], times[rows],
+                                     times[rows] + pd.Timedelta(hours=24),
+                                     end=pd.Timestamp('2019-06-30'))
+
+    assert report['train_size'] == np.sum(times[rows] < '2019-01-01')
+    assert report['test_size'] == np.sum((times[rows] >= '2019-01-01') & (times[rows] <= '2019-06-30'))
+    analog = report['analog_forecaster']['t2m']
+    assert analog['rmse'] < 0.5 * report['climatology_baseline']['t2m']['rmse']
+    assert analog['rmse'] < report['persistence_baseline']['t2m']['rmse']
+    assert analog['crps'] > 0 and analog['spread_skill_ratio'] > 0
+    assert report['persistence_baseline']['t2m']['count'] < report['test_size']
+
+
+def test_train_end_string_splits_nanosecond_parquet_times():
+    # Parquet init_time columns load as datetime64[ns]; TRAIN_END is a string
+    times = np.array(pd.date_range('2018-12-30', periods=16, freq='6h'), dtype='datetime64[ns]')
+    assert epochs_ns([TRAIN_END])[0] == epochs_ns(times)[8]
+    assert epochs_ns(times.astype('datetime64[us]')).tolist() == epochs_ns(times).tolist()
+
+    engine = HindcastEngine(k=4)
+    embeddings = np.tile(np.eye(2, dtype=np.float32), (8, 1))
+    split = engine.split_horizon(24, embeddings, times, np.ones((16, 9)), times,
+                                 times + np.timedelta64(24, 'h'))
+    assert len(split['train_embeddings']) == 8 and len(split['test_embeddings']) == 8
+
+
+def test_summary_only_averages_unitless_scores():
+    evaluator = SystemEvaluator(k=4)
+    scores = lambda rmse, corr: {'rmse': rmse, 'mae': rmse, 'bias': 0.0, 'correlation': corr,
+                                 'crps': rmse / 2, 'count': 10}
+    evaluator.results = {
+        'analog_forecaster': {'24h': {'t2m': scores(1.0, 0.9), 'cape': scores(100.0, 0.5)}},
+        'persistence_baseline': {'24h': {'t2m': scores(2.0, 0.8), 'cape': scores(400.0, 0.3)}},
+        'climatology_baseline': {'24h': {'t2m': scores(4.0, 0.0), 'cape': scores(200.0, 0.0)}},
+    }
+    evaluator._calculate_summary_statistics()
+
+    summary = evaluator.results['summary_statistics']
+    assert summary['analog_forecaster']['24h']['rmse_ratio_vs_climatology_mean'] == pytest.approx(0.375)
+    assert summary['persistence_baseline']['24h']['crps_ratio_vs_climatology_mean'] == pytest.approx(1.25)
+    assert summary['analog_forecaster']['24h']['correlation_mean'] == pytest.approx(0.7)
+    assert 'rmse_mean' not in summary['analog_forecaster']['24h']
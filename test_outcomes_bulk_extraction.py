@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized outcomes extraction in OutcomesDatabaseBuilder.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from scripts.build_outcomes_database import OutcomesDatabaseBuilder
+
+
+def make_datasets(n_times=400, surface_steps=None):
+    rng = np.random.default_rng(0)
+    times = pd.date_range('2018-01-01', periods=n_times, freq='6h')
+    lats, lons, levels = [-34.5, -35.0, -35.5], [138.0, 138.5, 139.0], [500, 700, 850]
+
+    def field(base, scale, shape):
+        return base + scale * rng.standard_normal(shape)
+
+    pressure_shape = (n_times, len(levels), len(lats), len(lons))
+    pressure = xr.Dataset(
+        {'z': (('time', 'isobaricInhPa', 'latitude', 'longitude'), field(54000, 500, pressure_shape)),
+         't': (('time', 'isobaricInhPa', 'latitude', 'longitude'), field(275, 12, pressure_shape)),
+         'q': (('time', 'isobaricInhPa', 'latitude', 'longitude'), field(0.005, 0.004, pressure_shape)),
+         'u': (('time', 'isobaricInhPa', 'latitude', 'longitude'), field(5, 8, pressure_shape)),
+         'v': (('time', 'isobaricInhPa', 'latitude', 'longitude'), field(0, 8, pressure_shape))},
+        coords={'time': times, 'isobaricInhPa': levels, 'latitude': lats, 'longitude': lons})
+
+    surface_times = times[:surface_steps] if surface_steps else times
+    surface_shape = (len(surface_times), len(lats), len(lons))
+    t2m = field(290, 6, surface_shape)
+    t2m[5] = np.nan  # Missing surface value: lapse-rate fallback
+    surface = xr.Dataset(
+        {'t2m': (('time', 'latitude', 'longitude'), t2m),
+         'u10': (('time', 'latitude', 'longitude'), field(3, 4, surface_shape)),
+         'v10': (('time', 'latitude', 'longitude'), field(0, 4, surface_shape))},
+        coords={'time': surface_times, 'latitude': lats, 'longitude': lons})
+    return surface, pressure, times
+
+
+def make_builder(surface, pressure):
+    builder = OutcomesDatabaseBuilder()
+    builder.surface_ds, builder.pressure_ds = surface, pressure
+    return builder
+
+
+def test_bulk_matches_per_row_extraction():
+    surface, pressure, times = make_datasets()
+    builder = make_builder(surface, pressure)
+    valid_times = times[::3] + pd.Timedelta(minutes=20)  # Nearest-time resolution
+
+    bulk = builder.extract_outcomes_bulk(valid_times)
+    per_row = np.array([builder.extract_outcome_at_time(t) for t in valid_times])
+
+    np.testing.assert_allclose(bulk, per_row, rtol=1e-6)
+    assert bulk.dtype == np.float32 and not np.isnan(bulk).any()
+
+
+def test_missing_inputs_fall_back_like_per_row_path():
+    surface, pressure, times = make_datasets(n_times=40)
+    pressure['q'][:] = np.nan  # No humidity: rows are dropped
+    builder = make_builder(surface.drop_vars('u10'), pressure)
+
+    bulk = builder.extract_outcomes_bulk(times[:4])
+    assert np.isnan(bulk).all()
+
+    builder = make_builder(surface.drop_vars('u10'), make_datasets(n_times=40)[1])
+    bulk = builder.extract_outcomes_bulk(times)
+    u850 = builder.pressure_ds['u'].sel(isobaricInhPa=850, latitude=-35.0, longitude=138.5)
+    t850 = builder.pressure_ds['t'].sel(isobaricInhPa=850, latitude=-35.0, longitude=138.5)
+    np.testing.assert_allclose(bulk[:, 4], u850.values * 0.8, rtol=1e-6)
+    assert bulk[5, 1] == pytest.approx(float(t850.values[5]) + 9.75)
+
+
+def test_build_writes_memmapped_outcomes(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    surface, pressure, times = make_datasets(n_times=60, surface_steps=50)
+    builder = make_builder(surface, pressure)
+    (tmp_path / 'embeddings').mkdir()
+    pd.DataFrame({'init_time': times - pd.Timedelta(hours=24), 'valid_time': times}).to_parquet(
+        tmp_path / 'embeddings' / 'metadata_24h.parquet')
+    monkeypatch.chdir(tmp_path)
+
+    assert builder.build_outcomes_for_horizon(24)
+    outcomes = np.load(tmp_path / 'outcomes' / 'outcomes_24h.npy')
+    np.testing.assert_array_equal(outcomes, builder.extract_outcomes_bulk(times))
+    assert len(pd.read_parquet(tmp_path / 'outcomes' / 'metadata_24h_clean.parquet')) == len(outcomes)
+    assert list((tmp_path / 'outcomes').glob('.outcomes_*')) == []
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared, versioned analog corpus.
+"""
+
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pandas as pd
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from core import shared_corpus
+from core.shared_corpus import SharedAnalogCorpus, contiguous_rows, publish_corpus
+
+
+@pytest.fixture
+def sources(tmp_path):
+    rng = np.random.default_rng(0)
+    dirs = {name: tmp_path / name for name in ('embeddings', 'indices', 'outcomes')}
+    for directory in dirs.values():
+        directory.mkdir()
+    embeddings = rng.normal(size=(500, 32)).astype(np.float32)
+    np.save(dirs['embeddings'] / 'embeddings_24h.npy', embeddings)
+    np.save(dirs['outcomes'] / 'outcomes_24h.npy', rng.normal(size=(500, 9)).astype(np.float32))
+    index = faiss.IndexFlatIP(32)
+    index.add(embeddings)
+    faiss.write_index(index, str(dirs['indices'] / 'faiss_24h_flatip.faiss'))
+    return dirs, embeddings
+
+
+def publish(root, dirs):
+    return publish_corpus(root, dirs['embeddings'], dirs['indices'], dirs['outcomes'], horizons=(24,))
+
+
+def test_attached_corpus_maps_artifacts_without_copying(tmp_path, sources):
+    dirs, embeddings = sources
+    generation = publish(tmp_path / 'corpus', dirs)
+    corpus = SharedAnalogCorpus.attach(tmp_path / 'corpus')
+
+    assert corpus.generation == generation
+    mapped = corpus.embeddings(24)
+    assert isinstance(mapped, np.memmap) and not mapped.flags.writeable
+    np.testing.assert_array_equal(mapped, embeddings)
+    assert corpus.embeddings(24) is mapped  # One mapping per process
+
+    distances, indices = corpus.index(24, 'flatip').search(embeddings[:3], 1)
+    assert indices[:, 0].tolist() == [0, 1, 2]
+    assert not corpus.available(24, 'index_ivfpq')
+    with pytest.raises(KeyError):
+        corpus.outcomes(6)
+
+
+def test_rebuild_publishes_new_generation(tmp_path, sources, monkeypatch):
+    dirs, embeddings = sources
+    root = tmp_path / 'corpus'
+    first = publish(root, dirs)
+    assert publish(root, dirs) == first  # Unchanged sources: no rebuild
+
+    monkeypatch.setenv('ANALOG_CORPUS_DIR', str(root))
+    monkeypatch.setattr(shared_corpus, '_corpus', None)
+    attached = shared_corpus.get_shared_corpus()
+
+    np.save(dirs['embeddings'] / 'embeddings_24h.npy', embeddings * 2)
+    second = publish(root, dirs)
+    assert second != first
+    assert not attached.is_current()
+    np.testing.assert_array_equal(attached.embeddings(24), embeddings)  # Old mapping stays valid
+
+    refreshed = shared_corpus.get_shared_corpus(recheck_seconds=0)
+    assert refreshed.generation == second
+    np.testing.assert_array_equal(refreshed.embeddings(24), embeddings * 2)
+
+
+def test_metadata_columns_round_trip_as_views(tmp_path):
+    n = 200
+    metadata = pd.DataFrame({
+        'init_time': pd.date_range('2018-12-01', periods=n, freq='6h'),
+        'valid_time': pd.date_range('2018-12-02', periods=n, freq='6h', tz='UTC'),
+        'lead_time': np.full(n, 24),
+        'season': ['summer'] * n,
+    })
+    root = tmp_path / 'gen'
+    root.mkdir()
+    columns = shared_corpus._write_columns(metadata, root / 'metadata')
+    corpus = SharedAnalogCorpus.__new__(SharedAnalogCorpus)
+    corpus.directory = root
+    loaded = corpus._load_frame({'directory': 'metadata', 'columns': columns})
+
+    pd.testing.assert_frame_equal(loaded, metadata, check_dtype=False)
+    train = contiguous_rows(loaded, (loaded['init_time'] < '2019-01-01').to_numpy())
+    assert len(train) == 124
+    assert np.shares_memory(train['lead_time'].to_numpy(), loaded['lead_time'].to_numpy())
+
+
+def test_missing_metadata_values_stay_missing(tmp_path):
+    metadata = pd.DataFrame({
+        'season': ['summer', None, 'winter', np.nan],
+        'station': pd.array(['a', 'b', pd.NA, 'd'], dtype='string'),
+    })
+    root = tmp_path / 'gen'
+    root.mkdir()
+    columns = shared_corpus._write_columns(metadata, root / 'metadata')
+    corpus = SharedAnalogCorpus.__new__(SharedAnalogCorpus)
+    corpus.directory = root
+    loaded = corpus._load_frame({'directory': 'metadata', 'columns': columns})
+
+    for name in metadata.columns:
+        assert loaded[name].isna().tolist() == metadata[name].isna().tolist()
+        assert loaded[name].dropna().tolist() == metadata[name].dropna().tolist()
+    assert 'nan' not in loaded['season'].tolist()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the cross-worker shared metrics segment.
+
+Worker processes are real child processes writing into one shared directory;
+the parent aggregates their counters, windowed latency buckets and circuit
+breaker state.
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from core import shared_metrics
+from core.shared_metrics import SharedMetricsSegment
+
+
+def _worker(directory, queries):
+    segment = SharedMetricsSegment(directory)
+    for i in range(queries):
+        segment.inc('faiss_queries:success')
+        segment.observe_bucket('faiss_latency:24h:flatip', str(100 + i % 3))
+    segment.set('breaker:faiss_search:failures', 2)
+
+
+@pytest.fixture
+def shared_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('SHARED_METRICS_DIR', str(tmp_path))
+    monkeypatch.setattr(shared_metrics, '_segment_pid', None)
+    yield str(tmp_path)
+    monkeypatch.setattr(shared_metrics, '_segment_pid', None)
+
+
+def test_counters_and_buckets_aggregate_across_worker_processes(shared_dir):
+    workers = [multiprocessing.Process(target=_worker, args=(shared_dir, n)) for n in (30, 60)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    segment = shared_metrics.get_shared_metrics()
+    segment.inc('faiss_queries:success', 10)
+
+    assert segment.totals('faiss_queries:') == {'success': 100.0}
+    assert sum(segment.read_buckets('faiss_latency:24h:').values()) == 90
+    # Exited workers still count towards counters but not towards live state
+    assert segment.gauge('breaker:faiss_search:failures') == 0.0
+
+
+def test_window_expiry_and_slot_reuse(tmp_path):
+    segment = SharedMetricsSegment(str(tmp_path), window_seconds=60, window_slices=6)
+    segment.observe_bucket('lat', '5', now=0)
+    segment.observe_bucket('lat', '7', now=30)
+
+    assert segment.read_buckets('lat', now=50) == {'5': 1.0, '7': 1.0}
+    assert segment.read_buckets('lat', now=65) == {'7': 1.0}
+
+    segment.observe_bucket('lat', '9', now=61)  # Reuses the t=0 slot
+    assert segment.read_buckets('lat', now=65) == {'7': 1.0, '9': 1.0}
+
+
+def test_circuit_breaker_trips_globally(shared_dir):
+    from core.runtime_guardrails import RuntimeGuardRails
+
+    other = SharedMetricsSegment(shared_dir, pid=os.getppid())  # A live "worker"
+    other.set('breaker:faiss_search:failures', RuntimeGuardRails.CIRCUIT_BREAKER_FAILURE_THRESHOLD - 1)
+
+    guardrails = RuntimeGuardRails(enable_gpu_monitoring=False)
+    guardrails._record_circuit_breaker_failure('faiss_search', 'timeout')
+
+    assert guardrails.circuit_breakers['faiss_search']['state'] == 'open'
+    opened_at = shared_metrics.get_shared_metrics().get_local('breaker:faiss_search:opened_at')
+    assert opened_at == pytest.approx(time.time(), abs=5)
+
+
+def test_concurrent_increments_survive_growth(tmp_path):
+    import threading
+
+    segment = SharedMetricsSegment(str(tmp_path), pid=99999)
+    start = threading.Barrier(5)
+
+    def hammer(worker):
+        start.wait()
+        for i in range(2000):
+            segment.inc('shared')
+            if i % 10 == 0:
+                segment.set(f'grow_{worker}_{i}_' + 'x' * 100, i)   # Forces repeated remaps
+
+    threads = [threading.Thread(target=hammer, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    while any(thread.is_alive() for thread in threads):
+        segment.get_local('shared')                                  # Reads race the remaps
+    for thread in threads:
+        thread.join()
+
+    assert len(segment._mmap) > 64 * 1024
+    assert segment.get_local('shared') == 8000
+    assert shared_metrics._read_file(segment.path)['shared'] == 8000
+    segment.close()
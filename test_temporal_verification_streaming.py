@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming cross-horizon duplication detection in
+TemporalVerificationSystem.
+"""
+
+import hashlib
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from temporal_verification_system import TemporalVerificationSystem, row_hashes
+
+
+def make_archive(tmp_path, n_rows=6000, seed=0):
+    """Independent outcome series per horizon, written as .npy files later."""
+    rng = np.random.default_rng(seed)
+    (tmp_path / 'outcomes').mkdir(exist_ok=True)
+    scale = np.array([150, 6, 5, 0.003, 4, 4, 8, 8, 100])
+    offset = np.array([5500, 290, 285, 0.008, 0, 0, 0, 0, 300])
+    return {horizon: (offset + scale * rng.standard_normal((n_rows, 9))).astype(np.float32)
+            for horizon in ['6h', '12h', '24h', '48h']}
+
+
+def save(tmp_path, archive):
+    for horizon, outcomes in archive.items():
+        np.save(tmp_path / 'outcomes' / f'outcomes_{horizon}.npy', outcomes)
+    return {h: np.load(tmp_path / 'outcomes' / f'outcomes_{h}.npy', mmap_mode='r') for h in archive}
+
+
+def test_detects_multi_row_shift_beyond_sampled_window(tmp_path):
+    archive = make_archive(tmp_path)
+    # 24h is 48h shifted by three rows: invisible to a single-lag check
+    archive['24h'][:-3] = archive['48h'][3:]
+    verifier = TemporalVerificationSystem(tmp_path)
+    verifier.chunk_rows = 997  # Chunk boundaries must not matter
+    result = verifier.detect_cross_horizon_duplication(save(tmp_path, archive))
+
+    shift = result['shift_patterns']['24h']['48h']
+    assert shift['is_shifted'] and shift['lag_rows'] == 3
+    assert result['shifting_detected']
+    assert not result['shift_patterns']['6h']['12h']['is_shifted']
+
+    # Lag-0 per-column correlations cover every row, not a 1000-row sample
+    expected = np.corrcoef(archive['6h'][:, 1].astype(np.float64), archive['12h'][:, 1].astype(np.float64))[0, 1]
+    assert result['column_correlations']['6h']['12h']['t2m'] == pytest.approx(expected, abs=1e-9)
+    assert result['correlation_matrix']['6h']['12h'] == result['column_correlations']['6h']['12h']['z500']
+    assert result['rows_analyzed']['48h'] == 6000
+
+
+def test_exact_duplicate_rows_and_file_hashes(tmp_path):
+    archive = make_archive(tmp_path, n_rows=3000, seed=1)
+    rng = np.random.default_rng(2)
+    source, target = rng.choice(3000, 120, replace=False), rng.choice(3000, 120, replace=False)
+    archive['12h'][target] = archive['6h'][source]
+    archive['6h'][:50] = np.nan      # Incomplete rows are never counted as duplicates
+    archive['12h'][:50] = np.nan
+    archive['48h'] = archive['24h'].copy()
+    mapped = save(tmp_path, archive)
+
+    verifier = TemporalVerificationSystem(tmp_path)
+    verifier.chunk_rows = 512
+    result = verifier.detect_cross_horizon_duplication(mapped)
+
+    expected = int(np.isin(source, np.arange(50, 3000))[np.isin(target, np.arange(50, 3000))].sum())
+    assert result['duplicate_rows']['6h']['12h']['count'] == expected
+    assert result['duplicate_rows']['6h']['24h']['count'] == 0
+    assert result['duplicate_rows']['24h']['48h']['fraction'] == 1.0
+    assert result['identical_groups'] == [['24h', '48h']]
+    assert result['file_hashes']['6h'] == hashlib.sha256(archive['6h'].tobytes()).hexdigest()
+    assert {(d['horizon1'], d['horizon2']) for d in result['duplicated_rows']} == {('6h', '12h'), ('24h', '48h')}
+
+    # Row hashes are dtype-independent and ignore the sign of zero
+    block = np.array([[0.0, 1.5], [-0.0, 1.5], [0.0, 2.5]], dtype=np.float32)
+    hashes = row_hashes(block)
+    assert hashes[0] == hashes[1] != hashes[2]
+    assert np.array_equal(hashes, row_hashes(block.astype(np.float64)))
+
+
+def test_full_archive_sweep_runs_in_bounded_memory(tmp_path):
+    archive = make_archive(tmp_path, n_rows=200000, seed=3)
+    mapped = save(tmp_path, archive)
+    archive_bytes = sum(outcomes.nbytes for outcomes in archive.values())
+    del archive
+
+    verifier = TemporalVerificationSystem(tmp_path)
+    verifier.chunk_rows = 8192
+    tracemalloc.start()
+    result = verifier.detect_cross_horizon_duplication(mapped)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert not result['duplication_detected'] and not result['shifting_detected']
+    # Row hashes (8 bytes/row) plus a few chunks, not copies of the archive
+    assert peak < archive_bytes / 2
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the matrix-wide assessment in VariableQualityMonitor.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from core.variable_quality_monitor import STATUS_BY_CODE, VariableQualityMonitor, VariableStatus
+
+
+def make_outcomes(rng, n_analogs=40):
+    outcomes = rng.standard_normal((n_analogs, 9))
+    outcomes[:, 0] = 5500 + 200 * outcomes[:, 0]
+    outcomes[:, 1] = 293 + 10 * outcomes[:, 1]
+    outcomes[:, 2] = 285 + 8 * outcomes[:, 2]
+    outcomes[:, 3] = 0.008 + 0.002 * outcomes[:, 3]
+    outcomes[:, 4:8] *= 6
+    outcomes[:, 8] = np.abs(outcomes[:, 8]) * 200
+    return outcomes
+
+
+def reference_metrics(values, var_def, global_min, score_threshold):
+    """The original per-variable computation, one 1-D slice at a time."""
+    low, high = var_def['valid_range']
+    valid = values[np.isfinite(values) & (values >= low) & (values <= high)]
+    n = len(valid)
+    outliers = 0
+    if n > 3:
+        outliers = int(np.sum(np.abs((valid - valid.mean()) / (valid.std() + 1e-8)) > var_def['outlier_threshold']))
+    consistency = max(0, 1.0 - valid.std() / (abs(valid.mean()) + 1e-8)) if n > 5 else 0.0
+    score = np.mean([n / len(values), max(0, 1.0 - outliers / max(1, n)), consistency,
+                     min(1.0, n / var_def['min_analogs'])])
+    if n >= var_def['min_analogs'] and score >= score_threshold:
+        status = VariableStatus.AVAILABLE
+    elif n >= global_min:
+        status = VariableStatus.DEGRADED
+    else:
+        status = VariableStatus.INSUFFICIENT if n > 0 else VariableStatus.UNAVAILABLE
+    return n, outliers, consistency, score, status
+
+
+def test_matrix_matches_per_variable_reference():
+    monitor = VariableQualityMonitor()
+    rng = np.random.default_rng(0)
+    outcomes = make_outcomes(rng)
+    outcomes[30:, 1] = np.nan      # Missing t2m
+    outcomes[25:, 3] = -999.0      # Out-of-range q850
+    outcomes[0, 4] = 60.0          # Range violation on u10
+    outcomes[1, 8] = np.inf        # Non-finite CAPE
+    outcomes[:, 6] = np.nan        # u850 unavailable
+    outcomes[2, 0] = 7000.0        # Out-of-range z500
+    outcomes[3, 8] = 7000.0        # In range but a z-score outlier
+
+    matrix = monitor.assess_quality_matrix(outcomes)
+
+    for column, name in enumerate(matrix.variable_names):
+        n, outliers, consistency, score, status = reference_metrics(
+            outcomes[:, column], monitor.VARIABLE_DEFINITIONS[name],
+            monitor.global_min_analogs, monitor.quality_score_threshold)
+        assert matrix.valid_analogs[column] == n
+        assert matrix.outlier_count[column] == outliers
+        assert matrix.temporal_consistency_score[column] == pytest.approx(consistency, abs=1e-12)
+        assert matrix.quality_score[column] == pytest.approx(score, abs=1e-12)
+        assert matrix.status()[column] is status
+    assert matrix.outlier_count[8] == 1
+    assert matrix.status()[6] is VariableStatus.UNAVAILABLE
+
+    assessment = monitor.assess_horizon_quality(24, outcomes, np.arange(40), 0.9)
+    assert assessment.variable_metrics['u850'].requires_na_display()
+    assert 'u850' in assessment.unavailable_variables
+    single = monitor.assess_variable_quality('q850', outcomes[:, 3], np.arange(40))
+    expected = assessment.variable_metrics['q850']
+    assert (single.valid_analogs, single.status) == (expected.valid_analogs, expected.status)
+    assert single.quality_score == pytest.approx(expected.quality_score, abs=1e-12)
+
+
+def test_batch_axis_matches_per_query_assessment():
+    monitor = VariableQualityMonitor()
+    rng = np.random.default_rng(1)
+    batch = np.stack([make_outcomes(rng) for _ in range(5)])
+    batch[2, :35, 1] = np.nan
+    batch[4, :, 3] = -1.0
+
+    matrix = monitor.assess_quality_matrix(batch)
+    assessments = monitor.assess_horizon_quality_batch(12, batch, 0.8)
+
+    assert matrix.quality_score.shape == (5, 9) and len(assessments) == 5
+    for query in range(5):
+        single = monitor.assess_quality_matrix(batch[query])
+        np.testing.assert_array_equal(matrix.valid_analogs[query], single.valid_analogs)
+        np.testing.assert_allclose(matrix.quality_score[query], single.quality_score, rtol=1e-12)
+        expected = monitor.assess_horizon_quality(12, batch[query], np.arange(40), 0.8)
+        assert assessments[query].variable_metrics == expected.variable_metrics
+        assert assessments[query].actual_confidence == expected.actual_confidence
+    assert 'q850' in assessments[4].unavailable_variables
+
+
+def test_custom_threshold_vectors_and_shape_checks():
+    monitor = VariableQualityMonitor()
+    thresholds = monitor.get_thresholds(['t2m', 'mystery'])
+    assert monitor.get_thresholds(['t2m', 'mystery']) is thresholds
+    assert thresholds.min_analogs.tolist() == [20, monitor.global_min_analogs]
+
+    outcomes = np.column_stack([np.full(12, 290.0), np.linspace(-5, 5, 12)])
+    matrix = monitor.assess_quality_matrix(outcomes, thresholds)
+    assert matrix.valid_analogs.tolist() == [12, 12]
+    assert list(STATUS_BY_CODE[matrix.status_code]) == [VariableStatus.DEGRADED, VariableStatus.AVAILABLE]
+
+    with pytest.raises(ValueError):
+        monitor.assess_quality_matrix(outcomes[:, :1], thresholds)
+    with pytest.raises(ValueError):
+        monitor.assess_quality_matrix(np.zeros(9))
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Tests for the hedged provider fetch engine in WeatherApiClient.
+
+Providers are served by a local stub HTTP server so the race, validation,
+fallback and caching behaviour can be checked without network access.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from scripts.weather_api_client import WeatherApiClient
+
+GFS_PAYLOAD = {
+    'current': {
+        'time': '2024-01-01T12:00',
+        'temperature_2m': 24.5,
+        'relative_humidity_2m': 40,
+        'surface_pressure': 1012.0,
+        'wind_speed_10m': 5.0,
+        'wind_direction_10m': 180,
+        'geopotential_height_500hPa': 5800,
+        'temperature_500hPa': -12.0,
+        'temperature_850hPa': 14.0,
+        'relative_humidity_850hPa': 50,
+    },
+    'hourly': {
+        'time': ['2024-01-01T12:00'],
+        'wind_speed_850hPa': [10.0],
+        'wind_direction_850hPa': [270],
+        'cape': [150.0],
+    },
+}
+
+WEATHERAPI_PAYLOAD = {
+    'location': {'name': 'Adelaide', 'lat': -34.93, 'lon': 138.6},
+    'current': {
+        'last_updated': '2024-01-01 12:00',
+        'temp_c': 23.0,
+        'humidity': 45,
+        'pressure_mb': 1013.0,
+        'wind_kph': 15.0,
+        'wind_degree': 200,
+    },
+}
+
+# Humidity above 100% fails validate_data_quality
+INVALID_WEATHERAPI_PAYLOAD = json.loads(json.dumps(WEATHERAPI_PAYLOAD))
+INVALID_WEATHERAPI_PAYLOAD['current']['humidity'] = 150
+
+
+class StubProviders:
+    """Threaded HTTP server whose routes return canned payloads after a delay."""
+
+    def __init__(self):
+        self.routes = {}
+        self.hits = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                stub.hits[path] = stub.hits.get(path, 0) + 1
+                status, delay, payload = stub.routes.get(path, (404, 0.0, {}))
+                time.sleep(delay)
+                body = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def route(self, path, payload, status=200, delay=0.0):
+        self.routes[path] = (status, delay, payload)
+        return self.base_url + path
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    providers = StubProviders()
+    yield providers
+    providers.close()
+
+
+def make_client(stub, **hedging):
+    client = WeatherApiClient(api_keys={'weatherapi': 'test-key'})
+    client.api_priority = ['gfs', 'weatherapi']
+    client.endpoints = {
+        'gfs': stub.base_url + '/gfs',
+        'weatherapi': stub.base_url + '/weatherapi',
+    }
+    client.hedge_delay_s = hedging.get('hedge_delay_s', 0.1)
+    client.max_in_flight = hedging.get('max_in_flight', 2)
+    client.overall_timeout_s = hedging.get('overall_timeout_s', 5.0)
+    client.cache_ttl_s = hedging.get('cache_ttl_s', 300.0)
+    return client
+
+
+def test_slow_primary_is_hedged_by_next_provider(stub):
+    stub.route('/gfs', GFS_PAYLOAD, delay=3.0)
+    stub.route('/weatherapi', WEATHERAPI_PAYLOAD)
+    client = make_client(stub)
+
+    start = time.monotonic()
+    era5 = client.get_forecast_ready_data()
+    elapsed = time.monotonic() - start
+
+    assert era5['source'] == 'weatherapi'
+    assert elapsed < 2.0
+
+
+def test_primary_wins_when_fast(stub):
+    stub.route('/gfs', GFS_PAYLOAD)
+    stub.route('/weatherapi', WEATHERAPI_PAYLOAD)
+    client = make_client(stub, hedge_delay_s=1.0)
+
+    era5 = client.get_forecast_ready_data()
+
+    assert era5['source'] == 'gfs'
+    assert era5['data_completeness'] == 'full_profile'
+    assert stub.hits.get('/weatherapi', 0) == 0
+
+
+def test_failed_provider_is_replaced_immediately(stub):
+    stub.route('/gfs', {}, status=503)
+    stub.route('/weatherapi', WEATHERAPI_PAYLOAD)
+    client = make_client(stub, hedge_delay_s=5.0)
+
+    start = time.monotonic()
+    era5 = client.get_forecast_ready_data()
+
+    assert era5['source'] == 'weatherapi'
+    assert time.monotonic() - start < 2.0
+
+
+def test_invalid_data_does_not_win_race(stub):
+    stub.route('/gfs', GFS_PAYLOAD, delay=0.3)
+    stub.route('/weatherapi', INVALID_WEATHERAPI_PAYLOAD)
+    client = make_client(stub, hedge_delay_s=0.05)
+
+    era5 = client.get_forecast_ready_data()
+
+    assert era5['source'] == 'gfs'
+
+
+def test_converted_result_is_cached(stub):
+    stub.route('/gfs', GFS_PAYLOAD)
+    client = make_client(stub)
+
+    first = client.get_forecast_ready_data()
+    second = client.get_forecast_ready_data()
+
+    assert first is second
+    assert stub.hits['/gfs'] == 1
+
+
+def test_unvalidated_raw_data_returned_when_nothing_validates(stub):
+    stub.route('/gfs', {}, status=500)
+    stub.route('/weatherapi', INVALID_WEATHERAPI_PAYLOAD)
+    client = make_client(stub)
+
+    assert client.get_forecast_ready_data() is None
+    raw = client.get_current_weather()
+    assert raw['source'] == 'weatherapi'